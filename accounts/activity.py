@@ -0,0 +1,243 @@
+# accounts/activity.py
+"""
+Write-coalesced user activity ("last seen") tracking.
+
+``User.update_last_activity()`` used to issue an ``UPDATE`` per call, so busy
+staff consoles and customers produced a steady stream of row writes on the
+users table. ``touch()`` records the timestamp instead:
+
+- in Redis sorted sets (``<prefix>:activity:seen`` for presence and
+  ``<prefix>:activity:dirty`` for users not yet written back), shared by
+  every process, or
+- in process memory when Redis is unavailable,
+
+and is throttled per user to ``ACTIVITY_RESOLUTION_SECONDS`` in each
+process, so a user making many requests costs one dict lookup per request
+and one Redis write per interval. ``flush()`` writes the dirty timestamps
+to ``User.last_activity`` with one ``UPDATE ... CASE`` per chunk;
+``flush_activity_task`` runs it every ``ACTIVITY_FLUSH_SECONDS``.
+
+Presence reads (``online_ids()``, ``online_count()``, ``last_seen()``) come
+from the same store and never touch the database. Without Redis they only
+see this process's users.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Iterable, Optional, Set
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Value, When
+
+logger = logging.getLogger(__name__)
+
+UPDATE_CHUNK = 500
+
+# Last recorded time per user in this process (the throttle)
+_recorded: Dict[int, float] = {}
+# Fallback store without Redis: user id -> last seen (epoch seconds)
+_seen: Dict[int, float] = {}
+_dirty: Dict[int, float] = {}
+_lock = threading.Lock()
+_last_local_flush = time.monotonic()
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _prefix() -> str:
+    return f"{_setting('CACHE_KEY_PREFIX', 'rms')}:activity:"
+
+
+def _redis():
+    if _setting("ACTIVITY_BACKEND", "auto") == "local":
+        return None
+    from core.cache_service import CacheService
+    return CacheService.get_redis_client(write=True)
+
+
+def _resolution() -> float:
+    return float(_setting("ACTIVITY_RESOLUTION_SECONDS", 60))
+
+
+def _online_window() -> float:
+    return float(_setting("ACTIVITY_ONLINE_SECONDS", 300))
+
+
+def _to_datetime(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+
+
+# ----------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------
+def touch(user_id: int, when: Optional[float] = None) -> bool:
+    """
+    Record that ``user_id`` was active at ``when`` (epoch seconds, default
+    now). Returns False when throttled (already recorded within
+    ``ACTIVITY_RESOLUTION_SECONDS`` by this process).
+    """
+    global _last_local_flush
+    now = time.time() if when is None else when
+    user_id = int(user_id)
+    with _lock:
+        if now - _recorded.get(user_id, 0.0) < _resolution():
+            return False
+        _recorded[user_id] = now
+        if len(_recorded) > int(_setting("ACTIVITY_THROTTLE_MAX_USERS", 50000)):
+            _recorded.clear()  # bounded; worst case one extra write per user
+
+    client = _redis()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.zadd(f"{_prefix()}seen", {user_id: now})
+            pipe.zadd(f"{_prefix()}dirty", {user_id: now})
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Redis activity write failed, buffering in process: {e}")
+
+    with _lock:
+        _seen[user_id] = max(now, _seen.get(user_id, 0.0))
+        _dirty[user_id] = max(now, _dirty.get(user_id, 0.0))
+        due = time.monotonic() - _last_local_flush >= float(_setting("ACTIVITY_FLUSH_SECONDS", 60))
+        if due:
+            _last_local_flush = time.monotonic()
+    if due:
+        transaction.on_commit(_flush_local)
+    return True
+
+
+# ----------------------------------------------------------------------
+# Presence (no database)
+# ----------------------------------------------------------------------
+def online_ids(within: Optional[float] = None) -> Set[int]:
+    """Ids of users active in the last ``within`` seconds (``ACTIVITY_ONLINE_SECONDS``)."""
+    since = time.time() - (within if within is not None else _online_window())
+    client = _redis()
+    if client is not None:
+        try:
+            return {int(pk) for pk in client.zrangebyscore(f"{_prefix()}seen", since, "+inf")}
+        except Exception as e:
+            logger.debug(f"Failed reading online users from Redis: {e}")
+    with _lock:
+        return {pk for pk, ts in _seen.items() if ts >= since}
+
+
+def online_count(within: Optional[float] = None) -> int:
+    since = time.time() - (within if within is not None else _online_window())
+    client = _redis()
+    if client is not None:
+        try:
+            return int(client.zcount(f"{_prefix()}seen", since, "+inf"))
+        except Exception as e:
+            logger.debug(f"Failed counting online users in Redis: {e}")
+    with _lock:
+        return sum(1 for ts in _seen.values() if ts >= since)
+
+
+def last_seen(user_ids: Iterable[int]) -> Dict[int, datetime]:
+    """Last recorded activity of ``user_ids`` (users without one are omitted)."""
+    ids = [int(pk) for pk in user_ids]
+    if not ids:
+        return {}
+    client = _redis()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            for pk in ids:
+                pipe.zscore(f"{_prefix()}seen", pk)
+            return {pk: _to_datetime(ts) for pk, ts in zip(ids, pipe.execute()) if ts is not None}
+        except Exception as e:
+            logger.debug(f"Failed reading last seen from Redis: {e}")
+    with _lock:
+        return {pk: _to_datetime(_seen[pk]) for pk in ids if pk in _seen}
+
+
+# ----------------------------------------------------------------------
+# Database writes
+# ----------------------------------------------------------------------
+def _apply(timestamps: Dict[int, float]) -> int:
+    User = get_user_model()
+    output = DateTimeField()
+    items = list(timestamps.items())
+    updated = 0
+    for start in range(0, len(items), UPDATE_CHUNK):
+        chunk = dict(items[start:start + UPDATE_CHUNK])
+        updated += User.objects.filter(pk__in=list(chunk)).update(last_activity=Case(
+            *[When(pk=pk, then=Value(_to_datetime(ts), output_field=output)) for pk, ts in chunk.items()],
+            default=F("last_activity"),
+            output_field=output,
+        ))
+    return updated
+
+
+def _flush_local() -> int:
+    with _lock:
+        dirty = dict(_dirty)
+        _dirty.clear()
+        # Presence outside the window is no longer needed
+        horizon = time.time() - max(_online_window(), _resolution()) * 2
+        for pk in [pk for pk, ts in _seen.items() if ts < horizon]:
+            del _seen[pk]
+    if not dirty:
+        return 0
+    try:
+        return _apply(dirty)
+    except Exception as e:
+        logger.warning(f"Failed flushing user activity, keeping it buffered: {e}")
+        with _lock:
+            for pk, ts in dirty.items():
+                _dirty[pk] = max(ts, _dirty.get(pk, 0.0))
+        return 0
+
+
+def _flush_redis(client) -> int:
+    lock = f"{_prefix()}flush_lock"
+    if not client.set(lock, 1, nx=True, ex=60):
+        return 0  # another worker is flushing
+
+    dirty, flushing = f"{_prefix()}dirty", f"{_prefix()}flushing"
+    try:
+        # A leftover snapshot from a failed flush is written first
+        if not client.exists(flushing):
+            if not client.exists(dirty):
+                return 0
+            client.rename(dirty, flushing)
+        timestamps = {int(pk): float(ts) for pk, ts in client.zrange(flushing, 0, -1, withscores=True)}
+        try:
+            written = _apply(timestamps)
+        except Exception as e:
+            logger.warning(f"Failed flushing user activity, will retry: {e}")
+            return 0
+        client.delete(flushing)
+        client.zremrangebyscore(f"{_prefix()}seen", "-inf", time.time() - max(_online_window(), _resolution()) * 2)
+        return written
+    finally:
+        client.delete(lock)
+
+
+def flush() -> int:
+    """Write buffered activity timestamps to ``User.last_activity``. Returns rows updated."""
+    global _last_local_flush
+    written = 0
+    client = _redis()
+    if client is not None:
+        try:
+            written += _flush_redis(client)
+        except Exception as e:
+            logger.warning(f"Failed flushing Redis user activity: {e}")
+    with _lock:
+        _last_local_flush = time.monotonic()
+    written += _flush_local()
+    if written:
+        logger.debug(f"Flushed activity of {written} users")
+    return written
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import empty
+
+
+class ActivityMiddleware(MiddlewareMixin):
+    """
+    Record the activity of the authenticated user of each request through
+    accounts.activity (buffered and throttled, no per-request UPDATE).
+    """
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        user = getattr(request, "user", None)
+        # Only a user some code already resolved: never load a session just for this
+        if getattr(user, "_wrapped", None) is empty:
+            return response
+        if user is not None and user.is_authenticated:
+            try:
+                user.update_last_activity()
+            except Exception:
+                pass
+        return response
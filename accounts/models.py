@@ -161,9 +161,15 @@ class User(AbstractUser):
             self.save(update_fields=['failed_login_attempts'])
     
     def update_last_activity(self):
-        """Update last activity timestamp."""
-        self.last_activity = timezone.now()
-        self.save(update_fields=['last_activity'])
+        """
+        Record activity now. The timestamp is buffered and throttled by
+        accounts.activity and written to ``last_activity`` in bulk.
+        """
+        from .activity import touch
+
+        now = timezone.now()
+        if touch(self.pk, now.timestamp()):
+            self.last_activity = now
     
     def password_needs_change(self, max_age_days=90):
         """Check if password needs to be changed based on age."""
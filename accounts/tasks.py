@@ -0,0 +1,24 @@
+# accounts/tasks.py
+from __future__ import annotations
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from celery import shared_task
+except Exception:  # Celery not installed; provide a no-op decorator
+    def shared_task(*d, **kw):
+        def _wrap(fn):
+            return fn
+        return _wrap
+
+
+@shared_task
+def flush_activity_task():
+    """Write buffered user activity timestamps to the database (accounts.activity)."""
+    try:
+        from accounts.activity import flush
+        return flush()
+    except Exception:
+        logger.exception("flush_activity_task failed")
+        return 0
@@ -19,6 +19,7 @@ from .views import (
     SessionLoginJSON,
     RegisterJSON,
     MeView,
+    OnlineUsersView,
 )
 
 app_name = "accounts"
@@ -35,6 +36,7 @@ urlpatterns = [
     # User Profile Management
     path("api/profile/", UserProfileView.as_view(), name="user_profile"),
     path("api/change-password/", ChangePasswordView.as_view(), name="change_password"),
+    path("api/online/", OnlineUsersView.as_view(), name="online_users"),
     
     # Password Reset
     path("api/password-reset/", PasswordResetRequestView.as_view(), name="password_reset_request"),
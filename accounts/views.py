@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import math
 from typing import Any, Dict
 from datetime import datetime, timedelta
 
@@ -397,3 +398,33 @@ def MeView(request: HttpRequest):
         return JsonResponse({"detail": "Not authenticated."}, status=401)
     user = request.user
     return JsonResponse({"id": user.id, "username": user.get_username(), "email": user.email or ""})
+
+
+class OnlineUsersView(APIView):
+    """
+    GET staff presence: users active within ``?within=<seconds>`` (default
+    ACTIVITY_ONLINE_SECONDS), read from the activity store without touching
+    the database. ``?ids=0`` returns the count only.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        from .activity import last_seen, online_count, online_ids
+
+        try:
+            within = float(request.query_params["within"]) if request.query_params.get("within") else None
+            if within is not None and not (math.isfinite(within) and within >= 0):
+                raise ValueError(within)  # nan/inf would reach the strict JSON renderer
+        except ValueError:
+            return Response({"detail": "within must be a number of seconds."}, status=status.HTTP_400_BAD_REQUEST)
+        window = within if within is not None else float(getattr(settings, "ACTIVITY_ONLINE_SECONDS", 300))
+
+        if request.query_params.get("ids") in ("0", "false"):
+            return Response({"count": online_count(within), "within_seconds": window})
+        ids = sorted(online_ids(within))
+        seen = last_seen(ids)
+        return Response({
+            "count": len(ids),
+            "within_seconds": window,
+            "users": [{"id": pk, "last_seen": seen[pk].isoformat()} for pk in ids if pk in seen],
+        })
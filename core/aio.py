@@ -0,0 +1,124 @@
+# core/aio.py
+"""
+Helpers for the native async read path.
+
+The hot public reads (menu display, table availability, service-type
+availability) are plain ``async def`` Django views served by an ASGI
+worker (see DEPLOYMENT.md). While they wait on Redis or the database the
+worker keeps serving other requests instead of parking a thread.
+
+- ``cache_get()`` / ``cache_set()`` talk to Redis through ``redis.asyncio``
+  using the django_redis key format, serializer and compressor, so they
+  read and write the same entries as the sync ``cache`` API (and the same
+  invalidations apply). Other backends go through Django's ``aget``/``aset``.
+- ``authenticate()`` resolves the session user, then a JWT bearer token,
+  like ``REST_FRAMEWORK["DEFAULT_AUTHENTICATION_CLASSES"]``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from typing import Any, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+# redis.asyncio clients are bound to the event loop that created them
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def _django_redis_client():
+    """The django_redis client behind the default cache, or None."""
+    if getattr(settings, "CACHE_DISABLED", False):
+        return None
+    client = getattr(cache, "client", None)
+    if client is None or not all(hasattr(client, name) for name in ("make_key", "encode", "decode")):
+        return None
+    return client
+
+
+def _redis():
+    """Per-loop ``redis.asyncio`` client for the default cache, or None."""
+    if _django_redis_client() is None:
+        return None
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            return None
+        location = settings.CACHES["default"]["LOCATION"]
+        if isinstance(location, (list, tuple)):
+            location = location[0]
+        pool_kwargs = settings.CACHES["default"].get("OPTIONS", {}).get("CONNECTION_POOL_KWARGS", {})
+        client = aioredis.Redis.from_url(location, max_connections=pool_kwargs.get("max_connections"))
+        _clients[loop] = client
+    return client
+
+
+async def cache_get(key: str, default: Any = None) -> Any:
+    redis = _redis()
+    if redis is None:
+        return await cache.aget(key, default)
+    backend = _django_redis_client()
+    try:
+        value = await redis.get(backend.make_key(key))
+    except Exception as e:
+        logger.warning(f"Async cache get failed for {key}: {e}")
+        return default
+    if value is None:
+        return default
+    return backend.decode(value)
+
+
+async def cache_set(key: str, value: Any, timeout: Optional[float]) -> None:
+    """Store ``value`` for ``timeout`` seconds (``None``: no expiry)."""
+    redis = _redis()
+    if redis is None:
+        await cache.aset(key, value, timeout)
+        return
+    backend = _django_redis_client()
+    try:
+        if timeout is None:
+            await redis.set(backend.make_key(key), backend.encode(value))
+        elif timeout > 0:
+            await redis.set(backend.make_key(key), backend.encode(value), px=int(timeout * 1000))
+        else:
+            await redis.delete(backend.make_key(key))
+    except Exception as e:
+        logger.warning(f"Async cache set failed for {key}: {e}")
+
+
+def _jwt_user(request):
+    try:
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+    except ImportError:
+        return None
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except Exception:
+        return None
+    return result[0] if result else None
+
+
+async def authenticate(request):
+    """Authenticated user of ``request`` (session or JWT bearer), or None."""
+    user = await request.auser()
+    if user is not None and user.is_authenticated:
+        return user
+    if request.headers.get("Authorization", "").startswith("Bearer "):
+        return await sync_to_async(_jwt_user)(request)
+    return None
+
+
+def error(detail: str, status: int) -> JsonResponse:
+    """Error body in the shape DRF views return."""
+    return JsonResponse({"detail": detail}, status=status)
@@ -4,7 +4,8 @@ from rest_framework.routers import DefaultRouter
 
 from .api_views import (
     OrganizationViewSet, LocationViewSet, ServiceTypeViewSet, TableViewSet,
-    ReservationViewSet, AdminTableViewSet, AdminReservationViewSet
+    ReservationViewSet, AdminTableViewSet, AdminReservationViewSet,
+    ServiceTypeAvailabilityView,
 )
 
 # Create router for public API endpoints
@@ -21,6 +22,12 @@ admin_router.register(r'tables', AdminTableViewSet, basename='admin-table')
 admin_router.register(r'reservations', AdminReservationViewSet, basename='admin-reservation')
 
 urlpatterns = [
+    # Native async read path
+    path(
+        'core/service-types/<int:pk>/availability/',
+        ServiceTypeAvailabilityView.as_view(),
+        name='servicetype-availability',
+    ),
     path('core/', include(router.urls)),
     path('core/admin/', include(admin_router.urls)),
 ]
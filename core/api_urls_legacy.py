@@ -10,7 +10,8 @@ from rest_framework.routers import DefaultRouter
 
 from .api_views import (
     OrganizationViewSet, LocationViewSet, ServiceTypeViewSet, TableViewSet,
-    ReservationViewSet, AdminTableViewSet, AdminReservationViewSet
+    ReservationViewSet, AdminTableViewSet, AdminReservationViewSet,
+    ServiceTypeAvailabilityView,
 )
 
 
@@ -28,6 +29,12 @@ admin_router.register(r'tables', AdminTableViewSet, basename='legacy-admin-table
 admin_router.register(r'reservations', AdminReservationViewSet, basename='legacy-admin-reservation')
 
 urlpatterns = [
+    # Native async read path
+    path(
+        'service-types/<int:pk>/availability/',
+        ServiceTypeAvailabilityView.as_view(),
+        name='legacy-servicetype-availability',
+    ),
     path('', include(router.urls)),
     path('admin/', include(admin_router.urls)),
 ]
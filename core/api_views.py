@@ -2,12 +2,15 @@
 from datetime import datetime, timedelta
 from django.db import transaction
 from django.db.models import Q
+from django.http import JsonResponse
 from django.utils import timezone
+from django.views import View
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 
+from . import aio
 from .models import Organization, Location, ServiceType, Table, Reservation
 from .serializers import (
     OrganizationSerializer, LocationSerializer,
@@ -45,46 +48,54 @@ class ServiceTypeViewSet(viewsets.ReadOnlyModelViewSet):
         return ServiceType.objects.filter(
             is_active=True
         ).order_by('sort_order', 'name')
-    
-    @action(detail=True, methods=['get'])
-    def availability(self, request, pk=None):
-        """Check availability for a service type on a specific date."""
-        service_type = self.get_object()
-        date_str = request.query_params.get('date')
-        
+
+
+class ServiceTypeAvailabilityView(View):
+    """
+    Check availability for a service type on a specific date. Served
+    natively async; routed as ``service-types/<pk>/availability/``.
+    """
+
+    async def get(self, request, pk):
+        service_type = await ServiceType.objects.filter(is_active=True, pk=pk).afirst()
+        if service_type is None:
+            return aio.error('Not found.', status.HTTP_404_NOT_FOUND)
+        date_str = request.GET.get('date')
+
         if not date_str:
-            return Response(
-                {'error': 'Date parameter is required'}, 
+            return JsonResponse(
+                {'error': 'Date parameter is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+
         try:
             check_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         except ValueError:
-            return Response(
-                {'error': 'Invalid date format. Use YYYY-MM-DD'}, 
+            return JsonResponse(
+                {'error': 'Invalid date format. Use YYYY-MM-DD'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+
         # Check if reservations are allowed for this service type
         if not service_type.allows_reservations:
-            return Response({
+            return JsonResponse({
                 'available': False,
                 'message': 'Reservations not allowed for this service type'
             })
-        
+
         # Get available time slots (simplified logic)
         available_slots = []
-        start_time = datetime.combine(check_date, service_type.start_time or datetime.min.time())
-        end_time = datetime.combine(check_date, service_type.end_time or datetime.max.time())
-        
+        # Service types carry no opening hours yet: the whole day is bookable
+        start_time = datetime.combine(check_date, getattr(service_type, 'start_time', None) or datetime.min.time())
+        end_time = datetime.combine(check_date, getattr(service_type, 'end_time', None) or datetime.max.time())
+
         # Generate 30-minute slots
         current_time = start_time
         while current_time < end_time:
             available_slots.append(current_time.strftime('%H:%M'))
             current_time += timedelta(minutes=30)
-        
-        return Response({
+
+        return JsonResponse({
             'available': True,
             'service_type': service_type.name,
             'date': date_str,
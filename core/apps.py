@@ -8,9 +8,9 @@ class CoreConfig(AppConfig):
     name = "core"
     
     def ready(self):
-        """Register table synchronization signals when the app is ready."""
-        from .signals import register_table_sync_signals
-        register_table_sync_signals()
+        """Register table registry signals when the app is ready."""
+        from .signals import register_table_registry_signals
+        register_table_registry_signals()
 
         # Wire additional receivers (order_paid, order_status_changed)
         try:
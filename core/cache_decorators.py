@@ -112,46 +112,42 @@ def cache_menu_data(timeout: int = MENU_CACHE_TIMEOUT):
     return decorator
 
 
-def cache_api_response(timeout: int = API_CACHE_TIMEOUT, vary_on: Optional[list] = None):
+def cache_api_response(timeout: int = API_CACHE_TIMEOUT, vary_on: Optional[list] = None,
+                       scope: str = 'anonymous', namespaces: Optional[list] = None):
     """
     Decorator for caching API responses with optional vary headers.
+
+    Stores the rendered bytes through ``core.http_cache`` (with ETag and
+    conditional GET), not the response object.
     
     Args:
         timeout: Cache timeout in seconds
-        vary_on: List of headers to vary cache on (e.g., ['Accept-Language', 'Authorization'])
+        vary_on: List of headers to vary cache on (e.g., ['Accept-Language'])
+        scope: Who may share a copy: 'public', 'non_staff', 'anonymous' or 'user'
+        namespaces: Invalidation groups (``core.http_cache.invalidate``)
     """
+    from core import http_cache
+
+    policy = http_cache.CachePolicy(
+        max_age=timeout,
+        scope=scope,
+        namespaces=tuple(namespaces or ()),
+        vary=tuple(vary_on or ('Accept', 'Accept-Language')),
+    )
+
     def decorator(view_func: Callable) -> Callable:
         @wraps(view_func)
         def wrapper(request: HttpRequest, *args, **kwargs):
-            # Generate cache key including vary headers
-            vary_data = {}
-            if vary_on:
-                for header in vary_on:
-                    vary_data[header] = request.META.get(f'HTTP_{header.upper().replace("-", "_")}')
-            
-            cache_key = cache_key_generator(
-                f"api:{view_func.__name__}",
-                request.method,
-                request.path,
-                request.GET.urlencode(),
-                vary_data,
-                *args,
-                **kwargs
-            )
-            
-            # Try to get from cache
-            cached_response = cache.get(cache_key)
+            cached_response, cache_key = http_cache.lookup(request, policy)
             if cached_response is not None:
                 return cached_response
             
-            # Execute view and cache response
             response = view_func(request, *args, **kwargs)
-            
-            # Only cache successful responses
-            if hasattr(response, 'status_code') and 200 <= response.status_code < 300:
-                cache.set(cache_key, response, timeout)
-            
-            return response
+            if cache_key is None:
+                return response
+            if getattr(response, 'is_rendered', True) is False:
+                response.render()
+            return http_cache.finalize(request, response, policy, cache_key)
         return wrapper
     return decorator
 
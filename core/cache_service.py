@@ -8,6 +8,8 @@ from django.utils import timezone
 import json
 import logging
 
+from core import local_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -66,6 +68,26 @@ class CacheService:
             logger.warning(f"Cache delete failed for key {key}: {e}")
             return False
     
+    @classmethod
+    def get_redis_client(cls, write: bool = True):
+        """
+        Return the raw redis client behind the default cache, or None when the
+        cache is not Redis-backed (LocMem/Dummy) or caching is disabled.
+        Supports both Django's built-in RedisCache and django_redis.
+        """
+        if getattr(settings, 'CACHE_DISABLED', False):
+            return None
+        try:
+            backend = getattr(cache, '_cache', None)
+            if backend is not None and hasattr(backend, 'get_client'):
+                return backend.get_client(write=write)
+            client = getattr(cache, 'client', None)
+            if client is not None and hasattr(client, 'get_client'):
+                return client.get_client(write=write)
+        except Exception as e:
+            logger.warning(f"Redis client unavailable: {e}")
+        return None
+
     @classmethod
     def delete_pattern(cls, pattern: str) -> int:
         """Delete all keys matching pattern."""
@@ -91,31 +113,35 @@ class CacheService:
     # Menu caching methods
     @classmethod
     def get_menu_items(cls, organization_id: int, category_id: Optional[int] = None) -> Optional[List[Dict]]:
-        """Get cached menu items for an organization."""
+        """Get cached menu items for an organization (per-process L1 first)."""
         key = cls._make_key(cls.MENU_PREFIX, "items", organization_id, category_id or "all")
-        return cls.get(key)
+        return local_cache.get(cls.MENU_PREFIX, key, lambda: cls.get(key))
     
     @classmethod
     def set_menu_items(cls, organization_id: int, items: List[Dict], category_id: Optional[int] = None) -> bool:
         """Cache menu items for an organization."""
         key = cls._make_key(cls.MENU_PREFIX, "items", organization_id, category_id or "all")
-        return cls.set(key, items, cls.LONG_TIMEOUT)
+        stored = cls.set(key, items, cls.LONG_TIMEOUT)
+        local_cache.invalidate(cls.MENU_PREFIX, key)
+        return stored
     
     @classmethod
     def get_menu_item(cls, item_id: int) -> Optional[Dict]:
-        """Get cached menu item by ID."""
+        """Get cached menu item by ID (per-process L1 first)."""
         key = cls._make_key(cls.MENU_PREFIX, "item", item_id)
-        return cls.get(key)
+        return local_cache.get(cls.MENU_PREFIX, key, lambda: cls.get(key))
     
     @classmethod
     def set_menu_item(cls, item_id: int, item_data: Dict) -> bool:
         """Cache menu item by ID."""
         key = cls._make_key(cls.MENU_PREFIX, "item", item_id)
-        return cls.set(key, item_data, cls.LONG_TIMEOUT)
+        stored = cls.set(key, item_data, cls.LONG_TIMEOUT)
+        local_cache.invalidate(cls.MENU_PREFIX, key)
+        return stored
     
     @classmethod
     def invalidate_menu_cache(cls, organization_id: Optional[int] = None, item_id: Optional[int] = None):
-        """Invalidate menu cache."""
+        """Invalidate menu cache, including every process's L1 copies."""
         if item_id:
             cls.delete(cls._make_key(cls.MENU_PREFIX, "item", item_id))
         
@@ -123,6 +149,9 @@ class CacheService:
             cls.delete_pattern(f"{cls.MENU_PREFIX}:items:{organization_id}")
         else:
             cls.delete_pattern(f"{cls.MENU_PREFIX}:*")
+        local_cache.invalidate(cls.MENU_PREFIX)
+        from core import http_cache
+        http_cache.invalidate("menu")
     
     # User caching methods
     @classmethod
@@ -285,21 +314,27 @@ class CacheService:
     
     # Utility methods
     @classmethod
-    def warm_cache(cls, organization_id: int):
-        """Warm up cache with commonly accessed data."""
-        logger.info(f"Warming cache for organization {organization_id}")
-        
-        # This would typically be called during off-peak hours
-        # Implementation would fetch and cache commonly accessed data
-        pass
+    def warm_cache(cls, organization_id: Optional[int] = None, datasets: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Rebuild the registered hot datasets (all, or the named ones); see
+        core.warmup. The datasets span every organization, so
+        ``organization_id`` is only kept for existing callers. Returns
+        per-dataset results.
+        """
+        from core import warmup
+        logger.info(f"Warming cache: {', '.join(datasets) if datasets else 'all datasets'}")
+        return warmup.warm(datasets)
     
     @classmethod
     def get_cache_stats(cls) -> Dict[str, Any]:
-        """Get cache statistics."""
+        """Get cache statistics, with this process's L1 counters under 'local'."""
+        stats: Dict[str, Any] = {'local': local_cache.stats()}
         try:
-            redis_client = cache._cache.get_client()
+            redis_client = cls.get_redis_client(write=False)
+            if redis_client is None:
+                return stats
             info = redis_client.info()
-            return {
+            stats.update({
                 'connected_clients': info.get('connected_clients', 0),
                 'used_memory': info.get('used_memory_human', '0B'),
                 'keyspace_hits': info.get('keyspace_hits', 0),
@@ -308,10 +343,10 @@ class CacheService:
                     info.get('keyspace_hits', 0) / 
                     max(info.get('keyspace_hits', 0) + info.get('keyspace_misses', 0), 1)
                 ) * 100
-            }
+            })
         except Exception as e:
             logger.warning(f"Failed to get cache stats: {e}")
-            return {}
+        return stats
     
     @classmethod
     def clear_all_cache(cls) -> bool:
@@ -0,0 +1,350 @@
+# core/fakes.py
+"""
+In-process stand-ins for the external services a checkout talks to, so the
+system can be driven under load without calling Stripe or the delivery
+platforms.
+
+``FakeStripe`` replaces the ``stripe`` API resources the code uses
+(``PaymentIntent``, ``checkout.Session``, ``Customer``, ``Refund``,
+``Coupon``, ``Webhook``) with local ones that answer after a configurable
+latency, honour idempotency keys and keep the objects they created, and
+signs webhook payloads the way Stripe does so the real webhook view (and
+its signature check) can be exercised::
+
+    with FakeStripe(latency_ms=250) as stripe_fake:
+        ...
+        payload, headers = stripe_fake.checkout_completed(session_id)
+        client.post(webhook_url, payload, content_type="application/json", **headers)
+
+``FakeIntegrations`` does the same for the integrations ``BaseClient``
+providers (DoorDash, Uber Eats, Grubhub) and the delivery quote engine.
+
+Both are context managers that patch module attributes for the whole
+process, so use them from management commands and tests, never in a
+running server.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.test.utils import override_settings
+
+
+class Latency:
+    """``mean_ms`` +/- ``jitter_ms`` (uniform), failing ``failure_rate`` of calls."""
+
+    def __init__(self, mean_ms: float = 0, jitter_ms: float = 0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.mean_ms = max(0.0, mean_ms)
+        self.jitter_ms = max(0.0, jitter_ms)
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self) -> bool:
+        """Sleep for one sampled latency; returns False when the call should fail."""
+        with self._lock:
+            delay = self.mean_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+            failed = self._rng.random() < self.failure_rate
+        time.sleep(max(0.0, delay) / 1000.0)
+        return not failed
+
+
+class StripeObject(dict):
+    """Dict with attribute access, like ``stripe.StripeObject``."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+# ----------------------------------------------------------------------
+# Stripe
+# ----------------------------------------------------------------------
+class _Resource:
+    object_name = ""
+    prefix = ""
+
+    def __init__(self, fake: "FakeStripe"):
+        self._fake = fake
+
+    def _defaults(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {}
+
+    def create(self, idempotency_key: Optional[str] = None, **params) -> StripeObject:
+        self._fake._call(f"{self.object_name}.create")
+        with self._fake._lock:
+            if idempotency_key and idempotency_key in self._fake._idempotent:
+                return self._fake._idempotent[idempotency_key]
+            obj = StripeObject(
+                id=f"{self.prefix}_{uuid.uuid4().hex[:24]}",
+                object=self.object_name,
+                created=int(time.time()),
+                livemode=False,
+                metadata=dict(params.pop("metadata", None) or {}),
+            )
+            obj.update(self._defaults(params))
+            obj.update(params)
+            self._fake.objects[obj["id"]] = obj
+            if idempotency_key:
+                self._fake._idempotent[idempotency_key] = obj
+        return obj
+
+    def retrieve(self, id: str, **params) -> StripeObject:
+        self._fake._call(f"{self.object_name}.retrieve")
+        obj = self._fake.objects.get(id)
+        if obj is None:
+            raise self._fake.stripe.error.InvalidRequestError(f"No such {self.object_name}: '{id}'", "id")
+        return obj
+
+    def modify(self, id: str, **params) -> StripeObject:
+        obj = self.retrieve(id)
+        with self._fake._lock:
+            obj.update(params)
+        return obj
+
+    def _set_status(self, id: str, status: str) -> StripeObject:
+        obj = self.retrieve(id)
+        with self._fake._lock:
+            obj["status"] = status
+        return obj
+
+
+class _PaymentIntents(_Resource):
+    object_name = "payment_intent"
+    prefix = "pi"
+
+    def _defaults(self, params):
+        return {"status": "requires_payment_method", "currency": params.get("currency", "usd")}
+
+    def create(self, idempotency_key=None, **params):
+        obj = super().create(idempotency_key=idempotency_key, **params)
+        obj.setdefault("client_secret", f"{obj['id']}_secret_{uuid.uuid4().hex[:12]}")
+        return obj
+
+    def confirm(self, id: str, **params) -> StripeObject:
+        return self._set_status(id, "succeeded")
+
+    def cancel(self, id: str, **params) -> StripeObject:
+        return self._set_status(id, "canceled")
+
+
+class _CheckoutSessions(_Resource):
+    object_name = "checkout.session"
+    prefix = "cs_test"
+
+    def _defaults(self, params):
+        return {"status": "open", "payment_status": "unpaid", "payment_intent": None}
+
+    def create(self, idempotency_key=None, **params):
+        obj = super().create(idempotency_key=idempotency_key, **params)
+        obj.setdefault("url", f"https://checkout.stripe.test/c/pay/{obj['id']}")
+        return obj
+
+
+class _Customers(_Resource):
+    object_name = "customer"
+    prefix = "cus"
+
+
+class _Refunds(_Resource):
+    object_name = "refund"
+    prefix = "re"
+
+    def _defaults(self, params):
+        return {"status": "succeeded"}
+
+
+class _Coupons(_Resource):
+    object_name = "coupon"
+    prefix = "co"
+
+
+class _Webhooks:
+    def __init__(self, fake: "FakeStripe"):
+        self._fake = fake
+
+    def construct_event(self, payload, sig_header, secret, tolerance: int = 300):
+        """Verify ``t=...,v1=...`` signatures like ``stripe.Webhook.construct_event``."""
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        parts = dict(part.split("=", 1) for part in (sig_header or "").split(",") if "=" in part)
+        timestamp, signature = parts.get("t", ""), parts.get("v1", "")
+        expected = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+        if not signature or not hmac.compare_digest(expected, signature):
+            raise self._fake.stripe.error.SignatureVerificationError("No signatures found matching the expected signature", sig_header)
+        if tolerance and abs(time.time() - int(timestamp)) > tolerance:
+            raise self._fake.stripe.error.SignatureVerificationError("Timestamp outside the tolerance zone", sig_header)
+        return StripeObject(json.loads(payload))
+
+
+class _Namespace:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class FakeStripe:
+    """
+    Patch the ``stripe`` module with in-process resources answering after
+    ``latency_ms`` (+/- ``jitter_ms``); ``failure_rate`` of the calls raise
+    ``stripe.error.APIConnectionError``. The webhook view is given
+    ``webhook_secret`` for the duration.
+    """
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, failure_rate: float = 0.0,
+                 webhook_secret: str = "whsec_loadtest"):
+        import stripe
+
+        self.stripe = stripe
+        self.latency = Latency(latency_ms, jitter_ms, failure_rate)
+        self.webhook_secret = webhook_secret
+        self.objects: Dict[str, StripeObject] = {}
+        self.calls: Dict[str, int] = {}
+        self._idempotent: Dict[str, StripeObject] = {}
+        self._lock = threading.Lock()
+        self._patched: List[Tuple[Any, str, Any]] = []
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if not self.latency.wait():
+            raise self.stripe.error.APIConnectionError(f"Injected failure in {name}")
+
+    def _patch(self, target, attr: str, value) -> None:
+        self._patched.append((target, attr, getattr(target, attr, None)))
+        setattr(target, attr, value)
+
+    def __enter__(self) -> "FakeStripe":
+        from payments.views import stripe_service
+
+        self._patch(self.stripe, "PaymentIntent", _PaymentIntents(self))
+        self._patch(self.stripe, "Customer", _Customers(self))
+        self._patch(self.stripe, "Refund", _Refunds(self))
+        self._patch(self.stripe, "Coupon", _Coupons(self))
+        self._patch(self.stripe, "Webhook", _Webhooks(self))
+        self._patch(self.stripe, "checkout", _Namespace(Session=_CheckoutSessions(self)))
+        self._patch(stripe_service, "stripe_webhook_secret", self.webhook_secret)
+        return self
+
+    def __exit__(self, *exc):
+        while self._patched:
+            target, attr, original = self._patched.pop()
+            setattr(target, attr, original)
+        return False
+
+    # -- webhooks -------------------------------------------------------
+    def sign(self, payload: str, timestamp: Optional[int] = None) -> str:
+        timestamp = timestamp or int(time.time())
+        signature = hmac.new(
+            self.webhook_secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256
+        ).hexdigest()
+        return f"t={timestamp},v1={signature}"
+
+    def event(self, event_type: str, obj: Dict[str, Any]) -> Tuple[str, Dict[str, str]]:
+        """A signed webhook delivery: ``(payload, request headers)``."""
+        payload = json.dumps({
+            "id": f"evt_{uuid.uuid4().hex[:24]}",
+            "object": "event",
+            "type": event_type,
+            "created": int(time.time()),
+            "data": {"object": dict(obj)},
+        })
+        return payload, {"HTTP_STRIPE_SIGNATURE": self.sign(payload)}
+
+    def checkout_completed(self, session_id: str) -> Tuple[str, Dict[str, str]]:
+        """Pay the Checkout Session and return its ``checkout.session.completed`` delivery."""
+        session = self.objects[session_id]
+        with self._lock:
+            session.update(status="complete", payment_status="paid")
+        return self.event("checkout.session.completed", session)
+
+    def payment_succeeded(self, payment_intent_id: str) -> Tuple[str, Dict[str, str]]:
+        """Confirm the PaymentIntent and return its ``payment_intent.succeeded`` delivery."""
+        intent = self.objects[payment_intent_id]
+        with self._lock:
+            intent["status"] = "succeeded"
+        return self.event("payment_intent.succeeded", intent)
+
+    def session_for_order(self, order_id: Any) -> Optional[StripeObject]:
+        order_id = str(order_id)
+        with self._lock:
+            for obj in reversed(list(self.objects.values())):
+                if obj["object"] == "checkout.session" and obj.get("client_reference_id") == order_id:
+                    return obj
+        return None
+
+
+# ----------------------------------------------------------------------
+# Integrations
+# ----------------------------------------------------------------------
+def _default_response(method: str, path: str, kwargs: Dict[str, Any]) -> Any:
+    body = kwargs.get("json") or {}
+    if method.upper() == "GET":
+        return {"data": [], "orders": [], "items": []}
+    return {
+        "id": f"fake_{uuid.uuid4().hex[:16]}",
+        "status": "accepted",
+        "external_id": body.get("external_id") or body.get("external_delivery_id"),
+    }
+
+
+class FakeIntegrations:
+    """
+    Answer every integrations ``BaseClient._request`` locally after
+    ``latency_ms`` (with ``failure_rate`` of the calls returning a 503
+    ``APIResponse``) and quote deliveries from fake providers with the same
+    latency. ``respond(method, path, kwargs)`` builds the response data.
+    """
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, failure_rate: float = 0.0,
+                 respond: Optional[Callable[[str, str, Dict[str, Any]], Any]] = None,
+                 quote_providers: Tuple[str, ...] = ("DOORDASH", "UBEREATS")):
+        self.latency = Latency(latency_ms, jitter_ms, failure_rate)
+        self.respond = respond or _default_response
+        self.quote_providers = quote_providers
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._original = None
+        self._settings = None
+
+    def _request(self, client, method: str, path: str, **kwargs):
+        from integrations.providers.base import APIResponse
+
+        with self._lock:
+            name = f"{type(client).__name__} {method.upper()}"
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if not self.latency.wait():
+            return APIResponse(False, 503, None, error="Injected failure")
+        return APIResponse(True, 200, self.respond(method, path, kwargs))
+
+    def __enter__(self) -> "FakeIntegrations":
+        from integrations.providers.base import BaseClient
+
+        fake = self
+        self._original = BaseClient._request
+
+        def _request(client, method, path, **kwargs):
+            return fake._request(client, method, path, **kwargs)
+
+        BaseClient._request = _request
+        self._settings = override_settings(DELIVERY_QUOTE_FAKE_PROVIDERS=",".join(
+            f"{name}={self.latency.mean_ms:g}" for name in self.quote_providers
+        ))
+        self._settings.enable()
+        return self
+
+    def __exit__(self, *exc):
+        from integrations.providers.base import BaseClient
+
+        BaseClient._request = self._original
+        self._settings.disable()
+        return False
@@ -0,0 +1,359 @@
+# core/http_cache.py
+"""
+HTTP response cache: rendered bytes, stable ETags and real conditional GET.
+
+Endpoints opt in with a ``CachePolicy``, declared by URL name in
+``HTTP_CACHE_POLICIES`` or on a function view with ``@cache_policy(...)``.
+``ResponseCacheMiddleware`` then, before the view runs:
+
+- answers ``If-None-Match``/``If-Modified-Since`` with a 304 when the stored
+  representation matches, and
+- otherwise serves the stored body (gzip-precompressed when the client
+  accepts it), so a repeat read costs two cache round trips and no
+  rendering.
+
+A stored entry is the rendered body, its gzip form, a SHA-256 ETag and the
+time it was stored; never a pickled response object. Entries are kept for
+``max_age + stale_while_revalidate`` seconds. Once past ``max_age`` the
+first request re-renders (single-flight) while the others keep getting
+the stale copy.
+
+Policies say who may share a representation:
+
+``public``     the same bytes for every requester (``Cache-Control: public``)
+``non_staff``  shared by everyone except staff, whose requests bypass the
+               cache (staff see unavailable items, inactive categories...)
+``anonymous``  shared by requests without a session user or Authorization
+``user``       one copy per signed-in user (``Cache-Control: private``)
+
+Anything else under /api/ is sent ``private, no-cache`` (see
+``CachePerformanceMiddleware``); ``CacheCompressionMiddleware`` still tags it
+with a content ETag and answers matching revalidations with a 304.
+
+A key covers scheme and host (bodies carry absolute URLs), path, query,
+the policy's Vary headers and the audience above. Entries are grouped in
+namespaces (``"menu"``, ``"tables"``); ``invalidate()`` bumps a namespace's
+generation, which is part of every key.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import DisallowedHost
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe, parse_etags
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("public", "non_staff", "anonymous", "user")
+COMPRESSIBLE = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+STORED_HEADERS = ("Content-Type", "Content-Language")
+GENERATION_KEY = "httpcache:gen:{}"
+REVALIDATE_KEY = "httpcache:revalidate:{}"
+# Upper bound on one re-render; a crashed renderer releases the others after this
+REVALIDATE_TIMEOUT = 30
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    max_age: int = 60
+    stale_while_revalidate: int = 0
+    scope: str = "public"
+    namespaces: Tuple[str, ...] = ()
+    vary: Tuple[str, ...] = ("Accept", "Accept-Language")
+
+    def __post_init__(self):
+        if self.scope not in SCOPES:
+            raise ValueError(f"Unknown cache scope {self.scope!r} (expected one of {', '.join(SCOPES)})")
+
+    @property
+    def ttl(self) -> int:
+        return self.max_age + self.stale_while_revalidate
+
+    def cache_control(self) -> str:
+        parts = ["private" if self.scope == "user" else "public", f"max-age={self.max_age}"]
+        if self.stale_while_revalidate:
+            parts.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        return ", ".join(parts)
+
+    def vary_header(self) -> str:
+        headers = list(self.vary) + ["Accept-Encoding"]
+        if self.scope != "public":
+            # Shared caches must not hand this copy to a different audience
+            headers += ["Cookie", "Authorization"]
+        return ", ".join(headers)
+
+
+def cache_policy(**options):
+    """Declare the cache policy of a function view (see ``CachePolicy``)."""
+    policy = CachePolicy(**{k: tuple(v) if isinstance(v, list) else v for k, v in options.items()})
+
+    def decorator(view):
+        view.http_cache_policy = policy
+        return view
+    return decorator
+
+
+_policies: Optional[Dict[str, CachePolicy]] = None
+
+
+def policies() -> Dict[str, CachePolicy]:
+    """``HTTP_CACHE_POLICIES`` (URL name -> options) as ``CachePolicy`` objects."""
+    global _policies
+    if _policies is None:
+        _policies = {
+            name: CachePolicy(**{k: tuple(v) if isinstance(v, list) else v for k, v in options.items()})
+            for name, options in _setting("HTTP_CACHE_POLICIES", {}).items()
+        }
+    return _policies
+
+
+def policy_for(request: HttpRequest, view_func=None) -> Optional[CachePolicy]:
+    policy = getattr(view_func, "http_cache_policy", None)
+    if policy is not None:
+        return policy
+    match = getattr(request, "resolver_match", None)
+    return policies().get(match.view_name) if match else None
+
+
+# ----------------------------------------------------------------------
+# Keys
+# ----------------------------------------------------------------------
+def _resolved_user(request: HttpRequest):
+    user = getattr(request, "user", None)
+    if user is None:
+        return None
+    # Resolve the session user; credentials in headers are only known to the view
+    return user if user.is_authenticated else None
+
+
+def audience(request: HttpRequest, policy: CachePolicy) -> Optional[str]:
+    """The key part for ``request`` under ``policy``, or None when it must bypass the cache."""
+    if policy.scope == "public":
+        return "all"
+    if request.META.get("HTTP_AUTHORIZATION"):
+        return None  # token users are authenticated by the view, after this
+    user = _resolved_user(request)
+    if policy.scope == "anonymous":
+        return "anon" if user is None else None
+    if policy.scope == "non_staff":
+        return "anon" if user is None or not user.is_staff else None
+    return f"user:{user.pk}" if user is not None else None
+
+
+def _generations(namespaces: Iterable[str]) -> str:
+    namespaces = list(namespaces)
+    if not namespaces:
+        return "0"
+    try:
+        values = cache.get_many([GENERATION_KEY.format(ns) for ns in namespaces])
+    except Exception:
+        values = {}
+    return ".".join(str(values.get(GENERATION_KEY.format(ns), 0)) for ns in namespaces)
+
+
+def cache_key(request: HttpRequest, policy: CachePolicy, who: str) -> str:
+    # Bodies embed absolute URLs (build_absolute_uri), so scheme and host are
+    # part of the key: an internal hostname or plain-http render is never
+    # replayed to another origin
+    origin = f"{request.scheme}://{request.get_host()}"
+    query = "&".join(sorted(request.GET.urlencode().split("&"))) if request.GET else ""
+    vary = [request.META.get("HTTP_" + header.upper().replace("-", "_"), "") for header in policy.vary]
+    raw = json.dumps([origin, request.path, query, vary, who])
+    digest = hashlib.sha256(raw.encode()).hexdigest()[:40]
+    return f"{_setting('CACHE_KEY_PREFIX', 'rms')}:httpcache:{_generations(policy.namespaces)}:{digest}"
+
+
+def invalidate(namespace: str) -> None:
+    """Retire every stored response of ``namespace`` (they age out of the store)."""
+    key = GENERATION_KEY.format(namespace)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+    except Exception as e:
+        logger.warning(f"HTTP cache invalidation of {namespace} failed: {e}")
+
+
+# ----------------------------------------------------------------------
+# Storage: a Redis hash of raw bytes, or a dict in any other cache backend
+# ----------------------------------------------------------------------
+def _redis():
+    from core.cache_service import CacheService
+    return CacheService.get_redis_client(write=True)
+
+
+def load(key: str) -> Optional[Dict[str, Any]]:
+    client = _redis()
+    try:
+        if client is None:
+            return cache.get(key)
+        fields = client.hgetall(key)
+        if not fields:
+            return None
+        entry = json.loads(fields[b"meta"])
+        entry["body"] = fields.get(b"body", b"")
+        entry["gzip"] = fields.get(b"gzip") or None
+        return entry
+    except Exception as e:
+        logger.debug(f"HTTP cache read of {key} failed: {e}")
+        return None
+
+
+def save(key: str, entry: Dict[str, Any], ttl: int) -> None:
+    client = _redis()
+    try:
+        if client is None:
+            cache.set(key, entry, ttl)
+            return
+        meta = {k: v for k, v in entry.items() if k not in ("body", "gzip")}
+        mapping = {"meta": json.dumps(meta), "body": entry["body"]}
+        if entry.get("gzip"):
+            mapping["gzip"] = entry["gzip"]
+        pipe = client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, ttl)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"HTTP cache write of {key} failed: {e}")
+
+
+def content_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def build_entry(response: HttpResponse) -> Optional[Dict[str, Any]]:
+    """The storable form of ``response``, or None when it must not be stored."""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return None
+    if response.has_header("Content-Encoding") or "no-store" in response.get("Cache-Control", ""):
+        return None
+    body = response.content
+    if len(body) > _setting("HTTP_CACHE_MAX_BYTES", 1024 * 1024):
+        return None
+    compressed = None
+    content_type = response.get("Content-Type", "")
+    if len(body) >= _setting("HTTP_CACHE_GZIP_MIN_BYTES", 1024) and content_type.startswith(COMPRESSIBLE):
+        compressed = gzip.compress(body, compresslevel=6, mtime=0)
+        if len(compressed) >= len(body):
+            compressed = None
+    return {
+        "etag": content_etag(body),
+        "stored": int(time.time()),
+        "headers": [[name, response[name]] for name in STORED_HEADERS if response.has_header(name)],
+        "body": body,
+        "gzip": compressed,
+    }
+
+
+# ----------------------------------------------------------------------
+# Conditional requests and replay
+# ----------------------------------------------------------------------
+def _strip(tag: str) -> str:
+    tag = tag[2:] if tag.startswith("W/") else tag
+    return tag.replace("-gzip", "")
+
+
+def not_modified(request: HttpRequest, etag: str, last_modified: Optional[int]) -> bool:
+    """RFC 9110 evaluation of If-None-Match, then If-Modified-Since."""
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        tags = parse_etags(if_none_match)
+        return tags == ["*"] or _strip(etag) in {_strip(tag) for tag in tags}
+    since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return bool(since and last_modified and last_modified <= since)
+
+
+def _accepts_gzip(request: HttpRequest) -> bool:
+    return "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "").lower()
+
+
+def _stamp(response: HttpResponse, policy: CachePolicy, etag: str, stored: int) -> HttpResponse:
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stored)
+    response["Cache-Control"] = policy.cache_control()
+    response["Vary"] = policy.vary_header()
+    return response
+
+
+def replay(request: HttpRequest, entry: Dict[str, Any], policy: CachePolicy, state: str) -> HttpResponse:
+    """A response for ``request`` from a stored entry (304, gzip or identity)."""
+    use_gzip = bool(entry.get("gzip")) and _accepts_gzip(request)
+    etag = entry["etag"][:-1] + '-gzip"' if use_gzip else entry["etag"]
+    if not_modified(request, etag, entry["stored"]):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry["gzip"] if use_gzip else entry["body"])
+        for name, value in entry["headers"]:
+            response[name] = value
+        if use_gzip:
+            response["Content-Encoding"] = "gzip"
+        response["Content-Length"] = str(len(response.content))
+    response["X-Cache"] = state
+    response["Age"] = str(max(0, int(time.time()) - entry["stored"]))
+    return _stamp(response, policy, etag, entry["stored"])
+
+
+def is_fresh(entry: Dict[str, Any], policy: CachePolicy) -> bool:
+    return time.time() - entry["stored"] < policy.max_age
+
+
+def enabled() -> bool:
+    return _setting("HTTP_CACHE_ENABLED", True) and not _setting("CACHE_DISABLED", False)
+
+
+def lookup(request: HttpRequest, policy: CachePolicy) -> Tuple[Optional[HttpResponse], Optional[str]]:
+    """
+    Answer ``request`` from the store before the view runs.
+
+    Returns ``(response, None)`` when the stored entry answers it,
+    ``(None, key)`` when the view must render and ``finalize()`` store the
+    result under ``key``, and ``(None, None)`` when the request bypasses
+    the cache.
+    """
+    if request.method not in ("GET", "HEAD") or not enabled():
+        return None, None
+    who = audience(request, policy)
+    if who is None:
+        return None, None
+    try:
+        key = cache_key(request, policy, who)
+    except DisallowedHost:
+        return None, None  # let the view answer it (400)
+    entry = load(key)
+    if entry is not None:
+        if is_fresh(entry, policy):
+            return replay(request, entry, policy, "HIT"), None
+        # Stale: one request re-renders, the rest get the stale copy meanwhile
+        if not cache.add(REVALIDATE_KEY.format(key), 1, REVALIDATE_TIMEOUT):
+            return replay(request, entry, policy, "STALE"), None
+    return None, key
+
+
+def finalize(request: HttpRequest, response: HttpResponse, policy: CachePolicy, key: str) -> HttpResponse:
+    """Store the response rendered for ``lookup()``'s ``key`` and answer conditionally."""
+    try:
+        entry = build_entry(response)
+        if entry is None:
+            return response
+        if request.method == "GET":
+            save(key, entry, policy.ttl)
+        return replay(request, entry, policy, "MISS")
+    finally:
+        cache.delete(REVALIDATE_KEY.format(key))
+
@@ -0,0 +1,269 @@
+# core/loadtest.py
+"""
+Scripted load scenarios driven by concurrent virtual users.
+
+Each scenario is a short user journey (browse the menu, build a cart,
+check out and pay, book a table, work the kitchen console) made of named
+steps. A virtual user is a thread with its own ``django.test.Client``
+(and database connection) that runs scenarios from a weighted mix for a
+number of iterations. Every step is measured with ``core.perf.measure``,
+so the report has p50/p95/p99 latency *and* queries per request for each
+step, next to the scenario totals.
+
+External services are replaced by ``core.fakes`` for the run, see the
+``load_test`` management command.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core import perf
+
+
+class StepFailed(Exception):
+    """A step answered with an unexpected status; the rest of the scenario is skipped."""
+
+
+@dataclass
+class Sample:
+    scenario: str
+    step: str
+    status: int
+    elapsed_ms: float
+    queries: int
+    duplicates: int
+    ok: bool
+
+
+@dataclass
+class VirtualUser:
+    index: int
+    client: Client
+    ctx: Dict[str, Any]
+    rng: random.Random
+    scenario: str = ""
+    samples: List[Sample] = field(default_factory=list)
+
+    def request(self, step: str, method: str, path: str, body: Any = None,
+                expect=(200, 201), headers: Optional[Dict[str, str]] = None, raw: bool = False):
+        kwargs = dict(headers or {})
+        if body is not None:
+            kwargs['data'] = body if raw else json.dumps(body)
+            kwargs['content_type'] = 'application/json'
+        error = None
+        with perf.measure(step) as metrics:
+            start = time.perf_counter()
+            try:
+                response = getattr(self.client, method)(path, **kwargs)
+            except Exception as e:
+                # DEBUG_PROPAGATE_EXCEPTIONS re-raises view errors through the
+                # test client; count them as a 500 like a real server would
+                response, error = None, e
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        status = response.status_code if response is not None else 500
+        ok = status in expect
+        self.samples.append(Sample(
+            self.scenario, step, status, elapsed_ms,
+            metrics.query_count, metrics.duplicate_queries, ok,
+        ))
+        if not ok:
+            detail = f' ({type(error).__name__}: {error})' if error else ''
+            raise StepFailed(f'{step}: HTTP {status}{detail}')
+        return response
+
+    def json(self, response) -> Any:
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+
+# ----------------------------------------------------------------------
+# Scenarios: fn(user) issuing requests through user.request()
+# ----------------------------------------------------------------------
+def browse_menu(user: VirtualUser) -> None:
+    user.request('menu-display', 'get', reverse('menu_api:menudisplay-list'))
+    user.request('category-tree', 'get', reverse('menu_api:menucategory-tree'))
+    category = user.rng.choice(user.ctx['category_ids'])
+    user.request('category-items', 'get', reverse('menu_api:menuitem-list') + f'?category={category}')
+    user.request('menu-search', 'get', reverse('menu_api:menuitem-search') + f"?query={user.rng.choice(['dish', 'load', 'extra'])}")
+
+
+def _fill_cart(user: VirtualUser, lines: int) -> dict:
+    user.request('cart-clear', 'delete', reverse('orders_api:cart-clear'), expect=(200, 204))
+    for item_id in user.rng.sample(user.ctx['menu_item_ids'], k=lines):
+        user.request('cart-add-item', 'post', reverse('orders_api:cart-add-item'),
+                     {'menu_item_id': item_id, 'quantity': user.rng.randint(1, 3)})
+    return user.json(user.request('cart', 'get', reverse('orders_api:cart-list')))
+
+
+def build_cart(user: VirtualUser) -> None:
+    cart = _fill_cart(user, user.rng.randint(2, 6))
+    items = cart.get('items') or []
+    if items:
+        line = user.rng.choice(items)
+        user.request('cart-update-item', 'patch', reverse('orders_api:cart-update-item'),
+                     {'cart_item_id': line['id'], 'quantity': (line.get('quantity') or 1) % 5 + 1})
+    user.request('cart-summary', 'get', reverse('orders_api:cart-summary'))
+
+
+def checkout(user: VirtualUser) -> None:
+    cart = _fill_cart(user, user.rng.randint(1, 4))
+    user.request('delivery-options', 'get', reverse('integrations:delivery_options') + (
+        f"?postal_code=L{user.rng.randint(1, 50)}&order_value={cart.get('total') or cart.get('subtotal') or '30.00'}"
+    ))
+    order = user.json(user.request(
+        'checkout', 'post', reverse('orders_api:order-list'), {'cart_uuid': cart.get('cart_uuid')},
+        headers={'HTTP_IDEMPOTENCY_KEY': f'load-{user.index}-{time.monotonic_ns()}'},
+    ))
+    session = user.ctx['stripe'].session_for_order(order.get('id'))
+    if session is None:
+        raise StepFailed('checkout: no Stripe session was created')
+    payload, headers = user.ctx['stripe'].checkout_completed(session['id'])
+    user.request('stripe-webhook', 'post', reverse('payments_api:stripe_webhook'), payload, headers=headers, raw=True)
+    user.request('order-track', 'get', reverse('orders_api:order-track', args=[order['id']]))
+
+
+def book_table(user: VirtualUser) -> None:
+    day = (timezone.localdate() + timedelta(days=user.rng.randint(1, 60))).isoformat()
+    hour = user.rng.randint(11, 21)
+    user.request('portal-availability', 'get',
+                 reverse('reservations_portal:availability') + f'?date={day}&time={hour}:00&end={hour + 1}:30')
+    # A conflict is a legitimate answer under concurrent booking
+    user.request('reservation-create', 'post', reverse('reservations_portal:create'), {
+        'table_id': user.rng.choice(user.ctx['table_ids']),
+        'date': day,
+        'time': f'{hour}:00',
+        'end_time': f'{hour + 1}:30',
+        'party_size': 2,
+        'customer_name': f'Load Guest {user.index}',
+        'customer_phone': f'+1555{user.index:07d}',
+    }, expect=(201, 409))
+
+
+def kitchen_console(user: VirtualUser) -> None:
+    user.request('kitchen-queue', 'get', reverse('orders_api:orderitem-preparation-queue'))
+    orders = user.json(user.request('kitchen-orders', 'get', reverse('orders_api:order-list') + '?status=CONFIRMED'))
+    results = orders.get('results', orders) if isinstance(orders, dict) else orders
+    if results:
+        user.request('kitchen-order-track', 'get', reverse('orders_api:order-track', args=[user.rng.choice(results)['id']]))
+
+
+# name -> (function, client kind, default weight)
+SCENARIOS: Dict[str, tuple] = {
+    'browse': (browse_menu, 'customer', 50),
+    'cart': (build_cart, 'customer', 20),
+    'checkout': (checkout, 'customer', 10),
+    'reservation': (book_table, 'customer', 10),
+    'kitchen': (kitchen_console, 'staff', 10),
+}
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+def _client(kind: str, index: int, ctx: Dict[str, Any]) -> Client:
+    User = get_user_model()
+    username = ctx['staff_username'] if kind == 'staff' else ctx['usernames'][index % len(ctx['usernames'])]
+    # A server error is a failed sample, not the end of the run (see also
+    # VirtualUser.request for DEBUG_PROPAGATE_EXCEPTIONS)
+    client = Client(raise_request_exception=False)
+    client.force_login(User.objects.get(username=username))
+    return client
+
+
+def run(ctx: Dict[str, Any], mix: Dict[str, int], users: int, iterations: int,
+        think_ms: float = 0, seed: int = 0,
+        on_progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+    """
+    Run ``users`` virtual users concurrently, each picking ``iterations``
+    scenarios from ``mix`` (name -> weight). Returns ``report()`` of the run.
+    """
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    done = [0]
+    lock = threading.Lock()
+
+    def virtual_user(index: int) -> List[Sample]:
+        rng = random.Random(seed * 100003 + index)
+        clients: Dict[str, Client] = {}
+        user = VirtualUser(index=index, client=None, ctx=ctx, rng=rng)
+        try:
+            for _ in range(iterations):
+                name = rng.choices(names, weights)[0]
+                fn, kind, _ = SCENARIOS[name]
+                if kind not in clients:
+                    clients[kind] = _client(kind, index, ctx)
+                user.client, user.scenario = clients[kind], name
+                start = time.perf_counter()
+                try:
+                    fn(user)
+                    ok = True
+                except StepFailed:
+                    ok = False
+                user.samples.append(Sample(name, '*', 0, (time.perf_counter() - start) * 1000, 0, 0, ok))
+                with lock:
+                    done[0] += 1
+                    if on_progress:
+                        on_progress(done[0])
+                if think_ms:
+                    time.sleep(rng.uniform(0, 2 * think_ms) / 1000.0)
+        finally:
+            connection.close()
+        return user.samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users, thread_name_prefix='load-user') as pool:
+        samples = [s for batch in pool.map(virtual_user, range(users)) for s in batch]
+    return report(samples, time.perf_counter() - start)
+
+
+def _summary(rows: List[Sample]) -> Dict[str, Any]:
+    latencies = [row.elapsed_ms for row in rows]
+    queries = [row.queries for row in rows]
+    return {
+        'requests': len(rows),
+        'errors': sum(not row.ok for row in rows),
+        'p50_ms': round(perf.percentile(latencies, 50), 2),
+        'p95_ms': round(perf.percentile(latencies, 95), 2),
+        'p99_ms': round(perf.percentile(latencies, 99), 2),
+        'queries_avg': round(sum(queries) / len(queries), 1) if queries else 0,
+        'queries_max': max(queries) if queries else 0,
+        'duplicates_max': max((row.duplicates for row in rows), default=0),
+        'statuses': sorted({row.status for row in rows if row.status}),
+    }
+
+
+def report(samples: List[Sample], wall_seconds: float) -> Dict[str, Any]:
+    steps: Dict[tuple, List[Sample]] = {}
+    scenarios: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        if sample.step == '*':
+            scenarios.setdefault(sample.scenario, []).append(sample)
+        else:
+            steps.setdefault((sample.scenario, sample.step), []).append(sample)
+    requests = sum(len(rows) for rows in steps.values())
+    return {
+        'wall_seconds': round(wall_seconds, 2),
+        'requests': requests,
+        'requests_per_second': round(requests / wall_seconds, 1) if wall_seconds else 0,
+        'scenarios': {name: _summary(rows) for name, rows in sorted(scenarios.items())},
+        'steps': [
+            {'scenario': scenario, 'step': step, **_summary(rows)}
+            for (scenario, step), rows in steps.items()
+        ],
+    }
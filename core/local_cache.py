@@ -0,0 +1,317 @@
+# core/local_cache.py
+"""
+Per-process L1 cache in front of the shared (Redis) cache.
+
+Hot lookups that are read many times per request, such as item and
+modifier prices while a large cart is priced, are kept in a bounded
+in-process LRU with a short TTL (``L1_CACHE_TTL``). A repeated read is a
+dict lookup; only misses go to Redis.
+
+Entries belong to a namespace (``"menu_item"``, ``"modifier"``, ``"menu"``)
+with a generation counter in Redis. ``invalidate()`` bumps it and
+publishes the change on ``L1_CACHE_CHANNEL``. Every process listens in a
+daemon thread and drops the key (or the whole namespace when it missed a
+message), so entries do not outlive an admin edit. When the subscriber is
+not connected, the generations are polled every ``L1_CACHE_SYNC_INTERVAL``
+seconds instead. Without Redis, generations live in the process, which
+matches a per-process cache backend.
+
+Hit/miss counters are reported by ``CacheService.get_cache_stats()``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _redis():
+    from core.cache_service import CacheService
+    return CacheService.get_redis_client(write=True)
+
+
+def _generation_key(namespace: str) -> str:
+    return f"{_setting('CACHE_KEY_PREFIX', 'rms')}:l1:gen:{namespace}"
+
+
+class LocalCache:
+    """Bounded, thread-safe LRU of ``(namespace, key) -> value`` with per-entry expiry."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, float, int]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    # -- reads and writes ---------------------------------------------
+    def get(self, namespace: str, key: str, default: Any = _MISSING) -> Any:
+        entry_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None:
+                value, expires, generation = entry
+                if expires > time.monotonic() and generation == self._generations.get(namespace, 0):
+                    self._entries.move_to_end(entry_key)
+                    self.hits += 1
+                    return value
+                del self._entries[entry_key]
+            self.misses += 1
+        return default
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def set(self, namespace: str, key: str, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store ``value``. Pass the ``generation()`` read before fetching it, so
+        a value fetched across an invalidation is never served.
+        """
+        if generation is None:
+            generation = self.generation(namespace)
+        with self._lock:
+            if generation != self._generations.get(namespace, 0):
+                return
+            entry_key = (namespace, key)
+            self._entries[entry_key] = (value, time.monotonic() + self.ttl, generation)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # -- invalidation --------------------------------------------------
+    def discard(self, namespace: str, key: Optional[str] = None, generation: Optional[int] = None) -> None:
+        """Drop one key (or the whole namespace) and adopt ``generation``."""
+        with self._lock:
+            current = self._generations.get(namespace, 0)
+            if generation is None:
+                generation = current + 1
+            if key is not None and generation == current + 1:
+                # In sequence: only this key changed
+                self._entries.pop((namespace, key), None)
+                self._bump(namespace, generation, keep_entries=True)
+            elif generation != current:
+                self._bump(namespace, generation, keep_entries=False)
+            else:
+                # Already applied (our own published message)
+                return
+            self.invalidations += 1
+
+    def _bump(self, namespace: str, generation: int, keep_entries: bool) -> None:
+        if keep_entries:
+            # Re-stamp surviving entries with the new generation
+            for entry_key, (value, expires, _) in list(self._entries.items()):
+                if entry_key[0] == namespace:
+                    self._entries[entry_key] = (value, expires, generation)
+        self._generations[namespace] = generation
+
+    def sync(self, generations: Dict[str, int]) -> None:
+        """Adopt generations read from Redis; entries of namespaces that moved go stale."""
+        with self._lock:
+            for namespace, generation in generations.items():
+                if generation != self._generations.get(namespace, 0):
+                    self._generations[namespace] = generation
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+# ----------------------------------------------------------------------
+# Process-wide instance and cross-process invalidation
+# ----------------------------------------------------------------------
+_local: Optional[LocalCache] = None
+_pid: Optional[int] = None
+_subscriber: Optional[threading.Thread] = None
+_subscribed = threading.Event()
+_last_sync = 0.0
+_setup_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return _setting("L1_CACHE_ENABLED", True) and not _setting("CACHE_DISABLED", False)
+
+
+def local() -> LocalCache:
+    """This process's L1 cache (recreated after a fork)."""
+    global _local, _pid
+    if _local is None or _pid != os.getpid():
+        with _setup_lock:
+            if _local is None or _pid != os.getpid():
+                _local = LocalCache(
+                    max_entries=int(_setting("L1_CACHE_MAX_ENTRIES", 5000)),
+                    ttl=float(_setting("L1_CACHE_TTL", 5)),
+                )
+                _pid = os.getpid()
+                _subscribed.clear()
+                _start_subscriber()
+    return _local
+
+
+def _listen(channel: str) -> None:
+    while True:
+        client = _redis()
+        if client is None:
+            return
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(channel)
+            # Messages may have been missed while disconnected
+            _sync_generations(force=True)
+            _subscribed.set()
+            for message in pubsub.listen():
+                try:
+                    data = json.loads(message["data"])
+                    local().discard(data["ns"], data.get("key"), int(data["gen"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        except Exception as e:
+            logger.warning(f"L1 cache invalidation channel lost: {e}")
+        _subscribed.clear()
+        time.sleep(1)
+
+
+def _start_subscriber() -> None:
+    global _subscriber
+    if _redis() is None:
+        return
+    _subscriber = threading.Thread(
+        target=_listen,
+        args=(_setting("L1_CACHE_CHANNEL", "rms:l1:invalidate"),),
+        name="l1-cache-invalidation",
+        daemon=True,
+    )
+    _subscriber.start()
+
+
+def _sync_generations(force: bool = False) -> None:
+    """Poll generations from Redis (only while the subscriber is not connected)."""
+    global _last_sync
+    if not force and (_subscribed.is_set() or time.monotonic() - _last_sync < float(_setting("L1_CACHE_SYNC_INTERVAL", 1))):
+        return
+    _last_sync = time.monotonic()
+    client = _redis()
+    cache = _local
+    if client is None or cache is None:
+        return
+    namespaces = list(cache._generations) or []
+    if not namespaces:
+        return
+    try:
+        values = client.mget([_generation_key(ns) for ns in namespaces])
+    except Exception as e:
+        logger.debug(f"L1 cache generation sync failed: {e}")
+        return
+    cache.sync({ns: int(value or 0) for ns, value in zip(namespaces, values)})
+
+
+def _ensure_namespace(namespace: str) -> None:
+    cache = local()
+    if namespace in cache._generations:
+        return
+    generation = 0
+    client = _redis()
+    if client is not None:
+        try:
+            generation = int(client.get(_generation_key(namespace)) or 0)
+        except Exception:
+            pass
+    cache.sync({namespace: generation})
+
+
+def get_many(namespace: str, keys: Iterable[Any], fetch: Callable[[List[Any]], Dict[Any, Any]]) -> Dict[Any, Any]:
+    """
+    Values of ``keys`` from L1, fetching the rest with ``fetch(missing)``
+    (which returns a dict; absent keys are not cached locally).
+    """
+    keys = list(keys)
+    if not enabled():
+        return fetch(keys)
+    cache = local()
+    _ensure_namespace(namespace)
+    _sync_generations()
+
+    found: Dict[Any, Any] = {}
+    missing = []
+    for key in keys:
+        value = cache.get(namespace, str(key))
+        if value is _MISSING:
+            missing.append(key)
+        else:
+            found[key] = value
+    if missing:
+        generation = cache.generation(namespace)
+        fetched = fetch(missing)
+        for key, value in fetched.items():
+            cache.set(namespace, str(key), value, generation)
+        found.update(fetched)
+    return found
+
+
+def get(namespace: str, key: Any, fetch: Callable[[], Any]) -> Any:
+    """Single-key ``get_many``; ``fetch()`` returning None is not cached locally."""
+    def _fetch(_keys):
+        value = fetch()
+        return {} if value is None else {key: value}
+    return get_many(namespace, [key], _fetch).get(key)
+
+
+def invalidate(namespace: str, key: Any = None) -> None:
+    """
+    Drop ``key`` (or the whole namespace) from every process's L1 cache.
+    Call after the shared cache entry was deleted or rewritten.
+    """
+    key = None if key is None else str(key)
+    client = _redis() if enabled() else None
+    if client is None:
+        if _local is not None:
+            _local.discard(namespace, key)
+        return
+    try:
+        generation = int(client.incr(_generation_key(namespace)))
+        client.publish(
+            _setting("L1_CACHE_CHANNEL", "rms:l1:invalidate"),
+            json.dumps({"ns": namespace, "key": key, "gen": generation}),
+        )
+    except Exception as e:
+        logger.warning(f"L1 cache invalidation of {namespace} failed: {e}")
+        generation = None
+    # Apply locally right away instead of waiting for our own message
+    if _local is not None:
+        _local.discard(namespace, key, generation)
+
+
+def stats() -> Dict[str, Any]:
+    data = local().stats() if enabled() else {'entries': 0, 'hits': 0, 'misses': 0, 'hit_rate': 0.0}
+    data['enabled'] = enabled()
+    data['subscribed'] = _subscribed.is_set()
+    return data
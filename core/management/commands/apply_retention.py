@@ -0,0 +1,75 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.retention import (
+    RetentionError, convert_to_partitioned, get_policies, run_retention,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply the data retention policies in DATA_RETENTION_POLICIES: archive and/or '
+        'delete expired rows in batches and drop expired PostgreSQL partitions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--policy',
+            action='append',
+            dest='policies',
+            help='Policy to apply (repeatable, default: all)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows and partitions would be removed'
+        )
+        parser.add_argument(
+            '--partition',
+            action='store_true',
+            help='Convert tables of policies with "partition" set to monthly partitioned '
+                 'tables first (PostgreSQL, takes an exclusive lock per table)'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the report as JSON'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['partition'] and not options['dry_run']:
+                for policy in get_policies(options['policies']):
+                    if policy.partition:
+                        created = convert_to_partitioned(policy)
+                        self.stdout.write(f'{policy.name}: partitions {", ".join(created) or "up to date"}')
+            results = run_retention(options['policies'], dry_run=options['dry_run'])
+        except RetentionError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps([result.as_dict() for result in results], indent=2))
+            return
+
+        for result in results:
+            if result.error:
+                self.stdout.write(self.style.ERROR(f'{result.policy}: failed: {result.error}'))
+                continue
+            if result.dry_run:
+                line = f'{result.policy}: {result.matched} rows older than {result.cutoff} would be removed'
+            else:
+                line = (
+                    f'{result.policy}: {result.action} {result.deleted} rows older than {result.cutoff} '
+                    f'in {result.batches} batches ({result.seconds}s)'
+                )
+            if result.partitions_dropped:
+                line += f'; partitions dropped: {", ".join(result.partitions_dropped)}'
+            if result.archive_files:
+                line += f'; archived {result.archived} rows to {", ".join(result.archive_files)}'
+            self.stdout.write(line)
+
+        failed = [result.policy for result in results if result.error]
+        if failed:
+            raise CommandError(f'Retention failed for: {", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS('Retention run complete'))
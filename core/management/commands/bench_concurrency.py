@@ -0,0 +1,266 @@
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core import perf
+from core.models import Location, ServiceType
+
+
+# ----------------------------------------------------------------------
+# Endpoints: name -> path(ctx); the native async read path
+# ----------------------------------------------------------------------
+def _menu_display(ctx):
+    return reverse('menu_api:menudisplay-list')
+
+
+def _tables_availability(ctx):
+    return (
+        reverse('reservations:reservations-tables-availability')
+        + f"?date={ctx['day']}&from=18:00&to=22:00&location={ctx['location_id']}"
+    )
+
+
+def _service_type_availability(ctx):
+    if not ctx['service_type_id']:
+        return None
+    path = reverse('core_api:servicetype-availability', args=[ctx['service_type_id']])
+    return f"{path}?date={ctx['day']}"
+
+
+def _portal_availability(ctx):
+    # Requires a session cookie or bearer token (--header)
+    return reverse('reservations_portal:availability') + f"?date={ctx['day']}&time=19:00&end=21:00"
+
+
+ENDPOINTS = {
+    'menu-display': _menu_display,
+    'tables-availability': _tables_availability,
+    'service-type-availability': _service_type_availability,
+    'portal-availability': _portal_availability,
+}
+DEFAULT_ENDPOINTS = ['menu-display', 'tables-availability', 'service-type-availability']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent-request throughput of the hot read endpoints against '
+        'running servers, e.g. the gunicorn sync workers and the uvicorn (ASGI) '
+        'workers side by side (see DEPLOYMENT.md, "ASGI workers").'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            action='append',
+            dest='targets',
+            help='NAME=BASE_URL of a running server (repeatable, default: local=http://127.0.0.1:8000)'
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            dest='endpoints',
+            choices=sorted(ENDPOINTS),
+            help=f'Endpoint to load (repeatable, default: {", ".join(DEFAULT_ENDPOINTS)})'
+        )
+        parser.add_argument(
+            '--concurrency',
+            default='1,8,32,64',
+            help='Comma-separated numbers of concurrent clients'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Requests per endpoint and concurrency level'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=20,
+            help='Unmeasured requests per endpoint before measuring (fills the caches)'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=30.0,
+            help='Per-request timeout in seconds'
+        )
+        parser.add_argument(
+            '--header',
+            action='append',
+            dest='headers',
+            default=[],
+            help='Extra "Name: value" request header, e.g. an Authorization bearer token'
+        )
+        parser.add_argument(
+            '--location',
+            type=int,
+            help='Location ID for table availability (default: first active location)'
+        )
+        parser.add_argument(
+            '--service-type',
+            type=int,
+            help='Service type ID (default: first active service type)'
+        )
+        parser.add_argument(
+            '--json',
+            dest='json_path',
+            help='Write the results to this file as JSON'
+        )
+
+    def handle(self, *args, **options):
+        targets = self._targets(options['targets'] or ['local=http://127.0.0.1:8000'])
+        try:
+            levels = [max(1, int(value)) for value in options['concurrency'].split(',') if value.strip()]
+        except ValueError:
+            raise CommandError('--concurrency must be a comma-separated list of integers')
+        headers = self._headers(options['headers'])
+        paths = self._paths(options['endpoints'] or DEFAULT_ENDPOINTS, options)
+
+        self._report_sync_middleware()
+        self.stdout.write(
+            f"{'target':<10} {'endpoint':<26} {'conc':>4} {'req/s':>8} "
+            f"{'p50':>8} {'p95':>8} {'p99':>8} {'errors':>6}"
+        )
+
+        results = []
+        for name, endpoint_path in paths.items():
+            for level in levels:
+                for target, base in targets.items():
+                    self._run(base, endpoint_path, min(level, options['warmup']) or 1,
+                              options['warmup'], options['timeout'], headers)
+                    result = self._run(base, endpoint_path, level, options['requests'],
+                                       options['timeout'], headers)
+                    result.update({'target': target, 'endpoint': name, 'concurrency': level})
+                    results.append(result)
+                    self.stdout.write(
+                        f"{target:<10} {name:<26} {level:>4} {result['rps']:>8.1f} "
+                        f"{result['p50_ms']:>7.1f} {result['p95_ms']:>7.1f} "
+                        f"{result['p99_ms']:>7.1f} {result['errors']:>6}"
+                    )
+
+        if len(targets) > 1:
+            self._compare(results, list(targets))
+
+        if options.get('json_path'):
+            with open(options['json_path'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} runs completed'))
+
+    # ------------------------------------------------------------------
+    def _targets(self, specs):
+        targets = {}
+        for spec in specs:
+            name, sep, url = spec.partition('=')
+            if not sep:
+                name, url = urlsplit(spec).netloc or spec, spec
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or not parts.netloc:
+                raise CommandError(f'Invalid target URL: {url}')
+            targets[name] = parts
+        return targets
+
+    def _headers(self, specs):
+        headers = {'Accept': 'application/json'}
+        for spec in specs:
+            name, sep, value = spec.partition(':')
+            if not sep:
+                raise CommandError(f'Invalid header: {spec}')
+            headers[name.strip()] = value.strip()
+        return headers
+
+    def _paths(self, endpoints, options):
+        location_id = options['location'] or (
+            Location.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True).first()
+        )
+        service_type_id = options['service_type'] or (
+            ServiceType.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True).first()
+        )
+        ctx = {
+            'day': (timezone.localdate() + timedelta(days=1)).isoformat(),
+            'location_id': location_id or 1,
+            'service_type_id': service_type_id,
+        }
+        paths = {}
+        for name in endpoints:
+            path = ENDPOINTS[name](ctx)
+            if path is None:
+                self.stdout.write(self.style.WARNING(f'Skipping {name}: no data to query'))
+                continue
+            paths[name] = path
+        return paths
+
+    def _report_sync_middleware(self):
+        # A sync-only middleware makes Django run everything below it, views included, in a thread
+        sync_only = [
+            path for path in settings.MIDDLEWARE
+            if not getattr(import_string(path), 'async_capable', False)
+        ]
+        if sync_only:
+            self.stdout.write(self.style.WARNING(
+                'Sync-only middleware (ASGI requests pass through a thread): ' + ', '.join(sync_only)
+            ))
+
+    def _run(self, base, path, concurrency, total, timeout, headers):
+        local = threading.local()
+        opened = []
+        connection_class = http.client.HTTPSConnection if base.scheme == 'https' else http.client.HTTPConnection
+        full_path = base.path.rstrip('/') + path
+
+        def one(_):
+            # One keep-alive connection per client thread
+            conn = getattr(local, 'conn', None)
+            if conn is None:
+                conn = local.conn = connection_class(base.netloc, timeout=timeout)
+                opened.append(conn)
+            start = time.perf_counter()
+            try:
+                conn.request('GET', full_path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                local.conn = None
+                ok = False
+            return (time.perf_counter() - start) * 1000, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(one, range(max(1, total))))
+        elapsed = time.perf_counter() - started
+        for conn in opened:
+            conn.close()
+
+        latencies = [ms for ms, _ in samples]
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for _, ok in samples if not ok),
+            'rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(perf.percentile(latencies, 50), 2),
+            'p95_ms': round(perf.percentile(latencies, 95), 2),
+            'p99_ms': round(perf.percentile(latencies, 99), 2),
+        }
+
+    def _compare(self, results, names):
+        baseline = names[0]
+        self.stdout.write(f'\nThroughput relative to {baseline}:')
+        by_key = {(r['target'], r['endpoint'], r['concurrency']): r for r in results}
+        for (target, endpoint, level), result in by_key.items():
+            if target == baseline:
+                continue
+            base = by_key.get((baseline, endpoint, level))
+            if base and base['rps']:
+                self.stdout.write(
+                    f"  {target:<10} {endpoint:<26} c={level:<4} x{result['rps'] / base['rps']:.2f}"
+                )
@@ -0,0 +1,79 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import perf
+from integrations.options import Address, DeliveryOptionsEngine, FakeQuoteProvider
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure delivery quote latency of the concurrent engine (integrations.options) '
+        'against local fake providers with injected delays, next to the serial sum'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--provider',
+            action='append',
+            dest='providers',
+            help='NAME=DELAY_MS[:fail] fake provider (repeatable, default: DOORDASH=150 UBEREATS=400 GRUBHUB=2500)'
+        )
+        parser.add_argument(
+            '--deadline-ms',
+            type=float,
+            default=1200,
+            help='Overall quote deadline in milliseconds'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Number of checkouts to quote'
+        )
+        parser.add_argument(
+            '--cached',
+            action='store_true',
+            help='Quote the same address every time (measures the cache hit path)'
+        )
+
+    def handle(self, *args, **options):
+        providers = self._providers(options['providers'] or ['DOORDASH=150', 'UBEREATS=400', 'GRUBHUB=2500'])
+        engine = DeliveryOptionsEngine(providers=providers, deadline_ms=options['deadline_ms'])
+        serial_ms = sum(p.delay_ms for p in providers)
+
+        latencies, partial = [], 0
+        run = int(time.time())
+        for i in range(max(1, options['requests'])):
+            postal_code = 'BENCH' if options['cached'] else f'B{run}-{i}'
+            address = Address(street='1 Bench St', city='Bench', postal_code=postal_code)
+            result = engine.quote(address, Decimal('42.00'))
+            latencies.append(result.elapsed_ms)
+            partial += result.partial
+
+        self.stdout.write(
+            'Providers: ' + ', '.join(f'{p.name}={p.delay_ms:.0f}ms{" (fail)" if p.fail else ""}' for p in providers)
+        )
+        self.stdout.write(f'Serial sum of provider latencies: {serial_ms:.0f}ms')
+        self.stdout.write(
+            f"Concurrent engine (deadline {options['deadline_ms']:.0f}ms): "
+            f"p50 {perf.percentile(latencies, 50):.1f}ms, p95 {perf.percentile(latencies, 95):.1f}ms, "
+            f"p99 {perf.percentile(latencies, 99):.1f}ms"
+        )
+        self.stdout.write(f'Partial results (fallback used): {partial}/{len(latencies)}')
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def _providers(self, specs):
+        providers = []
+        for spec in specs:
+            name, sep, rest = spec.partition('=')
+            delay, _, flag = rest.partition(':')
+            try:
+                delay_ms = float(delay)
+            except ValueError:
+                raise CommandError(f'Invalid provider spec: {spec}')
+            if not sep or not name:
+                raise CommandError(f'Invalid provider spec: {spec}')
+            providers.append(FakeQuoteProvider(name.upper(), delay_ms=delay_ms, fail=flag == 'fail'))
+        return providers
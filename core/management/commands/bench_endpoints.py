@@ -0,0 +1,368 @@
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from core import perf
+from core.seed import seed_benchmark_data
+
+
+# ----------------------------------------------------------------------
+# Scenarios: (name, url name, method, client kind, prepare(client, ctx) -> (path, body))
+# ----------------------------------------------------------------------
+def _menu_display(client, ctx):
+    return reverse('menu_api:menudisplay-list'), None
+
+
+def _categories(client, ctx):
+    return reverse('menu_api:menucategory-list'), None
+
+
+def _items(client, ctx):
+    return reverse('menu_api:menuitem-list'), None
+
+
+def _search(client, ctx):
+    return reverse('menu_api:menuitem-search') + '?query=dish', None
+
+
+def _cart_list(client, ctx):
+    return reverse('orders_api:cart-list'), None
+
+
+def _cart_add(client, ctx):
+    item_ids = ctx['menu_item_ids']
+    ctx['add_counter'] = ctx.get('add_counter', 0) + 1
+    item_id = item_ids[ctx['add_counter'] % len(item_ids)]
+    return reverse('orders_api:cart-add-item'), {'menu_item_id': item_id, 'quantity': 1}
+
+
+def _cart_update(client, ctx):
+    cart = client.get(reverse('orders_api:cart-list')).json()
+    items = cart.get('items') or []
+    if not items:
+        client.post(
+            reverse('orders_api:cart-add-item'),
+            {'menu_item_id': ctx['menu_item_ids'][0], 'quantity': 1},
+            content_type='application/json',
+        )
+        items = client.get(reverse('orders_api:cart-list')).json().get('items') or []
+    line = items[0]
+    return reverse('orders_api:cart-update-item'), {
+        'cart_item_id': line['id'], 'quantity': (line.get('quantity') or 1) % 5 + 1,
+    }
+
+
+def _order_list(client, ctx):
+    return reverse('orders_api:order-list'), None
+
+
+def _checkout(client, ctx):
+    client.post(
+        reverse('orders_api:cart-add-item'),
+        {'menu_item_id': ctx['menu_item_ids'][0], 'quantity': 2},
+        content_type='application/json',
+    )
+    cart = client.get(reverse('orders_api:cart-list')).json()
+    return reverse('orders_api:order-list'), {'cart_uuid': cart['cart_uuid']}
+
+
+def _kitchen_queue(client, ctx):
+    return reverse('orders_api:orderitem-preparation-queue'), None
+
+
+def _tables_availability(client, ctx):
+    day = (timezone.localdate() + timedelta(days=1)).isoformat()
+    return (
+        reverse('reservations:reservations-tables-availability')
+        + f"?date={day}&from=18:00&to=22:00&location={ctx['location_id']}"
+    ), None
+
+
+def _service_type_availability(client, ctx):
+    day = (timezone.localdate() + timedelta(days=1)).isoformat()
+    path = reverse('core_api:servicetype-availability', args=[ctx['service_type_id']])
+    return f'{path}?date={day}', None
+
+
+def _analytics_overview(client, ctx):
+    return reverse('reports:order-analytics-overview'), None
+
+
+def _ubereats_webhook(client, ctx):
+    return reverse('orders_api:ubereats_webhook'), {
+        'event_type': 'orders.notification', 'order_id': 'bench-order',
+    }
+
+
+def _stripe_webhook(client, ctx):
+    # A fresh intent and event per request: an unknown intent is a 500 (so
+    # Stripe retries) and a repeated event id only measures deduplication
+    from orders.models import Order
+    from payments.models import StripePaymentIntent
+
+    intent_id = f'pi_bench_{uuid.uuid4().hex[:16]}'
+    StripePaymentIntent.objects.create(
+        idempotency_key=uuid.uuid4(),
+        stripe_payment_intent_id=intent_id,
+        amount_cents=1000,
+        order=Order.objects.filter(user__username=ctx['usernames'][0]).order_by('-pk').first(),
+    )
+    return reverse('payments_api:stripe_webhook'), {
+        'id': f'evt_{intent_id}', 'type': 'payment_intent.succeeded',
+        'data': {'object': {'id': intent_id, 'object': 'payment_intent', 'metadata': {}}},
+    }
+
+
+SCENARIOS = [
+    ('menu-display', 'menu_api:menudisplay-list', 'get', 'anonymous', _menu_display),
+    ('menu-categories', 'menu_api:menucategory-list', 'get', 'anonymous', _categories),
+    ('menu-items', 'menu_api:menuitem-list', 'get', 'anonymous', _items),
+    ('menu-search', 'menu_api:menuitem-search', 'get', 'anonymous', _search),
+    ('cart', 'orders_api:cart-list', 'get', 'customer', _cart_list),
+    ('cart-add-item', 'orders_api:cart-add-item', 'post', 'customer', _cart_add),
+    ('cart-update-item', 'orders_api:cart-update-item', 'patch', 'customer', _cart_update),
+    ('order-history', 'orders_api:order-list', 'get', 'customer', _order_list),
+    ('checkout', 'orders_api:order-create', 'post', 'customer', _checkout),
+    ('kitchen-queue', 'orders_api:orderitem-preparation-queue', 'get', 'staff', _kitchen_queue),
+    ('tables-availability', 'reservations:reservations-tables-availability', 'get', 'anonymous', _tables_availability),
+    ('service-type-availability', 'core_api:servicetype-availability', 'get', 'anonymous', _service_type_availability),
+    ('analytics-overview', 'reports:order-analytics-overview', 'get', 'staff', _analytics_overview),
+    ('ubereats-webhook', 'orders_api:ubereats_webhook', 'post', 'anonymous', _ubereats_webhook),
+    ('stripe-webhook', 'payments_api:stripe_webhook', 'post', 'anonymous', _stripe_webhook),
+]
+
+# Statuses a scenario must answer with (default 200)
+EXPECTED_STATUS = {
+    'cart-add-item': (200, 201),
+    'checkout': (201,),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark hot API endpoints against PERF_BUDGETS (query count, duplicate '
+        'queries, latency). Seeds a throwaway test database by default and exits '
+        'non-zero when any budget is exceeded, so it can gate CI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=5,
+            help='Measured requests per scenario (the first one runs with a cold cache)'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help='Scenario name to run (repeatable, default: all)'
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='List scenario names and exit'
+        )
+        parser.add_argument(
+            '--use-existing-db',
+            action='store_true',
+            help='Run against the configured database instead of a throwaway test database'
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the test database between runs'
+        )
+        parser.add_argument(
+            '--skip-latency',
+            action='store_true',
+            help='Only enforce query budgets (latency is reported but not enforced)'
+        )
+        parser.add_argument(
+            '--json',
+            dest='json_path',
+            help='Write the results to this file as JSON'
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Print statements repeated within a request (N+1 candidates)'
+        )
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, route, method, kind, _ in SCENARIOS:
+                self.stdout.write(f'{name:<28} {method.upper():<6} {route} ({kind})')
+            return
+
+        selected = options.get('scenarios')
+        scenarios = [s for s in SCENARIOS if not selected or s[0] in selected]
+        if selected and len(scenarios) != len(set(selected)):
+            known = {s[0] for s in SCENARIOS}
+            raise CommandError(f'Unknown scenario(s): {", ".join(sorted(set(selected) - known))}')
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        if not options['use_existing_db']:
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, keepdb=options['keepdb']
+            )
+        try:
+            results = self._run(scenarios, options)
+        finally:
+            if not options['use_existing_db']:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if options.get('json_path'):
+            with open(options['json_path'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+
+        failures = [r for r in results if r['violations']]
+        if failures:
+            lines = [f"{r['scenario']}: {'; '.join(r['violations'])}" for r in failures]
+            raise CommandError('Performance budgets exceeded:\n  ' + '\n  '.join(lines))
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} scenarios within budget'))
+
+    # ------------------------------------------------------------------
+    def _run(self, scenarios, options):
+        ctx = seed_benchmark_data()
+        ctx['staff_username'] = self._ensure_staff_user()
+        iterations = max(1, options['iterations'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(scenarios)} scenarios x {iterations} iterations '
+            f"({len(ctx['menu_item_ids'])} menu items seeded)"
+        ))
+        self.stdout.write(
+            f"{'scenario':<28} {'status':>6} {'q cold':>6} {'q warm':>6} {'dup':>4} "
+            f"{'hit/miss':>9} {'p50':>8} {'p95':>8} {'p99':>8}  budget"
+        )
+
+        with _signed_stripe_webhooks() as stripe_secret:
+            ctx['stripe_secret'] = stripe_secret
+            return [self._run_scenario(scenario, ctx, iterations, options) for scenario in scenarios]
+
+    def _run_scenario(self, scenario, ctx, iterations, options):
+        name, route, method, kind, prepare = scenario
+        client = self._client(kind, ctx)
+        budget = perf.budget_for(route)
+        samples = []
+
+        cache.clear()
+        for _ in range(iterations):
+            path, body = prepare(client, ctx)
+            kwargs = self._request_kwargs(name, body, ctx)
+            with perf.measure(route) as metrics:
+                start = time.perf_counter()
+                response = getattr(client, method)(path, **kwargs)
+                elapsed = time.perf_counter() - start
+            samples.append((metrics, elapsed, response.status_code))
+
+        cold = samples[0][0]
+        query_counts = [m.query_count for m, _, _ in samples]
+        latencies = [elapsed * 1000 for _, elapsed, _ in samples]
+        statuses = sorted({code for _, _, code in samples})
+        worst = max((m for m, _, _ in samples), key=lambda m: (m.query_count, m.duplicate_queries))
+
+        # Query budgets apply to the worst request, latency budgets to p95
+        violations = worst.budget_violations(
+            perf.Budget(queries=budget.queries, duplicates=budget.duplicates)
+        )
+        p95 = perf.percentile(latencies, 95)
+        if not options['skip_latency'] and budget.ms is not None and p95 > budget.ms:
+            violations.append(f'p95 {p95:.1f}ms > budget {budget.ms}ms')
+        # A scenario answering with an error measures the error path, not the endpoint
+        expected = EXPECTED_STATUS.get(name, (200,))
+        if any(code not in expected for code in statuses):
+            violations.append(f'unexpected status ({", ".join(map(str, statuses))})')
+
+        result = {
+            'scenario': name,
+            'route': route,
+            'status': statuses,
+            'queries_cold': query_counts[0],
+            'queries_warm': min(query_counts),
+            'duplicates': worst.duplicate_queries,
+            'cache_hits': sum(m.cache_hits for m, _, _ in samples),
+            'cache_misses': sum(m.cache_misses for m, _, _ in samples),
+            'p50_ms': round(perf.percentile(latencies, 50), 2),
+            'p95_ms': round(p95, 2),
+            'p99_ms': round(perf.percentile(latencies, 99), 2),
+            'budget': {'queries': budget.queries, 'duplicates': budget.duplicates, 'ms': budget.ms},
+            'violations': violations,
+        }
+
+        verdict = self.style.SUCCESS('ok') if not violations else self.style.ERROR('; '.join(violations))
+        self.stdout.write(
+            f"{name:<28} {'/'.join(map(str, statuses)):>6} {result['queries_cold']:>6} "
+            f"{result['queries_warm']:>6} {result['duplicates']:>4} "
+            f"{result['cache_hits']:>4}/{result['cache_misses']:<4} "
+            f"{result['p50_ms']:>7.1f} {result['p95_ms']:>7.1f} {result['p99_ms']:>7.1f}  {verdict}"
+        )
+        if options['verbose']:
+            for sql, count in cold.repeated_statements(threshold=2):
+                self.stdout.write(f'    {count}x {sql[:160]}')
+        return result
+
+    def _request_kwargs(self, name, body, ctx):
+        if body is None:
+            return {}
+        payload = json.dumps(body)
+        kwargs = {'data': payload, 'content_type': 'application/json'}
+        if name == 'stripe-webhook':
+            timestamp = int(time.time())
+            signature = hmac.new(
+                ctx['stripe_secret'].encode(), f'{timestamp}.{payload}'.encode(), hashlib.sha256
+            ).hexdigest()
+            kwargs['HTTP_STRIPE_SIGNATURE'] = f't={timestamp},v1={signature}'
+        return kwargs
+
+    def _client(self, kind, ctx):
+        client = Client()
+        User = get_user_model()
+        if kind == 'customer':
+            client.force_login(User.objects.get(username=ctx['usernames'][0]))
+        elif kind == 'staff':
+            client.force_login(User.objects.get(username=ctx['staff_username']))
+        return client
+
+    def _ensure_staff_user(self):
+        User = get_user_model()
+        user, _ = User.objects.get_or_create(
+            username='bench_staff',
+            defaults={'email': 'bench_staff@example.com', 'is_staff': True, 'password': make_password(None)},
+        )
+        if not user.is_staff:
+            user.is_staff = True
+            user.save(update_fields=['is_staff'])
+        return user.username
+
+
+class _signed_stripe_webhooks:
+    """Give the Stripe webhook view a known signing secret for the run."""
+
+    def __enter__(self):
+        from payments.views import stripe_service
+        self._service = stripe_service
+        self._original = stripe_service.stripe_webhook_secret
+        if not self._original:
+            stripe_service.stripe_webhook_secret = 'whsec_benchmark'
+        return stripe_service.stripe_webhook_secret
+
+    def __exit__(self, *exc):
+        self._service.stripe_webhook_secret = self._original
+        return False
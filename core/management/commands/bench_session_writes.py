@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure database writes per anonymous page view for each session engine. '
+        'Runs against the configured database; sessions and guest carts it creates '
+        'are regular rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Number of measured page views per engine (after one warm-up view)'
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help='Path to browse (repeatable, default: / and /cart/bar/)'
+        )
+        parser.add_argument(
+            '--engine',
+            action='append',
+            dest='engines',
+            help='SESSION_ENGINE to compare (repeatable)'
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Print every write statement'
+        )
+
+    def handle(self, *args, **options):
+        paths = options.get('paths') or ['/', '/cart/bar/']
+        engines = options.get('engines') or [
+            'django.contrib.sessions.backends.cached_db',
+            'core.session_store',
+        ]
+        total_requests = max(1, options['requests'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Anonymous browsing: {total_requests} views over {", ".join(paths)}'
+        ))
+        for engine in engines:
+            with override_settings(SESSION_ENGINE=engine):
+                writes, elapsed, statements = self._browse(paths, total_requests)
+            per_request = writes / total_requests
+            self.stdout.write(
+                f'{engine:<48} writes={writes:<5} writes/request={per_request:.2f} '
+                f'avg={elapsed / total_requests * 1000:.1f}ms'
+            )
+            if options['verbose']:
+                for sql in statements:
+                    self.stdout.write(f'    {sql[:160]}')
+
+    def _browse(self, paths, total_requests):
+        client = Client(HTTP_HOST='localhost')
+        # Warm-up view creates the session and guest cart (expected writes)
+        client.get(paths[0])
+
+        statements = []
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            for i in range(total_requests):
+                client.get(paths[i % len(paths)])
+        elapsed = time.perf_counter() - start
+
+        for query in ctx.captured_queries:
+            sql = query['sql'].lstrip()
+            if sql.upper().startswith(WRITE_PREFIXES):
+                statements.append(sql)
+        return len(statements), elapsed, statements
@@ -1,18 +1,19 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.core.cache import cache
 from django.conf import settings
+from core import warmup
 from core.cache_service import CacheService
 from core.cache_decorators import invalidate_cache_pattern
 import time
 
 
 class Command(BaseCommand):
-    help = 'Manage application cache - warm up, clear, or get statistics'
+    help = 'Manage application cache - warm up (core.warmup datasets), clear, or get statistics'
 
     def add_arguments(self, parser):
         parser.add_argument(
             'action',
-            choices=['warmup', 'clear', 'stats', 'clear-pattern'],
+            choices=['warmup', 'clear', 'stats', 'clear-pattern', 'datasets'],
             help='Action to perform on cache'
         )
         
@@ -29,6 +30,19 @@ class Command(BaseCommand):
             help='Organization ID for cache operations'
         )
         
+        parser.add_argument(
+            '--dataset',
+            action='append',
+            dest='datasets',
+            help='Dataset to warm (repeatable, default: all; see the datasets action)'
+        )
+
+        parser.add_argument(
+            '--no-warmup',
+            action='store_true',
+            help='Do not rebuild the hot datasets after clear'
+        )
+        
         parser.add_argument(
             '--verbose',
             action='store_true',
@@ -41,9 +55,11 @@ class Command(BaseCommand):
         organization_id = options['organization_id']
         
         if action == 'warmup':
-            self.warmup_cache(organization_id, verbose)
+            self.warmup_cache(organization_id, verbose, options.get('datasets'))
+        elif action == 'datasets':
+            self.list_datasets()
         elif action == 'clear':
-            self.clear_cache(verbose)
+            self.clear_cache(verbose, rewarm=not options['no_warmup'])
         elif action == 'stats':
             self.show_stats(verbose)
         elif action == 'clear-pattern':
@@ -52,102 +68,43 @@ class Command(BaseCommand):
                 raise CommandError('--pattern is required for clear-pattern action')
             self.clear_pattern(pattern, verbose)
 
-    def warmup_cache(self, organization_id, verbose=False):
-        """Warm up cache with commonly accessed data."""
+    def warmup_cache(self, organization_id, verbose=False, datasets=None):
+        """Rebuild the registered hot datasets (core.warmup)."""
         self.stdout.write(self.style.SUCCESS('Starting cache warmup...'))
         start_time = time.time()
-        
-        try:
-            # Warm up menu items
-            if verbose:
-                self.stdout.write('Warming up menu items...')
-            
-            from menu.models import MenuItem, MenuCategory
-            
-            # Cache menu items
-            menu_items = list(MenuItem.objects.filter(
-                is_available=True
-            ).select_related('category').order_by('category__name', 'name').values(
-                'id', 'name', 'description', 'price', 'image', 
-                'category__name', 'category_id', 'is_vegetarian', 'preparation_time'
-            ))
-            
-            CacheService.set_menu_items(organization_id, menu_items)
-            
-            # Cache menu categories
-            categories = list(MenuCategory.objects.filter(
-                items__is_available=True
-            ).distinct().order_by('name').values('id', 'name', 'description'))
-            
-            cache.set(
-                f"menu_categories:{organization_id}", 
-                categories, 
-                3600
-            )
-            
-            # Cache individual menu items
-            for item in menu_items[:20]:  # Cache top 20 items
-                item_id = item['id']
-                cache.set(
-                    f"menu_item:{item_id}", 
-                    item, 
-                    3600
-                )
-            
-            self.stdout.write(f"✓ Cached {len(menu_items)} menu items and {len(categories)} categories")
-            
-            # Warm up popular items
-            if verbose:
-                self.stdout.write('Warming up popular items...')
-            
-            from orders.cache_utils import get_popular_items_cached
-            get_popular_items_cached(organization_id, 10)
-            
-            # Warm up tables data
-            if verbose:
-                self.stdout.write('Warming up tables data...')
-            
-            # Import and warm up tables
-            try:
-                from storefront.api import api_tables
-                from django.http import HttpRequest
-                
-                # Create a mock request for warming up
-                mock_request = HttpRequest()
-                mock_request.method = 'GET'
-                
-                # This will populate the cache
-                api_tables(mock_request)
-            except Exception as e:
-                if verbose:
-                    self.stdout.write(f'Warning: Could not warm up tables data: {e}')
-            
-            # Warm up analytics data
-            if verbose:
-                self.stdout.write('Warming up analytics data...')
-            
-            # Cache some basic analytics data
-            cache.set(
-                f'analytics_daily_stats:{organization_id}',
-                {'revenue': 0, 'orders': 0, 'customers': 0},
-                timeout=3600
-            )
-            
-            elapsed = time.time() - start_time
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Cache warmup completed in {elapsed:.2f} seconds'
-                )
-            )
-            
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'Cache warmup failed: {str(e)}')
+
+        known = {dataset.name for dataset in warmup.datasets()}
+        unknown = sorted(set(datasets or []) - known)
+        if unknown:
+            raise CommandError(f'Unknown dataset(s): {", ".join(unknown)}')
+
+        results = CacheService.warm_cache(organization_id, datasets=datasets)
+        failed = []
+        for name, result in results.items():
+            if result['ok']:
+                line = f"✓ {name} ({result['ms']:.0f} ms)"
+                if verbose and result.get('detail') is not None:
+                    line += f": {result['detail']}"
+                self.stdout.write(line)
+            else:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f"✗ {name}: {result['error']}"))
+
+        elapsed = time.time() - start_time
+        if failed:
+            raise CommandError(f'Cache warmup failed for: {", ".join(failed)}')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Cache warmup completed in {elapsed:.2f} seconds'
             )
-            raise CommandError(f'Cache warmup failed: {str(e)}')
+        )
+
+    def list_datasets(self):
+        for dataset in warmup.datasets():
+            self.stdout.write(f'{dataset.name:<20} {dataset.description}')
 
-    def clear_cache(self, verbose=False):
-        """Clear all cache."""
+    def clear_cache(self, verbose=False, rewarm=True):
+        """Clear all cache, then rebuild the hot datasets before customers do."""
         self.stdout.write(self.style.WARNING('Clearing all cache...'))
         
         try:
@@ -159,6 +116,9 @@ class Command(BaseCommand):
             )
             raise CommandError(f'Failed to clear cache: {str(e)}')
 
+        if rewarm and getattr(settings, 'CACHE_WARMUP_ENABLED', True):
+            self.warmup_cache(None, verbose)
+
     def clear_pattern(self, pattern, verbose=False):
         """Clear cache by pattern."""
         self.stdout.write(
@@ -189,6 +149,13 @@ class Command(BaseCommand):
             self.stdout.write(f"Total Keys: {stats.get('total_keys', 'N/A')}")
             self.stdout.write(f"Memory Usage: {stats.get('memory_usage', 'N/A')}")
             self.stdout.write(f"Hit Rate: {stats.get('hit_rate', 'N/A')}%")
+            local = stats.get('local', {})
+            if local.get('enabled'):
+                self.stdout.write(
+                    f"L1 (this process): {local['entries']}/{local['max_entries']} entries, "
+                    f"{local['hits']} hits, {local['misses']} misses ({local['hit_rate']:.1f}%), "
+                    f"{local['evictions']} evictions, {local['invalidations']} invalidations"
+                )
             
             if verbose and 'recent_keys' in stats:
                 self.stdout.write('\nRecent Cache Keys:')
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from core.models import OutboundEmail
+from core.outbox import drain, requeue_dead
+
+
+class Command(BaseCommand):
+    help = 'Send due messages from the transactional email outbox over one connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Maximum number of messages to handle (default: everything due)'
+        )
+        parser.add_argument(
+            '--backend',
+            help='Email backend to send with, e.g. django.core.mail.backends.filebased.EmailBackend '
+                 '(default: EMAIL_OUTBOX_BACKEND or EMAIL_BACKEND)'
+        )
+        parser.add_argument(
+            '--requeue-dead',
+            action='store_true',
+            help='Give dead letters a fresh set of attempts before draining'
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Only print message counts per status'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            counts = dict(
+                OutboundEmail.objects.values_list('status').annotate(total=Count('pk')).order_by()
+            )
+            for status, _ in OutboundEmail.STATUS_CHOICES:
+                self.stdout.write(f'{status:<8} {counts.get(status, 0)}')
+            return
+
+        if options['requeue_dead']:
+            requeued = requeue_dead()
+            self.stdout.write(f'Requeued {requeued} dead letters')
+
+        result = drain(limit=options['limit'], backend=options['backend'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {result["sent"]}, retried {result["retried"]}, '
+            f'dead {result["dead"]}, throttled {result["throttled"]}'
+        ))
@@ -0,0 +1,155 @@
+import json
+import sys
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core import loadtest
+from core.fakes import FakeIntegrations, FakeStripe
+from core.seed import seed_load_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive scripted scenarios (browse, cart, checkout, reservation, kitchen) '
+        'with concurrent virtual users against in-process fakes of Stripe and the '
+        'delivery platforms, and report p50/p95/p99 latency and queries per '
+        'request for every step. Seeds a throwaway test database by default; '
+        'use a PostgreSQL database, since every virtual user opens its own '
+        'connection.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users')
+        parser.add_argument('--iterations', type=int, default=10, help='Scenarios run by each virtual user')
+        parser.add_argument(
+            '--mix',
+            help='Scenario weights as NAME=WEIGHT,... (default: '
+                 + ','.join(f'{name}={weight}' for name, (_, _, weight) in loadtest.SCENARIOS.items()) + ')'
+        )
+        parser.add_argument('--think-ms', type=float, default=0, help='Mean pause between scenarios of a user')
+        parser.add_argument('--stripe-latency-ms', type=float, default=250, help='Latency of every fake Stripe call')
+        parser.add_argument('--delivery-latency-ms', type=float, default=300, help='Latency of fake delivery platform calls')
+        parser.add_argument('--jitter-ms', type=float, default=50, help='+/- jitter applied to the fake latencies')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of fake external calls that fail')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for scenario choice and data')
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for the seeded data volume')
+        parser.add_argument(
+            '--use-existing-db',
+            action='store_true',
+            help='Run against the configured database (seeding it if needed) instead of a test database'
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs')
+        parser.add_argument('--json', dest='json_path', help='Write the report to this file as JSON')
+
+    def handle(self, *args, **options):
+        mix = self._mix(options['mix'])
+        users = max(1, options['users'])
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        if not options['use_existing_db']:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            result = self._run(mix, users, options)
+        finally:
+            if not options['use_existing_db']:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self._print(result)
+        if options.get('json_path'):
+            with open(options['json_path'], 'w') as fh:
+                json.dump(result, fh, indent=2)
+
+        errors = sum(row['errors'] for row in result['scenarios'].values())
+        total = sum(row['requests'] for row in result['scenarios'].values())
+        message = f"{total} scenarios, {result['requests']} requests, {errors} failed scenarios"
+        self.stdout.write(self.style.SUCCESS(message) if not errors else self.style.WARNING(message))
+
+    # ------------------------------------------------------------------
+    def _mix(self, spec):
+        if not spec:
+            return {name: weight for name, (_, _, weight) in loadtest.SCENARIOS.items()}
+        mix = {}
+        for part in spec.split(','):
+            name, _, weight = part.strip().partition('=')
+            if name not in loadtest.SCENARIOS:
+                raise CommandError(f'Unknown scenario: {name} (known: {", ".join(loadtest.SCENARIOS)})')
+            try:
+                mix[name] = int(weight or 1)
+            except ValueError:
+                raise CommandError(f'Invalid weight for {name}: {weight}')
+        if not any(mix.values()):
+            raise CommandError('--mix needs at least one scenario with a positive weight')
+        return mix
+
+    def _run(self, mix, users, options):
+        scale = max(0.01, options['scale'])
+        ctx = seed_load_data(
+            categories=max(1, int(30 * scale)),
+            tables=max(users, int(60 * scale)),
+            users=max(users, int(200 * scale)),
+            orders_per_user=max(1, int(10 * scale)),
+        )
+        cache.clear()
+        total = users * max(1, options['iterations'])
+        self.stdout.write(
+            f"{len(ctx['menu_item_ids'])} menu items, {len(ctx['table_ids'])} tables, "
+            f"{len(ctx['usernames'])} customers; {users} virtual users x {options['iterations']} scenarios"
+        )
+
+        def progress(done):
+            if done % max(1, total // 10) == 0 or done == total:
+                sys.stderr.write(f'\r  {done}/{total} scenarios')
+                sys.stderr.flush()
+
+        stripe_fake = FakeStripe(
+            latency_ms=options['stripe_latency_ms'], jitter_ms=options['jitter_ms'],
+            failure_rate=options['failure_rate'],
+        )
+        integrations_fake = FakeIntegrations(
+            latency_ms=options['delivery_latency_ms'], jitter_ms=options['jitter_ms'],
+            failure_rate=options['failure_rate'],
+        )
+        with stripe_fake, integrations_fake:
+            ctx['stripe'] = stripe_fake
+            result = loadtest.run(
+                ctx, mix, users, max(1, options['iterations']),
+                think_ms=options['think_ms'], seed=options['seed'], on_progress=progress,
+            )
+        sys.stderr.write('\n')
+        result['fake_calls'] = {'stripe': stripe_fake.calls, 'integrations': integrations_fake.calls}
+        result['config'] = {
+            'users': users, 'iterations': options['iterations'], 'mix': mix,
+            'stripe_latency_ms': options['stripe_latency_ms'],
+            'delivery_latency_ms': options['delivery_latency_ms'],
+            'failure_rate': options['failure_rate'],
+        }
+        return result
+
+    def _print(self, result):
+        header = (
+            f"{'step':<32} {'reqs':>6} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8} "
+            f"{'q avg':>6} {'q max':>6} {'dup':>4}"
+        )
+        self.stdout.write(header)
+        for row in result['steps']:
+            self.stdout.write(
+                f"{row['scenario'] + '/' + row['step']:<32} {row['requests']:>6} {row['errors']:>5} "
+                f"{row['p50_ms']:>7.1f} {row['p95_ms']:>7.1f} {row['p99_ms']:>7.1f} "
+                f"{row['queries_avg']:>6} {row['queries_max']:>6} {row['duplicates_max']:>4}"
+            )
+        self.stdout.write('')
+        self.stdout.write(f"{'scenario':<32} {'runs':>6} {'fail':>5} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for name, row in result['scenarios'].items():
+            self.stdout.write(
+                f"{name:<32} {row['requests']:>6} {row['errors']:>5} "
+                f"{row['p50_ms']:>7.1f} {row['p95_ms']:>7.1f} {row['p99_ms']:>7.1f}"
+            )
+        self.stdout.write(
+            f"{result['requests']} requests in {result['wall_seconds']}s "
+            f"({result['requests_per_second']} req/s)"
+        )
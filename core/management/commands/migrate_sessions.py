@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.cache_service import CacheService
+
+
+class Command(BaseCommand):
+    help = 'Copy active database sessions into the Redis session store (core.session_store)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of sessions written per Redis pipeline'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many sessions would be migrated'
+        )
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE != 'core.session_store':
+            self.stdout.write(self.style.WARNING(
+                f'SESSION_ENGINE is {settings.SESSION_ENGINE}; sessions will be '
+                'copied but not read from Redis until the engine is switched.'
+            ))
+
+        active = Session.objects.filter(expire_date__gt=timezone.now()).count()
+        if options['dry_run']:
+            self.stdout.write(f'{active} active sessions would be migrated')
+            return
+
+        if CacheService.get_redis_client() is None:
+            raise CommandError('Default cache is not Redis-backed; nothing to migrate into')
+
+        from core.session_store import SessionStore
+        migrated = SessionStore.hydrate_from_database(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Migrated {migrated} of {active} active sessions into Redis'
+        ))
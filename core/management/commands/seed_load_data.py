@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.seed import seed_load_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large menu, floor plan, customers and order history for load '
+        'testing (idempotent, written with bulk inserts). See load_test.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=30, help='Top-level menu categories')
+        parser.add_argument('--subcategories', type=int, default=2, help='Subcategories per top-level category')
+        parser.add_argument('--items-per-category', type=int, default=40, help='Menu items per top-level category')
+        parser.add_argument('--tables', type=int, default=60, help='Tables in the floor plan')
+        parser.add_argument('--users', type=int, default=200, help='Customer accounts')
+        parser.add_argument('--orders-per-user', type=int, default=10, help='Completed orders per customer')
+        parser.add_argument('--open-orders', type=int, default=50, help='Confirmed orders waiting in the kitchen queue')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        ctx = seed_load_data(
+            categories=options['categories'],
+            subcategories=options['subcategories'],
+            items_per_category=options['items_per_category'],
+            tables=options['tables'],
+            users=options['users'],
+            orders_per_user=options['orders_per_user'],
+            open_orders=options['open_orders'],
+        )
+        created = ', '.join(f'{count} {name}' for name, count in ctx['created'].items())
+        self.stdout.write(f'Created: {created}')
+        self.stdout.write(
+            f"Menu items: {len(ctx['menu_item_ids'])}, tables: {len(ctx['table_ids'])}, "
+            f"customers: {len(ctx['usernames'])} (password {ctx['password']}), staff: {ctx['staff_username']}"
+        )
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {time.perf_counter() - start:.1f}s'))
@@ -1,30 +1,43 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from django.utils import timezone
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
 from core.models import Location
+from core.tables import apply_floor_plan
 
 
 class Command(BaseCommand):
-    help = 'Synchronize tables across all three apps (reservations, core, inventory)'
+    help = (
+        'Apply a floor plan to the canonical table registry (core.Table) in one '
+        'transaction per location, either from a JSON file or from the legacy '
+        'inventory.Table rows'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
-            '--source',
+            '--file',
             type=str,
-            choices=['reservations', 'core', 'inventory'],
-            help='Source app to sync from (default: auto-detect)'
+            help='JSON floor plan: a list of {"table_number", "capacity", "is_active", '
+                 '"table_type"} objects (requires --location), or an object mapping '
+                 'location IDs to such lists'
         )
         parser.add_argument(
-            '--target',
-            type=str,
-            choices=['reservations', 'core', 'inventory'],
-            help='Target app to sync to (default: all others)'
+            '--from-inventory',
+            action='store_true',
+            help='Import legacy inventory.Table rows missing from the registry; asset '
+                 'fields are moved by migrate_inventory_tables'
         )
         parser.add_argument(
             '--location',
             type=int,
             help='Sync tables for specific location ID only'
         )
+        parser.add_argument(
+            '--deactivate-missing',
+            action='store_true',
+            help='Deactivate registry tables that are not in the floor plan'
+        )
         parser.add_argument(
             '--dry-run',
             action='store_true',
@@ -32,138 +45,83 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        # Import models dynamically to avoid import errors
-        try:
-            from reservations.models import Table as ReservationTable
-        except ImportError:
-            ReservationTable = None
-            
-        try:
-            from core.models import Table as CoreTable
-        except ImportError:
-            CoreTable = None
-            
-        try:
-            from inventory.models import Table as InventoryTable
-        except ImportError:
-            InventoryTable = None
-
-        models = {
-            'reservations': ReservationTable,
-            'core': CoreTable,
-            'inventory': InventoryTable
-        }
-        
-        available_models = {k: v for k, v in models.items() if v is not None}
-        
-        if len(available_models) < 2:
-            self.stdout.write(
-                self.style.ERROR('At least 2 table models must be available for synchronization')
-            )
-            return
+        if bool(options['file']) == bool(options['from_inventory']):
+            raise CommandError('Pass exactly one of --file or --from-inventory')
 
-        source = options.get('source')
-        target = options.get('target')
-        location_id = options.get('location')
-        dry_run = options.get('dry_run')
-
-        # Auto-detect source if not specified (use the one with most tables)
-        if not source:
-            table_counts = {}
-            for app_name, model in available_models.items():
-                count = model.objects.filter(is_active=True).count()
-                table_counts[app_name] = count
-            source = max(table_counts, key=table_counts.get)
-            self.stdout.write(f'Auto-detected source: {source} ({table_counts[source]} tables)')
+        if options['file']:
+            plans = self._plans_from_file(options['file'], options['location'])
+        else:
+            plans = self._plans_from_inventory(options['location'])
 
-        source_model = available_models.get(source)
-        if not source_model:
+        totals = {'created': 0, 'updated': 0, 'deactivated': 0, 'unchanged': 0}
+        locations = Location.objects.in_bulk(list(plans))
+        for location_id, entries in plans.items():
+            location = locations.get(location_id)
+            if location is None:
+                raise CommandError(f'Location {location_id} does not exist')
+            try:
+                counts = apply_floor_plan(
+                    location,
+                    entries,
+                    deactivate_missing=options['deactivate_missing'],
+                    dry_run=options['dry_run'],
+                )
+            except ValidationError as e:
+                raise CommandError(f'Invalid floor plan for location {location_id}: {e}')
+            for name, value in counts.items():
+                totals[name] += value
             self.stdout.write(
-                self.style.ERROR(f'Source model "{source}" not available')
+                f'{location.name}: {counts["created"]} created, {counts["updated"]} updated, '
+                f'{counts["deactivated"]} deactivated, {counts["unchanged"]} unchanged'
             )
-            return
-
-        # Get source tables
-        source_tables = source_model.objects.filter(is_active=True)
-        if location_id:
-            source_tables = source_tables.filter(location_id=location_id)
-        source_tables = source_tables.select_related('location')
 
-        self.stdout.write(f'Found {source_tables.count()} tables in {source} app')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN - No changes were made'))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Sync completed: {totals["created"]} created, {totals["updated"]} updated, '
+                f'{totals["deactivated"]} deactivated, {totals["unchanged"]} unchanged'
+            )
+        )
 
-        # Determine target models
-        if target:
-            target_models = {target: available_models.get(target)}
-        else:
-            target_models = {k: v for k, v in available_models.items() if k != source}
+    def _plans_from_file(self, path, location_id):
+        try:
+            with open(path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read floor plan {path}: {e}')
 
-        sync_stats = {'created': 0, 'updated': 0, 'skipped': 0}
+        if isinstance(data, list):
+            if not location_id:
+                raise CommandError('--location is required for a single-location floor plan')
+            return {location_id: data}
+        if isinstance(data, dict):
+            plans = {int(key): value for key, value in data.items()}
+            if location_id:
+                plans = {location_id: plans.get(location_id, [])}
+            return plans
+        raise CommandError('Floor plan must be a list or an object keyed by location ID')
 
-        with transaction.atomic():
-            for table in source_tables:
-                for target_name, target_model in target_models.items():
-                    if not target_model:
-                        continue
-                        
-                    # Check if table already exists in target
-                    existing = target_model.objects.filter(
-                        location=table.location,
-                        table_number=table.table_number
-                    ).first()
+    def _plans_from_inventory(self, location_id):
+        from core.models import Table
+        from inventory.models import Table as InventoryTable
 
-                    if existing:
-                        # Update existing table
-                        updated = False
-                        if existing.capacity != table.capacity:
-                            existing.capacity = table.capacity
-                            updated = True
-                        if existing.is_active != table.is_active:
-                            existing.is_active = table.is_active
-                            updated = True
-                            
-                        if updated:
-                            if not dry_run:
-                                existing.save()
-                            sync_stats['updated'] += 1
-                            self.stdout.write(
-                                f'Updated table {table.table_number} in {target_name}'
-                            )
-                        else:
-                            sync_stats['skipped'] += 1
-                    else:
-                        # Create new table
-                        table_data = {
-                            'location': table.location,
-                            'table_number': table.table_number,
-                            'capacity': table.capacity,
-                            'is_active': table.is_active,
-                        }
-                        
-                        # Add model-specific fields
-                        if target_name == 'core' and hasattr(table, 'table_type'):
-                            table_data['table_type'] = getattr(table, 'table_type', 'dining')
-                        elif target_name == 'inventory':
-                            table_data.update({
-                                'condition': getattr(table, 'condition', 'good'),
-                                'purchase_date': getattr(table, 'purchase_date', timezone.now().date()),
-                                'purchase_cost': getattr(table, 'purchase_cost', 0.00),
-                            })
-                        
-                        if not dry_run:
-                            target_model.objects.create(**table_data)
-                        sync_stats['created'] += 1
-                        self.stdout.write(
-                            f'Created table {table.table_number} in {target_name}'
-                        )
+        legacy = InventoryTable.objects.all()
+        if location_id:
+            legacy = legacy.filter(location_id=location_id)
+        known = {
+            (location, number.upper())
+            for location, number in Table.objects.values_list('location_id', 'table_number')
+        }
 
-            if dry_run:
-                self.stdout.write(
-                    self.style.WARNING('DRY RUN - No changes were made')
-                )
-            
-        self.stdout.write(
-            self.style.SUCCESS(
-                f'Sync completed: {sync_stats["created"]} created, '
-                f'{sync_stats["updated"]} updated, {sync_stats["skipped"]} skipped'
-            )
-        )
\ No newline at end of file
+        # Only add what the registry lacks; the registry wins for existing tables
+        plans = {}
+        for row in legacy.values('location_id', 'table_number', 'capacity', 'is_active'):
+            if (row['location_id'], row['table_number'].strip().upper()) in known:
+                continue
+            plans.setdefault(row['location_id'], []).append({
+                'table_number': row['table_number'],
+                'capacity': row['capacity'],
+                'is_active': row['is_active'],
+            })
+        return plans
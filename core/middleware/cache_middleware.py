@@ -2,9 +2,12 @@ import time
 import logging
 from django.core.cache import cache
 from django.http import HttpResponse
-from django.utils.cache import get_cache_key, learn_cache_key
+from django.utils.cache import (
+    get_cache_key, get_conditional_response, learn_cache_key, patch_cache_control, patch_vary_headers,
+)
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
+from core import http_cache
 from core.cache_service import CacheService
 
 logger = logging.getLogger(__name__)
@@ -41,23 +44,37 @@ class CachePerformanceMiddleware(MiddlewareMixin):
                 # Add cache backend info
                 response['X-Cache-Backend'] = cache.__class__.__name__
         
+        # A shared cache must never hand one visitor's Set-Cookie (session,
+        # cart) to the next, whatever the view or cache policy declared
+        if response.cookies and response.has_header('Cache-Control'):
+            patch_cache_control(response, private=True)
+
+        # Views and ResponseCacheMiddleware policies decide for themselves
+        if response.has_header('Cache-Control'):
+            return response
+
         # Add cache control headers for static content
         if self._is_static_content(request):
             response['Cache-Control'] = 'public, max-age=86400'  # 24 hours
             response['Vary'] = 'Accept-Encoding'
         
-        # Add cache headers for API responses
+        # API responses without a cache policy may be per user: revalidate
+        # them with the ETag instead of letting shared caches keep them
         elif request.path.startswith('/api/'):
             if response.status_code == 200:
-                response['Cache-Control'] = 'public, max-age=300'  # 5 minutes
-                response['Vary'] = 'Accept, Accept-Language, Authorization'
+                response['Cache-Control'] = 'private, no-cache'
+                patch_vary_headers(response, ('Accept', 'Accept-Language', 'Authorization', 'Cookie'))
             else:
                 response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         
-        # Add cache headers for authenticated user content
-        elif hasattr(request, 'user') and request.user.is_authenticated:
-            response['Cache-Control'] = 'private, max-age=300'  # 5 minutes
-            response['Vary'] = 'Cookie, Accept-Language'
+        # Pages carrying a session (cart, CSRF token) or setting cookies are personal
+        elif (
+            (hasattr(request, 'user') and request.user.is_authenticated)
+            or response.cookies
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+        ):
+            response['Cache-Control'] = 'private, no-cache'
+            patch_vary_headers(response, ('Cookie', 'Accept-Language'))
         
         # Add cache headers for anonymous user content
         else:
@@ -136,31 +153,60 @@ class CacheInvalidationMiddleware(MiddlewareMixin):
 
 
 class CacheCompressionMiddleware(MiddlewareMixin):
-    """Middleware to handle cache compression and optimization."""
+    """Middleware to add compression hints, content ETags and 304 revalidation."""
     
     def process_response(self, request, response):
-        """Add compression hints and optimize cache storage."""
-        
+        """Tag rendered GET responses with a content hash and answer matching revalidations."""
+        if response.status_code != 200 or response.streaming:
+            return response
+
         # Add compression hints for cacheable responses
-        if (response.status_code == 200 and 
-            'Cache-Control' in response and 
-            'no-cache' not in response['Cache-Control']):
-            
-            # Add compression hints
-            if 'Vary' in response:
-                if 'Accept-Encoding' not in response['Vary']:
-                    response['Vary'] += ', Accept-Encoding'
-            else:
-                response['Vary'] = 'Accept-Encoding'
-            
-            # Add ETag for better caching
-            if not response.get('ETag'):
-                content_hash = hash(response.content)
-                response['ETag'] = f'W/"{content_hash}"'
+        if 'Cache-Control' in response and 'no-store' not in response['Cache-Control']:
+            patch_vary_headers(response, ('Accept-Encoding',))
+
+        # A stable content hash (``hash()`` differs between processes), so a
+        # client or proxy holding the same bytes gets a 304 without a body
+        if request.method in ('GET', 'HEAD') and not response.has_header('ETag'):
+            if response.has_header('Content-Encoding'):
+                return response
+            response['ETag'] = http_cache.content_etag(response.content)
+            return get_conditional_response(request, etag=response['ETag'], response=response)
         
         return response
 
 
+class ResponseCacheMiddleware(MiddlewareMixin):
+    """
+    Serve endpoints with a cache policy (``core.http_cache``) from stored
+    rendered bytes before the view runs, and store what the view renders.
+
+    Listed last so that authentication has run by ``process_view`` and the
+    stored response is final before the other middleware see it.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        policy = http_cache.policy_for(request, view_func)
+        if policy is None:
+            return None
+        cached, key = http_cache.lookup(request, policy)
+        if cached is not None:
+            return cached
+        if key is not None:
+            request._http_cache = (policy, key)
+        return None
+
+    def process_response(self, request, response):
+        state = getattr(request, '_http_cache', None)
+        if state is None:
+            return response
+        policy, key = state
+        try:
+            return http_cache.finalize(request, response, policy, key)
+        except Exception as e:
+            logger.warning(f"Failed storing response of {request.path}: {e}")
+            return response
+
+
 class CacheDebugMiddleware(MiddlewareMixin):
     """Middleware to add cache debugging information in development."""
     
@@ -0,0 +1,79 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from core import perf
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """
+    Measure query count, duplicate queries, DB time, cache hits/misses and
+    response rendering time for every request (see ``core.perf``).
+
+    With ``PERF_HEADERS`` (defaults to DEBUG) the numbers are returned as
+    ``X-Query-*``/``Server-Timing`` headers; otherwise they go to the
+    ``core.perf`` metrics sink, which logs budget violations.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'PERF_INSTRUMENTATION_ENABLED', True):
+            return self.get_response(request)
+
+        with perf.measure() as metrics:
+            request._perf_metrics = metrics
+            response = self.get_response(request)
+
+        self._finish(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        # ASGI: keeps async views on the event loop
+        if not getattr(settings, 'PERF_INSTRUMENTATION_ENABLED', True):
+            return await self.get_response(request)
+
+        with perf.measure() as metrics:
+            request._perf_metrics = metrics
+            response = await self.get_response(request)
+
+        await sync_to_async(self._finish)(request, response, metrics)
+        return response
+
+    def _finish(self, request, response, metrics):
+        metrics.route = perf.route_name(request)
+
+        # Feed CachePerformanceMiddleware's X-Cache-Hits/X-Cache-Misses
+        request._cache_hits = metrics.cache_hits
+        request._cache_misses = metrics.cache_misses
+
+        headers_enabled = getattr(settings, 'PERF_HEADERS', None)
+        if headers_enabled is None:
+            headers_enabled = settings.DEBUG
+        if headers_enabled:
+            for header, value in metrics.headers().items():
+                response[header] = value
+
+        try:
+            perf.report(metrics, method=request.method, status_code=response.status_code)
+        except Exception as e:
+            logger.debug(f"Failed to report request metrics: {e}")
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serialized) after the view returns
+        metrics = getattr(request, '_perf_metrics', None)
+        if metrics is not None and hasattr(response, 'add_post_render_callback'):
+            metrics.start_render()
+            response.add_post_render_callback(lambda rendered: metrics.end_render())
+        return response
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:40
+
+from django.db import migrations
+
+SEQUENCE = "core_confirmation_code_seq"
+COUNTER_TABLE = "core_confirmation_code_counter"
+
+# PostgreSQL hands out blocks from a sequence (see core.confirmation_codes);
+# other databases increment a one-row counter inside the booking transaction.
+PG_CREATE = [f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE} START WITH 1 INCREMENT BY 1"]
+PG_DROP = [f"DROP SEQUENCE IF EXISTS {SEQUENCE}"]
+COUNTER_CREATE = [
+    f"CREATE TABLE IF NOT EXISTS {COUNTER_TABLE} (id INTEGER PRIMARY KEY, value BIGINT NOT NULL)",
+    f"INSERT INTO {COUNTER_TABLE} (id, value) VALUES (1, 0)",
+]
+COUNTER_DROP = [f"DROP TABLE IF EXISTS {COUNTER_TABLE}"]
+
+
+def create_sequence(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in PG_CREATE if vendor == "postgresql" else COUNTER_CREATE:
+        schema_editor.execute(sql)
+
+
+def drop_sequence(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in PG_DROP if vendor == "postgresql" else COUNTER_DROP:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_outboundemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
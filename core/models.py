@@ -612,15 +612,9 @@ class Reservation(models.Model):
     
     @classmethod
     def generate_confirmation_number(cls):
-        """Generate a unique confirmation number."""
-        import random
-        import string
-        
-        while True:
-            # Generate 8-character alphanumeric code
-            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            if not cls.objects.filter(confirmation_number=code).exists():
-                return code
+        """Allocate a unique confirmation number (see core.confirmation_codes)."""
+        from core.confirmation_codes import allocate
+        return allocate(cls)
     
     @transaction.atomic
     def check_availability(self):
@@ -636,20 +630,20 @@ class Reservation(models.Model):
         start_datetime = timezone.make_aware(start_datetime)
         end_datetime = start_datetime + timezone.timedelta(minutes=self.duration_minutes)
         
-        # Check for conflicting reservations
-        conflicting_reservations = Reservation.objects.select_for_update().filter(
+        # One unlocked read of the candidate windows (same day, plus the
+        # previous day for bookings running past midnight). Bookings now go
+        # through reservations.Reservation, whose overlaps the database rejects.
+        candidates = Reservation.objects.filter(
             table=self.table,
-            reservation_date=self.reservation_date,
+            reservation_date__in=[self.reservation_date - timezone.timedelta(days=1), self.reservation_date],
             status__in=[self.STATUS_CONFIRMED, self.STATUS_SEATED]
-        ).exclude(pk=self.pk if self.pk else None)
+        ).exclude(pk=self.pk if self.pk else None).values_list(
+            'reservation_date', 'reservation_time', 'duration_minutes'
+        )
         
-        for reservation in conflicting_reservations:
-            existing_start = timezone.datetime.combine(
-                reservation.reservation_date,
-                reservation.reservation_time
-            )
-            existing_start = timezone.make_aware(existing_start)
-            existing_end = existing_start + timezone.timedelta(minutes=reservation.duration_minutes)
+        for day, start_time, duration in candidates:
+            existing_start = timezone.make_aware(timezone.datetime.combine(day, start_time))
+            existing_end = existing_start + timezone.timedelta(minutes=duration)
             
             # Check for overlap
             if (start_datetime < existing_end and end_datetime > existing_start):
@@ -772,3 +766,66 @@ class AuditLog(models.Model):
     def __str__(self):
         user_str = self.by_user.username if self.by_user else "System"
         return f"{self.model_name}({self.object_id}) {self.action} by {user_str} at {self.at}"
+
+
+class OutboundEmail(models.Model):
+    """
+    Transactional email outbox. Messages are rendered and stored when the
+    business event happens and sent later by ``core.outbox.drain()`` over a
+    single mail connection.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_DEAD, 'Dead letter'),
+    ]
+
+    kind = models.CharField(
+        max_length=40,
+        blank=True,
+        help_text="Message type, e.g. order_confirmation"
+    )
+    dedupe_key = models.CharField(
+        max_length=120,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Makes enqueueing idempotent (e.g. order_confirmation:123)"
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list, help_text="Recipient addresses")
+    headers = models.JSONField(default=dict, blank=True)
+    domain = models.CharField(
+        max_length=253,
+        blank=True,
+        help_text="Recipient domain, used for per-domain throttling"
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+            models.Index(fields=['created_at'], name='outbox_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind or 'email'} to {', '.join(self.to or [])} ({self.status})"
@@ -0,0 +1,334 @@
+# core/outbox.py
+"""
+Transactional email outbox.
+
+Callers render their messages when the business event happens and store
+them in one ``bulk_create`` with ``enqueue()`` (idempotent through
+``dedupe_key``); nothing talks to the mail server on the request path.
+``drain()`` then sends due messages over a single mail connection that stays
+open for the whole run:
+
+- rows are claimed in batches (``SELECT ... FOR UPDATE SKIP LOCKED`` where
+  supported, plus a lease so a crashed worker's claim expires), so several
+  workers can drain in parallel;
+- recipients' domains are throttled per minute
+  (``EMAIL_OUTBOX_DOMAIN_RATES`` / ``EMAIL_OUTBOX_DEFAULT_DOMAIN_RATE``);
+  over-budget messages wait for the next minute;
+- failures are retried with exponential backoff; permanent SMTP rejections
+  (5xx, refused recipients) and messages out of attempts become dead letters
+  (``status="dead"``, see ``requeue_dead()``). A connection that fails to
+  open counts as a failed attempt for the whole claimed batch.
+
+``drain_email_outbox_task`` runs every ``EMAIL_OUTBOX_DRAIN_SECONDS`` and is
+also kicked right after a commit that enqueued mail. Without Celery the kick
+drains in a background thread. ``EMAIL_OUTBOX_BACKEND`` overrides
+``EMAIL_BACKEND`` for the drainer, e.g. the file backend or an SMTP sink
+(``python -m aiosmtpd -n -l localhost:1025``) for local runs and tests.
+"""
+
+from __future__ import annotations
+
+import logging
+import smtplib
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, connections, router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+KICK_KEY = "outbox:kick"
+RATE_KEY = "outbox:rate:{}:{}"
+
+# One background drain per process at a time (no-Celery fallback)
+_thread_lock = threading.Lock()
+
+
+@dataclass
+class Email:
+    """A rendered message to enqueue."""
+    to: List[str]
+    subject: str
+    body: str = ""
+    html_body: str = ""
+    from_email: str = ""
+    kind: str = ""
+    dedupe_key: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _domain(addresses: List[str]) -> str:
+    for address in addresses:
+        if "@" in address:
+            return address.rsplit("@", 1)[1].strip(" >").lower()
+    return ""
+
+
+# ----------------------------------------------------------------------
+# Enqueueing
+# ----------------------------------------------------------------------
+def enqueue(messages: Iterable[Email]) -> int:
+    """
+    Store ``messages`` in one INSERT. Messages without recipients are
+    skipped; a ``dedupe_key`` already in the outbox is ignored. Returns the
+    number of messages handed to the database.
+    """
+    rows = []
+    for message in messages:
+        to = [address for address in (message.to or []) if address]
+        if not to:
+            continue
+        rows.append(OutboundEmail(
+            kind=message.kind[:40],
+            dedupe_key=message.dedupe_key,
+            subject=message.subject[:255],
+            body=message.body,
+            html_body=message.html_body or "",
+            from_email=message.from_email or "",
+            to=to,
+            headers=message.headers or {},
+            domain=_domain(to),
+        ))
+    if not rows:
+        return 0
+    OutboundEmail.objects.bulk_create(rows, ignore_conflicts=True)
+    transaction.on_commit(kick)
+    return len(rows)
+
+
+def kick() -> None:
+    """Ask for a drain soon (debounced); falls back to a background thread."""
+    if not cache.add(KICK_KEY, 1, int(_setting("EMAIL_OUTBOX_KICK_SECONDS", 2))):
+        return
+    try:
+        from core.tasks import drain_email_outbox_task
+        drain_email_outbox_task.delay()
+        return
+    except Exception as e:
+        logger.debug(f"Celery unavailable for the email outbox ({e}), draining in a thread")
+    if _setting("EMAIL_OUTBOX_THREAD_FALLBACK", True):
+        threading.Thread(target=_drain_in_thread, name="email-outbox", daemon=True).start()
+
+
+def _drain_in_thread() -> None:
+    if not _thread_lock.acquire(blocking=False):
+        return
+    try:
+        drain()
+    except Exception:
+        logger.exception("Background email outbox drain failed")
+    finally:
+        _thread_lock.release()
+        close_old_connections()
+
+
+# ----------------------------------------------------------------------
+# Claiming
+# ----------------------------------------------------------------------
+def claim(limit: int) -> List[OutboundEmail]:
+    """Lease up to ``limit`` due messages to this worker."""
+    now = timezone.now()
+    lease = timedelta(seconds=int(_setting("EMAIL_OUTBOX_LEASE_SECONDS", 300)))
+    using = router.db_for_write(OutboundEmail)
+    with transaction.atomic(using=using):
+        due = OutboundEmail.objects.filter(
+            Q(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            | Q(status=OutboundEmail.STATUS_SENDING, locked_until__lt=now)
+        ).order_by("next_attempt_at", "id")
+        if connections[using].features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        rows = list(due[:limit])
+        if rows:
+            OutboundEmail.objects.filter(pk__in=[row.pk for row in rows]).update(
+                status=OutboundEmail.STATUS_SENDING, locked_until=now + lease,
+            )
+    return rows
+
+
+# ----------------------------------------------------------------------
+# Throttling
+# ----------------------------------------------------------------------
+def _domain_limit(domain: str) -> int:
+    rates = _setting("EMAIL_OUTBOX_DOMAIN_RATES", {}) or {}
+    return int(rates.get(domain, _setting("EMAIL_OUTBOX_DEFAULT_DOMAIN_RATE", 0)) or 0)
+
+
+def _take(domain: str, minute: int) -> bool:
+    """Count one message against ``domain``'s budget for this minute."""
+    limit = _domain_limit(domain)
+    if not limit:
+        return True
+    key = RATE_KEY.format(domain, minute)
+    cache.add(key, 0, 120)
+    try:
+        return cache.incr(key) <= limit
+    except ValueError:
+        return True  # key evicted between add and incr
+
+
+# ----------------------------------------------------------------------
+# Sending
+# ----------------------------------------------------------------------
+def _message(row: OutboundEmail, connection) -> EmailMultiAlternatives:
+    message = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body,
+        from_email=row.from_email or _setting("DEFAULT_FROM_EMAIL", None),
+        to=list(row.to or []),
+        headers=row.headers or None,
+        connection=connection,
+    )
+    if row.html_body:
+        message.attach_alternative(row.html_body, "text/html")
+    return message
+
+
+def _is_permanent(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+def _send(connection, row: OutboundEmail) -> None:
+    try:
+        connection.send_messages([_message(row, connection)])
+    except smtplib.SMTPServerDisconnected:
+        # The server dropped the pooled connection: reconnect once
+        connection.close()
+        connection.open()
+        connection.send_messages([_message(row, connection)])
+
+
+def _backoff(attempts: int) -> timedelta:
+    base = int(_setting("EMAIL_OUTBOX_RETRY_BASE_SECONDS", 60))
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 3600))
+
+
+def _record_failure(row: OutboundEmail, error: Exception, max_attempts: int) -> None:
+    """Count a failed attempt on ``row``: schedule a retry or dead-letter it."""
+    row.attempts += 1
+    row.last_error = f"{type(error).__name__}: {error}"[:2000]
+    row.locked_until = None
+    if _is_permanent(error) or row.attempts >= max_attempts:
+        row.status = OutboundEmail.STATUS_DEAD
+        logger.warning(f"Email {row.pk} ({row.kind}) dead-lettered after {row.attempts} attempts: {error}")
+    else:
+        row.status = OutboundEmail.STATUS_PENDING
+        row.next_attempt_at = timezone.now() + _backoff(row.attempts)
+
+
+def _save_failures(failed: List[OutboundEmail], stats: Counter) -> None:
+    if failed:
+        OutboundEmail.objects.bulk_update(
+            failed, ["status", "attempts", "last_error", "locked_until", "next_attempt_at"]
+        )
+    stats["dead"] += sum(1 for row in failed if row.status == OutboundEmail.STATUS_DEAD)
+    stats["retried"] += sum(1 for row in failed if row.status == OutboundEmail.STATUS_PENDING)
+
+
+def _fail_batch(rows: List[OutboundEmail], error: Exception, stats: Counter) -> None:
+    """Release a claimed batch that could not be sent at all (e.g. the
+    connection did not open), counting the attempt on every row."""
+    max_attempts = int(_setting("EMAIL_OUTBOX_MAX_ATTEMPTS", 5))
+    for row in rows:
+        _record_failure(row, error, max_attempts)
+    _save_failures(rows, stats)
+
+
+def _send_batch(connection, rows: List[OutboundEmail], stats: Counter) -> None:
+    max_attempts = int(_setting("EMAIL_OUTBOX_MAX_ATTEMPTS", 5))
+    minute = int(time.time() // 60)
+    sent, throttled, failed = [], [], []
+
+    for row in rows:
+        if not _take(row.domain, minute):
+            throttled.append(row.pk)
+            continue
+        try:
+            _send(connection, row)
+            sent.append(row.pk)
+        except Exception as e:
+            _record_failure(row, e, max_attempts)
+            failed.append(row)
+
+    now = timezone.now()
+    if sent:
+        OutboundEmail.objects.filter(pk__in=sent).update(
+            status=OutboundEmail.STATUS_SENT, sent_at=now, locked_until=None,
+            attempts=F("attempts") + 1, last_error="",
+        )
+    if throttled:
+        OutboundEmail.objects.filter(pk__in=throttled).update(
+            status=OutboundEmail.STATUS_PENDING, locked_until=None,
+            next_attempt_at=now.replace(second=0, microsecond=0) + timedelta(minutes=1),
+        )
+    _save_failures(failed, stats)
+
+    stats["sent"] += len(sent)
+    stats["throttled"] += len(throttled)
+
+
+def drain(limit: Optional[int] = None, backend: Optional[str] = None) -> Dict[str, int]:
+    """
+    Send due messages (at most ``limit``) over one connection. Returns
+    counts of sent, retried, dead and throttled messages.
+    """
+    batch_size = int(_setting("EMAIL_OUTBOX_BATCH_SIZE", 100))
+    backend = backend or _setting("EMAIL_OUTBOX_BACKEND", "") or None
+    stats: Counter = Counter()
+    connection = None
+    handled = 0
+    try:
+        while limit is None or handled < limit:
+            size = batch_size if limit is None else min(batch_size, limit - handled)
+            rows = claim(size)
+            if not rows:
+                break
+            if connection is None:
+                try:
+                    connection = get_connection(backend=backend, fail_silently=False)
+                    connection.open()
+                except Exception as e:
+                    # Hand the claimed rows back now instead of leaving them
+                    # SENDING until the lease runs out, with no attempt counted
+                    _fail_batch(rows, e, stats)
+                    raise
+            _send_batch(connection, rows, stats)
+            handled += len(rows)
+            if len(rows) < size:
+                break
+    finally:
+        if connection is not None:
+            connection.close()
+
+    if stats:
+        logger.info(
+            f"Email outbox: {stats['sent']} sent, {stats['retried']} retried, "
+            f"{stats['dead']} dead, {stats['throttled']} throttled"
+        )
+    return {name: stats[name] for name in ("sent", "retried", "dead", "throttled")}
+
+
+def requeue_dead(ids: Optional[Iterable[int]] = None) -> int:
+    """Give dead letters (all, or ``ids``) a fresh set of attempts."""
+    dead = OutboundEmail.objects.filter(status=OutboundEmail.STATUS_DEAD)
+    if ids is not None:
+        dead = dead.filter(pk__in=list(ids))
+    return dead.update(
+        status=OutboundEmail.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now(), locked_until=None,
+    )
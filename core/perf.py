@@ -0,0 +1,306 @@
+# core/perf.py
+"""
+Per-request performance instrumentation and query/latency budgets.
+
+``measure()`` collects, for everything executed inside it:
+
+- SQL query count, total DB time, exact duplicates (same SQL and params) and
+  repeated statements (same SQL, different params; the usual N+1 signature);
+- cache hits/misses on the default cache;
+- render (response serialization) time, when the caller marks it.
+
+``core.middleware.query_budget.QueryBudgetMiddleware`` wraps every request
+in ``measure()``; ``manage.py bench_endpoints`` uses it directly.
+
+Budgets are declared per URL name in ``settings.PERF_BUDGETS``::
+
+    PERF_BUDGETS = {
+        "menu_api:menudisplay-list": {"queries": 6, "ms": 150},
+    }
+
+with ``settings.PERF_DEFAULT_BUDGET`` applying to everything else.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar[Optional["RequestMetrics"]] = contextvars.ContextVar(
+    "rms_request_metrics", default=None
+)
+_MISS = object()
+
+
+@dataclass
+class Budget:
+    queries: Optional[int] = None
+    ms: Optional[float] = None
+    duplicates: Optional[int] = None
+
+
+@dataclass
+class RequestMetrics:
+    """Counters collected while a request (or benchmark step) runs."""
+    route: str = ""
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+    query_count: int = 0
+    db_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    render_time: float = 0.0
+    _render_started: Optional[float] = None
+    _statements: Counter = field(default_factory=Counter)
+    _exact: Counter = field(default_factory=Counter)
+
+    # -- recording -----------------------------------------------------
+    def record_query(self, sql: str, params: Any, duration: float) -> None:
+        self.query_count += 1
+        self.db_time += duration
+        self._statements[sql] += 1
+        try:
+            self._exact[(sql, repr(params))] += 1
+        except Exception:
+            pass
+
+    def start_render(self) -> None:
+        self._render_started = time.perf_counter()
+
+    def end_render(self) -> None:
+        if self._render_started is not None:
+            self.render_time += time.perf_counter() - self._render_started
+            self._render_started = None
+
+    def finish(self) -> None:
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    # -- results -------------------------------------------------------
+    @property
+    def total_time(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def duplicate_queries(self) -> int:
+        """Executions beyond the first of identical SQL with identical params."""
+        return sum(count - 1 for count in self._exact.values() if count > 1)
+
+    def repeated_statements(self, threshold: Optional[int] = None) -> List[tuple]:
+        """Statements executed at least ``threshold`` times (N+1 candidates)."""
+        threshold = threshold or int(getattr(settings, "PERF_REPEAT_THRESHOLD", 5))
+        return [(sql, count) for sql, count in self._statements.most_common() if count >= threshold]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "route": self.route,
+            "queries": self.query_count,
+            "duplicates": self.duplicate_queries,
+            "db_ms": round(self.db_time * 1000, 2),
+            "render_ms": round(self.render_time * 1000, 2),
+            "total_ms": round(self.total_time * 1000, 2),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+    def headers(self) -> Dict[str, str]:
+        data = self.as_dict()
+        app_ms = max(0.0, data["total_ms"] - data["db_ms"] - data["render_ms"])
+        return {
+            "X-Query-Count": str(data["queries"]),
+            "X-Query-Duplicates": str(data["duplicates"]),
+            "X-DB-Time": f"{data['db_ms']:.2f}ms",
+            "X-Serialize-Time": f"{data['render_ms']:.2f}ms",
+            "X-Response-Time": f"{data['total_ms']:.2f}ms",
+            "Server-Timing": (
+                f"db;dur={data['db_ms']:.2f}, render;dur={data['render_ms']:.2f}, "
+                f"app;dur={app_ms:.2f}, total;dur={data['total_ms']:.2f}"
+            ),
+        }
+
+    def budget_violations(self, budget: Optional[Budget] = None) -> List[str]:
+        budget = budget or budget_for(self.route)
+        problems = []
+        if budget.queries is not None and self.query_count > budget.queries:
+            problems.append(f"{self.query_count} queries > budget {budget.queries}")
+        if budget.duplicates is not None and self.duplicate_queries > budget.duplicates:
+            problems.append(f"{self.duplicate_queries} duplicate queries > budget {budget.duplicates}")
+        if budget.ms is not None and self.total_time * 1000 > budget.ms:
+            problems.append(f"{self.total_time * 1000:.1f}ms > budget {budget.ms}ms")
+        return problems
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+# ----------------------------------------------------------------------
+# Collectors
+# ----------------------------------------------------------------------
+def _query_recorder(metrics: RequestMetrics):
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.record_query(sql, params, time.perf_counter() - start)
+    return wrapper
+
+
+def _instrument_cache(alias: str = "default") -> None:
+    """
+    Wrap get/get_many of this thread's cache backend instance once so hits and
+    misses are reported to whichever ``RequestMetrics`` is current.
+    """
+    backend = caches[alias]
+    if getattr(backend, "_rms_instrumented", False):
+        return
+    original_get = backend.get
+    original_get_many = backend.get_many
+
+    def get(key, default=None, version=None, **kwargs):
+        value = original_get(key, _MISS, version=version, **kwargs)
+        metrics = _current.get()
+        if value is _MISS:
+            if metrics is not None:
+                metrics.cache_misses += 1
+            return default
+        if metrics is not None:
+            metrics.cache_hits += 1
+        return value
+
+    def get_many(keys, version=None, **kwargs):
+        keys = list(keys)
+        found = original_get_many(keys, version=version, **kwargs)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.cache_hits += len(found)
+            metrics.cache_misses += len(keys) - len(found)
+        return found
+
+    backend.get = get
+    backend.get_many = get_many
+    backend._rms_instrumented = True
+
+
+@contextmanager
+def measure(route: str = "", using: Optional[List[str]] = None):
+    """
+    Collect ``RequestMetrics`` for the enclosed block. Queries are recorded by
+    every active measurement; cache counters of a nested measurement (e.g. the
+    middleware inside a benchmark) are added to the enclosing one on exit.
+    """
+    metrics = RequestMetrics(route=route)
+    parent = _current.get()
+    token = _current.set(metrics)
+    try:
+        _instrument_cache()
+    except Exception as e:
+        logger.debug(f"Cache instrumentation unavailable: {e}")
+
+    aliases = using or list(connections)
+    wrappers = []
+    try:
+        for alias in aliases:
+            cm = connections[alias].execute_wrapper(_query_recorder(metrics))
+            cm.__enter__()
+            wrappers.append(cm)
+        yield metrics
+    finally:
+        for cm in reversed(wrappers):
+            cm.__exit__(None, None, None)
+        metrics.finish()
+        _current.reset(token)
+        if parent is not None:
+            parent.cache_hits += metrics.cache_hits
+            parent.cache_misses += metrics.cache_misses
+
+
+# ----------------------------------------------------------------------
+# Budgets and reporting
+# ----------------------------------------------------------------------
+def budget_for(route: str) -> Budget:
+    budgets = getattr(settings, "PERF_BUDGETS", {}) or {}
+    spec = budgets.get(route) or getattr(settings, "PERF_DEFAULT_BUDGET", {}) or {}
+    return Budget(
+        queries=spec.get("queries"),
+        ms=spec.get("ms"),
+        duplicates=spec.get("duplicates"),
+    )
+
+
+def route_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is not None and match.view_name:
+        return match.view_name
+    return request.path
+
+
+def report(metrics: RequestMetrics, method: str = "GET", status_code: int = 200) -> None:
+    """
+    Production metrics sink: budget violations are logged as warnings, a
+    sampled share of requests as info, and per-route counters are aggregated
+    in Redis (``perf:<YYYYMMDDHH>:<route>`` hashes) when available.
+    """
+    data = metrics.as_dict()
+    data.update({"method": method, "status": status_code})
+
+    violations = metrics.budget_violations()
+    repeated = metrics.repeated_statements()
+    if violations or repeated:
+        reason = "; ".join(violations) or f"{repeated[0][1]}x repeated statement"
+        logger.warning(
+            f"Performance budget exceeded for {method} {metrics.route}: {reason}",
+            extra={"perf": data, "repeated_sql": [sql[:200] for sql, _ in repeated[:3]]},
+        )
+    elif random.random() < float(getattr(settings, "PERF_LOG_SAMPLE_RATE", 0.0)):
+        logger.info(f"Request metrics for {method} {metrics.route}", extra={"perf": data})
+
+    if getattr(settings, "PERF_AGGREGATE_METRICS", False):
+        _aggregate(data, bool(violations))
+
+
+def _aggregate(data: Dict[str, Any], over_budget: bool) -> None:
+    from core.cache_service import CacheService
+
+    client = CacheService.get_redis_client()
+    if client is None:
+        return
+    bucket = time.strftime("%Y%m%d%H", time.gmtime())
+    key = f"{getattr(settings, 'CACHE_KEY_PREFIX', 'rms')}:perf:{bucket}:{data['route']}"
+    try:
+        pipe = client.pipeline()
+        pipe.hincrby(key, "requests", 1)
+        pipe.hincrby(key, "queries", data["queries"])
+        pipe.hincrby(key, "duplicates", data["duplicates"])
+        pipe.hincrbyfloat(key, "db_ms", data["db_ms"])
+        pipe.hincrbyfloat(key, "total_ms", data["total_ms"])
+        pipe.hincrby(key, "cache_hits", data["cache_hits"])
+        pipe.hincrby(key, "cache_misses", data["cache_misses"])
+        if over_budget:
+            pipe.hincrby(key, "over_budget", 1)
+        pipe.expire(key, 7 * 86400)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Failed to aggregate request metrics: {e}")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (``pct`` in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
@@ -0,0 +1,555 @@
+# core/retention.py
+"""
+Data lifecycle: retention, archival and time partitioning of high-churn
+tables.
+
+Policies are declared in ``settings.DATA_RETENTION_POLICIES``::
+
+    DATA_RETENTION_POLICIES = {
+        "sync_log": {
+            "model": "integrations.SyncLog",
+            "field": "created_at",      # timestamp the age is measured on
+            "days": 30,
+            "action": "archive",        # or "delete"
+            "filters": {},              # optional extra queryset filters
+            "batch_size": 2000,         # optional, DATA_RETENTION_BATCH_SIZE
+            "partition": "month",       # optional, PostgreSQL only
+        },
+    }
+
+Expired rows are removed in batches of primary keys, each batch in its own
+transaction, with raw ``DELETE ... WHERE pk IN (...)`` statements: rows are
+never loaded as model instances and no signals fire. Dependent rows follow
+the declared ``on_delete`` (CASCADE children are deleted the same way,
+SET_NULL/SET_DEFAULT columns updated, auto-created M2M rows removed);
+PROTECT/RESTRICT stops the policy. ``archive`` policies first append every
+batch to ``<DATA_RETENTION_ARCHIVE_DIR>/<policy>/<YYYY>/<MM>/`` as gzip
+NDJSON (one gzip member per batch, so a file interrupted mid-run is still
+readable). Archiving is at-least-once: a batch whose delete fails is
+archived again by the next run.
+
+With ``DATA_RETENTION_PARTITIONING`` on PostgreSQL, policies with
+``"partition": "month"`` can be converted (``apply_retention --partition``)
+into range-partitioned tables: the existing table becomes the
+``<table>_before_<YYYYMM>`` partition and new rows go to monthly
+``<table>_p<YYYYMM>`` partitions created ahead of time. Partitions entirely
+older than the cutoff are then archived and dropped in one statement; only
+the partially expired month is deleted row by row.
+
+``run_retention()`` is run by ``manage.py apply_retention`` and
+``core.tasks.apply_retention_task``; the last report is kept in the cache
+under ``retention:last_report``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DELETE = "delete"
+ARCHIVE = "archive"
+ACTIONS = (DELETE, ARCHIVE)
+
+REPORT_KEY = "retention:last_report"
+LOCK_KEY = "retention:lock"
+LOCK_SECONDS = 3600
+
+
+class RetentionError(Exception):
+    """A policy is misconfigured or cannot be applied."""
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    name: str
+    model: str
+    field: str
+    days: int
+    action: str = DELETE
+    filters: Dict = field(default_factory=dict)
+    batch_size: int = 2000
+    partition: Optional[str] = None
+
+    @classmethod
+    def from_setting(cls, name: str, spec: Dict) -> "RetentionPolicy":
+        try:
+            policy = cls(
+                name=name,
+                model=spec["model"],
+                field=spec.get("field", "created_at"),
+                days=int(spec["days"]),
+                action=spec.get("action", DELETE),
+                filters=dict(spec.get("filters") or {}),
+                batch_size=int(spec.get("batch_size") or getattr(settings, "DATA_RETENTION_BATCH_SIZE", 2000)),
+                partition=spec.get("partition"),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise RetentionError(f"Invalid retention policy {name}: {e}")
+        if policy.action not in ACTIONS:
+            raise RetentionError(f"Invalid retention policy {name}: unknown action {policy.action!r}")
+        if policy.partition not in (None, "month"):
+            raise RetentionError(f"Invalid retention policy {name}: unknown partitioning {policy.partition!r}")
+        if policy.partition and policy.filters:
+            # Dropping a partition removes every row in it
+            raise RetentionError(f"Invalid retention policy {name}: partitioned policies cannot have filters")
+        if policy.days < 1 or policy.batch_size < 1:
+            raise RetentionError(f"Invalid retention policy {name}: days and batch_size must be positive")
+        return policy
+
+    @property
+    def model_class(self):
+        return apps.get_model(self.model)
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        return (now or timezone.now()) - timedelta(days=self.days)
+
+    def expired(self, cutoff: datetime):
+        model = self.model_class
+        return model._base_manager.filter(**{f"{self.field}__lt": cutoff}, **self.filters)
+
+
+@dataclass
+class RetentionResult:
+    policy: str
+    model: str
+    action: str
+    cutoff: str
+    dry_run: bool = False
+    matched: int = 0
+    deleted: int = 0
+    archived: int = 0
+    batches: int = 0
+    partitions_dropped: List[str] = field(default_factory=list)
+    partitions_created: List[str] = field(default_factory=list)
+    archive_files: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+    error: str = ""
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def get_policies(names: Optional[Iterable[str]] = None) -> List[RetentionPolicy]:
+    """Policies from settings, optionally restricted to ``names``."""
+    declared = getattr(settings, "DATA_RETENTION_POLICIES", {}) or {}
+    names = list(names or declared)
+    unknown = [name for name in names if name not in declared]
+    if unknown:
+        raise RetentionError(f"Unknown retention policies: {', '.join(unknown)}")
+    return [RetentionPolicy.from_setting(name, declared[name]) for name in names]
+
+
+# ----------------------------------------------------------------------
+# Raw chunked deletes
+# ----------------------------------------------------------------------
+def _chunks(values: List, size: int):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _raw_delete(model, pks: List, using: str) -> int:
+    """
+    Delete rows ``pks`` of ``model`` and their dependents without loading
+    them or sending signals. Must run inside a transaction.
+    """
+    if not pks:
+        return 0
+    opts = model._meta
+
+    # Auto-created M2M rows, both directions
+    for m2m in opts.many_to_many:
+        through = m2m.remote_field.through
+        if through._meta.auto_created:
+            through._base_manager.using(using).filter(**{f"{m2m.m2m_field_name()}__in": pks})._raw_delete(using)
+
+    for rel in opts.related_objects:
+        if rel.many_to_many:
+            through = rel.through
+            if through._meta.auto_created:
+                through._base_manager.using(using).filter(
+                    **{f"{rel.field.m2m_reverse_field_name()}__in": pks}
+                )._raw_delete(using)
+            continue
+
+        target = rel.field.target_field
+        keys = pks if target.primary_key else list(
+            model._base_manager.using(using).filter(pk__in=pks).values_list(target.attname, flat=True)
+        )
+        related = rel.related_model._base_manager.using(using).filter(**{f"{rel.field.name}__in": keys})
+        on_delete = rel.on_delete
+
+        if on_delete is models.CASCADE:
+            child_pks = list(related.values_list("pk", flat=True))
+            for chunk in _chunks(child_pks, 1000):
+                _raw_delete(rel.related_model, chunk, using)
+        elif on_delete is models.SET_NULL:
+            related.update(**{rel.field.name: None})
+        elif on_delete is models.SET_DEFAULT:
+            related.update(**{rel.field.name: rel.field.get_default()})
+        elif on_delete is models.DO_NOTHING:
+            continue
+        elif related.exists():
+            # PROTECT, RESTRICT and SET(...) need the ORM collector
+            raise RetentionError(
+                f"{rel.related_model._meta.label}.{rel.field.name} prevents raw deletion of {opts.label} rows"
+            )
+
+    # Generic relations declared on the model cascade like Django's collector
+    for private in opts.private_fields:
+        if getattr(private, "is_relation", False) and getattr(private, "one_to_many", False):
+            from django.contrib.contenttypes.models import ContentType
+            content_type = ContentType.objects.db_manager(using).get_for_model(model, for_concrete_model=private.for_concrete_model)
+            child_pks = list(
+                private.related_model._base_manager.using(using).filter(**{
+                    private.content_type_field_name: content_type,
+                    f"{private.object_id_field_name}__in": pks,
+                }).values_list("pk", flat=True)
+            )
+            for chunk in _chunks(child_pks, 1000):
+                _raw_delete(private.related_model, chunk, using)
+
+    return model._base_manager.using(using).filter(pk__in=pks)._raw_delete(using)
+
+
+def purge(queryset, batch_size: Optional[int] = None, archive: Optional["Archive"] = None,
+          result: Optional[RetentionResult] = None) -> int:
+    """
+    Delete every row of ``queryset`` in primary key batches (optionally
+    archiving each batch first). Returns the number of rows deleted.
+    """
+    batch_size = batch_size or int(getattr(settings, "DATA_RETENTION_BATCH_SIZE", 2000))
+    model = queryset.model
+    using = router.db_for_write(model)
+    ids = queryset.using(using).order_by().values_list("pk", flat=True)
+    deleted = 0
+    while True:
+        with transaction.atomic(using=using):
+            pks = list(ids[:batch_size])
+            if not pks:
+                break
+            if archive is not None:
+                written = archive.write(model._base_manager.using(using).filter(pk__in=pks).values())
+                if result is not None:
+                    result.archived += written
+            count = _raw_delete(model, pks, using)
+        deleted += count
+        if result is not None:
+            result.deleted += count
+            result.batches += 1
+        if len(pks) < batch_size:
+            break
+    return deleted
+
+
+# ----------------------------------------------------------------------
+# Archives
+# ----------------------------------------------------------------------
+class Archive:
+    """Append-only gzip NDJSON file for one policy run."""
+
+    def __init__(self, policy: str, started: Optional[datetime] = None):
+        started = started or timezone.now()
+        base = str(getattr(settings, "DATA_RETENTION_ARCHIVE_DIR", "archive"))
+        directory = os.path.join(base, policy, started.strftime("%Y"), started.strftime("%m"))
+        self.path = os.path.join(directory, f"{policy}-{started.strftime('%Y%m%dT%H%M%S')}.ndjson.gz")
+        self.rows = 0
+
+    def write(self, rows: Iterable[Dict]) -> int:
+        lines = [json.dumps(row, cls=DjangoJSONEncoder, separators=(",", ":")) for row in rows]
+        if not lines:
+            return 0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # One complete gzip member per batch; concatenated members are a valid gzip file
+        with gzip.open(self.path, "at", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+        self.rows += len(lines)
+        return len(lines)
+
+
+# ----------------------------------------------------------------------
+# PostgreSQL time partitioning
+# ----------------------------------------------------------------------
+def partitioning_enabled(using: str = "default") -> bool:
+    return bool(getattr(settings, "DATA_RETENTION_PARTITIONING", False)) and connections[using].vendor == "postgresql"
+
+
+def _month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(dt_timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(moment: datetime) -> datetime:
+    return (moment.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _literal(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d %H:%M:%S+00")
+
+
+def is_partitioned(model, using: str = "default") -> bool:
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [model._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions(model, using: str = "default") -> Dict[str, tuple]:
+    """Partition name -> (lower, upper) bounds (lower None for the legacy one)."""
+    table = model._meta.db_table
+    pattern = re.compile(rf"^{re.escape(table)}_(p|before_)(\d{{6}})$")
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    bounds = {}
+    for name in names:
+        match = pattern.match(name)
+        if not match:
+            continue  # e.g. the default partition
+        month = datetime.strptime(match.group(2), "%Y%m").replace(tzinfo=dt_timezone.utc)
+        if match.group(1) == "before_":
+            bounds[name] = (None, month)
+        else:
+            bounds[name] = (month, _next_month(month))
+    return bounds
+
+
+def ensure_partitions(model, ahead: Optional[int] = None, using: str = "default") -> List[str]:
+    """Create the monthly partitions up to ``ahead`` months from now."""
+    ahead = int(getattr(settings, "DATA_RETENTION_PARTITIONS_AHEAD", 3) if ahead is None else ahead)
+    table = model._meta.db_table
+    quote = connections[using].ops.quote_name
+    existing = partitions(model, using)
+    start = max(upper for _, upper in existing.values()) if existing else _month_start(timezone.now())
+    horizon = _month_start(timezone.now())
+    for _ in range(ahead):
+        horizon = _next_month(horizon)
+
+    created = []
+    with connections[using].cursor() as cursor:
+        month = start
+        while month <= horizon:
+            name = f"{table}_p{month.strftime('%Y%m')}"
+            if name not in existing:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {quote(name)} PARTITION OF {quote(table)} "
+                    f"FOR VALUES FROM ('{_literal(month)}') TO ('{_literal(_next_month(month))}')"
+                )
+                created.append(name)
+            month = _next_month(month)
+    return created
+
+
+def convert_to_partitioned(policy: RetentionPolicy, using: str = "default") -> List[str]:
+    """
+    Turn the policy's table into a table range-partitioned by month on
+    ``policy.field``. Existing rows stay where they are: the old table is
+    attached as the ``_before_<YYYYMM>`` partition. Takes an ACCESS
+    EXCLUSIVE lock for the duration (including the bound validation scan).
+    """
+    if not partitioning_enabled(using):
+        raise RetentionError("Partitioning needs DATA_RETENTION_PARTITIONING and PostgreSQL")
+    model = policy.model_class
+    if is_partitioned(model, using):
+        return ensure_partitions(model, using=using)
+
+    opts = model._meta
+    table = opts.db_table
+    column = opts.get_field(policy.field).column
+    pk = opts.pk.column
+    connection = connections[using]
+    quote = connection.ops.quote_name
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE confrelid = to_regclass(%s) AND contype = 'f'",
+            [table],
+        )
+        if cursor.fetchall():
+            raise RetentionError(f"{table} is referenced by foreign keys and cannot be partitioned")
+        cursor.execute(
+            "SELECT count(*) FROM pg_index WHERE indrelid = to_regclass(%s) AND indisunique AND NOT indisprimary",
+            [table],
+        )
+        if cursor.fetchone()[0]:
+            raise RetentionError(f"{table} has unique constraints and cannot be partitioned")
+
+        cursor.execute(f"LOCK TABLE {quote(table)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"SELECT max({quote(column)}), max({quote(pk)}) FROM {quote(table)}")
+        newest, max_pk = cursor.fetchone()
+        boundary = _next_month(_month_start(max(newest or timezone.now(), timezone.now())))
+        legacy = f"{table}_before_{boundary.strftime('%Y%m')}"
+
+        cursor.execute(
+            "SELECT i.relname, pg_get_indexdef(i.oid), x.indisprimary FROM pg_index x "
+            "JOIN pg_class i ON i.oid = x.indexrelid WHERE x.indrelid = to_regclass(%s)",
+            [table],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}")
+        # Free the index names for the parent's partitioned indexes
+        for name, _, primary in indexes:
+            renamed = f"{name[:56]}_legacy"
+            if primary:
+                cursor.execute(f"ALTER TABLE {quote(legacy)} RENAME CONSTRAINT {quote(name)} TO {quote(renamed)}")
+            else:
+                cursor.execute(f"ALTER INDEX {quote(name)} RENAME TO {quote(renamed)}")
+        cursor.execute(f"ALTER TABLE {quote(legacy)} ALTER COLUMN {quote(pk)} DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {quote(legacy)} ALTER COLUMN {quote(pk)} DROP DEFAULT")
+
+        cursor.execute(
+            f"CREATE TABLE {quote(table)} (LIKE {quote(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+            f"INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE ({quote(column)})"
+        )
+        sequence = f"{table[:50]}_{pk}_seq"
+        cursor.execute(f"CREATE SEQUENCE {quote(sequence)} OWNED BY {quote(table)}.{quote(pk)}")
+        cursor.execute("SELECT setval(%s, %s, false)", [sequence, (max_pk or 0) + 1])
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ALTER COLUMN {quote(pk)} SET DEFAULT nextval('{sequence}')"
+        )
+        # The partition key has to be part of the primary key
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(f'{table[:50]}_pkey')} "
+            f"PRIMARY KEY ({quote(pk)}, {quote(column)})"
+        )
+        for name, definition, primary in indexes:
+            if not primary:
+                # Captured before the rename, so the definition names the new parent
+                cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}")
+
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(legacy)} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{_literal(boundary)}')"
+        )
+        cursor.execute(f"CREATE TABLE {quote(f'{table}_default')} PARTITION OF {quote(table)} DEFAULT")
+
+    created = ensure_partitions(model, using=using)
+    logger.info(f"Partitioned {table} by month on {column}; existing rows kept in {legacy}")
+    return [legacy] + created
+
+
+def _drop_expired_partitions(policy: RetentionPolicy, cutoff: datetime, result: RetentionResult,
+                             archive: Optional[Archive], using: str) -> None:
+    model = policy.model_class
+    quote = connections[using].ops.quote_name
+    for name, (lower, upper) in sorted(partitions(model, using).items(), key=lambda item: item[1][1]):
+        if upper > cutoff:
+            continue
+        if result.dry_run:
+            result.partitions_dropped.append(name)
+            continue
+        rows = model._base_manager.using(using).filter(**{f"{policy.field}__lt": upper})
+        if lower is not None:
+            rows = rows.filter(**{f"{policy.field}__gte": lower})
+        with transaction.atomic(using=using):
+            if archive is not None:
+                batch = []
+                for row in rows.order_by().values().iterator(chunk_size=policy.batch_size):
+                    batch.append(row)
+                    if len(batch) >= policy.batch_size:
+                        result.archived += archive.write(batch)
+                        batch = []
+                result.archived += archive.write(batch)
+            count = rows.count()
+            with connections[using].cursor() as cursor:
+                cursor.execute(f"DROP TABLE {quote(name)}")
+        result.deleted += count
+        result.partitions_dropped.append(name)
+        logger.info(f"Dropped partition {name} ({count} rows) for retention policy {policy.name}")
+
+
+# ----------------------------------------------------------------------
+# Runs
+# ----------------------------------------------------------------------
+def apply_policy(policy: RetentionPolicy, dry_run: bool = False, now: Optional[datetime] = None) -> RetentionResult:
+    started = time.perf_counter()
+    now = now or timezone.now()
+    cutoff = policy.cutoff(now)
+    result = RetentionResult(
+        policy=policy.name, model=policy.model, action=policy.action,
+        cutoff=cutoff.isoformat(), dry_run=dry_run,
+    )
+    model = policy.model_class
+    using = router.db_for_write(model)
+    archive = Archive(policy.name, now) if policy.action == ARCHIVE and not dry_run else None
+
+    try:
+        partitioned = bool(policy.partition) and partitioning_enabled(using) and is_partitioned(model, using)
+        if partitioned:
+            _drop_expired_partitions(policy, cutoff, result, archive, using)
+            if not dry_run:
+                result.partitions_created = ensure_partitions(model, using=using)
+        if dry_run:
+            result.matched = policy.expired(cutoff).count()
+        else:
+            purge(policy.expired(cutoff), policy.batch_size, archive, result)
+    except Exception as e:
+        result.error = str(e)
+        logger.exception(f"Retention policy {policy.name} failed")
+
+    if archive is not None and archive.rows:
+        result.archive_files.append(archive.path)
+    result.seconds = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_retention(names: Optional[Iterable[str]] = None, dry_run: bool = False) -> List[RetentionResult]:
+    """Apply the configured policies (or ``names``) and return one result each."""
+    policies = get_policies(names)
+    if not dry_run and not cache.add(LOCK_KEY, 1, LOCK_SECONDS):
+        raise RetentionError("Another retention run is in progress")
+    try:
+        results = [apply_policy(policy, dry_run=dry_run) for policy in policies]
+    finally:
+        if not dry_run:
+            cache.delete(LOCK_KEY)
+
+    for result in results:
+        if result.error:
+            continue
+        logger.info(
+            f"Retention {result.policy}: {'would remove' if dry_run else 'removed'} "
+            f"{result.matched if dry_run else result.deleted} rows older than {result.cutoff}"
+            + (f", archived {result.archived}" if result.archived else "")
+            + (f", dropped {len(result.partitions_dropped)} partitions" if result.partitions_dropped else "")
+        )
+    if not dry_run:
+        cache.set(REPORT_KEY, {
+            "finished_at": timezone.now().isoformat(),
+            "results": [result.as_dict() for result in results],
+        }, None)
+    return results
+
+
+def last_report() -> Optional[Dict]:
+    return cache.get(REPORT_KEY)
@@ -9,6 +9,7 @@ def seed_default_tables(min_tables: int = 6) -> dict:
     Returns a summary dict with counts created.
     """
     from core.models import Organization, Location, Table
+    from core.tables import apply_floor_plan
 
     created = {"organizations": 0, "locations": 0, "tables": 0}
 
@@ -23,14 +24,303 @@ def seed_default_tables(min_tables: int = 6) -> dict:
         if loc_created:
             created["locations"] += 1
 
-        # Consistent naming: T1..T<n>
-        for num in range(1, min_tables + 1):
-            _, t_created = Table.objects.get_or_create(
+        # Consistent naming: T1..T<n>, written through the registry in one go
+        counts = apply_floor_plan(loc, [
+            {"table_number": f"T{num}", "capacity": 4, "is_active": True, "table_type": "dining"}
+            for num in range(1, min_tables + 1)
+        ])
+        created["tables"] += counts["created"]
+
+    return created
+
+
+BENCHMARK_ORGANIZATION = "Benchmark Organization"
+
+
+def seed_benchmark_data(
+    categories: int = 6,
+    items_per_category: int = 8,
+    users: int = 5,
+    orders_per_user: int = 4,
+) -> dict:
+    """
+    Idempotently seed a menu, carts and order histories sized for the
+    ``bench_endpoints`` query budgets. Returns the ids the benchmark
+    scenarios need plus counts of what was created.
+    """
+    from decimal import Decimal
+
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+
+    from core.models import Organization, Location, ServiceType, Table
+    from menu.models import MenuCategory, MenuItem, ModifierGroup, Modifier
+    from orders.models import Cart, CartItem, Order, OrderItem
+
+    User = get_user_model()
+    created = {"categories": 0, "items": 0, "users": 0, "carts": 0, "orders": 0}
+
+    with transaction.atomic():
+        org, _ = Organization.objects.get_or_create(name=BENCHMARK_ORGANIZATION)
+        loc, _ = Location.objects.get_or_create(
+            organization=org, name="Benchmark", defaults={"timezone": "Asia/Kathmandu"}
+        )
+        for num in range(1, 7):
+            Table.objects.get_or_create(
                 location=loc,
-                table_number=f"T{num}",
+                table_number=f"B{num}",
                 defaults={"capacity": 4, "is_active": True, "table_type": "dining"},
             )
-            if t_created:
-                created["tables"] += 1
+        service_type, _ = ServiceType.objects.get_or_create(
+            code="BENCH_DINE_IN",  # ServiceType.clean() upper-cases codes
+            defaults={"name": "Benchmark Dine-in", "allows_reservations": True},
+        )
 
-    return created
+        items = list(MenuItem.objects.filter(organization=org).order_by("pk"))
+        if not items:
+            for c in range(1, categories + 1):
+                category = MenuCategory.objects.create(
+                    organization=org, name=f"Category {c}", sort_order=c
+                )
+                created["categories"] += 1
+                for i in range(1, items_per_category + 1):
+                    item = MenuItem.objects.create(
+                        organization=org,
+                        category=category,
+                        name=f"Dish {c}-{i}",
+                        description=f"Benchmark dish {i} of category {c}",
+                        price=Decimal("5.00") + Decimal(i),
+                        sort_order=i,
+                    )
+                    group = ModifierGroup.objects.create(menu_item=item, name="Extras")
+                    for m in range(1, 4):
+                        Modifier.objects.create(
+                            modifier_group=group, name=f"Extra {m}", price=Decimal("0.50") * m
+                        )
+                    items.append(item)
+                    created["items"] += 1
+
+        for u in range(1, users + 1):
+            # User.save() runs full_clean(), so the password must be set on create
+            user, user_created = User.objects.get_or_create(
+                username=f"bench_user_{u}",
+                defaults={"email": f"bench_user_{u}@example.com", "password": make_password("bench12345")},
+            )
+            if user_created:
+                created["users"] += 1
+
+            if not Cart.objects.filter(user=user, status=Cart.STATUS_ACTIVE).exists():
+                cart = Cart.objects.create(user=user)
+                for item in items[u:u + 3]:
+                    CartItem.objects.create(cart=cart, menu_item=item, quantity=2)
+                created["carts"] += 1
+
+            existing = Order.objects.filter(user=user).count()
+            for o in range(existing, orders_per_user):
+                order = Order.objects.create(
+                    user=user,
+                    status=Order.STATUS_CONFIRMED,
+                    confirmed_at=timezone.now(),
+                )
+                for item in items[o:o + 3]:
+                    OrderItem.objects.create(
+                        order=order, menu_item=item, quantity=1, unit_price=item.price
+                    )
+                order.calculate_totals()
+                created["orders"] += 1
+
+    try:
+        from menu.search import rebuild_index
+        rebuild_index(organization_id=org.pk)
+    except Exception:
+        pass
+
+    return {
+        "organization_id": org.pk,
+        "location_id": loc.pk,
+        "service_type_id": service_type.pk,
+        "menu_item_ids": [item.pk for item in items],
+        "usernames": [f"bench_user_{u}" for u in range(1, users + 1)],
+        "password": "bench12345",
+        "created": created,
+    }
+
+
+LOAD_ORGANIZATION = "Load Test Organization"
+LOAD_PASSWORD = "load12345"
+
+
+def seed_load_data(
+    categories: int = 30,
+    subcategories: int = 2,
+    items_per_category: int = 40,
+    tables: int = 60,
+    users: int = 200,
+    orders_per_user: int = 10,
+    open_orders: int = 50,
+    batch_size: int = 1000,
+) -> dict:
+    """
+    Idempotently seed a large menu (nested categories, items with modifier
+    groups), a floor plan, customers with order history and an open kitchen
+    queue for the ``load_test`` scenarios. Rows are written with
+    ``bulk_create`` and the menu tree, category aggregates and search index
+    are rebuilt once at the end, so tens of thousands of rows take seconds.
+    Returns the ids the scenarios need plus counts of what was created.
+    """
+    import random
+    from datetime import timedelta
+    from decimal import Decimal
+
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+
+    from core.models import Organization, Location, ServiceType, Table
+    from core.tables import apply_floor_plan
+    from menu import tree
+    from menu.models import MenuCategory, MenuItem, ModifierGroup, Modifier
+    from orders.models import Order, OrderItem
+
+    User = get_user_model()
+    rng = random.Random(1234)
+    now = timezone.now()
+    created = {"categories": 0, "items": 0, "modifiers": 0, "tables": 0, "users": 0, "orders": 0}
+
+    with transaction.atomic():
+        org, _ = Organization.objects.get_or_create(name=LOAD_ORGANIZATION)
+        loc, _ = Location.objects.get_or_create(
+            organization=org, name="Load Test", defaults={"timezone": "Asia/Kathmandu"}
+        )
+        service_type, _ = ServiceType.objects.get_or_create(
+            code="LOAD_DINE_IN",  # ServiceType.clean() upper-cases codes
+            defaults={"name": "Load Test Dine-in", "allows_reservations": True},
+        )
+        created["tables"] = apply_floor_plan(loc, [
+            {"table_number": f"L{num}", "capacity": (2, 4, 4, 6, 8)[num % 5], "is_active": True, "table_type": "dining"}
+            for num in range(1, tables + 1)
+        ])["created"]
+
+        # Menu: roots with ``subcategories`` children each; items go in the leaves
+        if not MenuItem.objects.filter(organization=org).exists():
+            roots = MenuCategory.objects.bulk_create([
+                MenuCategory(organization=org, name=f"Load Category {c}", slug=f"load-category-{c}", sort_order=c)
+                for c in range(1, categories + 1)
+            ], batch_size=batch_size)
+            children = MenuCategory.objects.bulk_create([
+                MenuCategory(
+                    organization=org, parent=root, level=1, sort_order=s,
+                    name=f"{root.name}.{s}", slug=f"{root.slug}-{s}",
+                )
+                for root in roots for s in range(1, subcategories + 1)
+            ], batch_size=batch_size)
+            leaves = children or roots
+            per_leaf = max(1, items_per_category // max(1, subcategories))
+            created["categories"] = len(roots) + len(children)
+
+            items = MenuItem.objects.bulk_create([
+                MenuItem(
+                    organization=org,
+                    category=leaf,
+                    name=f"Load Dish {leaf.pk}-{i}",
+                    slug=f"load-dish-{leaf.pk}-{i}",
+                    description=f"Load test dish {i} of {leaf.name}",
+                    price=Decimal(rng.randint(500, 3500)) / 100,
+                    sort_order=i,
+                )
+                for leaf in leaves for i in range(1, per_leaf + 1)
+            ], batch_size=batch_size)
+            created["items"] = len(items)
+
+            groups = ModifierGroup.objects.bulk_create([
+                ModifierGroup(menu_item=item, name="Extras", slug="extras", selection_type=ModifierGroup.SELECTION_MULTIPLE, max_selections=3)
+                for item in items
+            ], batch_size=batch_size)
+            modifiers = Modifier.objects.bulk_create([
+                Modifier(modifier_group=group, name=f"Extra {m}", slug=f"extra-{m}", price=Decimal("0.50") * m)
+                for group in groups for m in range(1, 4)
+            ], batch_size=batch_size)
+            created["modifiers"] = len(modifiers)
+
+            tree.rebuild()
+            tree.refresh_aggregates()
+
+        items = list(MenuItem.objects.filter(organization=org).order_by("pk").values("pk", "price"))
+
+        # Customers share one password hash (hashing is the slow part)
+        usernames = [f"load_user_{u}" for u in range(1, users + 1)]
+        existing = set(User.objects.filter(username__in=usernames).values_list("username", flat=True))
+        password = make_password(LOAD_PASSWORD)
+        User.objects.bulk_create([
+            User(username=name, email=f"{name}@example.com", password=password)
+            for name in usernames if name not in existing
+        ], batch_size=batch_size)
+        created["users"] = len(usernames) - len(existing)
+        staff, _ = User.objects.get_or_create(
+            username="load_staff",
+            defaults={"email": "load_staff@example.com", "is_staff": True, "password": password},
+        )
+
+        # Order history, plus confirmed orders feeding the kitchen queue
+        customers = list(User.objects.filter(username__in=usernames).values_list("pk", flat=True))
+        with_history = set(
+            Order.objects.filter(user_id__in=customers, order_number__startswith="LOAD-")
+            .values_list("user_id", flat=True).distinct()
+        )
+        orders, lines = [], []
+        for index, user_id in enumerate(customers):
+            if user_id in with_history:
+                continue
+            for n in range(orders_per_user + (1 if index < open_orders else 0)):
+                open_order = n == orders_per_user
+                chosen = rng.sample(items, k=min(len(items), rng.randint(1, 5)))
+                quantities = [rng.randint(1, 3) for _ in chosen]
+                subtotal = sum((row["price"] * qty for row, qty in zip(chosen, quantities)), Decimal("0.00"))
+                placed = now - timedelta(minutes=rng.randint(1, 30)) if open_order else now - timedelta(days=rng.randint(1, 90))
+                order = Order(
+                    user_id=user_id,
+                    order_number=f"LOAD-{user_id}-{n + 1}",
+                    status=Order.STATUS_CONFIRMED if open_order else Order.STATUS_COMPLETED,
+                    payment_status="COMPLETED",
+                    subtotal=subtotal,
+                    total_amount=subtotal,
+                    item_count=sum(quantities),
+                    created_at=placed,
+                    confirmed_at=placed,
+                    completed_at=None if open_order else placed + timedelta(minutes=40),
+                )
+                orders.append(order)
+                lines.append([
+                    OrderItem(
+                        menu_item_id=row["pk"], quantity=qty, unit_price=row["price"],
+                        line_total=row["price"] * qty, created_at=placed,
+                        status=OrderItem.STATUS_PENDING if open_order else OrderItem.STATUS_SERVED,
+                    )
+                    for row, qty in zip(chosen, quantities)
+                ])
+        Order.objects.bulk_create(orders, batch_size=batch_size)
+        for order, order_lines in zip(orders, lines):
+            for line in order_lines:
+                line.order = order
+        OrderItem.objects.bulk_create([line for order_lines in lines for line in order_lines], batch_size=batch_size)
+        created["orders"] = len(orders)
+
+    try:
+        from menu.search import rebuild_index
+        rebuild_index(organization_id=org.pk)
+    except Exception:
+        pass
+
+    return {
+        "organization_id": org.pk,
+        "location_id": loc.pk,
+        "service_type_id": service_type.pk,
+        "menu_item_ids": [row["pk"] for row in items],
+        "category_ids": list(MenuCategory.objects.filter(organization=org).values_list("pk", flat=True)),
+        "table_ids": list(Table.objects.filter(location=loc, is_active=True).values_list("pk", flat=True)),
+        "usernames": usernames,
+        "staff_username": staff.username,
+        "password": LOAD_PASSWORD,
+        "created": created,
+    }
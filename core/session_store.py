@@ -0,0 +1,371 @@
+# core/session_store.py
+"""
+Redis-native session engine with coalesced database write-through.
+
+Each session lives in a Redis hash (one field per top-level session key, so the
+cart keys kept by ``orders.session_utils.SessionCartManager`` are updated field
+by field). The ``django_session`` row is only written when:
+
+- a non-volatile key changes (login/logout, cart contents, coupons, ...), or
+- volatile keys (``SESSION_COALESCED_KEYS``, e.g. activity timestamps) changed
+  and ``SESSION_DB_SYNC_INTERVAL`` seconds passed since the last DB write, or
+- the periodic ``core.tasks.flush_dirty_sessions_task`` drains the dirty set.
+
+Sessions that only exist in the database (created by the previous engine) are
+hydrated into Redis on first load; ``manage.py migrate_sessions`` does the same
+in bulk. When the default cache is not Redis-backed the engine behaves like the
+plain ``db`` backend but still skips the write when nothing changed.
+
+Enable with ``SESSION_ENGINE = "core.session_store"``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.db import router, transaction
+
+from core.cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+# Reserved hash fields (session keys never start with "@")
+SYNCED_FIELD = "@synced"
+DIRTY_FIELD = "@dirty"
+META_FIELDS = (SYNCED_FIELD, DIRTY_FIELD)
+
+DEFAULT_COALESCED_KEYS = ("cart_last_activity", "cart_last_modified")
+
+
+def _key_prefix() -> str:
+    return f"{getattr(settings, 'CACHE_KEY_PREFIX', 'rms')}:session:"
+
+
+def _dirty_set_key() -> str:
+    return f"{getattr(settings, 'CACHE_KEY_PREFIX', 'rms')}:session_dirty"
+
+
+def _encode_value(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _as_text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class SessionStore(DBStore):
+    """Session store backed by Redis hashes with lazy database persistence."""
+
+    def __init__(self, session_key: Optional[str] = None):
+        super().__init__(session_key)
+        # Encoded field values as last written to Redis/DB, used for diffing
+        self._snapshot: Dict[str, str] = {}
+        self._db_synced_at = 0.0
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    @classmethod
+    def _redis(cls):
+        return CacheService.get_redis_client(write=True)
+
+    @staticmethod
+    def _redis_key(session_key: str) -> str:
+        return f"{_key_prefix()}{session_key}"
+
+    @staticmethod
+    def _sync_interval() -> int:
+        return int(getattr(settings, "SESSION_DB_SYNC_INTERVAL", 3600))
+
+    @staticmethod
+    def _coalesced_keys() -> set:
+        return set(getattr(settings, "SESSION_COALESCED_KEYS", DEFAULT_COALESCED_KEYS))
+
+    @staticmethod
+    def _encode_fields(data: Dict[str, Any]) -> Dict[str, str]:
+        return {key: _encode_value(value) for key, value in data.items()}
+
+    @staticmethod
+    def _decode_hash(raw: Dict[Any, Any]) -> Tuple[Dict[str, Any], Dict[str, str], float]:
+        data: Dict[str, Any] = {}
+        fields: Dict[str, str] = {}
+        synced = 0.0
+        for raw_key, raw_value in raw.items():
+            key, value = _as_text(raw_key), _as_text(raw_value)
+            if key == SYNCED_FIELD:
+                try:
+                    synced = float(value)
+                except ValueError:
+                    synced = 0.0
+                continue
+            if key in META_FIELDS:
+                continue
+            data[key] = json.loads(value)
+            fields[key] = value
+        return data, fields, synced
+
+    def _sync_due(self) -> bool:
+        return time.time() - self._db_synced_at >= self._sync_interval()
+
+    def _write_db(self, data: Dict[str, Any]) -> None:
+        """Upsert the session row (UPDATE, falling back to INSERT)."""
+        obj = self.create_model_instance(data)
+        using = router.db_for_write(self.model, instance=obj)
+        with transaction.atomic(using=using):
+            obj.save(using=using)
+        self._db_synced_at = time.time()
+
+    def _hydrate(self, client, fields: Dict[str, str], synced: float, ttl: int) -> None:
+        key = self._redis_key(self.session_key)
+        pipe = client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping={**fields, SYNCED_FIELD: repr(synced)})
+        pipe.expire(key, max(ttl, 1))
+        pipe.execute()
+
+    # ------------------------------------------------------------------
+    # SessionBase API
+    # ------------------------------------------------------------------
+    def load(self):
+        client = self._redis()
+        if client is not None and self.session_key:
+            try:
+                raw = client.hgetall(self._redis_key(self.session_key))
+            except Exception as e:
+                logger.warning(f"Session load from Redis failed, using database: {e}")
+                raw = None
+            if raw:
+                data, fields, synced = self._decode_hash(raw)
+                self._snapshot = fields
+                self._db_synced_at = synced
+                return data
+
+        # Database path (also the lazy migration path for pre-existing sessions)
+        s = self._get_session_from_db()
+        if s is None:
+            self._snapshot = {}
+            self._db_synced_at = 0.0
+            return {}
+        data = self.decode(s.session_data)
+        self._snapshot = self._encode_fields(data)
+        expiry_age = self.get_expiry_age(expiry=data.get("_session_expiry"))
+        self._db_synced_at = (s.expire_date - timedelta(seconds=expiry_age)).timestamp()
+        if client is not None:
+            try:
+                self._hydrate(client, self._snapshot, self._db_synced_at, expiry_age)
+            except Exception as e:
+                logger.warning(f"Session hydration into Redis failed: {e}")
+        return data
+
+    def exists(self, session_key):
+        client = self._redis()
+        if client is not None:
+            try:
+                if client.exists(self._redis_key(session_key)):
+                    return True
+            except Exception as e:
+                logger.warning(f"Session exists check in Redis failed: {e}")
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        client = self._redis()
+        if client is None:
+            return self._save_database_only(must_create)
+
+        data = self._get_session(no_load=must_create)
+        fields = self._encode_fields(data)
+        changed = {k: v for k, v in fields.items() if self._snapshot.get(k) != v}
+        removed = [k for k in self._snapshot if k not in fields]
+        key = self._redis_key(self.session_key)
+        ttl = max(self.get_expiry_age(), 1)
+
+        try:
+            if must_create:
+                # Redis arbitrates key uniqueness; the DB row is written lazily
+                if not client.hsetnx(key, SYNCED_FIELD, "0"):
+                    raise CreateError
+                self._db_synced_at = 0.0
+
+            volatile = self._coalesced_keys()
+            content_changed = any(k not in volatile for k in list(changed) + removed)
+            pending = bool(changed or removed)
+            # Persisted sessions also refresh their row (and expire_date) once
+            # per sync interval, which is the coalesced timer.
+            write_through = content_changed or (self._db_synced_at > 0 and self._sync_due())
+
+            pipe = client.pipeline()
+            if changed:
+                pipe.hset(key, mapping=changed)
+            if removed:
+                pipe.hdel(key, *removed)
+            if pending and not write_through:
+                pipe.hset(key, DIRTY_FIELD, "1")
+                pipe.sadd(_dirty_set_key(), self.session_key)
+            pipe.expire(key, ttl)
+            pipe.execute()
+        except CreateError:
+            raise
+        except Exception as e:
+            logger.warning(f"Session save to Redis failed, writing database: {e}")
+            self._save_database_only(must_create)
+            self._snapshot = fields
+            return
+
+        self._snapshot = fields
+        if write_through:
+            self._write_db(data)
+            try:
+                pipe = client.pipeline()
+                pipe.hset(key, SYNCED_FIELD, repr(self._db_synced_at))
+                pipe.hdel(key, DIRTY_FIELD)
+                pipe.srem(_dirty_set_key(), self.session_key)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to record session sync marker: {e}")
+
+    def _save_database_only(self, must_create=False):
+        """Plain db-backend save that skips unchanged sessions."""
+        if must_create:
+            super().save(must_create=True)
+            self._snapshot = self._encode_fields(self._get_session(no_load=True))
+            self._db_synced_at = time.time()
+            return
+        data = self._get_session()
+        fields = self._encode_fields(data)
+        if fields == self._snapshot and self._db_synced_at and not self._sync_due():
+            return
+        super().save(must_create=False)
+        self._snapshot = fields
+        self._db_synced_at = time.time()
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self.evict(session_key)
+        super().delete(session_key)
+
+    @classmethod
+    def evict(cls, session_key: str) -> None:
+        """Drop the Redis copy so the next load re-reads the database row."""
+        client = cls._redis()
+        if client is None or not session_key:
+            return
+        try:
+            pipe = client.pipeline()
+            pipe.delete(cls._redis_key(session_key))
+            pipe.srem(_dirty_set_key(), session_key)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Session evict from Redis failed: {e}")
+
+    # Async variants route through the sync implementation so they share the
+    # Redis path instead of the db backend's native async ORM calls.
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    async def aexists(self, session_key):
+        return await sync_to_async(self.exists)(session_key)
+
+    async def asave(self, must_create=False):
+        return await sync_to_async(self.save)(must_create=must_create)
+
+    async def adelete(self, session_key=None):
+        return await sync_to_async(self.delete)(session_key)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    @classmethod
+    def flush_dirty(cls, limit: int = 500) -> int:
+        """
+        Persist sessions whose coalesced changes have not reached the database.
+        Returns the number of sessions written.
+        """
+        client = cls._redis()
+        if client is None:
+            return 0
+        try:
+            keys = client.spop(_dirty_set_key(), limit) or []
+        except Exception as e:
+            logger.warning(f"Failed to read dirty session set: {e}")
+            return 0
+
+        written = 0
+        for raw_key in keys:
+            session_key = _as_text(raw_key)
+            store = cls(session_key)
+            try:
+                raw = client.hgetall(cls._redis_key(session_key))
+                if not raw:
+                    continue
+                data, fields, _ = cls._decode_hash(raw)
+                store._session_cache = data
+                store._snapshot = fields
+                store._write_db(data)
+                pipe = client.pipeline()
+                pipe.hset(cls._redis_key(session_key), SYNCED_FIELD, repr(store._db_synced_at))
+                pipe.hdel(cls._redis_key(session_key), DIRTY_FIELD)
+                pipe.execute()
+                written += 1
+            except Exception as e:
+                logger.warning(f"Failed to flush session {session_key}: {e}")
+                try:
+                    client.sadd(_dirty_set_key(), session_key)
+                except Exception:
+                    pass
+        return written
+
+    @classmethod
+    def hydrate_from_database(cls, session_keys: Optional[Iterable[str]] = None, batch_size: int = 500) -> int:
+        """
+        Copy active database sessions into Redis (bulk migration path).
+        Returns the number of sessions hydrated.
+        """
+        from django.contrib.sessions.models import Session
+        from django.utils import timezone
+
+        client = cls._redis()
+        if client is None:
+            return 0
+
+        now = timezone.now()
+        qs = Session.objects.filter(expire_date__gt=now)
+        if session_keys is not None:
+            qs = qs.filter(session_key__in=list(session_keys))
+
+        hydrated = 0
+        pipe = client.pipeline()
+        pending: List[str] = []
+        for row in qs.iterator(chunk_size=batch_size):
+            store = cls(row.session_key)
+            try:
+                data = store.decode(row.session_data)
+            except Exception:
+                continue
+            ttl = int((row.expire_date - now).total_seconds())
+            synced = (row.expire_date - timedelta(seconds=store.get_session_cookie_age())).timestamp()
+            key = cls._redis_key(row.session_key)
+            pipe.delete(key)
+            pipe.hset(key, mapping={**store._encode_fields(data), SYNCED_FIELD: repr(synced)})
+            pipe.expire(key, max(ttl, 1))
+            pending.append(row.session_key)
+            if len(pending) >= batch_size:
+                pipe.execute()
+                hydrated += len(pending)
+                pending = []
+        if pending:
+            pipe.execute()
+            hydrated += len(pending)
+        return hydrated
@@ -0,0 +1,250 @@
+# core/tables.py
+"""
+Canonical table registry.
+
+``core.Table`` is the only table model that is written to; reservations
+import it directly and inventory keeps its asset data in ``TableAsset``
+(one-to-one with ``core.Table``). Nothing is copied between apps any more.
+
+Readers that only need the floor plan (table pickers, availability grids)
+use ``tables()`` / ``get_table()`` (``atables()`` in async views), a
+cached projection of every table ordered like ``Table.Meta.ordering``. The projection lives under a
+versioned key: ``invalidate()`` bumps the version once, so a reader that
+loaded rows just before a commit can only fill a key nobody reads again.
+A miss is rebuilt by one worker at a time (``core.warmup``) while the
+others serve the previous projection, and a commit schedules a warm-up.
+
+``apply_floor_plan()`` is the write path for bulk edits: one SELECT, one
+``bulk_create``, one ``bulk_update`` and a single invalidation when the
+transaction commits. Single-row saves through the ORM invalidate through
+the ``post_save`` / ``post_delete`` receivers in ``core.signals``, at most
+once per transaction.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from . import aio, warmup
+from .models import Location, Table
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "tables:registry:version"
+PROJECTION_KEY = "tables:registry:{}"
+# Last good projection, served while another worker rebuilds (core.warmup)
+STALE_KEY = "tables:registry:stale"
+PROJECTION_TTL = 60 * 60
+
+FLOOR_PLAN_FIELDS = ("capacity", "is_active", "table_type")
+
+
+# ----------------------------------------------------------------------
+# Projection
+# ----------------------------------------------------------------------
+def _version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY) or 1
+    return version
+
+
+def _row(table: Table) -> dict:
+    return {
+        "id": table.pk,
+        "location_id": table.location_id,
+        "location": {"id": table.location_id, "name": table.location.name},
+        "table_number": table.table_number,
+        "capacity": table.capacity,
+        "table_type": table.table_type,
+        "is_active": table.is_active,
+    }
+
+
+def _load() -> List[dict]:
+    rows = Table.objects.select_related("location").order_by("location_id", "table_number")
+    return [_row(table) for table in rows]
+
+
+def _select(rows: List[dict], location_id: Optional[int], active_only: bool) -> List[dict]:
+    if location_id is not None:
+        rows = [row for row in rows if row["location_id"] == location_id]
+    if active_only:
+        rows = [row for row in rows if row["is_active"]]
+    return rows
+
+
+def tables(location_id: Optional[int] = None, active_only: bool = True) -> List[dict]:
+    """
+    Floor plan as plain dicts (``id``, ``location_id``, ``location.name``,
+    ``table_number``, ``capacity``, ``table_type``, ``is_active``), served
+    from the cache.
+    """
+    rows = warmup.get_or_build(PROJECTION_KEY.format(_version()), _load, PROJECTION_TTL, STALE_KEY)
+    return _select(rows, location_id, active_only)
+
+
+async def atables(location_id: Optional[int] = None, active_only: bool = True) -> List[dict]:
+    """``tables()`` for async views: a cache hit stays on the async cache client."""
+    version = await aio.cache_get(VERSION_KEY)
+    if version is None:
+        version = await sync_to_async(_version)()
+    key = PROJECTION_KEY.format(version)
+    rows = await aio.cache_get(key)
+    if rows is None:
+        rows = await sync_to_async(warmup.get_or_build)(key, _load, PROJECTION_TTL, STALE_KEY)
+    return _select(rows, location_id, active_only)
+
+
+def refresh() -> bool:
+    """Rebuild the projection for the current version (cache warm-up)."""
+    return warmup.refresh(PROJECTION_KEY.format(_version()), _load, PROJECTION_TTL, STALE_KEY)
+
+
+def get_table(table_id: int) -> Optional[dict]:
+    """Projection row of one table (active or not), or None."""
+    for row in tables(active_only=False):
+        if row["id"] == table_id:
+            return row
+    return None
+
+
+def has_tables() -> bool:
+    return bool(tables(active_only=False))
+
+
+def invalidate() -> None:
+    """Retire the cached projection (one cache write)."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Version key evicted: any fresh value retires the old projection
+        cache.set(VERSION_KEY, _version() + 1, None)
+
+
+def _invalidate_on_commit() -> None:
+    invalidate()
+    warmup.schedule(["tables.registry"])
+
+
+def schedule_invalidation(using: Optional[str] = None) -> None:
+    """
+    Invalidate when the current transaction commits; several writes in one
+    transaction share a single invalidation. Outside a transaction it runs
+    immediately.
+    """
+    using = using or router.db_for_write(Table)
+    conn = connections[using]
+    if conn.in_atomic_block and any(
+        entry[1] is _invalidate_on_commit for entry in conn.run_on_commit
+    ):
+        return
+    transaction.on_commit(_invalidate_on_commit, using=using)
+
+
+# ----------------------------------------------------------------------
+# Bulk floor-plan edits
+# ----------------------------------------------------------------------
+def _normalize(entry: dict) -> dict:
+    number = str(entry.get("table_number") or "").strip().upper()
+    if not number:
+        raise ValidationError({"table_number": "Table number cannot be empty."})
+    values = {"table_number": number}
+    for name in FLOOR_PLAN_FIELDS:
+        if name in entry and entry[name] is not None:
+            values[name] = entry[name]
+    if "capacity" in values:
+        values["capacity"] = int(values["capacity"])
+    return values
+
+
+def _validate(table: Table) -> None:
+    try:
+        table.full_clean(exclude=["location"], validate_unique=False, validate_constraints=False)
+    except ValidationError as e:
+        raise ValidationError({table.table_number: e.messages})
+
+
+def apply_floor_plan(
+    location: Location,
+    entries: Iterable[dict],
+    deactivate_missing: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Create or update ``location``'s tables from ``entries`` (dicts with
+    ``table_number`` and any of ``capacity``, ``is_active``, ``table_type``)
+    in one transaction. With ``deactivate_missing`` tables not listed are
+    deactivated rather than deleted, since reservations and orders point at
+    them. Every row is validated before anything is written; a
+    ``ValidationError`` leaves the floor plan untouched.
+
+    Returns counts of created, updated, deactivated and unchanged tables.
+    """
+    plan: Dict[str, dict] = {}
+    for entry in entries:
+        values = _normalize(entry)
+        plan[values["table_number"]] = values
+
+    counts = {"created": 0, "updated": 0, "deactivated": 0, "unchanged": 0}
+    using = router.db_for_write(Table)
+    with transaction.atomic(using=using):
+        existing = {
+            table.table_number: table
+            for table in Table.objects.using(using).select_for_update().filter(location=location)
+        }
+        to_create: List[Table] = []
+        to_update: List[Table] = []
+
+        for number, values in plan.items():
+            table = existing.get(number)
+            if table is None:
+                if "capacity" not in values:
+                    raise ValidationError({number: ["Capacity is required for a new table."]})
+                table = Table(location=location, **values)
+                _validate(table)
+                to_create.append(table)
+                continue
+            changed = [name for name in FLOOR_PLAN_FIELDS if name in values and getattr(table, name) != values[name]]
+            if not changed:
+                counts["unchanged"] += 1
+                continue
+            for name in changed:
+                setattr(table, name, values[name])
+            _validate(table)
+            to_update.append(table)
+
+        if deactivate_missing:
+            for number, table in existing.items():
+                if number not in plan and table.is_active:
+                    table.is_active = False
+                    to_update.append(table)
+                    counts["deactivated"] += 1
+
+        counts["created"] = len(to_create)
+        counts["updated"] = len(to_update) - counts["deactivated"]
+        if dry_run or not (to_create or to_update):
+            return counts
+
+        if to_create:
+            Table.objects.using(using).bulk_create(to_create)
+        if to_update:
+            now = timezone.now()
+            for table in to_update:
+                table.updated_at = now
+            Table.objects.using(using).bulk_update(to_update, [*FLOOR_PLAN_FIELDS, "updated_at"])
+        schedule_invalidation(using)
+
+    logger.info(
+        f"Floor plan of location {location.pk}: {counts['created']} created, "
+        f"{counts['updated']} updated, {counts['deactivated']} deactivated"
+    )
+    return counts
@@ -0,0 +1,71 @@
+# core/tasks.py
+from __future__ import annotations
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from celery import shared_task
+except Exception:  # Celery not installed; provide a no-op decorator
+    def shared_task(*d, **kw):
+        def _wrap(fn):
+            return fn
+        return _wrap
+
+
+@shared_task
+def flush_dirty_sessions_task(limit: int = 500):
+    """
+    Persist coalesced session changes from Redis to the database.
+    Only meaningful when SESSION_ENGINE is core.session_store.
+    """
+    try:
+        from core.session_store import SessionStore
+        written = SessionStore.flush_dirty(limit=limit)
+        if written:
+            logger.info("Flushed %s dirty sessions to the database", written)
+        return written
+    except Exception:
+        logger.exception("flush_dirty_sessions_task failed")
+        return 0
+
+
+@shared_task
+def apply_retention_task(policies=None):
+    """
+    Apply the data retention policies (see core.retention). Returns the
+    per-policy report.
+    """
+    try:
+        from core.retention import run_retention
+        results = run_retention(policies)
+        for result in results:
+            if result.error:
+                logger.error("Retention policy %s failed: %s", result.policy, result.error)
+        return [result.as_dict() for result in results]
+    except Exception:
+        logger.exception("apply_retention_task failed")
+        return []
+
+
+@shared_task
+def drain_email_outbox_task(limit: int = 1000):
+    """Send due messages from the email outbox (see core.outbox)."""
+    try:
+        from core.outbox import drain
+        return drain(limit=limit)
+    except Exception:
+        logger.exception("drain_email_outbox_task failed")
+        return {}
+
+
+@shared_task
+def warm_cache_task(names=None):
+    """Rebuild cached datasets after an invalidation (see core.warmup)."""
+    try:
+        from core.warmup import run_scheduled, warm
+        results = run_scheduled(names) if names else warm()
+        return {name: result["ok"] for name, result in results.items()}
+    except Exception:
+        logger.exception("warm_cache_task failed")
+        return {}
@@ -199,10 +199,14 @@ def cache_version():
     return getattr(settings, 'CACHE_VERSION', 1)
 
 
+IMAGE_SIZE_WIDTHS = {"small": 320, "medium": 640, "large": 1280}
+
+
 @register.filter
 def cached_image_url(image_field, size="medium"):
     """
-    Get cached image URL with optional size parameter.
+    Get the URL of the image derivative closest to a named size (menu.images).
+    Derivative URLs are content-hashed, so they are cached without expiry.
     
     Usage:
     {{ menu_item.image|cached_image_url:"large" }}
@@ -210,20 +214,68 @@ def cached_image_url(image_field, size="medium"):
     if not image_field:
         return ""
     
-    cache_key = f"image_url:{image_field.name}:{size}"
+    manifest = getattr(getattr(image_field, "instance", None), "image_variants", None) or {}
+    cache_key = f"image_url:{image_field.name}:{manifest.get('hash', '')}:{size}"
     cached_url = cache.get(cache_key)
     
     if cached_url is not None:
         return cached_url
     
-    # Generate URL (in a real app, you might have different sizes)
-    url = image_field.url if image_field else ""
+    from menu.images import url_for_width
+    url = url_for_width(image_field, IMAGE_SIZE_WIDTHS.get(size, IMAGE_SIZE_WIDTHS["medium"]))
     
-    # Cache for 1 hour
-    cache.set(cache_key, url, 3600)
+    cache.set(cache_key, url, None if manifest else 3600)
     return url
 
 
+@register.filter
+def image_srcset(image_field, fmt="jpeg"):
+    """
+    srcset value for an image's derivatives in one format (webp or jpeg).
+    
+    Usage:
+    <img srcset="{{ menu_item.image|image_srcset:'webp' }}">
+    """
+    if not image_field:
+        return ""
+    from menu.images import srcset
+    return srcset(image_field, fmt)
+
+
+@register.simple_tag
+def responsive_image(image_field, alt="", sizes=None, css_class=""):
+    """
+    Render a <picture> with WebP and JPEG srcsets for an image with
+    derivatives, or a plain lazy <img> of the original otherwise.
+    
+    Usage:
+    {% responsive_image menu_item.image menu_item.name "(max-width: 600px) 100vw, 33vw" %}
+    """
+    if not image_field:
+        return ""
+    from django.conf import settings
+    from django.utils.html import format_html
+    from menu.images import image_payload
+
+    payload = image_payload(image_field)
+    sizes = sizes or getattr(settings, "MENU_IMAGE_SIZES", "100vw")
+    if not payload["srcset"]:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="lazy" decoding="async"/>',
+            payload["src"], alt, css_class,
+        )
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}"/>'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" '
+        'loading="lazy" decoding="async"/>'
+        '</picture>',
+        payload["srcset"]["webp"], sizes,
+        payload["src"], payload["srcset"]["jpeg"], sizes,
+        payload["width"], payload["height"], alt, css_class,
+    )
+
+
 @register.simple_tag
 def cache_menu_search(organization_id, query, category_id=None):
     """
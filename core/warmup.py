@@ -0,0 +1,271 @@
+# core/warmup.py
+"""
+Cache warm-up and single-flight rebuilds.
+
+Hot cached datasets (menu display, categories, availability index, item
+and modifier prices, table registry) are registered here by name. Each
+app declares its own in a ``warmup`` module, discovered like ``admin``::
+
+    from core import warmup
+
+    @warmup.register("menu.display", "Complete menu display payload")
+    def warm_menu_display():
+        ...
+
+``warm()`` rebuilds them, and runs from ``manage.py cache_management
+warmup``, after ``cache_management clear``, after an invalidation
+(``schedule()``, debounced, on Celery when available) and, with
+``CACHE_WARMUP_ON_STARTUP``, once per deploy when a web worker starts.
+
+Readers of those keys go through ``get_or_build()``: on a miss only the
+worker holding ``warmup:lock:<key>`` rebuilds, while the others return the
+last good copy kept under ``<key>:stale`` (or wait briefly for the winner
+when there is none). Invalidation deletes or versions the primary key only,
+so the stale copy is still there to serve during the rebuild.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "warmup:lock:{}"
+PENDING_KEY = "warmup:pending:{}"
+STARTUP_KEY = "warmup:startup"
+
+Timeout = Union[int, float, None, Callable[[], Optional[float]]]
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def stale_key_for(key: str) -> str:
+    return f"{key}:stale"
+
+
+# ----------------------------------------------------------------------
+# Single-flight rebuilds
+# ----------------------------------------------------------------------
+def _acquire(key: str) -> Optional[str]:
+    token = uuid.uuid4().hex
+    try:
+        if cache.add(LOCK_KEY.format(key), token, int(_setting("CACHE_WARMUP_LOCK_TTL", 30))):
+            return token
+    except Exception as e:
+        # Without a working cache every worker is on its own
+        logger.warning(f"Single-flight lock unavailable for {key}: {e}")
+        return token
+    return None
+
+
+def _release(key: str, token: str) -> None:
+    lock = LOCK_KEY.format(key)
+    try:
+        if cache.get(lock) == token:
+            cache.delete(lock)
+    except Exception:
+        pass
+
+
+def _store(key: str, value: Any, timeout: Timeout, stale_key: str) -> None:
+    if callable(timeout):
+        timeout = timeout()
+    try:
+        cache.set(key, value, timeout)
+        cache.set(stale_key, value, int(_setting("CACHE_WARMUP_STALE_TTL", 60 * 60 * 24)))
+    except Exception as e:
+        logger.warning(f"Failed to store rebuilt cache entry {key}: {e}")
+
+
+def get_or_build(key: str, build: Callable[[], Any], timeout: Timeout, stale_key: Optional[str] = None) -> Any:
+    """
+    ``cache.get(key)``, rebuilding a miss at most once across workers.
+    ``timeout`` may be a callable evaluated after the build. Values of
+    ``None`` are not cached.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    stale_key = stale_key or stale_key_for(key)
+    token = _acquire(key)
+    if token is not None:
+        try:
+            value = build()
+            if value is not None:
+                _store(key, value, timeout, stale_key)
+            return value
+        finally:
+            _release(key, token)
+
+    # Someone else is rebuilding: serve the last good copy
+    value = cache.get(stale_key)
+    if value is not None:
+        return value
+
+    # Cold cache: wait for the winner rather than stampede the database
+    deadline = time.monotonic() + _setting("CACHE_WARMUP_WAIT_MS", 2000) / 1000.0
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    logger.warning(f"Gave up waiting for rebuild of {key}")
+    return build()
+
+
+def refresh(key: str, build: Callable[[], Any], timeout: Timeout, stale_key: Optional[str] = None) -> bool:
+    """Rebuild ``key`` now unless another worker already is; returns True when rebuilt."""
+    token = _acquire(key)
+    if token is None:
+        return False
+    try:
+        value = build()
+        if value is not None:
+            _store(key, value, timeout, stale_key or stale_key_for(key))
+        return True
+    finally:
+        _release(key, token)
+
+
+# ----------------------------------------------------------------------
+# Registry
+# ----------------------------------------------------------------------
+@dataclass
+class Dataset:
+    name: str
+    description: str
+    warm: Callable[[], Any]
+
+
+_registry: Dict[str, Dataset] = {}
+_discovered = False
+
+
+def register(name: str, description: str = ""):
+    """Decorator registering a warm-up function under ``name``."""
+    def decorator(fn):
+        _registry[name] = Dataset(name=name, description=description or (fn.__doc__ or "").strip(), warm=fn)
+        return fn
+    return decorator
+
+
+def datasets() -> List[Dataset]:
+    global _discovered
+    if not _discovered:
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules("warmup")
+        _discovered = True
+    return [_registry[name] for name in sorted(_registry)]
+
+
+def warm(names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the named warm-up functions (all when ``names`` is None). A failing
+    dataset is logged and reported; the others still run.
+    """
+    known = {dataset.name: dataset for dataset in datasets()}
+    selected = list(names) if names is not None else list(known)
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in selected:
+        dataset = known.get(name)
+        if dataset is None:
+            results[name] = {"ok": False, "ms": 0.0, "error": "unknown dataset"}
+            continue
+        start = time.perf_counter()
+        try:
+            detail = dataset.warm()
+            results[name] = {"ok": True, "ms": (time.perf_counter() - start) * 1000, "detail": detail}
+        except Exception as e:
+            logger.exception(f"Cache warm-up of {name} failed")
+            results[name] = {"ok": False, "ms": (time.perf_counter() - start) * 1000, "error": str(e)}
+    return results
+
+
+def schedule(names: Iterable[str]) -> None:
+    """
+    Warm ``names`` after an invalidation. Repeated calls within
+    ``CACHE_WARMUP_DEBOUNCE`` seconds are coalesced into one run.
+    """
+    if not _setting("CACHE_WARMUP_ENABLED", True):
+        return
+    names = sorted(set(names))
+    debounce = int(_setting("CACHE_WARMUP_DEBOUNCE", 5))
+    pending = PENDING_KEY.format(",".join(names))
+    try:
+        if not cache.add(pending, 1, debounce):
+            return
+    except Exception:
+        return
+    try:
+        from core.tasks import warm_cache_task
+        warm_cache_task.apply_async(args=[names], countdown=debounce)
+        return
+    except (ImportError, AttributeError):
+        pass
+    except Exception as e:
+        logger.warning(f"Could not queue cache warm-up: {e}")
+    run_scheduled(names)
+
+
+def run_scheduled(names: List[str]) -> Dict[str, Dict[str, Any]]:
+    # Later invalidations schedule a new run from here on
+    cache.delete(PENDING_KEY.format(",".join(sorted(set(names)))))
+    return warm(names)
+
+
+def on_startup() -> None:
+    """
+    With ``CACHE_WARMUP_ON_STARTUP``, warm everything in a background thread
+    of the first web worker to start (once per ``CACHE_WARMUP_STARTUP_TTL``).
+    """
+    if not (_setting("CACHE_WARMUP_ENABLED", True) and _setting("CACHE_WARMUP_ON_STARTUP", False)):
+        return
+    try:
+        if not cache.add(STARTUP_KEY, 1, int(_setting("CACHE_WARMUP_STARTUP_TTL", 300))):
+            return
+    except Exception:
+        return
+
+    def _run():
+        from django.db import close_old_connections
+        try:
+            results = warm()
+            failed = [name for name, result in results.items() if not result["ok"]]
+            logger.info(f"Startup cache warm-up: {len(results) - len(failed)} datasets warmed, {len(failed)} failed")
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=_run, name="cache-warmup", daemon=True).start()
+
+
+def build_request():
+    """
+    GET request for ``SITE_URL``, for builders whose payload contains
+    absolute URLs (serializers calling ``request.build_absolute_uri``).
+    """
+    from urllib.parse import urlsplit
+    from django.test import RequestFactory
+
+    site = urlsplit(_setting("SITE_URL", "http://localhost:8000"))
+    return RequestFactory().get("/", HTTP_HOST=site.netloc, secure=site.scheme == "https")
+
+
+# ----------------------------------------------------------------------
+# Core datasets
+# ----------------------------------------------------------------------
+@register("tables.registry", "Canonical table registry projection (core.tables)")
+def warm_table_registry():
+    from core import tables as table_registry
+    table_registry.refresh()
+    return len(table_registry.tables(active_only=False))
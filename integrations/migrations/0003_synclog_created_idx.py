@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0002_integrationtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='synclog',
+            index=models.Index(fields=['created_at'], name='synclog_created_idx'),
+        ),
+    ]
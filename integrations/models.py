@@ -42,6 +42,9 @@ class SyncLog(models.Model):
 
     class Meta:
         ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["created_at"], name="synclog_created_idx"),
+        ]
 
 
 class IntegrationToken(models.Model):
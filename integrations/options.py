@@ -1,11 +1,51 @@
+"""
+Delivery quotes across platforms.
+
+``DeliveryOptionsEngine`` asks every enabled provider (``DELIVERY_QUOTE_PROVIDERS``)
+for a quote at once and returns whatever arrived within
+``DELIVERY_QUOTE_DEADLINE_MS``. A provider that is slow or failing is
+replaced by its last known good quote for the address (or a configured
+estimate) and reported in ``DeliveryOptions.failed``, so checkout waits for
+the deadline at most instead of the sum of the provider latencies.
+
+Each provider has its own pool of ``DELIVERY_QUOTE_MAX_WORKERS`` threads, so
+a hanging platform cannot queue a healthy one's calls behind its own; while
+all of a provider's workers are busy it is skipped (fallback) rather than
+queued. Calls time out at ``DELIVERY_QUOTE_HTTP_TIMEOUT``, capped at twice
+the deadline.
+
+Quotes are cached per address cell (rounded coordinates, or the postal code)
+and basket value band. A provider that answers after the deadline still
+fills the cache for the next checkout.
+
+``DELIVERY_QUOTE_FAKE_PROVIDERS`` (``"DOORDASH=120,UBEREATS=900"``) swaps in
+``FakeQuoteProvider`` instances with those delays in milliseconds, for
+local runs and ``manage.py bench_delivery_quotes``.
+"""
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
 from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from django.conf import settings
 from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+QUOTE_KEY = "delivery_quote:{}:{}:{}"
+LAST_GOOD_KEY = "delivery_quote:last_good:{}:{}"
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
 
 
 @dataclass
@@ -15,6 +55,27 @@ class Address:
     postal_code: str
     lat: Optional[float] = None
     lng: Optional[float] = None
+    state: str = ""
+
+    def cell(self) -> str:
+        """Cache cell: coordinates rounded to ``DELIVERY_QUOTE_CELL_PRECISION`` decimals, else the postal code."""
+        if self.lat is not None and self.lng is not None:
+            precision = int(_setting("DELIVERY_QUOTE_CELL_PRECISION", 2))
+            return f"{self.lat:.{precision}f},{self.lng:.{precision}f}"
+        return "".join(self.postal_code.split()).upper()
+
+    def as_provider_address(self) -> Dict[str, str]:
+        return {"street": self.street, "city": self.city, "state": self.state, "zip_code": self.postal_code}
+
+
+def value_band(order_value: Decimal) -> str:
+    """Basket value band (``DELIVERY_QUOTE_VALUE_BANDS``) used in the cache key."""
+    lower = 0
+    for upper in _setting("DELIVERY_QUOTE_VALUE_BANDS", [15, 30, 50, 100]):
+        if order_value < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
 
 
 @dataclass
@@ -24,11 +85,23 @@ class Option:
     eta_minutes: int
     available: bool
     promotion: Optional[str] = None
+    estimated: bool = False
+
+    def to_dict(self) -> Dict:
+        # The cache serializer is JSON in production: no Decimals
+        return {**asdict(self), "fee": str(self.fee)}
+
+    @classmethod
+    def from_dict(cls, data: Dict, **overrides) -> "Option":
+        return cls(**{**data, "fee": Decimal(data["fee"]), **overrides})
 
 
 @dataclass
 class DeliveryOptions:
     options: List[Option]
+    partial: bool = False
+    failed: List[str] = field(default_factory=list)
+    elapsed_ms: float = 0.0
 
 
 @dataclass
@@ -43,39 +116,286 @@ class RecommendedOption:
     rationale: str
 
 
+# ----------------------------------------------------------------------
+# Providers
+# ----------------------------------------------------------------------
+class QuoteUnavailable(Exception):
+    """The provider answered but did not return a usable quote."""
+
+
+class QuoteProvider:
+    """One delivery platform. ``quote()`` blocks and runs on the provider's pool."""
+
+    name = ""
+
+    def quote(self, address: Address, order_value: Decimal, timeout: float) -> Option:
+        raise NotImplementedError
+
+    def _order_data(self, address: Address, order_value: Decimal) -> Dict:
+        return {
+            "pickup_address": _setting("DELIVERY_PICKUP_ADDRESS", {}),
+            "dropoff_address": address.as_provider_address(),
+            "dropoff_latitude": address.lat,
+            "dropoff_longitude": address.lng,
+            "order_value": int(order_value * 100),  # cents
+        }
+
+
+def _minutes_until(value: Optional[str]) -> Optional[int]:
+    eta = parse_datetime(value) if value else None
+    if eta is None:
+        return None
+    return max(0, int((eta - timezone.now()).total_seconds() // 60))
+
+
+class DoorDashQuoteProvider(QuoteProvider):
+    name = "DOORDASH"
+
+    def quote(self, address: Address, order_value: Decimal, timeout: float) -> Option:
+        from orders.services.doordash import DoorDashService
+
+        data = DoorDashService().create_delivery_quote(self._order_data(address, order_value), timeout=timeout)
+        if "error" in data or "fee" not in data:
+            raise QuoteUnavailable(data.get("details") or data.get("error") or "no fee in quote")
+        eta = _minutes_until(data.get("dropoff_time_estimated")) or int(data.get("duration") or 0)
+        return Option(platform=self.name, fee=Decimal(data["fee"]) / 100, eta_minutes=eta, available=True)
+
+
+class UberEatsQuoteProvider(QuoteProvider):
+    name = "UBEREATS"
+
+    def quote(self, address: Address, order_value: Decimal, timeout: float) -> Option:
+        from orders.services.uber_eats import UberEatsService
+
+        data = UberEatsService().create_delivery_quote(self._order_data(address, order_value), timeout=timeout)
+        if "error" in data or "fee" not in data:
+            raise QuoteUnavailable(data.get("details") or data.get("error") or "no fee in quote")
+        eta = int(data.get("duration") or 0) or _minutes_until(data.get("dropoff_eta")) or 0
+        return Option(platform=self.name, fee=Decimal(data["fee"]) / 100, eta_minutes=eta, available=True)
+
+
+class FakeQuoteProvider(QuoteProvider):
+    """Local stand-in with an injected delay (and optional failure)."""
+
+    def __init__(self, name: str, fee: Decimal = Decimal("4.99"), eta_minutes: int = 35,
+                 delay_ms: float = 0, fail: bool = False):
+        self.name = name
+        self.fee = fee
+        self.eta_minutes = eta_minutes
+        self.delay_ms = delay_ms
+        self.fail = fail
+
+    def quote(self, address: Address, order_value: Decimal, timeout: float) -> Option:
+        time.sleep(min(self.delay_ms / 1000.0, timeout))
+        if self.fail or self.delay_ms / 1000.0 > timeout:
+            raise QuoteUnavailable(f"{self.name} fake provider failed")
+        return Option(platform=self.name, fee=self.fee, eta_minutes=self.eta_minutes, available=True)
+
+
+PROVIDERS = {
+    DoorDashQuoteProvider.name: DoorDashQuoteProvider,
+    UberEatsQuoteProvider.name: UberEatsQuoteProvider,
+}
+
+
+def parse_fake_providers(spec: str) -> List[FakeQuoteProvider]:
+    """``"DOORDASH=120,UBEREATS=900"`` -> fake providers with those delays (ms)."""
+    providers = []
+    for part in (spec or "").split(","):
+        name, _, delay = part.strip().partition("=")
+        if name:
+            providers.append(FakeQuoteProvider(name.upper(), delay_ms=float(delay or 0)))
+    return providers
+
+
+def enabled_providers() -> List[QuoteProvider]:
+    fakes = _setting("DELIVERY_QUOTE_FAKE_PROVIDERS", "")
+    if fakes:
+        return parse_fake_providers(fakes)
+    providers = []
+    for name in _setting("DELIVERY_QUOTE_PROVIDERS", list(PROVIDERS)):
+        provider_class = PROVIDERS.get(name.upper())
+        if provider_class is None:
+            logger.warning(f"Unknown delivery quote provider: {name}")
+            continue
+        providers.append(provider_class())
+    return providers
+
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_in_flight: Dict[str, int] = {}
+_pool_lock = threading.Lock()
+
+
+def _release(name: str) -> None:
+    with _pool_lock:
+        _in_flight[name] -= 1
+
+
+def _submit(name: str, fn, *args) -> Optional[Future]:
+    """Run ``fn`` on provider ``name``'s own pool; None when all its workers are busy."""
+    limit = int(_setting("DELIVERY_QUOTE_MAX_WORKERS", 8))
+    with _pool_lock:
+        if _in_flight.get(name, 0) >= limit:
+            return None
+        _in_flight[name] = _in_flight.get(name, 0) + 1
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = ThreadPoolExecutor(
+                max_workers=limit, thread_name_prefix=f"delivery-quote-{name.lower()}",
+            )
+    future = executor.submit(fn, *args)
+    future.add_done_callback(lambda _: _release(name))
+    return future
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
 class DeliveryOptionsEngine:
+    def __init__(self, providers: Optional[Sequence[QuoteProvider]] = None, deadline_ms: Optional[float] = None):
+        self.providers = list(providers) if providers is not None else enabled_providers()
+        self.deadline = (deadline_ms if deadline_ms is not None else _setting("DELIVERY_QUOTE_DEADLINE_MS", 1200)) / 1000.0
+
+    def _quote_keys(self, address: Address, order_value: Decimal) -> Dict[str, str]:
+        cell, band = address.cell(), value_band(order_value)
+        return {provider.name: QUOTE_KEY.format(provider.name, cell, band) for provider in self.providers}
+
+    def _last_good_keys(self, platforms: Sequence[str], address: Address) -> Dict[str, str]:
+        return {name: LAST_GOOD_KEY.format(name, address.cell()) for name in platforms}
+
+    def _call(self, provider: QuoteProvider, address: Address, order_value: Decimal, key: str) -> Option:
+        # Answers up to one deadline late still fill the cache; a hung call does not hold the worker longer
+        timeout = min(float(_setting("DELIVERY_QUOTE_HTTP_TIMEOUT", 5)), self.deadline * 2)
+        option = provider.quote(address, order_value, timeout=timeout)
+        data = option.to_dict()
+        try:
+            cache.set(key, data, int(_setting("DELIVERY_QUOTE_CACHE_TTL", 60)))
+            cache.set(LAST_GOOD_KEY.format(provider.name, address.cell()), data,
+                      int(_setting("DELIVERY_QUOTE_FALLBACK_TTL", 1800)))
+        except Exception as e:
+            logger.warning(f"Failed to cache {provider.name} delivery quote: {e}")
+        return option
+
+    def _start(self, address: Address, order_value: Decimal,
+               cached: Dict) -> Tuple[Dict[str, Option], Dict[str, Future], List[str]]:
+        keys = self._quote_keys(address, order_value)
+        options: Dict[str, Option] = {}
+        futures: Dict[str, Future] = {}
+        saturated: List[str] = []
+        for provider in self.providers:
+            data = cached.get(keys[provider.name])
+            if data:
+                options[provider.name] = Option.from_dict(data)
+                continue
+            future = _submit(provider.name, self._call, provider, address, order_value, keys[provider.name])
+            if future is None:
+                logger.info(f"Delivery quote pool for {provider.name} is saturated, using its fallback")
+                saturated.append(provider.name)
+            else:
+                futures[provider.name] = future
+        return options, futures, saturated
+
+    def _collect(self, options: Dict[str, Option], futures: Dict[str, Future], saturated: List[str]) -> List[str]:
+        failed = list(saturated)
+        for name, future in futures.items():
+            if not future.done():
+                logger.info(f"Delivery quote from {name} missed the {self.deadline * 1000:.0f}ms deadline")
+                failed.append(name)
+            elif future.exception() is not None:
+                logger.warning(f"Delivery quote from {name} failed: {future.exception()}")
+                failed.append(name)
+            else:
+                options[name] = future.result()
+        return failed
+
+    def _result(self, options: Dict[str, Option], failed: List[str], fallback: FallbackOptions,
+                started: float) -> DeliveryOptions:
+        for option in fallback.options:
+            options[option.platform] = option
+        return DeliveryOptions(
+            options=[options[p.name] for p in self.providers if p.name in options],
+            partial=bool(failed),
+            failed=failed,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def quote(self, address: Address, order_value: Decimal) -> DeliveryOptions:
+        """Synchronous ``get_unified_options()`` for WSGI views and tasks."""
+        started = time.perf_counter()
+        options, futures, saturated = self._start(
+            address, order_value, cache.get_many(list(self._quote_keys(address, order_value).values()))
+        )
+        if futures:
+            wait(list(futures.values()), timeout=self.deadline)
+        failed = self._collect(options, futures, saturated)
+        fallback = self._fallback(failed, address, cache.get_many(list(self._last_good_keys(failed, address).values())) if failed else {})
+        return self._result(options, failed, fallback, started)
+
     async def get_unified_options(self, address: Address, order_value: Decimal) -> DeliveryOptions:
         """Return real-time delivery options from all available platforms.
 
-        Uses short-lived cache to avoid rate limiting.
+        Providers are queried concurrently; the call returns within the
+        deadline with fallbacks for the providers that did not answer.
         """
-        cache_key = f"opts:{address.postal_code}:{int(order_value)}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
-        # Placeholder: call platform quote APIs concurrently
-        opts = DeliveryOptions(options=[
-            Option(platform="UBEREATS", fee=Decimal("3.99"), eta_minutes=35, available=True),
-            Option(platform="DOORDASH", fee=Decimal("4.49"), eta_minutes=30, available=True),
-            Option(platform="GRUBHUB", fee=Decimal("4.99"), eta_minutes=45, available=True),
-        ])
-        cache.set(cache_key, opts, timeout=30)
-        return opts
-
-    async def handle_platform_outage(self, failed_platforms: List[str]) -> FallbackOptions:
+        started = time.perf_counter()
+        cached = await cache.aget_many(list(self._quote_keys(address, order_value).values()))
+        options, futures, saturated = self._start(address, order_value, cached)
+        if futures:
+            await asyncio.wait([asyncio.wrap_future(f) for f in futures.values()], timeout=self.deadline)
+        failed = self._collect(options, futures, saturated)
+        fallback = await self.handle_platform_outage(failed, address) if failed else FallbackOptions([], "")
+        return self._result(options, failed, fallback, started)
+
+    def _fallback(self, failed_platforms: List[str], address: Optional[Address], stored: Dict) -> FallbackOptions:
+        keys = self._last_good_keys(failed_platforms, address) if address is not None else {}
+        options = []
+        for name in failed_platforms:
+            data = stored.get(keys.get(name))
+            if data:
+                # Last known good quote for this cell, flagged as an estimate
+                options.append(Option.from_dict(data, estimated=True))
+            else:
+                fee = _setting(f"DELIVERY_FEE_{name}", 0) or _setting("DELIVERY_QUOTE_FALLBACK_FEE", "4.99")
+                options.append(Option(
+                    platform=name,
+                    fee=Decimal(str(fee)),
+                    eta_minutes=int(_setting("DELIVERY_QUOTE_FALLBACK_ETA", 40)),
+                    available=False,
+                    promotion="estimate",
+                    estimated=True,
+                ))
+        return FallbackOptions(options=options, reason="platform_outage")
+
+    async def handle_platform_outage(self, failed_platforms: List[str], address: Optional[Address] = None) -> FallbackOptions:
         """Provide graceful degradation when platforms are down."""
-        # Use last-known-good from cache and mark as estimated
-        est = [
-            Option(platform=p, fee=Decimal("4.99"), eta_minutes=40, available=False, promotion="estimate")
-            for p in failed_platforms
-        ]
-        return FallbackOptions(options=est, reason="platform_outage")
+        stored = {}
+        if address is not None and failed_platforms:
+            stored = await cache.aget_many(list(self._last_good_keys(failed_platforms, address).values()))
+        return self._fallback(failed_platforms, address, stored)
 
     async def optimize_platform_selection(self, customer: Dict, options: DeliveryOptions) -> RecommendedOption:
-        """AI-driven platform recommendation engine.
-
-        Placeholder heuristic: prefer lowest fee, tie-break by ETA.
+        """Recommend a platform: confirmed quotes first, then fee plus the
+        time cost of the ETA (``DELIVERY_QUOTE_MINUTE_VALUE`` per minute),
+        with a credit for the customer's preferred platform.
         """
-        best = sorted(options.options, key=lambda o: (o.fee, o.eta_minutes))[0]
-        return RecommendedOption(platform=best.platform, rationale="lowest_fee_then_fastest")
+        candidates = [o for o in options.options if o.available] or list(options.options)
+        if not candidates:
+            return RecommendedOption(platform="", rationale="no_options")
+
+        minute_value = Decimal(str(_setting("DELIVERY_QUOTE_MINUTE_VALUE", "0.10")))
+        preference_credit = Decimal(str(_setting("DELIVERY_QUOTE_PREFERENCE_CREDIT", "0.50")))
+        preferred = ((customer or {}).get("preferred_platform") or "").upper()
+
+        def cost(option: Option) -> Decimal:
+            value = option.fee + minute_value * option.eta_minutes
+            return value - preference_credit if option.platform == preferred else value
 
+        best = min(candidates, key=lambda o: (o.estimated, cost(o), o.eta_minutes))
+        if best.platform == preferred:
+            rationale = "preferred_platform"
+        elif best.estimated:
+            rationale = "estimate_only"
+        else:
+            rationale = "lowest_fee_and_eta_cost"
+        return RecommendedOption(platform=best.platform, rationale=rationale)
@@ -18,4 +18,5 @@ urlpatterns = [
     path("orders/recent/", views.recent_orders, name="recent_orders"),
     path("reports/sales/", views.sales_report, name="sales_report"),
     path("order/status/", views.push_order_status, name="order_status"),
+    path("delivery/options/", views.delivery_options, name="delivery_options"),
 ]
@@ -6,15 +6,22 @@ import json
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.throttling import UserRateThrottle
 
 from django.conf import settings
 
+from .options import Address, DeliveryOptionsEngine
 from .services import push_menu as direct_push_menu, update_item_availability as direct_update_availability
 
 
+class DeliveryQuoteRateThrottle(UserRateThrottle):
+    """Per user (or IP for guests): cache misses fan out to paid quote APIs."""
+    scope = 'delivery_quotes'
+
+
 def _verify_signature(secret: str, header_value: str, payload: bytes) -> bool:
     try:
         sig = (header_value or "").strip()
@@ -160,3 +167,39 @@ def push_order_status(request):
     # For direct integrations, platform callbacks are handled by tasks; just store intent here.
     ok = True
     return Response({"ok": bool(ok)})
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@throttle_classes([DeliveryQuoteRateThrottle])
+def delivery_options(request):
+    """Delivery quotes from every enabled platform, bounded by DELIVERY_QUOTE_DEADLINE_MS."""
+    from decimal import Decimal, InvalidOperation
+
+    params = request.query_params
+    try:
+        order_value = Decimal(params.get("order_value") or "0")
+        lat = float(params["lat"]) if params.get("lat") else None
+        lng = float(params["lng"]) if params.get("lng") else None
+    except (InvalidOperation, ValueError):
+        return Response({"detail": "order_value, lat and lng must be numbers"}, status=400)
+    if not order_value.is_finite() or order_value < 0:
+        return Response({"detail": "order_value must be a non-negative number"}, status=400)
+    if not params.get("postal_code") and (lat is None or lng is None):
+        return Response({"detail": "postal_code or lat/lng is required"}, status=400)
+
+    address = Address(
+        street=params.get("street", ""),
+        city=params.get("city", ""),
+        state=params.get("state", ""),
+        postal_code=params.get("postal_code", ""),
+        lat=lat,
+        lng=lng,
+    )
+    result = DeliveryOptionsEngine().quote(address, order_value)
+    return Response({
+        "options": [option.to_dict() for option in result.options],
+        "partial": result.partial,
+        "failed": result.failed,
+        "elapsed_ms": round(result.elapsed_ms, 1),
+    })
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "inventory"
+
+    def ready(self):
+        # Restock on order cancellation / refund (inventory.depletion)
+        try:
+            from . import signals  # noqa: F401
+        except Exception:
+            pass
@@ -0,0 +1,345 @@
+# inventory/depletion.py
+"""
+Recipe-based inventory depletion.
+
+When an order is paid, ``deplete_for_order`` aggregates what the order
+consumes into one delta per stock row:
+
+- ingredients from ``RecipeIngredient`` (menu item portions and modifier
+  selections), applied to ``InventoryItem.current_stock``;
+- tracked ``MenuItem.stock_quantity`` / ``Modifier.stock_quantity``;
+- today's ``Modifier.daily_count`` of modifiers with a daily limit.
+
+The stock rows are locked (``SELECT ... FOR UPDATE``, in pk order) so the
+quantity actually taken, ``min(stock, delta)``, is known; each table is then
+updated with a single ``UPDATE ... SET x = CASE pk WHEN ...`` built from
+``F()`` expressions, so the cost does not grow with the number of order
+lines. Stock never goes below zero. What was taken is recorded in
+``InventoryDepletion`` (one row per order), which makes depletion idempotent
+and lets ``restock_for_order`` give back exactly that on cancellation or full
+refund, never stock that was not there.
+
+Ingredients that end up at or below ``minimum_stock`` are looked up with the
+predicate of the ``low_stock_items_idx`` partial index and announced through
+the ``low_stock`` signal once the transaction commits. Menu items and
+modifiers that sell out, or come back from zero on a restock, invalidate the
+menu availability index on commit, since the bulk updates skip ``post_save``.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional, Set
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case, DecimalField, F, PositiveIntegerField, Q, Value, When,
+)
+from django.db.models.functions import Greatest
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import InventoryDepletion, InventoryItem, RecipeIngredient
+
+logger = logging.getLogger(__name__)
+
+# Receivers get kwargs: items (list of InventoryItem), order
+low_stock: Signal = Signal()
+
+STOCK_QUANTUM = Decimal("0.01")
+
+
+@dataclass
+class Requirements:
+    """Aggregated stock an order consumes, keyed by row id."""
+    ingredients: Dict[int, Decimal] = field(default_factory=dict)
+    menu_items: Dict[int, int] = field(default_factory=dict)
+    modifiers: Dict[int, int] = field(default_factory=dict)
+    organizations: Set[int] = field(default_factory=set)
+
+    def is_empty(self) -> bool:
+        return not (self.ingredients or self.menu_items or self.modifiers)
+
+
+# ----------------------------------------------------------------------
+# Requirements
+# ----------------------------------------------------------------------
+def _modifier_selections(modifiers) -> List[tuple]:
+    """(modifier_id, quantity) pairs from an OrderItem.modifiers snapshot."""
+    selections = []
+    for entry in modifiers or []:
+        if not isinstance(entry, dict):
+            continue
+        modifier_id = entry.get("id") or entry.get("modifier_id")
+        try:
+            selections.append((int(modifier_id), int(entry.get("quantity") or 1)))
+        except (TypeError, ValueError):
+            continue
+    return selections
+
+
+def order_requirements(order) -> Requirements:
+    """Aggregate the stock consumed by ``order`` (two queries)."""
+    from orders.models import OrderItem
+
+    portions: Dict[int, int] = defaultdict(int)
+    selections: Dict[int, int] = defaultdict(int)
+    lines = (
+        OrderItem.objects.filter(order_id=order.pk)
+        .exclude(status=OrderItem.STATUS_CANCELLED)
+        .values_list("menu_item_id", "quantity", "modifiers")
+    )
+    for menu_item_id, quantity, modifiers in lines:
+        if not menu_item_id or not quantity:
+            continue
+        portions[menu_item_id] += quantity
+        for modifier_id, per_portion in _modifier_selections(modifiers):
+            selections[modifier_id] += per_portion * quantity
+
+    requirements = Requirements(menu_items=dict(portions), modifiers=dict(selections))
+    if not portions and not selections:
+        return requirements
+
+    ingredients: Dict[int, Decimal] = defaultdict(Decimal)
+    recipes = RecipeIngredient.objects.filter(
+        Q(menu_item_id__in=list(portions)) | Q(modifier_id__in=list(selections)),
+        inventory_item__is_active=True,
+    ).values_list("menu_item_id", "modifier_id", "inventory_item_id",
+                  "inventory_item__organization_id", "quantity")
+    for menu_item_id, modifier_id, item_id, organization_id, quantity in recipes:
+        count = portions.get(menu_item_id, 0) if menu_item_id else selections.get(modifier_id, 0)
+        if count:
+            ingredients[item_id] += quantity * count
+            requirements.organizations.add(organization_id)
+
+    requirements.ingredients = {
+        item_id: total.quantize(STOCK_QUANTUM)
+        for item_id, total in ingredients.items()
+        if total > 0
+    }
+    return requirements
+
+
+# ----------------------------------------------------------------------
+# Bulk stock updates
+# ----------------------------------------------------------------------
+def _stock_expression(column: str, deltas: Dict[int, object], sign: int, output_field):
+    if sign < 0:
+        whens = [
+            When(pk=pk, then=Greatest(F(column) - Value(delta, output_field=output_field),
+                                      Value(0, output_field=output_field)))
+            for pk, delta in deltas.items()
+        ]
+    else:
+        whens = [
+            When(pk=pk, then=F(column) + Value(delta, output_field=output_field))
+            for pk, delta in deltas.items()
+        ]
+    return Case(*whens, default=F(column), output_field=output_field)
+
+
+def _apply(model, column: str, deltas: Dict[int, object], sign: int, output_field, **filters) -> int:
+    """One UPDATE statement applying ``sign * delta`` to every row in ``deltas``."""
+    if not deltas:
+        return 0
+    values = {column: _stock_expression(column, deltas, sign, output_field)}
+    if any(f.name == "updated_at" for f in model._meta.concrete_fields):
+        values["updated_at"] = timezone.now()
+    return model.objects.filter(pk__in=list(deltas), **filters).update(**values)
+
+
+def _take(model, column: str, deltas: Dict[int, object], output_field, **filters) -> Dict[int, object]:
+    """
+    Lock the rows in ``deltas``, take ``min(stock, delta)`` from each and
+    return what was taken (rows with nothing to take are left out).
+    """
+    if not deltas:
+        return {}
+    current = (
+        model.objects.select_for_update()
+        .filter(pk__in=list(deltas), **filters)
+        .order_by("pk")
+        .values_list("pk", column)
+    )
+    taken = {}
+    for pk, stock in current:
+        amount = min(stock, deltas[pk])
+        if amount > 0:
+            taken[pk] = amount
+    _apply(model, column, taken, -1, output_field, **filters)
+    return taken
+
+
+def _take_requirements(requirements: Requirements) -> Requirements:
+    """Deplete ``requirements``; returns the quantities actually taken."""
+    from menu.counters import apply_daily_counts
+    from menu.models import MenuItem, Modifier
+
+    taken = Requirements(
+        ingredients=_take(InventoryItem, "current_stock", requirements.ingredients,
+                          DecimalField(max_digits=10, decimal_places=2)),
+        menu_items=_take(MenuItem, "stock_quantity", requirements.menu_items,
+                         PositiveIntegerField(), track_inventory=True),
+        modifiers=_take(Modifier, "stock_quantity", requirements.modifiers,
+                        PositiveIntegerField(), track_inventory=True),
+        organizations=requirements.organizations,
+    )
+    # A sale uses up part of today's limit whether or not stock was short
+    apply_daily_counts(requirements.modifiers, sign=1)
+    _invalidate_availability(taken, sign=-1)
+    return taken
+
+
+def _return_requirements(taken: Requirements, daily_counts: Dict[int, int]) -> None:
+    """Give back stock recorded as taken and undo the daily counts."""
+    from menu.counters import apply_daily_counts
+    from menu.models import MenuItem, Modifier
+
+    _apply(InventoryItem, "current_stock", taken.ingredients, 1,
+           DecimalField(max_digits=10, decimal_places=2))
+    _apply(MenuItem, "stock_quantity", taken.menu_items, 1,
+           PositiveIntegerField(), track_inventory=True)
+    _apply(Modifier, "stock_quantity", taken.modifiers, 1,
+           PositiveIntegerField(), track_inventory=True)
+    apply_daily_counts(daily_counts, sign=-1)
+    _invalidate_availability(taken, sign=1)
+
+
+def _invalidate_availability(taken: Requirements, sign: int) -> None:
+    # The bulk UPDATEs skip post_save; rows that sold out (or came back from
+    # zero) change what the availability index serves
+    from menu.models import MenuItem, Modifier
+
+    if (_crossed_zero(MenuItem, taken.menu_items, sign)
+            or _crossed_zero(Modifier, taken.modifiers, sign)):
+        from menu.availability import invalidate
+        transaction.on_commit(invalidate)
+
+
+def _crossed_zero(model, deltas: Dict[int, int], sign: int) -> bool:
+    """Whether a tracked stock row in ``deltas`` is now at zero (depletion)
+    or was at zero before the update (restock: new stock equals its delta)."""
+    if not deltas:
+        return False
+    qs = model.objects.filter(pk__in=list(deltas), track_inventory=True)
+    if sign < 0:
+        return qs.filter(stock_quantity=0).exists()
+    match = Q()
+    for pk, delta in deltas.items():
+        match |= Q(pk=pk, stock_quantity=delta)
+    return qs.filter(match).exists()
+
+
+# ----------------------------------------------------------------------
+# Low stock
+# ----------------------------------------------------------------------
+def low_stock_items(item_ids, organization_ids=None) -> List[InventoryItem]:
+    """
+    Active items among ``item_ids`` at or below their minimum stock. The
+    predicate matches ``low_stock_items_idx`` so the partial index is used.
+    """
+    if not item_ids:
+        return []
+    qs = InventoryItem.objects.filter(
+        current_stock__lte=F("minimum_stock"),
+        pk__in=list(item_ids),
+        is_active=True,
+    )
+    if organization_ids:
+        qs = qs.filter(organization_id__in=list(organization_ids))
+    return list(qs)
+
+
+def _emit_low_stock(items: List[InventoryItem], order=None) -> None:
+    # Alert once per item per window rather than on every order while low
+    ttl = int(getattr(settings, "INVENTORY_LOW_STOCK_ALERT_TTL", 3600))
+    fresh = [item for item in items if cache.add(f"inventory:low_stock:{item.pk}", 1, ttl)]
+    if not fresh:
+        return
+    for item in fresh:
+        logger.warning(
+            f"Low stock: {item.name} ({item.sku}) at {item.current_stock} {item.unit}, "
+            f"minimum {item.minimum_stock}"
+        )
+    try:
+        low_stock.send(sender=InventoryItem, items=fresh, order=order)
+    except Exception:
+        logger.exception("Failed emitting low_stock signal")
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+def deplete_for_order(order) -> Optional[InventoryDepletion]:
+    """
+    Take the stock ``order`` consumes. Returns the ledger row, or None when
+    the order consumes nothing tracked or was already depleted.
+    """
+    requirements = order_requirements(order)
+    if requirements.is_empty():
+        return None
+
+    with transaction.atomic():
+        try:
+            # The unique order row doubles as the idempotency lock
+            with transaction.atomic():
+                depletion = InventoryDepletion.objects.create(order_id=order.pk)
+        except IntegrityError:
+            logger.info(f"Inventory already depleted for order {order.pk}")
+            return None
+
+        taken = _take_requirements(requirements)
+        depletion.ingredients = {str(pk): str(qty) for pk, qty in taken.ingredients.items()}
+        depletion.menu_items = {str(pk): qty for pk, qty in taken.menu_items.items()}
+        depletion.modifiers = {str(pk): qty for pk, qty in taken.modifiers.items()}
+        depletion.daily_counts = {str(pk): qty for pk, qty in requirements.modifiers.items()}
+        depletion.save(update_fields=["ingredients", "menu_items", "modifiers", "daily_counts"])
+        low = low_stock_items(requirements.ingredients, requirements.organizations)
+
+    if low:
+        transaction.on_commit(lambda: _emit_low_stock(low, order))
+    logger.info(
+        f"Depleted inventory for order {order.pk}: {len(requirements.ingredients)} ingredients, "
+        f"{len(requirements.menu_items)} menu items, {len(requirements.modifiers)} modifiers"
+    )
+    return depletion
+
+
+def restock_for_order(order, reason: str = "") -> Optional[InventoryDepletion]:
+    """
+    Reverse the depletion recorded for ``order`` (cancellation / full refund).
+    Returns the ledger row, or None if nothing was depleted or it was already
+    reversed.
+    """
+    with transaction.atomic():
+        depletion = (
+            InventoryDepletion.objects.select_for_update()
+            .filter(order_id=order.pk, reversed_at__isnull=True)
+            .first()
+        )
+        if depletion is None:
+            return None
+
+        taken = Requirements(
+            ingredients={int(pk): Decimal(qty) for pk, qty in (depletion.ingredients or {}).items()},
+            menu_items={int(pk): int(qty) for pk, qty in (depletion.menu_items or {}).items()},
+            modifiers={int(pk): int(qty) for pk, qty in (depletion.modifiers or {}).items()},
+        )
+        # Ledger rows from before daily_counts existed recorded the selections
+        # in ``modifiers``
+        recorded = depletion.daily_counts or depletion.modifiers or {}
+        daily_counts = {int(pk): int(qty) for pk, qty in recorded.items()}
+        _return_requirements(taken, daily_counts)
+
+        depletion.reversed_at = timezone.now()
+        depletion.reversal_reason = (reason or "")[:50]
+        depletion.save(update_fields=["reversed_at", "reversal_reason"])
+
+    cache.delete_many([f"inventory:low_stock:{pk}" for pk in taken.ingredients])
+    logger.info(f"Restocked inventory for order {order.pk} ({reason or 'reversal'})")
+    return depletion
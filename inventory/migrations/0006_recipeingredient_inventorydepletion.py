@@ -0,0 +1,55 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:00
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_rename_inventory_t_condition_idx_inventory_t_conditi_326363_idx_and_more'),
+        ('menu', '0003_menuitemsearchdocument'),
+        ('orders', '0004_alter_cart_source_alter_order_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=3, help_text="Quantity used per portion, in the inventory item's unit", max_digits=10, validators=[django.core.validators.MinValueValidator(0)])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_usages', to='inventory.inventoryitem')),
+                ('menu_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredients', to='menu.menuitem')),
+                ('modifier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredients', to='menu.modifier')),
+            ],
+            options={
+                'ordering': ['inventory_item__name'],
+                'constraints': [
+                    models.CheckConstraint(check=models.Q(models.Q(('menu_item__isnull', False), ('modifier__isnull', True)), models.Q(('menu_item__isnull', True), ('modifier__isnull', False)), _connector='OR'), name='recipe_ingredient_single_owner'),
+                    models.CheckConstraint(check=models.Q(('quantity__gt', 0)), name='positive_recipe_quantity'),
+                    models.UniqueConstraint(condition=models.Q(('menu_item__isnull', False)), fields=('menu_item', 'inventory_item'), name='unique_menu_item_ingredient'),
+                    models.UniqueConstraint(condition=models.Q(('modifier__isnull', False)), fields=('modifier', 'inventory_item'), name='unique_modifier_ingredient'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryDepletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingredients', models.JSONField(blank=True, default=dict, help_text='Inventory item id -> quantity taken')),
+                ('menu_items', models.JSONField(blank=True, default=dict, help_text='Menu item id -> portions taken from tracked stock')),
+                ('modifiers', models.JSONField(blank=True, default=dict, help_text='Modifier id -> selections taken from tracked stock')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reversed_at', models.DateTimeField(blank=True, null=True)),
+                ('reversal_reason', models.CharField(blank=True, max_length=50)),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_depletion', to='orders.order')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='inv_depletion_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_recipeingredient_inventorydepletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorydepletion',
+            name='daily_counts',
+            field=models.JSONField(blank=True, default=dict, help_text="Modifier id -> selections added to today's daily count"),
+        ),
+    ]
@@ -10,6 +10,10 @@ class Table(models.Model):
     """
     Inventory Table model for tracking table-related inventory and equipment.
     This tracks tables from an inventory/asset management perspective.
+
+    Legacy: core.Table is the table registry and asset data lives in
+    TableAsset. Rows here are no longer kept in sync; import them with
+    ``sync_tables --from-inventory`` and ``migrate_inventory_tables``.
     """
     location = models.ForeignKey(
         "core.Location",
@@ -309,3 +313,122 @@ class InventoryItem(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.sku})"
+
+
+class RecipeIngredient(models.Model):
+    """
+    Quantity of an inventory item consumed by one portion of a menu item or
+    one selection of a modifier. Exactly one of ``menu_item``/``modifier`` is set.
+    """
+    menu_item = models.ForeignKey(
+        "menu.MenuItem",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="recipe_ingredients",
+    )
+    modifier = models.ForeignKey(
+        "menu.Modifier",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="recipe_ingredients",
+    )
+    inventory_item = models.ForeignKey(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        related_name="recipe_usages",
+    )
+    quantity = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        validators=[MinValueValidator(0)],
+        help_text="Quantity used per portion, in the inventory item's unit"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["inventory_item__name"]
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    models.Q(menu_item__isnull=False, modifier__isnull=True)
+                    | models.Q(menu_item__isnull=True, modifier__isnull=False)
+                ),
+                name='recipe_ingredient_single_owner'
+            ),
+            models.CheckConstraint(
+                check=models.Q(quantity__gt=0),
+                name='positive_recipe_quantity'
+            ),
+            models.UniqueConstraint(
+                fields=['menu_item', 'inventory_item'],
+                condition=models.Q(menu_item__isnull=False),
+                name='unique_menu_item_ingredient'
+            ),
+            models.UniqueConstraint(
+                fields=['modifier', 'inventory_item'],
+                condition=models.Q(modifier__isnull=False),
+                name='unique_modifier_ingredient'
+            ),
+        ]
+
+    def clean(self):
+        super().clean()
+        if bool(self.menu_item_id) == bool(self.modifier_id):
+            raise ValidationError('Set either a menu item or a modifier.')
+
+    def save(self, *args, **kwargs):
+        self.full_clean()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        owner = self.menu_item or self.modifier
+        return f"{owner}: {self.quantity} {self.inventory_item.unit} {self.inventory_item.name}"
+
+
+class InventoryDepletion(models.Model):
+    """
+    Ledger of the stock taken for an order (see ``inventory.depletion``).
+    One row per order makes depletion idempotent and lets cancellations and
+    refunds restore exactly what was taken.
+    """
+    order = models.OneToOneField(
+        "orders.Order",
+        on_delete=models.CASCADE,
+        related_name="inventory_depletion",
+    )
+    ingredients = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Inventory item id -> quantity taken"
+    )
+    menu_items = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Menu item id -> portions taken from tracked stock"
+    )
+    modifiers = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Modifier id -> selections taken from tracked stock"
+    )
+    daily_counts = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Modifier id -> selections added to today's daily count"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    reversed_at = models.DateTimeField(null=True, blank=True)
+    reversal_reason = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=['-created_at'], name='inv_depletion_created_idx'),
+        ]
+
+    def __str__(self):
+        state = "reversed" if self.reversed_at else "applied"
+        return f"Depletion for order {self.order_id} ({state})"
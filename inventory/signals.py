@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from orders.models import Order
+
+logger = logging.getLogger(__name__)
+
+RESTOCK_STATUSES = {Order.STATUS_CANCELLED, Order.STATUS_REFUNDED}
+
+
+@receiver(post_save, sender=Order)
+def restock_cancelled_order(sender, instance: Order, raw=False, update_fields=None, **kwargs):
+    # Partial refunds keep the order's status and do not restock
+    if raw or instance.status not in RESTOCK_STATUSES:
+        return
+    if update_fields is not None and 'status' not in update_fields:
+        return
+
+    order, reason = instance, instance.status.lower()
+
+    def _restock():
+        try:
+            from .depletion import restock_for_order
+            restock_for_order(order, reason=reason)
+        except Exception as e:
+            logger.warning(f"Inventory restock failed for order {order.pk}: {e}")
+
+    transaction.on_commit(_restock)
@@ -4,7 +4,7 @@ from rest_framework.routers import DefaultRouter
 
 from .api_views import (
     MenuCategoryViewSet, MenuItemViewSet, ModifierGroupViewSet, ModifierViewSet,
-    MenuDisplayViewSet
+    MenuDisplayViewSet, MenuDisplayView
 )
 
 # Create router for API endpoints
@@ -16,6 +16,8 @@ router.register(r'modifiers', ModifierViewSet, basename='modifier')
 router.register(r'display', MenuDisplayViewSet, basename='menudisplay')
 
 urlpatterns = [
+    # Native async read path; keeps the router's route name
+    path('display/', MenuDisplayView.as_view(), name='menudisplay-list'),
     path('', include(router.urls)),
 ]
 
@@ -1,8 +1,10 @@
 from decimal import Decimal
+from asgiref.sync import sync_to_async
 from django.db.models import Q, Prefetch
 from django.utils import timezone
 from django.core.cache import cache
-from django.http import Http404
+from django.http import Http404, JsonResponse
+from django.views import View
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -10,7 +12,16 @@ from rest_framework.permissions import IsAuthenticated, AllowAny, IsAuthenticate
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core import aio, warmup
+
 from .models import MenuCategory, MenuItem, ModifierGroup, Modifier
+from .search import search_menu, ranked_queryset
+from .availability import available_now, seconds_until_change
+from .tree import deferred_aggregates, navigation
+from .read_models import (
+    category_list_queryset, category_with_items_queryset,
+    menu_item_list_queryset, menu_item_detail_queryset,
+)
 from .serializers import (
     MenuCategorySerializer, MenuCategoryWithItemsSerializer,
     MenuItemSerializer, MenuItemListSerializer, MenuItemDetailSerializer,
@@ -18,6 +29,9 @@ from .serializers import (
     MenuDisplaySerializer, MenuSearchSerializer
 )
 
+MENU_DISPLAY_CACHE_KEY = 'complete_menu_display'
+CATEGORIES_WITH_ITEMS_CACHE_KEY = 'menu_categories_with_items'
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     """Standard pagination for API responses."""
@@ -42,7 +56,7 @@ class MenuCategoryViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filter queryset based on user permissions."""
-        queryset = super().get_queryset()
+        queryset = category_list_queryset(super().get_queryset())
         
         # For public access, only show active categories
         if not self.request.user.is_authenticated or not self.request.user.is_staff:
@@ -95,37 +109,33 @@ class MenuCategoryViewSet(viewsets.ModelViewSet):
         Get all active categories with their available menu items.
         Useful for displaying the complete menu.
         """
-        # Check cache first
-        cache_key = 'menu_categories_with_items'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data is None:
-            # Prefetch related data for efficiency
-            queryset = self.get_queryset().filter(is_active=True).prefetch_related(
-                Prefetch(
-                    'menu_items',
-                    queryset=MenuItem.objects.filter(is_available=True).order_by('sort_order', 'name')
-                )
-            )
-            
-            serializer = self.get_serializer(queryset, many=True)
-            cached_data = serializer.data
-            
-            # Cache for 15 minutes
-            cache.set(cache_key, cached_data, 60 * 15)
+        cached_data = warmup.get_or_build(
+            CATEGORIES_WITH_ITEMS_CACHE_KEY,
+            lambda: build_categories_with_items(request),
+            60 * 15,
+        )
         
         return Response(cached_data)
     
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """
+        Nested category navigation with cached item counts and price ranges,
+        built from a single query regardless of depth (see menu.tree).
+        """
+        is_staff = request.user.is_authenticated and request.user.is_staff
+        return Response(navigation(active_only=not is_staff))
+    
     @action(detail=True, methods=['get'])
     def items(self, request, pk=None):
         """
         Get all available menu items for a specific category.
         """
         category = self.get_object()
-        items = MenuItem.objects.filter(
+        items = menu_item_list_queryset(MenuItem.objects.filter(
             category=category,
             is_available=True
-        ).order_by('sort_order', 'name')
+        )).order_by('sort_order', 'name')
         
         # Apply pagination
         page = self.paginate_queryset(items)
@@ -141,9 +151,7 @@ class MenuItemViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing menu items with comprehensive CRUD operations.
     """
-    queryset = MenuItem.objects.select_related('category').prefetch_related(
-        'modifier_groups__modifiers'
-    ).all().order_by('sort_order', 'name')
+    queryset = MenuItem.objects.select_related('category').all().order_by('sort_order', 'name')
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -178,7 +186,10 @@ class MenuItemViewSet(viewsets.ModelViewSet):
             except (ValueError, TypeError):
                 pass
         
-        return queryset
+        # Load exactly what the action's serializer reads
+        if self.action in ('list', 'featured', 'search', 'export_csv'):
+            return menu_item_list_queryset(queryset)
+        return menu_item_detail_queryset(queryset)
 
     def get_permissions(self):
         if self.request.method in ("GET",):
@@ -249,44 +260,46 @@ class MenuItemViewSet(viewsets.ModelViewSet):
         reader = csv.DictReader(wrapper)
         created = 0
         updated = 0
-        for row in reader:
-            try:
-                cid = int(row.get('category_id') or 0)
-            except Exception:
-                cid = 0
-            defaults = {
-                'name': row.get('name') or '',
-                'price': row.get('price') or '0.00',
-                'is_available': (row.get('is_available') or 'True') in ('True','true','1'),
-                'available_from': row.get('available_from') or None,
-                'available_until': row.get('available_until') or None,
-                'is_vegetarian': (row.get('is_vegetarian') or 'False') in ('True','true','1'),
-                'is_vegan': (row.get('is_vegan') or 'False') in ('True','true','1'),
-                'is_gluten_free': (row.get('is_gluten_free') or 'False') in ('True','true','1'),
-                'sort_order': int(row.get('sort_order') or 0),
-            }
-            obj_id = row.get('id')
-            if obj_id:
+        # Category aggregates are refreshed once for the whole file (menu.tree)
+        with deferred_aggregates():
+            for row in reader:
                 try:
-                    mi = MenuItem.objects.get(pk=int(obj_id))
-                    for k, v in defaults.items():
-                        setattr(mi, k, v)
-                    if cid:
-                        mi.category_id = cid
-                    mi.save()
-                    updated += 1
-                except MenuItem.DoesNotExist:
+                    cid = int(row.get('category_id') or 0)
+                except Exception:
+                    cid = 0
+                defaults = {
+                    'name': row.get('name') or '',
+                    'price': row.get('price') or '0.00',
+                    'is_available': (row.get('is_available') or 'True') in ('True','true','1'),
+                    'available_from': row.get('available_from') or None,
+                    'available_until': row.get('available_until') or None,
+                    'is_vegetarian': (row.get('is_vegetarian') or 'False') in ('True','true','1'),
+                    'is_vegan': (row.get('is_vegan') or 'False') in ('True','true','1'),
+                    'is_gluten_free': (row.get('is_gluten_free') or 'False') in ('True','true','1'),
+                    'sort_order': int(row.get('sort_order') or 0),
+                }
+                obj_id = row.get('id')
+                if obj_id:
+                    try:
+                        mi = MenuItem.objects.get(pk=int(obj_id))
+                        for k, v in defaults.items():
+                            setattr(mi, k, v)
+                        if cid:
+                            mi.category_id = cid
+                        mi.save()
+                        updated += 1
+                    except MenuItem.DoesNotExist:
+                        mi = MenuItem.objects.create(**defaults)
+                        if cid:
+                            mi.category_id = cid
+                            mi.save(update_fields=['category'])
+                        created += 1
+                else:
                     mi = MenuItem.objects.create(**defaults)
                     if cid:
                         mi.category_id = cid
                         mi.save(update_fields=['category'])
                     created += 1
-            else:
-                mi = MenuItem.objects.create(**defaults)
-                if cid:
-                    mi.category_id = cid
-                    mi.save(update_fields=['category'])
-                created += 1
         try:
             from reports.models import AuditLog
             AuditLog.log_action(request.user, 'IMPORT', f'Imported items CSV (created={created}, updated={updated})', request=request, category='menu')
@@ -297,49 +310,33 @@ class MenuItemViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def search(self, request):
         """
-        Advanced search for menu items with multiple filters.
+        Ranked full-text search for menu items (see menu.search).
+        Paginated responses also carry facet counts for the matched items.
         """
         serializer = MenuSearchSerializer(data=request.query_params)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         validated_data = serializer.validated_data
-        query = validated_data['query']
-        
-        # Build search query
-        queryset = self.get_queryset().filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query)
+        filters = {
+            key: validated_data.get(key)
+            for key in ('category_id', 'is_vegan', 'is_gluten_free', 'min_price', 'max_price')
+        }
+        is_staff = request.user.is_authenticated and request.user.is_staff
+        result = search_menu(
+            validated_data['query'],
+            filters=filters,
+            available_only=not is_staff,
         )
-        
-        # Apply additional filters
-        if 'category_id' in validated_data and validated_data['category_id']:
-            queryset = queryset.filter(category_id=validated_data['category_id'])
-        
-        if 'is_vegan' in validated_data:
-            queryset = queryset.filter(is_vegan=validated_data['is_vegan'])
-        
-        if 'is_gluten_free' in validated_data:
-            queryset = queryset.filter(is_gluten_free=validated_data['is_gluten_free'])
-        
-        if 'min_price' in validated_data:
-            queryset = queryset.filter(price__gte=validated_data['min_price'])
-        
-        if 'max_price' in validated_data:
-            queryset = queryset.filter(price__lte=validated_data['max_price'])
-        
-        # Order by relevance (items with query in name first)
-        queryset = queryset.extra(
-            select={
-                'name_match': "CASE WHEN LOWER(name) LIKE LOWER(%s) THEN 1 ELSE 0 END"
-            },
-            select_params=[f'%{query}%']
-        ).order_by('-name_match', 'sort_order', 'name')
+        queryset = ranked_queryset(self.get_queryset(), result.ids)
         
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = MenuItemListSerializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+            response.data['facets'] = result.facets
+            response.data['corrected_query'] = result.corrected_query
+            return response
         
         serializer = MenuItemListSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
@@ -350,7 +347,7 @@ class MenuItemViewSet(viewsets.ModelViewSet):
         Get all modifier groups for a specific menu item.
         """
         menu_item = self.get_object()
-        modifier_groups = menu_item.modifier_groups.prefetch_related('modifiers').all()
+        modifier_groups = menu_item.direct_modifier_groups.prefetch_related('modifiers').all()
         
         serializer = ModifierGroupSerializer(
             modifier_groups, many=True, context={'request': request}
@@ -471,56 +468,79 @@ class ModifierViewSet(viewsets.ModelViewSet):
         instance.delete()
 
 
+def menu_display_timeout():
+    """30 minutes or until the next availability flip."""
+    return seconds_until_change(cap=60 * 30)
+
+
+def build_menu_display(request):
+    """Complete menu display payload: categories with items, featured items."""
+    # One pass over the availability index instead of per-item checks
+    now_available = available_now()
+    item_ids = now_available['items']
+
+    # Get categories open right now with their orderable items
+    categories = category_with_items_queryset(
+        MenuCategory.objects.filter(pk__in=now_available['categories']),
+        items_queryset=MenuItem.objects.filter(pk__in=item_ids),
+    ).order_by('sort_order', 'name')
+
+    # Get featured items
+    featured_items = MenuItem.objects.filter(
+        pk__in=item_ids, is_featured=True
+    ).select_related('category').order_by('sort_order', 'name')[:10]
+
+    menu_data = {
+        'categories': MenuCategoryWithItemsSerializer(
+            categories, many=True, context={'request': request}
+        ).data,
+        'featured_items': MenuItemListSerializer(
+            featured_items, many=True, context={'request': request}
+        ).data,
+        'total_categories': categories.count(),
+        'total_items': len(item_ids),
+        'last_updated': timezone.now()
+    }
+    return MenuDisplaySerializer(menu_data).data
+
+
+def build_categories_with_items(request):
+    """Active categories with their available menu items."""
+    queryset = category_list_queryset(
+        MenuCategory.objects.filter(is_active=True).order_by('sort_order', 'name')
+    ).prefetch_related(
+        Prefetch(
+            'menu_items',
+            queryset=MenuItem.objects.filter(is_available=True).order_by('sort_order', 'name')
+        )
+    )
+    return MenuCategoryWithItemsSerializer(queryset, many=True, context={'request': request}).data
+
+
+class MenuDisplayView(View):
+    """
+    Complete menu display, served natively async (routed as
+    ``menudisplay-list``). A cache hit never leaves the event loop; a miss
+    is rebuilt by one worker (``core.warmup``) in a thread while the others
+    serve the previous payload.
+    """
+
+    async def get(self, request):
+        data = await aio.cache_get(MENU_DISPLAY_CACHE_KEY)
+        if data is None:
+            data = await sync_to_async(warmup.get_or_build)(
+                MENU_DISPLAY_CACHE_KEY, lambda: build_menu_display(request), menu_display_timeout
+            )
+        return JsonResponse(data)
+
+
 class MenuDisplayViewSet(viewsets.ViewSet):
     """
-    ViewSet for displaying the complete menu structure.
-    Optimized for frontend consumption.
+    Menu display maintenance actions. The display itself is
+    ``MenuDisplayView``.
     """
     permission_classes = [AllowAny]
-    
-    def list(self, request):
-        """
-        Get the complete menu display with categories, items, and featured items.
-        """
-        # Check cache first
-        cache_key = 'complete_menu_display'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data is None:
-            # Get active categories with their available items
-            categories = MenuCategory.objects.filter(is_active=True).prefetch_related(
-                Prefetch(
-                    'menu_items',
-                    queryset=MenuItem.objects.filter(is_available=True).order_by('sort_order', 'name')
-                )
-            ).order_by('sort_order', 'name')
-            
-            # Get featured items
-            featured_items = MenuItem.objects.filter(
-                is_available=True, is_featured=True
-            ).select_related('category').order_by('sort_order', 'name')[:10]
-            
-            # Prepare data
-            menu_data = {
-                'categories': MenuCategoryWithItemsSerializer(
-                    categories, many=True, context={'request': request}
-                ).data,
-                'featured_items': MenuItemListSerializer(
-                    featured_items, many=True, context={'request': request}
-                ).data,
-                'total_categories': categories.count(),
-                'total_items': MenuItem.objects.filter(is_available=True).count(),
-                'last_updated': timezone.now()
-            }
-            
-            serializer = MenuDisplaySerializer(menu_data)
-            cached_data = serializer.data
-            
-            # Cache for 30 minutes
-            cache.set(cache_key, cached_data, 60 * 30)
-        
-        return Response(cached_data)
-    
+
     @action(detail=False, methods=['post'])
     def clear_cache(self, request):
         """
@@ -534,8 +554,8 @@ class MenuDisplayViewSet(viewsets.ViewSet):
             )
         
         cache_keys = [
-            'complete_menu_display',
-            'menu_categories_with_items'
+            MENU_DISPLAY_CACHE_KEY,
+            CATEGORIES_WITH_ITEMS_CACHE_KEY,
         ]
         
         for key in cache_keys:
@@ -0,0 +1,402 @@
+# menu/availability.py
+"""
+Time-window availability index for menu categories, items and modifiers.
+
+Every availability rule (active/available flags, stock, daily limits, daily
+time windows and weekday lists, parent category) is compiled into a
+``Schedule``: a static on/off gate plus a set of half-open intervals in
+"seconds since Monday 00:00" local time. An ``AvailabilityIndex`` holds the
+schedules of a whole organization together with the sorted list of instants
+at which any of them flips, so:
+
+- "what is orderable right now" is one in-memory pass over the schedules;
+- results can be cached until the next flip instant, which makes time-based
+  changes visible immediately without per-request rule evaluation.
+
+Writes to menu models bump a version counter (see ``menu.signals``), which
+drops compiled indexes and cached snapshots. Schedules are evaluated in the
+location's timezone (``core.Location.timezone``) or ``settings.TIME_ZONE``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+import time as _time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core import http_cache, warmup
+from core.cache_config import CACHE_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+WEEK = 7 * DAY
+
+VERSION_KEY = "menu_availability:version"
+# Rebuilt after every invalidation (core.warmup, menu.warmup, orders.warmup)
+WARMUP_DATASETS = ("menu.availability", "menu.display", "menu.categories", "menu.items", "menu.modifiers")
+
+KIND_CATEGORY = "categories"
+KIND_ITEM = "items"
+KIND_MODIFIER = "modifiers"
+KIND_ITEM_MODIFIER_GROUP = "item_modifier_groups"
+KINDS = (KIND_CATEGORY, KIND_ITEM, KIND_MODIFIER, KIND_ITEM_MODIFIER_GROUP)
+
+Interval = Tuple[int, int]
+
+# Per-process compiled indexes: (organization_id, tz_name) -> ((version, day), built_at, index)
+_local_indexes: Dict[Tuple[Optional[int], str], Tuple[int, float, "AvailabilityIndex"]] = {}
+_local_lock = threading.Lock()
+
+
+# ----------------------------------------------------------------------
+# Schedules
+# ----------------------------------------------------------------------
+@dataclass(frozen=True)
+class Schedule:
+    """Static gate plus weekly open intervals (``None`` means always open)."""
+    static: bool = True
+    intervals: Optional[Tuple[Interval, ...]] = None
+
+    def is_open(self, week_second: int) -> bool:
+        if not self.static:
+            return False
+        if self.intervals is None:
+            return True
+        for start, end in self.intervals:
+            if start <= week_second < end:
+                return True
+            if start > week_second:
+                break
+        return False
+
+    def is_open_at(self, moment: datetime) -> bool:
+        return self.is_open(week_second(moment))
+
+    def boundaries(self) -> Iterable[int]:
+        if not self.static or self.intervals is None:
+            return ()
+        return (edge % WEEK for interval in self.intervals for edge in interval)
+
+
+ALWAYS = Schedule()
+NEVER = Schedule(static=False)
+
+
+def _seconds(value) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _merge(intervals: List[Interval]) -> Tuple[Interval, ...]:
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return tuple((start, end) for start, end in merged)
+
+
+def window_intervals(available_from=None, available_until=None, available_days=None) -> Optional[Tuple[Interval, ...]]:
+    """
+    Weekly intervals for a daily ``available_from``-``available_until`` window
+    restricted to ``available_days`` (0=Monday). Both bounds are inclusive at
+    second resolution, matching the model checks.
+    """
+    has_window = bool(available_from and available_until)
+    days = sorted({int(d) for d in available_days or [] if 0 <= int(d) <= 6})
+    if not has_window and not days:
+        return None
+    days = days or list(range(7))
+    if has_window:
+        start, end = _seconds(available_from), _seconds(available_until) + 1
+    else:
+        start, end = 0, DAY
+    return _merge([(day * DAY + start, day * DAY + end) for day in days])
+
+
+def intersect(a: Schedule, b: Schedule) -> Schedule:
+    """Schedule open only when both ``a`` and ``b`` are open."""
+    if not (a.static and b.static):
+        return NEVER
+    if a.intervals is None:
+        return b
+    if b.intervals is None:
+        return a
+    result: List[Interval] = []
+    i = j = 0
+    while i < len(a.intervals) and j < len(b.intervals):
+        start = max(a.intervals[i][0], b.intervals[j][0])
+        end = min(a.intervals[i][1], b.intervals[j][1])
+        if start < end:
+            result.append((start, end))
+        if a.intervals[i][1] < b.intervals[j][1]:
+            i += 1
+        else:
+            j += 1
+    return Schedule(static=bool(result), intervals=tuple(result) if result else None)
+
+
+def category_schedule(category) -> Schedule:
+    if not category.is_active:
+        return NEVER
+    return Schedule(intervals=window_intervals(category.available_from, category.available_until))
+
+
+def item_schedule(item, category: Optional[Schedule] = None) -> Schedule:
+    if category is None:
+        category = category_schedule(item.category)
+    static = bool(item.is_available) and not (item.track_inventory and item.stock_quantity <= 0)
+    own = Schedule(
+        static=static,
+        intervals=window_intervals(item.available_from, item.available_until, item.available_days),
+    )
+    return intersect(category, own)
+
+
+def modifier_schedule(modifier, pending_daily: Optional[int] = None) -> Schedule:
+    """``pending_daily``: buffered daily increments, when fetched for a whole set."""
+    static = (
+        bool(modifier.is_available)
+        and not (modifier.track_inventory and modifier.stock_quantity <= 0)
+        and not modifier.is_at_daily_limit(pending_daily)
+    )
+    return Schedule(
+        static=static,
+        intervals=window_intervals(modifier.available_from, modifier.available_until, modifier.available_days),
+    )
+
+
+def item_modifier_group_schedule(link, group_active: Optional[bool] = None) -> Schedule:
+    if group_active is None:
+        group_active = link.modifier_group.is_active
+    if not (link.is_visible and group_active):
+        return NEVER
+    return Schedule(
+        intervals=window_intervals(link.available_from, link.available_until, link.available_days),
+    )
+
+
+# ----------------------------------------------------------------------
+# Time helpers
+# ----------------------------------------------------------------------
+def resolve_timezone(tz_name: Optional[str] = None):
+    if tz_name:
+        try:
+            return ZoneInfo(tz_name)
+        except Exception:
+            logger.warning(f"Unknown timezone {tz_name!r}, using {settings.TIME_ZONE}")
+    return timezone.get_default_timezone()
+
+
+def local_now(tz_name: Optional[str] = None) -> datetime:
+    return timezone.localtime(timezone.now(), resolve_timezone(tz_name))
+
+
+def week_second(moment: datetime) -> int:
+    return moment.weekday() * DAY + _seconds(moment)
+
+
+# ----------------------------------------------------------------------
+# Index
+# ----------------------------------------------------------------------
+@dataclass
+class AvailabilityIndex:
+    """Compiled schedules of one organization in one timezone."""
+    organization_id: Optional[int]
+    tz_name: str
+    version: int = 0
+    schedules: Dict[str, Dict[int, Schedule]] = field(default_factory=lambda: {kind: {} for kind in KINDS})
+    flips: Tuple[int, ...] = ()
+
+    def _moment(self, at: Optional[datetime] = None) -> datetime:
+        tz = resolve_timezone(self.tz_name)
+        return timezone.localtime(at or timezone.now(), tz)
+
+    def is_available(self, kind: str, pk: int, at: Optional[datetime] = None) -> bool:
+        schedule = self.schedules.get(kind, {}).get(pk)
+        return bool(schedule and schedule.is_open_at(self._moment(at)))
+
+    def available_ids(self, kind: str, at: Optional[datetime] = None) -> Set[int]:
+        ws = week_second(self._moment(at))
+        return {pk for pk, schedule in self.schedules.get(kind, {}).items() if schedule.is_open(ws)}
+
+    def state(self, at: Optional[datetime] = None) -> Dict[str, Set[int]]:
+        """Available ids of every kind at ``at`` (default: now)."""
+        ws = week_second(self._moment(at))
+        return {
+            kind: {pk for pk, schedule in schedules.items() if schedule.is_open(ws)}
+            for kind, schedules in self.schedules.items()
+        }
+
+    def next_flip(self, at: Optional[datetime] = None) -> Optional[datetime]:
+        """First instant after ``at`` at which any schedule changes state."""
+        if not self.flips:
+            return None
+        moment = self._moment(at)
+        ws = week_second(moment)
+        position = bisect.bisect_right(self.flips, ws)
+        boundary = self.flips[position] if position < len(self.flips) else self.flips[0] + WEEK
+        start_of_second = moment.replace(microsecond=0)
+        return start_of_second + timedelta(seconds=boundary - ws)
+
+    def seconds_until_next_flip(self, at: Optional[datetime] = None, cap: Optional[int] = None) -> int:
+        """Seconds until the next flip, capped (also bounds DST drift)."""
+        cap = cap or max_snapshot_ttl()
+        flip = self.next_flip(at)
+        if flip is None:
+            return cap
+        delta = (flip - (at or timezone.now())).total_seconds()
+        return max(1, min(cap, int(delta + 0.999)))
+
+
+def max_snapshot_ttl() -> int:
+    return int(getattr(settings, "MENU_AVAILABILITY_MAX_TTL", 3600))
+
+
+def build_index(organization_id: Optional[int] = None, tz_name: Optional[str] = None, version: int = 0) -> AvailabilityIndex:
+    """Compile schedules for every category, item and modifier (4 queries)."""
+    from .counters import pending_daily
+    from .models import MenuCategory, MenuItem, Modifier, MenuItemModifierGroup
+
+    tz_name = tz_name or settings.TIME_ZONE
+    index = AvailabilityIndex(organization_id=organization_id, tz_name=tz_name, version=version)
+
+    categories = MenuCategory.objects.only(
+        "id", "is_active", "available_from", "available_until"
+    )
+    items = MenuItem.objects.only(
+        "id", "category_id", "is_available", "track_inventory", "stock_quantity",
+        "available_from", "available_until", "available_days",
+    )
+    modifiers = Modifier.objects.only(
+        "id", "is_available", "track_inventory", "stock_quantity", "daily_limit",
+        "daily_count", "daily_count_date", "available_from", "available_until", "available_days",
+    )
+    links = MenuItemModifierGroup.objects.select_related("modifier_group").only(
+        "id", "is_visible", "available_from", "available_until", "available_days",
+        "modifier_group__is_active",
+    )
+    if organization_id:
+        categories = categories.filter(organization_id=organization_id)
+        items = items.filter(organization_id=organization_id)
+        modifiers = modifiers.filter(modifier_group__menu_item__organization_id=organization_id)
+        links = links.filter(menu_item__organization_id=organization_id)
+
+    by_kind = index.schedules
+    for category in categories:
+        by_kind[KIND_CATEGORY][category.pk] = category_schedule(category)
+    for item in items:
+        parent = by_kind[KIND_CATEGORY].get(item.category_id, NEVER)
+        by_kind[KIND_ITEM][item.pk] = item_schedule(item, parent)
+    # Buffered daily increments for every limited modifier in one lookup
+    modifiers = list(modifiers)
+    pending = pending_daily([modifier.pk for modifier in modifiers if modifier.daily_limit])
+    for modifier in modifiers:
+        by_kind[KIND_MODIFIER][modifier.pk] = modifier_schedule(modifier, pending.get(modifier.pk, 0))
+    for link in links:
+        by_kind[KIND_ITEM_MODIFIER_GROUP][link.pk] = item_modifier_group_schedule(
+            link, link.modifier_group.is_active
+        )
+
+    flips = set()
+    for schedules in by_kind.values():
+        for schedule in schedules.values():
+            flips.update(schedule.boundaries())
+    index.flips = tuple(sorted(flips))
+    return index
+
+
+def current_version() -> int:
+    try:
+        return int(cache.get(VERSION_KEY) or 0)
+    except Exception:
+        return 0
+
+
+def invalidate() -> None:
+    """Drop compiled indexes and availability snapshots after a menu write."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+    except Exception as e:
+        logger.warning(f"Failed to bump menu availability version: {e}")
+    with _local_lock:
+        _local_indexes.clear()
+    # The menu display embeds availability; rebuild it on next request
+    cache.delete("complete_menu_display")
+    http_cache.invalidate("menu")
+    warmup.schedule(WARMUP_DATASETS)
+
+
+def get_index(organization_id: Optional[int] = None, tz_name: Optional[str] = None) -> AvailabilityIndex:
+    """
+    Return the compiled index, from process memory when the version matches,
+    then the shared cache, otherwise compiled from the database.
+    """
+    tz_name = tz_name or settings.TIME_ZONE
+    version = current_version()
+    # Modifier daily limits roll over by date (menu.counters), so a new day
+    # gets a fresh index without any write having to invalidate it
+    day = timezone.localdate().isoformat()
+    memo_key = (organization_id, tz_name)
+    # Local copies are also aged out so processes sharing a non-shared cache
+    # (e.g. DummyCache in development) pick up other processes' writes.
+    local_ttl = int(getattr(settings, "MENU_AVAILABILITY_LOCAL_TTL", 30))
+
+    with _local_lock:
+        memo = _local_indexes.get(memo_key)
+    if memo and memo[0] == (version, day) and _time.monotonic() - memo[1] < local_ttl:
+        return memo[2]
+
+    cache_key = f"menu_availability:index:{organization_id or 'all'}:{tz_name}:{version}:{day}"
+    # One worker rebuilds after an invalidation; the others use the previous index meanwhile
+    index = warmup.get_or_build(
+        cache_key,
+        lambda: build_index(organization_id, tz_name, version),
+        CACHE_TIMEOUTS["MENU"],
+        stale_key=f"menu_availability:index:stale:{organization_id or 'all'}:{tz_name}",
+    )
+
+    if index.version == version:
+        with _local_lock:
+            _local_indexes[memo_key] = ((version, day), _time.monotonic(), index)
+    return index
+
+
+def get_index_for_location(location) -> AvailabilityIndex:
+    return get_index(location.organization_id, location.timezone)
+
+
+def available_now(organization_id: Optional[int] = None, tz_name: Optional[str] = None) -> Dict[str, Set[int]]:
+    """
+    Ids of every category, item, modifier and item/modifier-group link that is
+    available now. Cached until the next flip instant.
+    """
+    tz_name = tz_name or settings.TIME_ZONE
+    index = get_index(organization_id, tz_name)
+    cache_key = (
+        f"menu_availability:now:{organization_id or 'all'}:{tz_name}:{index.version}:"
+        f"{timezone.localdate().isoformat()}"
+    )
+    snapshot = cache.get(cache_key)
+    if snapshot is None:
+        now = timezone.now()
+        snapshot = index.state(now)
+        cache.set(cache_key, snapshot, index.seconds_until_next_flip(now))
+    return snapshot
+
+
+def seconds_until_change(organization_id: Optional[int] = None, tz_name: Optional[str] = None, cap: Optional[int] = None) -> int:
+    """Cache lifetime for responses derived from current availability."""
+    return get_index(organization_id, tz_name).seconds_until_next_flip(cap=cap)
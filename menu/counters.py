@@ -0,0 +1,327 @@
+# menu/counters.py
+"""
+Buffered popularity and usage counters.
+
+``MenuItem.view_count``/``order_count``, ``Modifier.order_count`` and
+``MenuItemModifierGroup.usage_count`` are bumped on hot paths. Instead of a
+single-row ``UPDATE`` per call (which serializes popular rows on their row
+lock during a rush), increments are accumulated:
+
+- in Redis hashes (``<prefix>:counters:<name>`` -> ``{pk: delta}``), shared
+  by every process, or
+- in process memory when Redis is unavailable,
+
+and ``flush()`` writes them back with one ``UPDATE ... SET x = CASE pk WHEN
+... END`` per counter. ``flush_counters_task`` runs it every
+``COUNTER_FLUSH_SECONDS``; the in-process buffer also flushes itself on the
+first increment after that interval.
+
+Reads are read-your-writes: ``pending()`` returns the not yet flushed
+deltas, which ``get_popular_items``/``get_popular_modifiers`` add to the
+stored totals.
+
+Modifier daily counts are date-bucketed: ``Modifier.daily_count`` is only
+meaningful together with ``daily_count_date`` (see
+``Modifier.current_daily_count``, which also adds ``pending_daily()``), so a
+new day starts from zero without a table-wide reset, and buffered daily
+increments live in per-day Redis keys that simply expire.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DAILY = "modifier.daily"
+UPDATE_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class Counter:
+    model: str
+    field: str
+    touch: Optional[str] = None  # timestamp column set when flushed
+
+
+COUNTERS: Dict[str, Counter] = {
+    "menu_item.views": Counter("menu.MenuItem", "view_count"),
+    "menu_item.orders": Counter("menu.MenuItem", "order_count"),
+    "modifier.orders": Counter("menu.Modifier", "order_count", touch="last_ordered"),
+    "item_modifier_group.usage": Counter("menu.MenuItemModifierGroup", "usage_count", touch="last_used"),
+}
+
+# In-process buffer: key -> {pk: delta}
+_local: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+_local_lock = threading.Lock()
+_last_local_flush = time.monotonic()
+
+
+def bucket_date() -> date:
+    """The day daily counts belong to (local date of ``settings.TIME_ZONE``)."""
+    return timezone.localdate()
+
+
+def _prefix() -> str:
+    return f"{getattr(settings, 'CACHE_KEY_PREFIX', 'rms')}:counters:"
+
+
+def _key(name: str, day: Optional[date] = None) -> str:
+    if name == DAILY:
+        return f"{_prefix()}{name}:{(day or bucket_date()).strftime('%Y%m%d')}"
+    return f"{_prefix()}{name}"
+
+
+def _redis():
+    if getattr(settings, "COUNTER_BACKEND", "auto") == "local":
+        return None
+    from core.cache_service import CacheService
+    return CacheService.get_redis_client(write=True)
+
+
+def _flush_interval() -> int:
+    return int(getattr(settings, "COUNTER_FLUSH_SECONDS", 5))
+
+
+# ----------------------------------------------------------------------
+# Increments
+# ----------------------------------------------------------------------
+def _incr(key: str, pk: int, amount: int, ttl: Optional[int] = None) -> None:
+    client = _redis()
+    if client is not None:
+        try:
+            pipe = client.pipeline()
+            pipe.hincrby(key, pk, amount)
+            if ttl:
+                pipe.expire(key, ttl)
+            pipe.execute()
+            return
+        except Exception as e:
+            logger.warning(f"Redis counter increment failed, buffering in process: {e}")
+
+    global _last_local_flush
+    with _local_lock:
+        _local[key][int(pk)] += amount
+        due = time.monotonic() - _last_local_flush >= _flush_interval()
+        if due:
+            _last_local_flush = time.monotonic()
+    if due:
+        transaction.on_commit(_flush_local)
+
+
+def incr(name: str, pk: int, amount: int = 1) -> None:
+    """Buffer ``amount`` for counter ``name`` (a key of ``COUNTERS``) on row ``pk``."""
+    if name not in COUNTERS:
+        raise KeyError(f"Unknown counter: {name}")
+    _incr(_key(name), pk, amount)
+
+
+def incr_daily(modifier_id: int, amount: int = 1) -> None:
+    """Buffer a daily-count increment for today's bucket."""
+    _incr(_key(DAILY), modifier_id, amount, ttl=2 * 86400)
+
+
+# ----------------------------------------------------------------------
+# Read-your-writes
+# ----------------------------------------------------------------------
+def _pending_for_key(key: str, ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    totals: Dict[int, int] = defaultdict(int)
+    ids = None if ids is None else [int(pk) for pk in ids]
+    wanted = None if ids is None else set(ids)
+
+    client = _redis()
+    if client is not None:
+        try:
+            for name in (key, f"{key}:flushing"):
+                if ids is None:
+                    for pk, value in client.hgetall(name).items():
+                        totals[int(pk)] += int(value)
+                elif ids:
+                    for pk, value in zip(ids, client.hmget(name, ids)):
+                        if value is not None:
+                            totals[pk] += int(value)
+        except Exception as e:
+            logger.debug(f"Failed reading pending counters from Redis: {e}")
+
+    with _local_lock:
+        buffered = dict(_local.get(key) or {})
+    for pk, value in buffered.items():
+        if wanted is None or pk in wanted:
+            totals[pk] += value
+    return dict(totals)
+
+
+def pending(name: str, ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    """Not yet flushed increments of counter ``name``, for ``ids`` or every row."""
+    return _pending_for_key(_key(name), ids)
+
+
+def pending_daily(ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    """Not yet flushed daily-count increments for today."""
+    return _pending_for_key(_key(DAILY), ids)
+
+
+# ----------------------------------------------------------------------
+# Database writes
+# ----------------------------------------------------------------------
+def _chunks(deltas: Dict[int, int]):
+    items = list(deltas.items())
+    for start in range(0, len(items), UPDATE_CHUNK):
+        yield dict(items[start:start + UPDATE_CHUNK])
+
+
+def _apply_counter(counter: Counter, deltas: Dict[int, int]) -> int:
+    model = apps.get_model(counter.model)
+    output = PositiveIntegerField()
+    updated = 0
+    for chunk in _chunks(deltas):
+        values = {
+            counter.field: Case(
+                *[When(pk=pk, then=F(counter.field) + Value(delta, output_field=output))
+                  for pk, delta in chunk.items()],
+                default=F(counter.field),
+                output_field=output,
+            )
+        }
+        if counter.touch:
+            values[counter.touch] = timezone.now()
+        updated += model.objects.filter(pk__in=list(chunk)).update(**values)
+    return updated
+
+
+def apply_daily_counts(deltas: Dict[int, int], sign: int = 1, day: Optional[date] = None) -> int:
+    """
+    Add (``sign`` > 0) or remove ``deltas`` to the modifiers' count for
+    ``day`` in one UPDATE. A row whose count belongs to an earlier day starts
+    again from the delta; removals only touch rows already on ``day``.
+    """
+    from .models import Modifier
+
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    day = day or bucket_date()
+    output = PositiveIntegerField()
+    updated = 0
+    for chunk in _chunks(deltas):
+        if sign > 0:
+            whens = []
+            for pk, delta in chunk.items():
+                whens.append(When(Q(pk=pk) & Q(daily_count_date=day),
+                                  then=F("daily_count") + Value(delta, output_field=output)))
+                whens.append(When(pk=pk, then=Value(delta, output_field=output)))
+            updated += Modifier.objects.filter(pk__in=list(chunk), daily_limit__isnull=False).update(
+                daily_count=Case(*whens, default=F("daily_count"), output_field=output),
+                daily_count_date=day,
+            )
+        else:
+            whens = [
+                When(pk=pk, then=Greatest(F("daily_count") - Value(delta, output_field=output),
+                                          Value(0, output_field=output)))
+                for pk, delta in chunk.items()
+            ]
+            updated += Modifier.objects.filter(
+                pk__in=list(chunk), daily_limit__isnull=False, daily_count_date=day,
+            ).update(daily_count=Case(*whens, default=F("daily_count"), output_field=output))
+
+    # Modifiers that just reached their limit drop out of the availability index
+    if sign > 0 and Modifier.objects.filter(
+        pk__in=list(deltas), daily_count_date=day, daily_count__gte=F("daily_limit")
+    ).exists():
+        from .availability import invalidate
+        transaction.on_commit(invalidate)
+    return updated
+
+
+def _apply(key_name: str, deltas: Dict[int, int], day: Optional[date] = None) -> int:
+    if key_name == DAILY:
+        return apply_daily_counts(deltas, day=day)
+    return _apply_counter(COUNTERS[key_name], deltas)
+
+
+# ----------------------------------------------------------------------
+# Flushing
+# ----------------------------------------------------------------------
+def _flush_local() -> int:
+    with _local_lock:
+        buffered = {key: dict(values) for key, values in _local.items() if values}
+        _local.clear()
+
+    written = 0
+    for key, deltas in buffered.items():
+        name, day = _parse_key(key)
+        if name == DAILY and day != bucket_date():
+            continue  # yesterday's count no longer limits anything
+        try:
+            written += _apply(name, deltas, day)
+        except Exception as e:
+            logger.warning(f"Failed flushing counter {name}, keeping increments buffered: {e}")
+            with _local_lock:
+                for pk, delta in deltas.items():
+                    _local[key][pk] += delta
+    return written
+
+
+def _parse_key(key: str):
+    name = key[len(_prefix()):]
+    if name.startswith(f"{DAILY}:"):
+        return DAILY, datetime.strptime(name.rsplit(":", 1)[1], "%Y%m%d").date()
+    return name, None
+
+
+def _flush_redis(client) -> int:
+    lock = f"{_prefix()}flush_lock"
+    if not client.set(lock, 1, nx=True, ex=60):
+        return 0  # another worker is flushing
+
+    written = 0
+    try:
+        for key in [_key(name) for name in COUNTERS] + [_key(DAILY)]:
+            name, day = _parse_key(key)
+            flushing = f"{key}:flushing"
+            # A leftover snapshot from a failed flush is written first
+            if not client.exists(flushing):
+                if not client.exists(key):
+                    continue
+                client.rename(key, flushing)
+            deltas = {int(pk): int(value) for pk, value in client.hgetall(flushing).items()}
+            try:
+                written += _apply(name, deltas, day)
+            except Exception as e:
+                logger.warning(f"Failed flushing counter {name}, will retry: {e}")
+                continue
+            client.delete(flushing)
+    finally:
+        client.delete(lock)
+    return written
+
+
+def flush() -> int:
+    """Write buffered increments to the database. Returns rows updated."""
+    global _last_local_flush
+    written = 0
+    client = _redis()
+    if client is not None:
+        try:
+            written += _flush_redis(client)
+        except Exception as e:
+            logger.warning(f"Failed flushing Redis counters: {e}")
+    with _local_lock:
+        _last_local_flush = time.monotonic()
+    written += _flush_local()
+    if written:
+        logger.debug(f"Flushed buffered counters to {written} rows")
+    return written
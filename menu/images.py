@@ -0,0 +1,240 @@
+# menu/images.py
+"""
+Responsive derivatives of menu images.
+
+When a ``MenuItem`` or ``MenuCategory`` image changes, ``schedule()`` (called
+from ``menu.signals``) renders the image once per width in
+``MENU_IMAGE_WIDTHS`` as WebP and JPEG, off the request. Without Celery it
+runs right after the commit. ``manage.py build_image_variants`` backfills
+existing rows.
+
+Derivatives are content-addressed: the file name is a hash of the source
+bytes and the render settings, e.g.
+``derivatives/3f/3f9c...-640.webp``. A URL therefore never changes meaning,
+and the web server can serve ``MENU_IMAGE_DERIVATIVE_DIR`` with
+``Cache-Control: public, max-age=31536000, immutable``.
+
+The manifest stored in ``image_variants`` looks like::
+
+    {"source": "menu_items/2026/10/soup.jpg", "hash": "3f9c...",
+     "width": 1600, "height": 1200,
+     "variants": {"webp": {"320": "derivatives/3f/3f9c...-320.webp", ...},
+                  "jpeg": {"320": "derivatives/3f/3f9c...-320.jpg", ...}}}
+
+``srcset()``, ``image_payload()`` and the ``responsive_image`` template tag
+(``core.templatetags.cache_tags``) turn it into ``srcset``-ready URLs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from io import BytesIO
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    # format -> (Pillow format, extension, content type)
+    "webp": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+}
+FALLBACK_FORMAT = "jpeg"
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _widths():
+    return sorted({int(w) for w in _setting("MENU_IMAGE_WIDTHS", (160, 320, 640, 960, 1280))})
+
+
+def _quality() -> int:
+    return int(_setting("MENU_IMAGE_QUALITY", 80))
+
+
+def needs_refresh(instance) -> bool:
+    """True when the stored manifest does not describe the current image."""
+    image = getattr(instance, "image", None)
+    manifest = getattr(instance, "image_variants", None) or {}
+    if not image:
+        return bool(manifest)
+    return manifest.get("source") != image.name
+
+
+# ----------------------------------------------------------------------
+# Rendering
+# ----------------------------------------------------------------------
+def _target_widths(original: int):
+    widths = _widths()
+    targets = [w for w in widths if w < original]
+    # Never upscale; the largest derivative is the original size capped at the widest target
+    targets.append(min(original, widths[-1]))
+    return sorted(set(targets))
+
+
+def _encode(image, fmt: str) -> bytes:
+    pil_format, _ext, _type = FORMATS[fmt]
+    buffer = BytesIO()
+    if fmt == "jpeg" and image.mode != "RGB":
+        from PIL import Image
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        if image.mode in ("RGBA", "LA", "P"):
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.split()[-1])
+        else:
+            background.paste(image.convert("RGB"))
+        image = background
+    options = {"quality": _quality(), "optimize": True}
+    if fmt == "jpeg":
+        options["progressive"] = True
+    else:
+        options["method"] = 4
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate(field_file) -> Dict:
+    """Render every derivative of ``field_file`` (skipping files already stored); returns the manifest."""
+    from PIL import Image, ImageOps
+
+    storage = field_file.storage
+    field_file.open("rb")
+    try:
+        data = field_file.read()
+    finally:
+        field_file.close()
+
+    params = f"{_widths()}:{_quality()}:{sorted(FORMATS)}"
+    digest = hashlib.sha256(data + params.encode()).hexdigest()[:24]
+    folder = f"{_setting('MENU_IMAGE_DERIVATIVE_DIR', 'derivatives').strip('/')}/{digest[:2]}"
+
+    source = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    if source.mode not in ("RGB", "RGBA"):
+        source = source.convert("RGBA" if "A" in source.getbands() or source.mode == "P" else "RGB")
+    width, height = source.size
+
+    variants: Dict[str, Dict[str, str]] = {fmt: {} for fmt in FORMATS}
+    for target in _target_widths(width):
+        resized = source if target == width else source.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS
+        )
+        for fmt, (_pil, ext, _type) in FORMATS.items():
+            name = f"{folder}/{digest}-{target}.{ext}"
+            if not storage.exists(name):
+                stored = storage.save(name, ContentFile(_encode(resized, fmt)))
+                if stored != name:
+                    # Lost a race with another worker rendering the same content
+                    storage.delete(stored)
+            variants[fmt][str(target)] = name
+
+    return {
+        "source": field_file.name,
+        "hash": digest,
+        "width": width,
+        "height": height,
+        "variants": variants,
+    }
+
+
+def refresh(instance, force: bool = False) -> bool:
+    """
+    Bring ``instance.image_variants`` up to date with its image. Written with
+    ``update()`` so no save signals fire. Returns True when it changed.
+    """
+    if not force and not needs_refresh(instance):
+        return False
+    manifest = generate(instance.image) if instance.image else {}
+    type(instance).objects.filter(pk=instance.pk).update(image_variants=manifest)
+    instance.image_variants = manifest
+    return True
+
+
+def _refresh_by_label(label: str, pk: int) -> None:
+    from django.apps import apps
+    model = apps.get_model(label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is not None:
+        refresh(instance)
+
+
+def schedule(instance) -> None:
+    """Render derivatives after the current transaction commits, via Celery when available."""
+    label, pk = instance._meta.label, instance.pk
+
+    def _run():
+        try:
+            from menu.tasks import generate_image_variants_task
+            generate_image_variants_task.delay(label, pk)
+            return
+        except Exception as e:
+            # No Celery, or the broker is unreachable: render in-process
+            logger.debug(f"Celery unavailable for image derivatives ({e}), rendering inline")
+        try:
+            _refresh_by_label(label, pk)
+        except Exception:
+            logger.exception(f"Image derivatives failed for {label} {pk}")
+
+    transaction.on_commit(_run)
+
+
+# ----------------------------------------------------------------------
+# URLs
+# ----------------------------------------------------------------------
+def _manifest(field_file) -> Dict:
+    instance = getattr(field_file, "instance", None)
+    manifest = getattr(instance, "image_variants", None) or {}
+    if not field_file or manifest.get("source") != field_file.name:
+        return {}
+    return manifest
+
+
+def _identity(url: str) -> str:
+    return url
+
+
+def srcset(field_file, fmt: str = FALLBACK_FORMAT, build_url=_identity) -> str:
+    """``srcset`` attribute value for ``fmt``, or "" without derivatives."""
+    manifest = _manifest(field_file)
+    variants = (manifest.get("variants") or {}).get(fmt) or {}
+    storage = field_file.storage
+    return ", ".join(
+        f"{build_url(storage.url(name))} {width}w"
+        for width, name in sorted(variants.items(), key=lambda pair: int(pair[0]))
+    )
+
+
+def url_for_width(field_file, width: int, fmt: str = FALLBACK_FORMAT) -> str:
+    """Smallest derivative at least ``width`` wide (or the largest); the original without derivatives."""
+    if not field_file:
+        return ""
+    variants = (_manifest(field_file).get("variants") or {}).get(fmt) or {}
+    if not variants:
+        return field_file.url
+    widths = sorted(int(w) for w in variants)
+    chosen = next((w for w in widths if w >= width), widths[-1])
+    return field_file.storage.url(variants[str(chosen)])
+
+
+def image_payload(field_file, build_url=_identity) -> Optional[Dict]:
+    """
+    API representation: ``src`` (largest JPEG, or the original), intrinsic
+    ``width``/``height`` and a ``srcset`` per format. ``build_url`` maps each
+    URL, e.g. ``request.build_absolute_uri``.
+    """
+    if not field_file:
+        return None
+    manifest = _manifest(field_file)
+    if not manifest:
+        return {"src": build_url(field_file.url), "width": None, "height": None, "srcset": {}}
+    return {
+        "src": build_url(url_for_width(field_file, manifest["width"])),
+        "width": manifest.get("width"),
+        "height": manifest.get("height"),
+        "srcset": {fmt: srcset(field_file, fmt, build_url) for fmt in FORMATS},
+    }
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from menu.images import needs_refresh, refresh
+from menu.models import MenuCategory, MenuItem
+
+MODELS = {'item': MenuItem, 'category': MenuCategory}
+
+
+class Command(BaseCommand):
+    help = 'Render responsive WebP/JPEG derivatives of menu item and category images (menu.images)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=['item', 'category', 'all'],
+            default='all',
+            help='Which images to process'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render images whose derivatives are already up to date'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Rows loaded per query'
+        )
+
+    def handle(self, *args, **options):
+        models = MODELS.values() if options['model'] == 'all' else [MODELS[options['model']]]
+        for model in models:
+            rendered = skipped = failed = 0
+            rows = (
+                model.objects.exclude(image='').exclude(image__isnull=True)
+                .only('pk', 'image', 'image_variants').order_by('pk')
+            )
+            for instance in rows.iterator(chunk_size=max(1, options['batch_size'])):
+                if not options['force'] and not needs_refresh(instance):
+                    skipped += 1
+                    continue
+                try:
+                    refresh(instance, force=True)
+                    rendered += 1
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'{model.__name__} {instance.pk}: {e}'))
+            self.stdout.write(self.style.SUCCESS(
+                f'{model.__name__}: {rendered} rendered, {skipped} up to date, {failed} failed'
+            ))
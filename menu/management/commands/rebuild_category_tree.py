@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from menu.tree import rebuild, refresh_aggregates
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute category materialized paths and levels, and the cached '
+        'item_count/min_price/max_price aggregates (menu.tree)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--aggregates-only',
+            action='store_true',
+            help='Only recompute the aggregates (e.g. after a bulk queryset update)'
+        )
+
+    def handle(self, *args, **options):
+        if not options['aggregates_only']:
+            changed = rebuild()
+            self.stdout.write(f'Rewrote paths of {changed} categories')
+        refreshed = refresh_aggregates()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed aggregates of {refreshed} categories'))
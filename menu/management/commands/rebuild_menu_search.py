@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from menu.search import rebuild_index, search_menu
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the menu full-text search index (menu.search)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization',
+            type=int,
+            help='Only re-index items of this organization id'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of items upserted per batch'
+        )
+        parser.add_argument(
+            '--query',
+            help='Run a sample search after rebuilding and print the ranked ids'
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_index(
+            organization_id=options.get('organization'),
+            batch_size=max(1, options['batch_size']),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Indexed {written} menu items'))
+
+        if options.get('query'):
+            result = search_menu(
+                options['query'],
+                organization_id=options.get('organization'),
+                available_only=False,
+                use_cache=False,
+            )
+            self.stdout.write(f'{result.total} matches: {result.ids[:20]}')
+            if result.corrected_query:
+                self.stdout.write(f'Corrected query: {result.corrected_query}')
+            self.stdout.write(f'Facets: {result.facets}')
@@ -4,7 +4,6 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.utils.html import strip_tags
-from django.utils import timezone
 from decimal import Decimal, ROUND_HALF_UP
 from typing import List, Optional
 
@@ -252,30 +251,8 @@ class MenuItemModifierGroup(models.Model):
 
     def is_available_now(self) -> bool:
         """Check if this modifier group is currently available for the item."""
-        if not self.is_visible:
-            return False
-        
-        # Check base modifier group availability
-        if not self.modifier_group.is_active:
-            return False
-        
-        # Check override availability times
-        if self.available_from and self.available_until:
-            now = timezone.now().time()
-            if not (self.available_from <= now <= self.available_until):
-                return False
-        
-        # Check override available days
-        if self.available_days:
-            current_day = timezone.now().weekday()
-            if current_day not in self.available_days:
-                return False
-        
-        # If no overrides, check group availability
-        if not (self.available_from or self.available_until or self.available_days):
-            return self.modifier_group.is_available_now()
-        
-        return True
+        from .availability import item_modifier_group_schedule, local_now
+        return item_modifier_group_schedule(self).is_open_at(local_now())
 
     def get_available_modifiers(self):
         """Get available modifiers with price adjustments applied."""
@@ -343,11 +320,9 @@ class MenuItemModifierGroup(models.Model):
         return total.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
     def increment_usage_count(self):
-        """Increment usage count and update last used time."""
-        MenuItemModifierGroup.objects.filter(pk=self.pk).update(
-            usage_count=models.F('usage_count') + 1,
-            last_used=timezone.now()
-        )
+        """Increment usage count and last used time (buffered, see menu.counters)."""
+        from .counters import incr
+        incr("item_modifier_group.usage", self.pk)
 
     def get_display_config(self) -> dict:
         """Get comprehensive display configuration for frontend."""
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from django.db import models
+from decimal import Decimal
+
+
+class MenuItemSearchDocument(models.Model):
+    """
+    Denormalized search row for a menu item, maintained by ``menu.search``.
+
+    Text columns are pre-normalized (lower-cased, tags flattened) so the
+    database full-text index can rank them by weight: name > tags > description.
+    Facet columns mirror the item so results and facet counts come from a
+    single query against this table. On PostgreSQL the weighted ``search_vector``
+    column and trigram index are added by migration; on SQLite a companion
+    FTS5 table (``menu_search_fts``) keyed by ``menu_item_id`` is kept in sync.
+    """
+    PRICE_BAND_CHOICES = [
+        ('under_10', 'Under 10'),
+        ('10_20', '10 - 20'),
+        ('20_35', '20 - 35'),
+        ('35_plus', '35 and up'),
+    ]
+
+    menu_item = models.OneToOneField(
+        'menu.MenuItem',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        help_text="Menu item this document indexes"
+    )
+    organization = models.ForeignKey(
+        'core.Organization',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    category = models.ForeignKey(
+        'menu.MenuCategory',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+
+    # Weighted text fields (normalized)
+    name_text = models.CharField(max_length=200, help_text="Normalized item name (weight A)")
+    tags_text = models.TextField(blank=True, help_text="Dietary tags, allergens and category (weight B)")
+    body_text = models.TextField(blank=True, help_text="Short and long description (weight C)")
+
+    # Facets / filters
+    price = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    price_band = models.CharField(max_length=16, choices=PRICE_BAND_CHOICES, db_index=True)
+    is_available = models.BooleanField(default=True)
+    category_active = models.BooleanField(default=True)
+    is_vegetarian = models.BooleanField(default=False)
+    is_vegan = models.BooleanField(default=False)
+    is_gluten_free = models.BooleanField(default=False)
+    is_dairy_free = models.BooleanField(default=False)
+    is_nut_free = models.BooleanField(default=False)
+    is_spicy = models.BooleanField(default=False)
+    sort_order = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'menu_search_document'
+        verbose_name = "Menu Search Document"
+        verbose_name_plural = "Menu Search Documents"
+        indexes = [
+            models.Index(fields=['organization', 'is_available', 'category_active'], name='menu_search_org_avail_idx'),
+            models.Index(fields=['category'], name='menu_search_category_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Search document for item {self.menu_item_id}"
@@ -0,0 +1,106 @@
+# Generated by Django 5.1.2 on 2025-09-20 10:12
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE menu_search_document ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name_text, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(tags_text, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(body_text, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX menu_search_vector_gin ON menu_search_document USING GIN (search_vector)",
+    "CREATE INDEX menu_search_name_trgm ON menu_search_document USING GIN (name_text gin_trgm_ops)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS menu_search_name_trgm",
+    "DROP INDEX IF EXISTS menu_search_vector_gin",
+    "ALTER TABLE menu_search_document DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS menu_search_fts USING fts5(
+        name, tags, body,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3 4'
+    )
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS menu_search_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def add_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        try:
+            _run(schema_editor, SQLITE_FORWARD)
+        except Exception:
+            # SQLite built without FTS5: menu.search falls back to LIKE scoring
+            pass
+
+
+def remove_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('menu', '0002_alter_menuitem_gallery_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuItemSearchDocument',
+            fields=[
+                ('menu_item', models.OneToOneField(help_text='Menu item this document indexes', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='menu.menuitem')),
+                ('name_text', models.CharField(help_text='Normalized item name (weight A)', max_length=200)),
+                ('tags_text', models.TextField(blank=True, help_text='Dietary tags, allergens and category (weight B)')),
+                ('body_text', models.TextField(blank=True, help_text='Short and long description (weight C)')),
+                ('price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('price_band', models.CharField(choices=[('under_10', 'Under 10'), ('10_20', '10 - 20'), ('20_35', '20 - 35'), ('35_plus', '35 and up')], db_index=True, max_length=16)),
+                ('is_available', models.BooleanField(default=True)),
+                ('category_active', models.BooleanField(default=True)),
+                ('is_vegetarian', models.BooleanField(default=False)),
+                ('is_vegan', models.BooleanField(default=False)),
+                ('is_gluten_free', models.BooleanField(default=False)),
+                ('is_dairy_free', models.BooleanField(default=False)),
+                ('is_nut_free', models.BooleanField(default=False)),
+                ('is_spicy', models.BooleanField(default=False)),
+                ('sort_order', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='menu.menucategory')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.organization')),
+            ],
+            options={
+                'verbose_name': 'Menu Search Document',
+                'verbose_name_plural': 'Menu Search Documents',
+                'db_table': 'menu_search_document',
+                'indexes': [models.Index(fields=['organization', 'is_available', 'category_active'], name='menu_search_org_avail_idx'), models.Index(fields=['category'], name='menu_search_category_idx')],
+            },
+        ),
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
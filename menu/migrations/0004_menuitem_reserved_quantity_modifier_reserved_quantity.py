@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2025-09-24 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0003_menuitemsearchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='reserved_quantity',
+            field=models.PositiveIntegerField(default=0, help_text='Units held by active carts (database reservation fallback)'),
+        ),
+        migrations.AddField(
+            model_name='modifier',
+            name='reserved_quantity',
+            field=models.PositiveIntegerField(default=0, help_text='Units held by active carts (database reservation fallback)'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2025-09-25 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0004_menuitem_reserved_quantity_modifier_reserved_quantity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='modifier',
+            name='daily_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of times ordered on daily_count_date'),
+        ),
+        migrations.AddField(
+            model_name='modifier',
+            name='daily_count_date',
+            field=models.DateField(blank=True, help_text='Day daily_count belongs to; counts from earlier days read as 0', null=True),
+        ),
+    ]
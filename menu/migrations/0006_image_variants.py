@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0005_modifier_daily_count_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menucategory',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized WebP/JPEG derivatives of image (see menu.images)'),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized WebP/JPEG derivatives of image (see menu.images)'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:05
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_paths_and_aggregates(apps, schema_editor):
+    MenuCategory = apps.get_model('menu', 'MenuCategory')
+    MenuItem = apps.get_model('menu', 'MenuItem')
+    db = schema_editor.connection.alias
+
+    rows = dict(MenuCategory.objects.using(db).values_list('pk', 'parent_id'))
+    paths = {}
+
+    def resolve(pk, seen=()):
+        if pk not in paths:
+            parent_id = rows[pk]
+            prefix = resolve(parent_id, seen + (pk,)) if parent_id in rows and parent_id not in seen else ''
+            paths[pk] = f'{prefix}{pk:010d}/'
+        return paths[pk]
+
+    categories = [
+        MenuCategory(pk=pk, path=resolve(pk), level=len(resolve(pk)) // 11 - 1)
+        for pk in rows
+    ]
+    MenuCategory.objects.using(db).bulk_update(categories, ['path', 'level'], batch_size=500)
+
+    items = MenuItem.objects.using(db).filter(
+        category=OuterRef('pk'), is_available=True
+    ).order_by().values('category')
+    MenuCategory.objects.using(db).update(
+        item_count=Coalesce(Subquery(items.annotate(n=Count('pk')).values('n')), 0),
+        min_price=Subquery(items.annotate(p=Min('price')).values('p')),
+        max_price=Subquery(items.annotate(p=Max('price')).values('p')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0006_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menucategory',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Materialized path of ancestor IDs (maintained by menu.tree)', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='menucategory',
+            index=models.Index(fields=['path'], name='menu_category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(backfill_paths_and_aggregates, migrations.RunPython.noop),
+    ]
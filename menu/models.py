@@ -15,6 +15,7 @@ from typing import Dict, List, Optional, Any
 
 # Import the MenuItemModifierGroup model
 from .menu_item_modifier_group import MenuItemModifierGroup
+from .menu_search_document import MenuItemSearchDocument
 
 
 class MenuCategory(models.Model):
@@ -68,6 +69,13 @@ class MenuCategory(models.Model):
         validators=[MaxValueValidator(5)],
         help_text="Hierarchy level (0-5, calculated automatically)"
     )
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Materialized path of ancestor IDs (maintained by menu.tree)"
+    )
     
     # Media and presentation
     image = models.ImageField(
@@ -76,6 +84,11 @@ class MenuCategory(models.Model):
         blank=True,
         help_text="Category image (optimized automatically)"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Resized WebP/JPEG derivatives of image (see menu.images)"
+    )
     icon = models.CharField(
         max_length=50,
         blank=True,
@@ -152,6 +165,7 @@ class MenuCategory(models.Model):
             models.Index(fields=['-created_at']),
             models.Index(fields=['uuid']),
             models.Index(fields=['slug']),
+            models.Index(fields=['path'], name='menu_category_path_idx', opclasses=['varchar_pattern_ops']),
         ]
         constraints = [
             models.CheckConstraint(
@@ -181,26 +195,22 @@ class MenuCategory(models.Model):
         if self.description:
             self.description = strip_tags(self.description).strip()
         
-        # Validate hierarchy
+        # Validate hierarchy from the materialized paths (no walk up the parents)
+        from . import tree
         if self.parent:
             if self.parent == self:
                 raise ValidationError({'parent': 'A category cannot be its own parent.'})
             
-            # Check for circular reference and calculate level
-            current = self.parent
-            level = 1
-            while current:
-                if current == self:
-                    raise ValidationError({'parent': 'Circular reference detected in category hierarchy.'})
-                current = current.parent
-                level += 1
-                if level > 5:
-                    raise ValidationError({'parent': 'Category hierarchy cannot exceed 5 levels.'})
+            if self.path and self.parent.path.startswith(self.path):
+                raise ValidationError({'parent': 'Circular reference detected in category hierarchy.'})
             
-            self.level = level
+            self.level = self.parent.level + 1
         else:
             self.level = 0
         
+        if self.level + tree.subtree_height(self) > 5:
+            raise ValidationError({'parent': 'Category hierarchy cannot exceed 5 levels.'})
+        
         # Validate availability times
         if self.available_from and self.available_until:
             if self.available_from >= self.available_until:
@@ -224,33 +234,15 @@ class MenuCategory(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
         
-        # Update cached fields for parent categories
-        self._update_parent_cache()
-
-    def _update_parent_cache(self):
-        """Update cached fields for parent categories."""
-        if self.parent:
-            self.parent.refresh_cached_fields()
+        # Maintain the materialized path (and the subtree's, when moved)
+        from . import tree
+        tree.sync_path(self)
 
     def refresh_cached_fields(self):
-        """Refresh cached fields like item_count and price range."""
-        active_items = self.get_active_items()
-        self.item_count = active_items.count()
-        
-        if self.item_count > 0:
-            prices = active_items.values_list('price', flat=True)
-            self.min_price = min(prices)
-            self.max_price = max(prices)
-        else:
-            self.min_price = None
-            self.max_price = None
-        
-        # Save without triggering signals to avoid recursion
-        MenuCategory.objects.filter(pk=self.pk).update(
-            item_count=self.item_count,
-            min_price=self.min_price,
-            max_price=self.max_price
-        )
+        """Refresh cached fields like item_count and price range now."""
+        from . import tree
+        tree.refresh_aggregates([self.pk])
+        self.refresh_from_db(fields=['item_count', 'min_price', 'max_price'])
 
     def __str__(self) -> str:
         if self.parent:
@@ -263,13 +255,15 @@ class MenuCategory(models.Model):
         return reverse('storefront:category_detail', kwargs={'slug': self.slug})
 
     def get_full_path(self) -> str:
-        """Get the full category path."""
-        path = [self.name]
-        current = self.parent
-        while current:
-            path.insert(0, current.name)
-            current = current.parent
-        return " > ".join(path)
+        """Get the full category path (one query for all ancestors)."""
+        if not self.parent_id:
+            return self.name
+        return " > ".join([*self.get_ancestors().values_list('name', flat=True), self.name])
+
+    def get_ancestors(self):
+        """Get ancestor categories, root first, in one query."""
+        from . import tree
+        return tree.ancestors(self)
 
     def get_active_items(self):
         """Get all active menu items in this category."""
@@ -280,15 +274,9 @@ class MenuCategory(models.Model):
         return self.get_active_items().filter(is_featured=True)[:limit]
 
     def is_available_now(self) -> bool:
-        """Check if category is available at current time."""
-        if not self.is_active:
-            return False
-        
-        if not (self.available_from and self.available_until):
-            return True
-        
-        now = timezone.now().time()
-        return self.available_from <= now <= self.available_until
+        """Check if category is available at current local time."""
+        from .availability import category_schedule, local_now
+        return category_schedule(self).is_open_at(local_now())
 
     def get_subcategories(self, active_only: bool = True):
         """Get subcategories, optionally filtered by active status."""
@@ -298,12 +286,9 @@ class MenuCategory(models.Model):
         return qs.order_by('sort_order', 'name')
 
     def get_all_descendants(self):
-        """Get all descendant categories recursively."""
-        descendants = []
-        for child in self.subcategories.all():
-            descendants.append(child)
-            descendants.extend(child.get_all_descendants())
-        return descendants
+        """Get all descendant categories (one indexed query on the path)."""
+        from . import tree
+        return list(tree.descendants(self).order_by('path'))
 
     @classmethod
     def get_root_categories(cls, active_only: bool = True):
@@ -396,6 +381,11 @@ class MenuItem(models.Model):
         blank=True,
         help_text="Primary item image (optimized automatically)"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Resized WebP/JPEG derivatives of image (see menu.images)"
+    )
     gallery_images = models.JSONField(
         default=list,
         blank=True,
@@ -506,6 +496,10 @@ class MenuItem(models.Model):
         default=0,
         help_text="Current stock quantity (if tracking inventory)"
     )
+    reserved_quantity = models.PositiveIntegerField(
+        default=0,
+        help_text="Units held by active carts (database reservation fallback)"
+    )
     low_stock_threshold = models.PositiveIntegerField(
         default=5,
         help_text="Alert threshold for low stock"
@@ -683,9 +677,17 @@ class MenuItem(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
         
-        # Update category cache
-        if self.category:
-            self.category.refresh_cached_fields()
+        # Category aggregates are refreshed in bulk on commit (menu.tree)
+        from . import tree
+        tree.mark_dirty(self.category_id, getattr(self, '_loaded_category_id', None))
+        self._loaded_category_id = self.category_id
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a move also refreshes the old category's aggregates
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        return instance
 
     @property
     def dietary_tags(self):
@@ -767,27 +769,13 @@ class MenuItem(models.Model):
         return total.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
     def is_available_now(self) -> bool:
-        """Check if item is currently available."""
-        if not self.is_available or not self.category.is_available_now():
-            return False
-        
-        # Check inventory
-        if self.track_inventory and self.stock_quantity <= 0:
-            return False
-        
-        # Check time availability
-        if self.available_from and self.available_until:
-            now = timezone.now().time()
-            if not (self.available_from <= now <= self.available_until):
-                return False
-        
-        # Check day availability
-        if self.available_days:
-            current_day = timezone.now().weekday()  # 0=Monday, 6=Sunday
-            if current_day not in self.available_days:
-                return False
-        
-        return True
+        """
+        Check if item is currently available (flags, stock, time window,
+        weekdays and parent category). For whole-menu checks use
+        menu.availability.available_now(), which avoids per-item queries.
+        """
+        from .availability import item_schedule, local_now
+        return item_schedule(self).is_open_at(local_now())
 
     def is_low_stock(self) -> bool:
         """Check if item is low on stock."""
@@ -796,16 +784,14 @@ class MenuItem(models.Model):
         return self.stock_quantity <= self.low_stock_threshold
 
     def increment_view_count(self):
-        """Increment view count (use F() to avoid race conditions)."""
-        MenuItem.objects.filter(pk=self.pk).update(
-            view_count=models.F('view_count') + 1
-        )
+        """Increment view count (buffered, see menu.counters)."""
+        from .counters import incr
+        incr("menu_item.views", self.pk)
 
     def increment_order_count(self):
-        """Increment order count (use F() to avoid race conditions)."""
-        MenuItem.objects.filter(pk=self.pk).update(
-            order_count=models.F('order_count') + 1
-        )
+        """Increment order count (buffered, see menu.counters)."""
+        from .counters import incr
+        incr("menu_item.orders", self.pk)
 
     def update_rating(self, new_rating: Decimal):
         """Update average rating with new rating."""
@@ -830,15 +816,31 @@ class MenuItem(models.Model):
 
     @classmethod
     def get_popular_items(cls, limit: int = 6):
-        """Get popular menu items based on order count."""
-        return cls.objects.filter(
+        """
+        Get popular menu items based on order count, including increments
+        not yet flushed by menu.counters.
+        """
+        from .counters import pending
+
+        qs = cls.objects.filter(
             is_available=True,
             category__is_active=True
-        ).select_related('category').order_by('-order_count', '-rating_average')[:limit]
+        ).select_related('category')
+        items = list(qs.order_by('-order_count', '-rating_average')[:limit])
+        extra = pending("menu_item.orders")
+        missing = set(extra) - {item.pk for item in items}
+        if missing:
+            items += list(qs.filter(pk__in=missing))
+        for item in items:
+            item.order_count += extra.get(item.pk, 0)
+        items.sort(key=lambda item: (-item.order_count, -item.rating_average))
+        return items[:limit]
 
     @classmethod
     def search_items(cls, query: str, category=None):
-        """Search menu items by name and description."""
+        """Search menu items through the full-text index, best matches first."""
+        from .search import search_menu, ranked_queryset
+
         qs = cls.objects.filter(
             is_available=True,
             category__is_active=True
@@ -847,14 +849,12 @@ class MenuItem(models.Model):
         if category:
             qs = qs.filter(category=category)
         
-        if query:
-            qs = qs.filter(
-                models.Q(name__icontains=query) |
-                models.Q(description__icontains=query) |
-                models.Q(short_description__icontains=query)
-            )
+        if not query:
+            return qs.order_by('sort_order', 'name')
         
-        return qs.order_by('sort_order', 'name')
+        filters = {'category_id': getattr(category, 'pk', category)} if category else None
+        result = search_menu(query, filters=filters)
+        return ranked_queryset(qs, result.ids)
 
 
 class ModifierGroup(models.Model):
@@ -1055,6 +1055,10 @@ class ModifierGroup(models.Model):
     def __str__(self):
         return f"{self.menu_item.name} - {self.name}"
 
+    def is_available_now(self) -> bool:
+        """Modifier groups have no schedule of their own; availability is the active flag."""
+        return self.is_active
+
     def get_available_modifiers(self):
         """Get all available modifiers in this group."""
         return self.modifiers.filter(is_available=True).order_by('sort_order', 'name')
@@ -1292,7 +1296,16 @@ class Modifier(models.Model):
     )
     daily_count = models.PositiveIntegerField(
         default=0,
-        help_text="Number of times ordered today"
+        help_text="Number of times ordered on daily_count_date"
+    )
+    daily_count_date = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Day daily_count belongs to; counts from earlier days read as 0"
+    )
+    reserved_quantity = models.PositiveIntegerField(
+        default=0,
+        help_text="Units held by active carts (database reservation fallback)"
     )
     
     # Nutritional impact
@@ -1420,7 +1433,7 @@ class Modifier(models.Model):
                     })
         
         # Validate daily limit vs daily count
-        if self.daily_limit and self.daily_count > self.daily_limit:
+        if self.daily_limit and self.current_daily_count > self.daily_limit:
             raise ValidationError({
                 'daily_count': 'Daily count cannot exceed daily limit.'
             })
@@ -1492,59 +1505,56 @@ class Modifier(models.Model):
         """Check if this modifier reduces cost."""
         return self.price < 0
 
-    def is_available_now(self) -> bool:
-        """Check if modifier is currently available."""
-        if not self.is_available:
-            return False
-        
-        # Check inventory
-        if self.track_inventory and self.stock_quantity <= 0:
-            return False
-        
-        # Check daily limit
-        if self.daily_limit and self.daily_count >= self.daily_limit:
-            return False
-        
-        # Check time availability
-        if self.available_from and self.available_until:
-            now = timezone.now().time()
-            if not (self.available_from <= now <= self.available_until):
-                return False
-        
-        # Check day availability
-        if self.available_days:
-            current_day = timezone.now().weekday()  # 0=Monday, 6=Sunday
-            if current_day not in self.available_days:
-                return False
-        
-        return True
+    def is_available_now(self, pending: Optional[int] = None) -> bool:
+        """Check if modifier is currently available (stock, daily limit, time window, weekdays)."""
+        from .availability import modifier_schedule, local_now
+        return modifier_schedule(self, pending).is_open_at(local_now())
 
-    def is_at_daily_limit(self) -> bool:
+    def is_at_daily_limit(self, pending: Optional[int] = None) -> bool:
         """Check if modifier has reached its daily limit."""
         if not self.daily_limit:
             return False
-        return self.daily_count >= self.daily_limit
+        return self.daily_count_today(pending) >= self.daily_limit
+
+    @property
+    def current_daily_count(self) -> int:
+        """Today's count including buffered increments (see ``daily_count_today``)."""
+        return self.daily_count_today()
+
+    def daily_count_today(self, pending: Optional[int] = None) -> int:
+        """
+        Today's count, including increments still buffered by
+        ``increment_daily_count``; a count stored for an earlier day reads as 0.
+        Callers handling many modifiers pass ``pending`` from one
+        ``menu.counters.pending_daily(ids)`` call instead of a lookup each.
+        """
+        from .counters import bucket_date, pending_daily
+        stored = self.daily_count if self.daily_count_date == bucket_date() else 0
+        if pending is None:
+            if not self.daily_limit or not self.pk:
+                return stored  # nothing to enforce, skip the buffer lookup
+            pending = pending_daily([self.pk]).get(self.pk, 0)
+        return stored + pending
 
     def increment_order_count(self):
-        """Increment order count and update last ordered time."""
-        from django.utils import timezone
-        Modifier.objects.filter(pk=self.pk).update(
-            order_count=models.F('order_count') + 1,
-            last_ordered=timezone.now()
-        )
+        """Increment order count and last ordered time (buffered, see menu.counters)."""
+        from .counters import incr
+        incr("modifier.orders", self.pk)
 
     def increment_daily_count(self):
-        """Increment daily count (use F() to avoid race conditions)."""
-        Modifier.objects.filter(pk=self.pk).update(
-            daily_count=models.F('daily_count') + 1
-        )
+        """Increment today's count (buffered, see menu.counters)."""
+        from .counters import incr_daily
+        incr_daily(self.pk)
 
     def reset_daily_count(self):
-        """Reset daily count (typically called by a daily task)."""
-        Modifier.objects.filter(pk=self.pk).update(daily_count=0)
+        """Reset today's count for this modifier."""
+        from .counters import bucket_date
+        Modifier.objects.filter(pk=self.pk).update(daily_count=0, daily_count_date=bucket_date())
 
     def get_display_info(self) -> dict:
         """Get comprehensive display information for frontend."""
+        from .counters import pending_daily
+        pending = pending_daily([self.pk]).get(self.pk, 0) if self.daily_limit else 0
         return {
             'id': self.id,
             'name': self.name,
@@ -1556,22 +1566,31 @@ class Modifier(models.Model):
             'modifier_type': self.modifier_type,
             'is_default': self.is_default,
             'is_popular': self.is_popular,
-            'is_available': self.is_available_now(),
+            'is_available': self.is_available_now(pending),
             'calorie_adjustment': self.calorie_adjustment,
             'icon': self.icon,
             'color_code': self.color_code,
-            'at_daily_limit': self.is_at_daily_limit(),
+            'at_daily_limit': self.is_at_daily_limit(pending),
         }
 
     @classmethod
     def get_popular_modifiers(cls, limit: int = 10):
-        """Get most popular modifiers across all groups."""
-        return cls.objects.filter(
+        """
+        Get most popular modifiers across all groups, including increments
+        not yet flushed by menu.counters.
+        """
+        from .counters import pending
+
+        qs = cls.objects.filter(
             is_available=True,
             modifier_group__is_active=True
-        ).order_by('-order_count', '-is_popular')[:limit]
-
-    @classmethod
-    def reset_all_daily_counts(cls):
-        """Reset daily counts for all modifiers (daily maintenance task)."""
-        return cls.objects.update(daily_count=0)
+        )
+        modifiers = list(qs.order_by('-order_count', '-is_popular')[:limit])
+        extra = pending("modifier.orders")
+        missing = set(extra) - {modifier.pk for modifier in modifiers}
+        if missing:
+            modifiers += list(qs.filter(pk__in=missing))
+        for modifier in modifiers:
+            modifier.order_count += extra.get(modifier.pk, 0)
+        modifiers.sort(key=lambda modifier: (-modifier.order_count, not modifier.is_popular))
+        return modifiers[:limit]
@@ -0,0 +1,92 @@
+# menu/read_models.py
+"""
+Read-model querysets for menu list endpoints.
+
+The serializers in ``menu.serializers`` read the annotations and prefetches
+declared here (and only fall back to per-object queries when handed a plain
+instance), so list endpoints run a fixed number of queries regardless of
+page size. Other apps nest menu items through ``menu_item_prefetches(prefix)``.
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+from django.db.models import Count, Prefetch, Q
+
+from .models import MenuCategory, MenuItem, ModifierGroup, Modifier
+
+
+def annotate_categories(queryset):
+    """Add ``available_items_count`` (read by MenuCategorySerializer)."""
+    return queryset.annotate(
+        available_items_count=Count(
+            'menu_items',
+            filter=Q(menu_items__is_available=True),
+            distinct=True,
+        )
+    )
+
+
+def modifier_groups_prefetch(lookup: str = 'direct_modifier_groups') -> Prefetch:
+    """Modifier groups with their modifiers (read by ModifierGroupSerializer)."""
+    return Prefetch(
+        lookup,
+        queryset=ModifierGroup.objects.order_by('sort_order', 'name').prefetch_related(
+            Prefetch('modifiers', queryset=Modifier.objects.order_by('sort_order', 'name'))
+        ),
+    )
+
+
+def menu_item_prefetches(prefix: str = '') -> List[Prefetch]:
+    """
+    Prefetches needed by MenuItemSerializer: the annotated category and the
+    item's modifier groups/modifiers. ``prefix`` nests them under another
+    relation, e.g. ``'items__menu_item__'``.
+    """
+    return [
+        Prefetch(f'{prefix}category', queryset=annotate_categories(MenuCategory.objects.all())),
+        modifier_groups_prefetch(f'{prefix}direct_modifier_groups'),
+    ]
+
+
+def menu_item_list_queryset(queryset=None):
+    """Queryset for MenuItemListSerializer (category name only)."""
+    if queryset is None:
+        queryset = MenuItem.objects.all()
+    return queryset.select_related('category')
+
+
+def menu_item_detail_queryset(queryset=None):
+    """Queryset for MenuItemSerializer / MenuItemDetailSerializer."""
+    if queryset is None:
+        queryset = MenuItem.objects.all()
+    return queryset.prefetch_related(*menu_item_prefetches())
+
+
+def category_list_queryset(queryset=None):
+    """Queryset for MenuCategorySerializer."""
+    if queryset is None:
+        queryset = MenuCategory.objects.all()
+    return annotate_categories(queryset)
+
+
+def category_with_items_queryset(queryset=None, items_queryset=None):
+    """
+    Queryset for MenuCategoryWithItemsSerializer. Prefetched items get their
+    ``category`` set from the parent, so ``category_name`` costs no query.
+    """
+    if items_queryset is None:
+        items_queryset = MenuItem.objects.filter(is_available=True)
+    return category_list_queryset(queryset).prefetch_related(
+        Prefetch('menu_items', queryset=items_queryset.order_by('sort_order', 'name'))
+    )
+
+
+def modifier_group_list_queryset(queryset=None):
+    """Queryset for ModifierGroupSerializer (modifiers prefetched)."""
+    if queryset is None:
+        queryset = ModifierGroup.objects.all()
+    return queryset.prefetch_related(
+        Prefetch('modifiers', queryset=Modifier.objects.order_by('sort_order', 'name'))
+    )
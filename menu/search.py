@@ -0,0 +1,513 @@
+# menu/search.py
+"""
+Indexed full-text search over menu items.
+
+Items are denormalized into ``MenuItemSearchDocument`` rows (see
+``menu/menu_search_document.py``) which are refreshed incrementally from
+``menu.signals`` and in bulk by ``manage.py rebuild_menu_search``.
+
+Backends, chosen from the active database connection:
+
+- PostgreSQL: weighted ``tsvector`` (name A, tags B, description C) with
+  prefix ``to_tsquery`` terms ranked by ``ts_rank_cd``, plus ``pg_trgm``
+  word similarity on the name for typo tolerance.
+- SQLite: FTS5 companion table ranked by column-weighted ``bm25``; when a
+  query has no hits each term is corrected against the indexed vocabulary
+  and the query is retried.
+- Anything else (or SQLite without FTS5): weighted ``LIKE`` scoring over the
+  normalized document columns.
+
+A search returns ranked item ids together with facet counts (dietary flags,
+price bands, categories) computed from the same result rows, so one SQL round
+trip serves both. Results are cached under a generation counter that every
+index update bumps.
+"""
+
+from __future__ import annotations
+
+import difflib
+import hashlib
+import json
+import logging
+import re
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from core.cache_config import CACHE_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+DOC_TABLE = "menu_search_document"
+FTS_TABLE = "menu_search_fts"
+
+GENERATION_KEY = "menu_search:generation"
+MAX_TERMS = 8
+
+# Column weights for ranking (name, tags, description)
+WEIGHT_NAME = 10.0
+WEIGHT_TAGS = 4.0
+WEIGHT_BODY = 1.0
+
+PRICE_BANDS: Tuple[Tuple[Optional[Decimal], str], ...] = (
+    (Decimal("10"), "under_10"),
+    (Decimal("20"), "10_20"),
+    (Decimal("35"), "20_35"),
+    (None, "35_plus"),
+)
+
+DIETARY_FLAGS = (
+    "is_vegetarian",
+    "is_vegan",
+    "is_gluten_free",
+    "is_dairy_free",
+    "is_nut_free",
+    "is_spicy",
+)
+
+DOCUMENT_FIELDS = (
+    "organization",
+    "category",
+    "name_text",
+    "tags_text",
+    "body_text",
+    "price",
+    "price_band",
+    "is_available",
+    "category_active",
+    *DIETARY_FLAGS,
+    "sort_order",
+    "updated_at",
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_fts_tables: Dict[str, bool] = {}
+
+
+@dataclass
+class SearchResult:
+    """Ranked ids plus facet counts for one search."""
+    ids: List[int] = field(default_factory=list)
+    total: int = 0
+    facets: Dict[str, Any] = field(default_factory=dict)
+    corrected_query: Optional[str] = None
+
+
+# ----------------------------------------------------------------------
+# Text helpers
+# ----------------------------------------------------------------------
+def normalize(text: Any) -> str:
+    """Lower-case and collapse everything but letters/digits to single spaces."""
+    return " ".join(_TOKEN_RE.findall(str(text or "").lower()))
+
+
+def tokenize(query: str) -> List[str]:
+    """Split a user query into unique index terms (at most ``MAX_TERMS``)."""
+    terms: List[str] = []
+    for term in _TOKEN_RE.findall(str(query or "").lower()):
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def price_band(price: Optional[Decimal]) -> str:
+    price = Decimal(str(price or 0))
+    for upper, band in PRICE_BANDS:
+        if upper is None or price < upper:
+            return band
+    return PRICE_BANDS[-1][1]
+
+
+def empty_facets() -> Dict[str, Any]:
+    return {
+        "dietary": {flag: 0 for flag in DIETARY_FLAGS},
+        "price_bands": {band: 0 for _, band in PRICE_BANDS},
+        "categories": [],
+    }
+
+
+# ----------------------------------------------------------------------
+# Indexing
+# ----------------------------------------------------------------------
+def build_document(item):
+    """Build (unsaved) search document for a menu item."""
+    from .models import MenuItemSearchDocument
+
+    category = item.category
+    tags = list(item.dietary_tags)
+    allergens = item.allergens if isinstance(item.allergens, list) else []
+    tags.extend(str(a) for a in allergens)
+    if category is not None:
+        tags.append(category.name)
+
+    return MenuItemSearchDocument(
+        menu_item_id=item.pk,
+        organization_id=item.organization_id,
+        category_id=item.category_id,
+        name_text=normalize(item.name)[:200],
+        tags_text=normalize(" ".join(tags)),
+        body_text=normalize(f"{item.short_description} {item.description}"),
+        price=item.price or Decimal("0.00"),
+        price_band=price_band(item.price),
+        is_available=bool(item.is_available),
+        category_active=bool(category.is_active) if category is not None else False,
+        is_vegetarian=item.is_vegetarian,
+        is_vegan=item.is_vegan,
+        is_gluten_free=item.is_gluten_free,
+        is_dairy_free=item.is_dairy_free,
+        is_nut_free=item.is_nut_free,
+        is_spicy=item.is_spicy,
+        sort_order=item.sort_order,
+    )
+
+
+def index_items(items: Iterable) -> int:
+    """Upsert search documents for the given menu items. Returns rows written."""
+    from django.utils import timezone
+    from .models import MenuItemSearchDocument
+
+    docs = [build_document(item) for item in items if item.pk]
+    if not docs:
+        return 0
+    now = timezone.now()
+    for doc in docs:
+        doc.updated_at = now
+
+    with transaction.atomic():
+        MenuItemSearchDocument.objects.bulk_create(
+            docs,
+            update_conflicts=True,
+            unique_fields=["menu_item"],
+            update_fields=list(DOCUMENT_FIELDS),
+        )
+        if _backend() == "fts5":
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                    [(doc.menu_item_id,) for doc in docs],
+                )
+                cursor.executemany(
+                    f"INSERT INTO {FTS_TABLE}(rowid, name, tags, body) VALUES (%s, %s, %s, %s)",
+                    [(doc.menu_item_id, doc.name_text, doc.tags_text, doc.body_text) for doc in docs],
+                )
+    bump_generation()
+    return len(docs)
+
+
+def index_item(item) -> int:
+    return index_items([item])
+
+
+def remove_items(item_ids: Sequence[int]) -> None:
+    """Drop search documents for deleted items."""
+    from .models import MenuItemSearchDocument
+
+    item_ids = [pk for pk in item_ids if pk]
+    if not item_ids:
+        return
+    with transaction.atomic():
+        MenuItemSearchDocument.objects.filter(menu_item_id__in=item_ids).delete()
+        if _backend() == "fts5":
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                    [(pk,) for pk in item_ids],
+                )
+    bump_generation()
+
+
+def rebuild_index(organization_id: Optional[int] = None, batch_size: int = 500) -> int:
+    """
+    Re-index all menu items (optionally one organization) in batches.
+    Returns the number of documents written.
+    """
+    from .models import MenuItem, MenuItemSearchDocument
+
+    qs = MenuItem.objects.select_related("category").order_by("pk")
+    if organization_id:
+        qs = qs.filter(organization_id=organization_id)
+
+    written = 0
+    batch: List = []
+    for item in qs.iterator(chunk_size=batch_size):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            written += index_items(batch)
+            batch = []
+    if batch:
+        written += index_items(batch)
+
+    # Orphans (documents are cascaded, the FTS table is not)
+    if organization_id is None and _backend() == "fts5":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid NOT IN (SELECT menu_item_id FROM {DOC_TABLE})"
+            )
+    elif organization_id is None:
+        MenuItemSearchDocument.objects.exclude(
+            menu_item_id__in=MenuItem.objects.values("pk")
+        ).delete()
+    return written
+
+
+def bump_generation() -> None:
+    """Invalidate every cached search result."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+    except Exception as e:
+        logger.warning(f"Failed to bump menu search generation: {e}")
+
+
+def _generation() -> int:
+    try:
+        return int(cache.get(GENERATION_KEY) or 0)
+    except Exception:
+        return 0
+
+
+# ----------------------------------------------------------------------
+# Querying
+# ----------------------------------------------------------------------
+def _backend() -> str:
+    vendor = connection.vendor
+    if vendor == "postgresql":
+        return "postgresql"
+    if vendor == "sqlite" and _fts_available():
+        return "fts5"
+    return "like"
+
+
+def _fts_available() -> bool:
+    name = str(connection.settings_dict.get("NAME"))
+    if name not in _fts_tables:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [FTS_TABLE],
+                )
+                _fts_tables[name] = cursor.fetchone() is not None
+        except Exception:
+            _fts_tables[name] = False
+    return _fts_tables[name]
+
+
+def _max_results() -> int:
+    return int(getattr(settings, "MENU_SEARCH_MAX_RESULTS", 500))
+
+
+def _scope_sql(organization_id: Optional[int], available_only: bool) -> Tuple[str, List[Any]]:
+    clauses: List[str] = []
+    params: List[Any] = []
+    if organization_id:
+        clauses.append("d.organization_id = %s")
+        params.append(organization_id)
+    if available_only:
+        clauses.append("d.is_available = %s AND d.category_active = %s")
+        params.extend([True, True])
+    sql = "".join(f" AND {c}" for c in clauses)
+    return sql, params
+
+
+def _select_columns(rank_sql: str) -> str:
+    flags = ", ".join(f"d.{flag}" for flag in DIETARY_FLAGS)
+    return f"d.menu_item_id, d.category_id, c.name, d.price, d.price_band, {flags}, {rank_sql} AS rank"
+
+
+def _fetch_rows(terms: List[str], organization_id: Optional[int], available_only: bool) -> List[tuple]:
+    from .models import MenuCategory
+
+    backend = _backend()
+    scope_sql, scope_params = _scope_sql(organization_id, available_only)
+    category_table = MenuCategory._meta.db_table
+    limit = _max_results()
+
+    if backend == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        phrase = " ".join(terms)
+        sql = (
+            f"SELECT {_select_columns('ts_rank_cd(d.search_vector, q.tsq, 32) + 0.3 * word_similarity(%s, d.name_text)')} "
+            f"FROM {DOC_TABLE} d "
+            f"JOIN {category_table} c ON c.id = d.category_id "
+            f"CROSS JOIN to_tsquery('simple', %s) AS q(tsq) "
+            f"WHERE (d.search_vector @@ q.tsq OR %s <%% d.name_text){scope_sql} "
+            f"ORDER BY rank DESC, d.sort_order, d.name_text LIMIT %s"
+        )
+        params = [phrase, tsquery, phrase, *scope_params, limit]
+    elif backend == "fts5":
+        match = " ".join(f'"{term}"*' for term in terms)
+        sql = (
+            f"SELECT {_select_columns(f'-bm25({FTS_TABLE}, {WEIGHT_NAME}, {WEIGHT_TAGS}, {WEIGHT_BODY})')} "
+            f"FROM {FTS_TABLE} "
+            f"JOIN {DOC_TABLE} d ON d.menu_item_id = {FTS_TABLE}.rowid "
+            f"JOIN {category_table} c ON c.id = d.category_id "
+            f"WHERE {FTS_TABLE} MATCH %s{scope_sql} "
+            f"ORDER BY rank DESC, d.sort_order, d.name_text LIMIT %s"
+        )
+        params = [match, *scope_params, limit]
+    else:
+        rank_parts: List[str] = []
+        where_parts: List[str] = []
+        rank_params: List[Any] = []
+        where_params: List[Any] = []
+        for term in terms:
+            like = f"%{term}%"
+            rank_parts.append(
+                f"(CASE WHEN d.name_text LIKE %s THEN {WEIGHT_NAME} ELSE 0 END"
+                f" + CASE WHEN d.tags_text LIKE %s THEN {WEIGHT_TAGS} ELSE 0 END"
+                f" + CASE WHEN d.body_text LIKE %s THEN {WEIGHT_BODY} ELSE 0 END)"
+            )
+            rank_params.extend([like, like, like])
+            where_parts.append("(d.name_text LIKE %s OR d.tags_text LIKE %s OR d.body_text LIKE %s)")
+            where_params.extend([like, like, like])
+        sql = (
+            f"SELECT {_select_columns(' + '.join(rank_parts))} "
+            f"FROM {DOC_TABLE} d "
+            f"JOIN {category_table} c ON c.id = d.category_id "
+            f"WHERE {' AND '.join(where_parts)}{scope_sql} "
+            f"ORDER BY rank DESC, d.sort_order, d.name_text LIMIT %s"
+        )
+        params = [*rank_params, *where_params, *scope_params, limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _vocabulary(organization_id: Optional[int]) -> List[str]:
+    """Distinct name/tag terms, cached per index generation."""
+    from .models import MenuItemSearchDocument
+
+    key = f"menu_search:vocab:{_generation()}:{organization_id or 'all'}"
+    vocab = cache.get(key)
+    if vocab is not None:
+        return vocab
+    qs = MenuItemSearchDocument.objects.all()
+    if organization_id:
+        qs = qs.filter(organization_id=organization_id)
+    words = set()
+    for name_text, tags_text in qs.values_list("name_text", "tags_text").iterator():
+        words.update(name_text.split())
+        words.update(tags_text.split())
+    vocab = sorted(words)
+    cache.set(key, vocab, CACHE_TIMEOUTS["SEARCH"])
+    return vocab
+
+
+def _correct_terms(terms: List[str], organization_id: Optional[int]) -> List[str]:
+    vocab = _vocabulary(organization_id)
+    if not vocab:
+        return terms
+    corrected = []
+    for term in terms:
+        if len(term) < 3 or term in vocab:
+            corrected.append(term)
+            continue
+        match = difflib.get_close_matches(term, vocab, n=1, cutoff=0.75)
+        corrected.append(match[0] if match else term)
+    return corrected
+
+
+def _row_matches(row: tuple, filters: Dict[str, Any]) -> bool:
+    item_id, category_id, _, price, band = row[:5]
+    flags = dict(zip(DIETARY_FLAGS, row[5:5 + len(DIETARY_FLAGS)]))
+    if filters.get("category_id") and category_id != filters["category_id"]:
+        return False
+    if filters.get("price_band") and band != filters["price_band"]:
+        return False
+    if filters.get("min_price") is not None and Decimal(str(price)) < Decimal(str(filters["min_price"])):
+        return False
+    if filters.get("max_price") is not None and Decimal(str(price)) > Decimal(str(filters["max_price"])):
+        return False
+    for flag in DIETARY_FLAGS:
+        if flag in filters and filters[flag] is not None and bool(flags[flag]) != bool(filters[flag]):
+            return False
+    return True
+
+
+def _facets(rows: List[tuple]) -> Dict[str, Any]:
+    facets = empty_facets()
+    categories: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        _, category_id, category_name, _, band = row[:5]
+        for flag, value in zip(DIETARY_FLAGS, row[5:5 + len(DIETARY_FLAGS)]):
+            if value:
+                facets["dietary"][flag] += 1
+        if band in facets["price_bands"]:
+            facets["price_bands"][band] += 1
+        entry = categories.setdefault(category_id, {"id": category_id, "name": category_name, "count": 0})
+        entry["count"] += 1
+    facets["categories"] = sorted(categories.values(), key=lambda c: (-c["count"], c["name"]))
+    return facets
+
+
+def search_menu(
+    query: str,
+    *,
+    organization_id: Optional[int] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    available_only: bool = True,
+    use_cache: bool = True,
+) -> SearchResult:
+    """
+    Ranked search over indexed menu items.
+
+    ``filters`` accepts ``category_id``, ``price_band``, ``min_price``,
+    ``max_price`` and any dietary flag (e.g. ``{"is_vegan": True}``). Facet
+    counts cover every text match in scope *before* these filters are applied,
+    so clients can show how many results each refinement would leave.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return SearchResult(facets=empty_facets())
+    filters = {k: v for k, v in (filters or {}).items() if v is not None}
+
+    cache_key = None
+    if use_cache:
+        fingerprint = json.dumps(
+            [terms, organization_id, available_only, sorted(filters.items())],
+            default=str,
+        )
+        digest = hashlib.md5(fingerprint.encode()).hexdigest()
+        cache_key = f"menu_search:{_generation()}:{digest}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return SearchResult(**cached)
+
+    rows = _fetch_rows(terms, organization_id, available_only)
+    corrected_query = None
+    if not rows and _backend() != "postgresql":
+        corrected = _correct_terms(terms, organization_id)
+        if corrected != terms:
+            rows = _fetch_rows(corrected, organization_id, available_only)
+            if rows:
+                corrected_query = " ".join(corrected)
+
+    ids = [row[0] for row in rows if _row_matches(row, filters)]
+    result = SearchResult(
+        ids=ids,
+        total=len(ids),
+        facets=_facets(rows),
+        corrected_query=corrected_query,
+    )
+    if cache_key:
+        cache.set(cache_key, asdict(result), CACHE_TIMEOUTS["SEARCH"])
+    return result
+
+
+def ranked_queryset(queryset, ids: Sequence[int]):
+    """Restrict ``queryset`` to ``ids`` and keep their ranked order."""
+    if not ids:
+        return queryset.none()
+    ordering = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).order_by(ordering)
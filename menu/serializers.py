@@ -5,6 +5,22 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from .models import MenuCategory, MenuItem, ModifierGroup, Modifier
 
 
+def _image_set(serializer, field_file):
+    """Responsive image URLs (menu.images), absolute when a request is available."""
+    from .images import image_payload
+    request = serializer.context.get('request')
+    build_url = request.build_absolute_uri if request is not None else (lambda url: url)
+    return image_payload(field_file, build_url)
+
+
+def _prefetched(obj, name):
+    """Return the prefetched related objects for ``name`` or None."""
+    cache = getattr(obj, '_prefetched_objects_cache', {})
+    if name in cache:
+        return list(cache[name])
+    return None
+
+
 class ModifierSerializer(serializers.ModelSerializer):
     """
     Clean serializer for modifiers with proper validation.
@@ -79,6 +95,9 @@ class ModifierGroupSerializer(serializers.ModelSerializer):
     
     def get_available_modifiers_count(self, obj):
         """Get count of available modifiers in this group."""
+        modifiers = _prefetched(obj, 'modifiers')
+        if modifiers is not None:
+            return sum(1 for modifier in modifiers if modifier.is_available)
         return obj.modifiers.filter(is_available=True).count()
     
     def validate_name(self, value):
@@ -155,6 +174,9 @@ class MenuCategorySerializer(serializers.ModelSerializer):
     
     def get_available_items_count(self, obj):
         """Get count of available menu items in this category."""
+        count = getattr(obj, 'available_items_count', None)
+        if count is not None:
+            return count
         return obj.menu_items.filter(is_available=True).count()
     
     def validate_name(self, value):
@@ -172,28 +194,36 @@ class MenuItemSerializer(serializers.ModelSerializer):
     """
     category = MenuCategorySerializer(read_only=True)
     category_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
-    modifier_groups = ModifierGroupSerializer(many=True, read_only=True)
+    modifier_groups = ModifierGroupSerializer(source='direct_modifier_groups', many=True, read_only=True)
     available_modifier_groups_count = serializers.SerializerMethodField()
     dietary_info = serializers.SerializerMethodField()
     
     available_from = serializers.TimeField(required=False, allow_null=True)
     available_until = serializers.TimeField(required=False, allow_null=True)
     image = serializers.ImageField(required=False, allow_null=True)
+    image_set = serializers.SerializerMethodField()
     class Meta:
         model = MenuItem
         fields = [
             'id', 'name', 'description', 'price', 'category', 'category_id',
             'is_available', 'is_vegetarian', 'is_vegan', 'is_gluten_free',
-            'available_from', 'available_until', 'image',
+            'available_from', 'available_until', 'image', 'image_set',
             'preparation_time', 'sort_order', 'modifier_groups',
             'available_modifier_groups_count', 'dietary_info',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    def get_image_set(self, obj):
+        """WebP/JPEG srcsets of the item image."""
+        return _image_set(self, obj.image)
+
     def get_available_modifier_groups_count(self, obj):
-        """Get count of modifier groups for this item."""
-        return obj.modifier_groups.count()
+        """Get count of active modifier groups for this item."""
+        groups = _prefetched(obj, 'direct_modifier_groups')
+        if groups is not None:
+            return sum(1 for group in groups if group.is_active)
+        return obj.direct_modifier_groups.filter(is_active=True).count()
     
     def get_dietary_info(self, obj):
         """Get dietary information as a list of tags."""
@@ -280,16 +310,21 @@ class MenuItemListSerializer(serializers.ModelSerializer):
     """
     category_name = serializers.CharField(source='category.name', read_only=True)
     dietary_info = serializers.SerializerMethodField()
+    image_set = serializers.SerializerMethodField()
     
     class Meta:
         model = MenuItem
         fields = [
             'id', 'name', 'description', 'price', 'category_name',
             'is_available', 'is_vegetarian', 'is_vegan', 'is_gluten_free',
-            'dietary_info', 'preparation_time', 'sort_order'
+            'dietary_info', 'preparation_time', 'sort_order', 'image_set'
         ]
         read_only_fields = ['id']
     
+    def get_image_set(self, obj):
+        """WebP/JPEG srcsets of the item image."""
+        return _image_set(self, obj.image)
+    
     def get_dietary_info(self, obj):
         """Get dietary information as a list of tags."""
         info = []
@@ -306,17 +341,15 @@ class MenuItemDetailSerializer(MenuItemSerializer):
     """
     Detailed serializer for single menu item views with all relationships.
     """
-    modifier_groups = ModifierGroupSerializer(many=True, read_only=True)
-    
     class Meta(MenuItemSerializer.Meta):
-        fields = MenuItemSerializer.Meta.fields + ['modifier_groups']
+        fields = MenuItemSerializer.Meta.fields
 
 
 class MenuCategoryWithItemsSerializer(MenuCategorySerializer):
     """
     Category serializer with nested menu items for menu display.
     """
-    menu_items = MenuItemListSerializer(source='items', many=True, read_only=True)
+    menu_items = MenuItemListSerializer(many=True, read_only=True)
     
     class Meta(MenuCategorySerializer.Meta):
         fields = MenuCategorySerializer.Meta.fields + ['menu_items']
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from django.db.models.signals import post_save
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from django.conf import settings
 
-from .models import MenuItem
+from .models import MenuCategory, MenuItem, ModifierGroup, Modifier, MenuItemModifierGroup
+
+logger = logging.getLogger(__name__)
 
 
 def _mw_enabled() -> bool:
@@ -27,3 +32,90 @@ def on_menu_item_saved(sender, instance: MenuItem, **kwargs):
     except Exception:
         pass
 
+
+# --- Search index maintenance (menu.search) ---
+
+def _reindex(items):
+    try:
+        from .search import index_items
+        index_items(items)
+    except Exception as e:
+        logger.warning(f"Menu search index update failed: {e}")
+
+
+@receiver(post_save, sender=MenuItem)
+def index_menu_item(sender, instance: MenuItem, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: _reindex([instance]))
+
+
+@receiver(post_delete, sender=MenuItem)
+def unindex_menu_item(sender, instance: MenuItem, **kwargs):
+    item_id = instance.pk
+
+    def _remove():
+        try:
+            from .search import remove_items
+            remove_items([item_id])
+        except Exception as e:
+            logger.warning(f"Menu search index removal failed: {e}")
+
+    transaction.on_commit(_remove)
+
+
+@receiver(post_save, sender=MenuCategory)
+def reindex_category_items(sender, instance: MenuCategory, created=False, raw=False, **kwargs):
+    # Category name and active flag are part of each item's document
+    if raw or created:
+        return
+    transaction.on_commit(
+        lambda: _reindex(instance.menu_items.select_related("category"))
+    )
+
+
+# --- Availability index invalidation (menu.availability) ---
+
+@receiver(post_save, sender=MenuCategory)
+@receiver(post_delete, sender=MenuCategory)
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=ModifierGroup)
+@receiver(post_delete, sender=ModifierGroup)
+@receiver(post_save, sender=Modifier)
+@receiver(post_delete, sender=Modifier)
+@receiver(post_save, sender=MenuItemModifierGroup)
+@receiver(post_delete, sender=MenuItemModifierGroup)
+def invalidate_menu_availability(sender, raw=False, **kwargs):
+    if raw:
+        return
+
+    def _invalidate():
+        try:
+            from .availability import invalidate
+            invalidate()
+        except Exception as e:
+            logger.warning(f"Menu availability invalidation failed: {e}")
+
+    transaction.on_commit(_invalidate)
+
+
+# --- Responsive image derivatives (menu.images) ---
+
+@receiver(post_save, sender=MenuCategory)
+@receiver(post_save, sender=MenuItem)
+def schedule_image_variants(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .images import needs_refresh, schedule
+    if needs_refresh(instance):
+        schedule(instance)
+
+
+# --- Category aggregates (menu.tree) ---
+
+@receiver(post_delete, sender=MenuItem)
+def refresh_category_aggregates(sender, instance: MenuItem, **kwargs):
+    # Saves mark their category in MenuItem.save(); deletes bypass it
+    from .tree import mark_dirty
+    mark_dirty(instance.category_id)
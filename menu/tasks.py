@@ -0,0 +1,34 @@
+# menu/tasks.py
+from __future__ import annotations
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from celery import shared_task
+except Exception:  # Celery not installed; provide a no-op decorator
+    def shared_task(*d, **kw):
+        def _wrap(fn):
+            return fn
+        return _wrap
+
+
+@shared_task
+def flush_counters_task():
+    """Write buffered popularity/usage counters to the database (menu.counters)."""
+    try:
+        from menu.counters import flush
+        return flush()
+    except Exception:
+        logger.exception("flush_counters_task failed")
+        return 0
+
+
+@shared_task
+def generate_image_variants_task(label: str, pk: int):
+    """Render the responsive derivatives of one menu image (menu.images)."""
+    try:
+        from menu.images import _refresh_by_label
+        _refresh_by_label(label, pk)
+    except Exception:
+        logger.exception(f"generate_image_variants_task failed for {label} {pk}")
@@ -0,0 +1,231 @@
+# menu/tree.py
+"""
+Menu category tree: materialized paths and denormalized aggregates.
+
+Every ``MenuCategory`` stores ``path``, the zero-padded primary keys of
+its ancestors and itself (``"0000000003/0000000017/"``). A subtree is one
+``path__startswith`` query on an indexed column, a breadcrumb is one
+``pk__in`` query over the ids in the path, and moving a category rewrites
+its descendants' paths in a single ``UPDATE``.
+
+``item_count``, ``min_price`` and ``max_price`` are recomputed by
+``refresh_aggregates()`` in one ``UPDATE`` with grouped subqueries. Item
+saves only mark their category dirty (``mark_dirty()``); the dirty set is
+refreshed once when the transaction commits, so an import of a few
+thousand items costs one statement instead of a refresh per row. Code that
+changes items outside a transaction can batch the same way with::
+
+    with tree.deferred_aggregates():
+        ...
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Length, Substr
+
+PATH_WIDTH = 10
+SEPARATOR = "/"
+SEGMENT_LENGTH = PATH_WIDTH + len(SEPARATOR)
+
+
+def segment(pk: int) -> str:
+    return f"{pk:0{PATH_WIDTH}d}{SEPARATOR}"
+
+
+def path_for(pk: int, parent_path: str = "") -> str:
+    return f"{parent_path}{segment(pk)}"
+
+
+def depth(path: str) -> int:
+    """Level of the category owning ``path`` (0 for roots)."""
+    return len(path) // SEGMENT_LENGTH - 1
+
+
+def ancestor_ids(path: str) -> List[int]:
+    """Primary keys of the ancestors encoded in ``path``, root first."""
+    return [int(part) for part in path.split(SEPARATOR) if part][:-1]
+
+
+def _model():
+    from .models import MenuCategory
+    return MenuCategory
+
+
+# ----------------------------------------------------------------------
+# Paths
+# ----------------------------------------------------------------------
+def sync_path(category) -> None:
+    """
+    Store ``category.path`` after a save, rewriting the paths and levels of
+    its descendants in one statement when it moved.
+    """
+    MenuCategory = _model()
+    # Current paths from the database: the instance may predate a move upstream
+    stored = dict(
+        MenuCategory.objects.filter(pk__in=[category.pk, category.parent_id]).values_list("pk", "path")
+    )
+    old_path = stored.get(category.pk, "")
+    new_path = path_for(category.pk, stored.get(category.parent_id, "") if category.parent_id else "")
+    category.path = new_path
+    if new_path == old_path:
+        return
+
+    MenuCategory.objects.filter(pk=category.pk).update(path=new_path)
+    if old_path:
+        MenuCategory.objects.filter(path__startswith=old_path).exclude(pk=category.pk).update(
+            path=Concat(Value(new_path), Substr("path", len(old_path) + 1)),
+            level=F("level") + (depth(new_path) - depth(old_path)),
+        )
+
+
+def subtree_height(category) -> int:
+    """Levels below ``category`` (0 for a leaf), in one query."""
+    if not category.pk or not category.path:
+        return 0
+    longest = _model().objects.filter(path__startswith=category.path).aggregate(
+        longest=Max(Length("path"))
+    )["longest"]
+    return max(0, (longest or 0) // SEGMENT_LENGTH - len(category.path) // SEGMENT_LENGTH)
+
+
+def descendants(category, include_self: bool = False):
+    """Queryset of the subtree under ``category``."""
+    qs = _model().objects.filter(path__startswith=category.path)
+    if not include_self:
+        qs = qs.exclude(pk=category.pk)
+    return qs
+
+
+def ancestors(category):
+    """Queryset of ``category``'s ancestors, root first."""
+    return _model().objects.filter(pk__in=ancestor_ids(category.path)).order_by("level")
+
+
+def rebuild(using: Optional[str] = None) -> int:
+    """
+    Recompute every category's ``path`` and ``level`` from ``parent`` (one
+    read, one ``bulk_update``). Returns the number of rows changed.
+    """
+    MenuCategory = _model()
+    manager = MenuCategory.objects.db_manager(using)
+    rows = {row["pk"]: row for row in manager.values("pk", "parent_id", "path", "level")}
+    paths: Dict[int, str] = {}
+
+    def resolve(pk: int, seen=()) -> str:
+        if pk not in paths:
+            parent_id = rows[pk]["parent_id"]
+            if parent_id in rows and parent_id not in seen:
+                paths[pk] = path_for(pk, resolve(parent_id, seen + (pk,)))
+            else:
+                paths[pk] = path_for(pk)
+        return paths[pk]
+
+    changed = []
+    for pk, row in rows.items():
+        path = resolve(pk)
+        if path != row["path"] or depth(path) != row["level"]:
+            changed.append(MenuCategory(pk=pk, path=path, level=depth(path)))
+    if changed:
+        manager.bulk_update(changed, ["path", "level"], batch_size=500)
+    return len(changed)
+
+
+def navigation(organization_id: Optional[int] = None, active_only: bool = True) -> List[Dict[str, Any]]:
+    """
+    The category tree as nested dicts (``children`` sorted by sort order
+    and name), from a single query whatever the depth.
+    """
+    qs = _model().objects.order_by("path")
+    if organization_id is not None:
+        qs = qs.filter(organization_id=organization_id)
+    if active_only:
+        qs = qs.filter(is_active=True)
+
+    nodes: Dict[int, Dict[str, Any]] = {}
+    roots: List[Dict[str, Any]] = []
+    for row in qs.values(
+        "id", "parent_id", "name", "slug", "level", "path",
+        "sort_order", "item_count", "min_price", "max_price",
+    ):
+        node = {**row, "children": []}
+        nodes[row["id"]] = node
+        if row["parent_id"] is None:
+            roots.append(node)
+        elif row["parent_id"] in nodes:
+            nodes[row["parent_id"]]["children"].append(node)
+        # else: under an inactive (filtered out) ancestor, hidden with it
+
+    def order(siblings):
+        siblings.sort(key=lambda node: (node["sort_order"], node["name"]))
+        for node in siblings:
+            order(node["children"])
+        return siblings
+
+    return order(roots)
+
+
+# ----------------------------------------------------------------------
+# Aggregates
+# ----------------------------------------------------------------------
+def refresh_aggregates(category_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute ``item_count``/``min_price``/``max_price`` from available items
+    for ``category_ids`` (all categories when None) in one statement.
+    """
+    from .models import MenuItem
+
+    items = MenuItem.objects.filter(category=OuterRef("pk"), is_available=True).order_by().values("category")
+    qs = _model().objects.all()
+    if category_ids is not None:
+        category_ids = {pk for pk in category_ids if pk}
+        if not category_ids:
+            return 0
+        qs = qs.filter(pk__in=category_ids)
+    return qs.update(
+        item_count=Coalesce(Subquery(items.annotate(n=Count("pk")).values("n")), 0),
+        min_price=Subquery(items.annotate(p=Min("price")).values("p")),
+        max_price=Subquery(items.annotate(p=Max("price")).values("p")),
+    )
+
+
+_state = threading.local()
+
+
+def _pending() -> set:
+    if not hasattr(_state, "pending"):
+        _state.pending = set()
+    return _state.pending
+
+
+def mark_dirty(*category_ids: Optional[int]) -> None:
+    """Refresh the aggregates of ``category_ids`` once the transaction commits."""
+    _pending().update(pk for pk in category_ids if pk)
+    if not getattr(_state, "deferred", 0):
+        transaction.on_commit(flush)
+
+
+def flush() -> int:
+    pending = _pending()
+    if not pending:
+        return 0
+    category_ids = set(pending)
+    pending.clear()
+    return refresh_aggregates(category_ids)
+
+
+@contextmanager
+def deferred_aggregates():
+    """Collect dirty categories in the block and refresh them once at the end."""
+    _state.deferred = getattr(_state, "deferred", 0) + 1
+    try:
+        yield
+    finally:
+        _state.deferred -= 1
+        if not _state.deferred:
+            transaction.on_commit(flush)
@@ -29,9 +29,15 @@ from rest_framework import serializers
 
 
 class MenuCategorySerializer(serializers.ModelSerializer):
+    image_set = serializers.SerializerMethodField()
+
     class Meta:
         model = MenuCategory
-        fields = ["id", "organization", "name", "description", "image", "sort_order", "is_active", "created_at"]
+        fields = ["id", "organization", "name", "description", "image", "image_set", "sort_order", "is_active", "created_at"]
+
+    def get_image_set(self, obj):
+        from .serializers import _image_set
+        return _image_set(self, obj.image)
 
 
 # -----------------------------------------------------------------------------
@@ -252,17 +258,28 @@ class CartMergeView(APIView):
         except Exception:
             return Response({"detail": "Invalid JSON."}, status=400)
 
+        from orders.utils.cart import plan_merge
+
         state = _session_cart_get(request)
         merged: Dict[str, int] = dict(state["items"] or {})
+        existing = {}
+        for sid, qty in merged.items():
+            try:
+                existing[(int(sid), ())] = int(qty or 0)
+            except (TypeError, ValueError):
+                continue
+        incoming = []
         for it in data.get("items", []) or []:
             try:
                 iid = int(it.get("id"))
                 qty = int(it.get("qty") or 0)
-                if qty <= 0:
-                    continue
-                merged[str(iid)] = int(merged.get(str(iid), 0)) + qty
             except Exception:
                 continue
+            if qty > 0:
+                incoming.append(((iid, ()), qty))
+        plan = plan_merge(existing, incoming)
+        for (iid, _), qty in plan.quantities.items():
+            merged[str(iid)] = qty
 
         tip_cents = int(round(float(data.get("tip") or data.get("tip_cents") or 0) * 100))
         discount_cents = int(round(float(data.get("discount") or data.get("discount_cents") or 0) * 100))
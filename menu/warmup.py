@@ -0,0 +1,25 @@
+# menu/warmup.py
+"""Menu datasets for ``core.warmup``."""
+
+from core import warmup
+
+
+@warmup.register("menu.availability", "Compiled availability index and current snapshot")
+def warm_availability():
+    from .availability import available_now
+    snapshot = available_now()
+    return len(snapshot["items"])
+
+
+@warmup.register("menu.display", "Complete menu display payload (/api/display/)")
+def warm_menu_display():
+    from .api_views import MENU_DISPLAY_CACHE_KEY, build_menu_display, menu_display_timeout
+    request = warmup.build_request()
+    return warmup.refresh(MENU_DISPLAY_CACHE_KEY, lambda: build_menu_display(request), menu_display_timeout)
+
+
+@warmup.register("menu.categories", "Active categories with their available items")
+def warm_categories():
+    from .api_views import CATEGORIES_WITH_ITEMS_CACHE_KEY, build_categories_with_items
+    request = warmup.build_request()
+    return warmup.refresh(CATEGORIES_WITH_ITEMS_CACHE_KEY, lambda: build_categories_with_items(request), 60 * 15)
@@ -1,6 +1,6 @@
 from decimal import Decimal
 from django.db import transaction
-from django.db.models import Sum, F, Q
+from django.db.models import Count, Sum, F, Q
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
@@ -18,6 +18,11 @@ import json
 
 from .models import Cart, CartItem, Order, OrderItem
 from .services.totals import compute_cart_totals, compute_order_totals
+from .utils.cart import merge_carts
+from .read_models import (
+    cart_read_queryset, cart_serializer_context, prefetch_cart,
+    order_read_queryset, order_item_read_queryset,
+)
 from menu.models import MenuItem, Modifier, ModifierGroup
 from .serializers import (
     CartSerializer, CartCreateSerializer, CartItemSerializer,
@@ -54,13 +59,10 @@ class CartViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Get cart based on user authentication or session."""
         if self.request.user.is_authenticated:
-            return Cart.objects.filter(
+            return cart_read_queryset(Cart.objects.filter(
                 user=self.request.user,
                 status=Cart.STATUS_ACTIVE
-            ).prefetch_related(
-                'items__menu_item__category',
-                'items__menu_item__modifier_groups__modifiers'
-            )
+            ))
         else:
             # For anonymous users, use session key
             session_key = self.request.session.session_key
@@ -68,13 +70,10 @@ class CartViewSet(viewsets.ModelViewSet):
                 self.request.session.create()
                 session_key = self.request.session.session_key
             
-            return Cart.objects.filter(
+            return cart_read_queryset(Cart.objects.filter(
                 session_key=session_key,
                 status=Cart.STATUS_ACTIVE
-            ).prefetch_related(
-                'items__menu_item__category',
-                'items__menu_item__modifier_groups__modifiers'
-            )
+            ))
     
     def get_or_create_cart(self):
         """Get or create a cart for the current user/session."""
@@ -125,7 +124,10 @@ class CartViewSet(viewsets.ModelViewSet):
     def list(self, request):
         """Get current cart or create if doesn't exist."""
         cart, created = self.get_or_create_cart()
-        serializer = self.get_serializer(cart)
+        prefetch_cart(cart)
+        serializer = self.get_serializer(
+            cart, context=cart_serializer_context([cart], self.get_serializer_context())
+        )
         
         response_data = serializer.data
         response_data['created'] = created
@@ -152,7 +154,10 @@ class CartViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_404_NOT_FOUND
                     )
             
-            serializer = self.get_serializer(cart)
+            prefetch_cart(cart)
+            serializer = self.get_serializer(
+                cart, context=cart_serializer_context([cart], self.get_serializer_context())
+            )
             return Response(serializer.data)
             
         except (ValueError, ValidationError):
@@ -364,33 +369,18 @@ class CartViewSet(viewsets.ModelViewSet):
                         session_key=request.session.session_key or ''
                     )
                 
-                # Merge items from anonymous cart to user cart
-                for anon_item in anonymous_cart.items.all():
-                    # Check if similar item exists in user cart
-                    existing_item = user_cart.items.filter(
-                        menu_item=anon_item.menu_item,
-                        selected_modifiers=anon_item.selected_modifiers
-                    ).first()
-                    
-                    if existing_item:
-                        existing_item.quantity += anon_item.quantity
-                        existing_item.save()
-                    else:
-                        # Move item to user cart
-                        anon_item.cart = user_cart
-                        anon_item.save()
+                # Merge items from anonymous cart to user cart (bulk engine,
+                # also recalculates the user cart totals)
+                summary = merge_carts(anonymous_cart, user_cart, strategy="increment")
                 
                 # Delete anonymous cart
                 anonymous_cart.delete()
                 
-                # Update user cart totals
-                from .services.totals import compute_cart_totals
-                compute_cart_totals(user_cart, save=True)
-                
                 cart_serializer = CartSerializer(user_cart, context={'request': request})
                 return Response({
                     'message': 'Carts merged successfully',
-                    'cart': cart_serializer.data
+                    'cart': cart_serializer.data,
+                    'summary': summary,
                 })
                 
         except Exception as e:
@@ -595,20 +585,16 @@ class OrderItemViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Get order items based on user authentication and order access."""
         if self.request.user.is_authenticated:
-            return OrderItem.objects.filter(
+            return order_item_read_queryset(OrderItem.objects.filter(
                 order__user=self.request.user
-            ).select_related(
-                'order', 'order__user', 'order__table', 'menu_item', 'menu_item__category'
-            ).order_by('-created_at')
+            )).order_by('-created_at')
         else:
             # For anonymous users, only show items from orders in current session
             session_key = self.request.session.session_key
             if session_key:
-                return OrderItem.objects.filter(
+                return order_item_read_queryset(OrderItem.objects.filter(
                     order__source_cart__session_key=session_key
-                ).select_related(
-                    'order', 'order__user', 'order__table', 'menu_item', 'menu_item__category'
-                ).order_by('-created_at')
+                )).order_by('-created_at')
             return OrderItem.objects.none()
     
     @action(detail=True, methods=['patch'])
@@ -701,20 +687,24 @@ class OrderItemViewSet(viewsets.ModelViewSet):
         """Get items in preparation queue (for kitchen staff)."""
         try:
             # Get items that are confirmed or preparing
-            queue_items = OrderItem.objects.filter(
-                status__in=[OrderItem.STATUS_CONFIRMED, OrderItem.STATUS_PREPARING],
+            queue_items = order_item_read_queryset(OrderItem.objects.filter(
+                status__in=[OrderItem.STATUS_PENDING, OrderItem.STATUS_PREPARING],
                 order__status__in=[Order.STATUS_CONFIRMED, Order.STATUS_PREPARING]
-            ).select_related(
-                'order', 'menu_item', 'menu_item__category'
-            ).order_by('order__confirmed_at', 'created_at')
+            )).order_by('order__confirmed_at', 'created_at')
             
             serializer = self.get_serializer(queue_items, many=True)
+            breakdown = queue_items.order_by().aggregate(
+                total=Count('pk'),
+                # Items stay PENDING until the kitchen starts them
+                confirmed=Count('pk', filter=Q(status=OrderItem.STATUS_PENDING)),
+                preparing=Count('pk', filter=Q(status=OrderItem.STATUS_PREPARING)),
+            )
             return Response({
                 'queue_items': serializer.data,
-                'total_items': queue_items.count(),
+                'total_items': breakdown['total'],
                 'status_breakdown': {
-                    'confirmed': queue_items.filter(status=OrderItem.STATUS_CONFIRMED).count(),
-                    'preparing': queue_items.filter(status=OrderItem.STATUS_PREPARING).count()
+                    'confirmed': breakdown['confirmed'],
+                    'preparing': breakdown['preparing']
                 }
             })
         except Exception as e:
@@ -759,9 +749,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         Regular authenticated users see only their own orders.
         Anonymous users see only orders tied to their current session cart.
         """
-        base = Order.objects.select_related('user', 'table').prefetch_related(
-            'items__menu_item', 'items__menu_item__category'
-        )
+        base = order_read_queryset(Order.objects.all())
         user = getattr(self.request, 'user', None)
         if getattr(user, "is_staff", False):
             return base.order_by('-created_at')
@@ -779,6 +767,11 @@ class OrderViewSet(viewsets.ModelViewSet):
             return base.filter(source_cart__session_key=session_key).order_by('-created_at')
         return Order.objects.none()
     
+    def _reload(self, order):
+        """Re-read ``order`` after a write; the prefetched status history and
+        annotations on the instance from get_object() are stale by then."""
+        return order_read_queryset(Order.objects.filter(pk=order.pk)).get()
+
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
         if self.action == 'create':
@@ -894,7 +887,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             if order.can_be_cancelled():
                 order.transition_to('cancelled', by_user=(request.user if request.user.is_authenticated else None))
                 
-                serializer = self.get_serializer(order)
+                serializer = self.get_serializer(self._reload(order))
                 return Response({
                     'message': 'Order cancelled successfully',
                     'order': serializer.data
@@ -929,7 +922,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                 success = order.apply_refund(refund_amount, reason)
                 if success:
                     order.save()
-                    serializer = self.get_serializer(order)
+                    serializer = self.get_serializer(self._reload(order))
                     return Response({
                         'message': 'Refund applied successfully',
                         'order': serializer.data
@@ -969,6 +962,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         try:
             # Update status via canonical transition method
             order.transition_to(new_status=new_status, by_user=(request.user if request.user.is_authenticated else None))
+            order = self._reload(order)
             
             serializer = self.get_serializer(order)
             return Response({
@@ -3,6 +3,7 @@ from decimal import Decimal
 from django.core.cache import cache
 from django.conf import settings
 from menu.models import MenuItem, Modifier
+from core import local_cache
 from core.cache_service import CacheService
 from core.cache_decorators import cache_result, cache_menu_data
 
@@ -10,12 +11,20 @@ from core.cache_decorators import cache_result, cache_menu_data
 MENU_ITEM_CACHE_TIMEOUT = getattr(settings, 'MENU_ITEM_CACHE_TIMEOUT', 3600)  # 1 hour
 MODIFIER_CACHE_TIMEOUT = getattr(settings, 'MODIFIER_CACHE_TIMEOUT', 3600)  # 1 hour
 
+# Per-process L1 namespaces (core.local_cache) in front of the keys below
+MENU_ITEM_L1_NAMESPACE = 'menu_item'
+MODIFIER_L1_NAMESPACE = 'modifier'
+
 
 def get_menu_item_cached(item_id: int) -> Optional[Tuple[str, Decimal, Optional[str]]]:
     """
     Get menu item details (name, price, image_url) from cache or database.
     Returns tuple of (name, price, image_url) or None if not found.
     """
+    return local_cache.get(MENU_ITEM_L1_NAMESPACE, item_id, lambda: _get_menu_item_shared(item_id))
+
+
+def _get_menu_item_shared(item_id: int) -> Optional[Tuple[str, Decimal, Optional[str]]]:
     cache_key = f"menu_item_{item_id}"
     cached_data = cache.get(cache_key)
     
@@ -41,7 +50,10 @@ def get_menu_items_batch_cached(item_ids: List[int]) -> Dict[int, Tuple[str, Dec
     """
     if not item_ids:
         return {}
-    
+    return local_cache.get_many(MENU_ITEM_L1_NAMESPACE, item_ids, _get_menu_items_shared)
+
+
+def _get_menu_items_shared(item_ids: List[int]) -> Dict[int, Tuple[str, Decimal, Optional[str]]]:
     # Try to get from cache first
     cache_keys = [f"menu_item_{item_id}" for item_id in item_ids]
     cached_items = cache.get_many(cache_keys)
@@ -93,7 +105,10 @@ def get_modifiers_batch_cached(modifier_ids: List[int]) -> Dict[int, Tuple[str,
     """
     if not modifier_ids:
         return {}
-    
+    return local_cache.get_many(MODIFIER_L1_NAMESPACE, modifier_ids, _get_modifiers_shared)
+
+
+def _get_modifiers_shared(modifier_ids: List[int]) -> Dict[int, Tuple[str, Decimal]]:
     # Try to get from cache first
     cache_keys = [f"modifier_{modifier_id}" for modifier_id in modifier_ids]
     cached_modifiers = cache.get_many(cache_keys)
@@ -143,6 +158,7 @@ def invalidate_menu_item_cache(item_id: int):
     Call this when menu item is updated.
     """
     cache.delete(f"menu_item_{item_id}")
+    local_cache.invalidate(MENU_ITEM_L1_NAMESPACE, item_id)
 
 
 def invalidate_modifier_cache(modifier_id: int):
@@ -151,6 +167,36 @@ def invalidate_modifier_cache(modifier_id: int):
     Call this when modifier is updated.
     """
     cache.delete(f"modifier_{modifier_id}")
+    local_cache.invalidate(MODIFIER_L1_NAMESPACE, modifier_id)
+
+
+def warm_menu_item_cache() -> int:
+    """
+    Cache every available menu item in one query and one ``set_many``
+    (cache warm-up). Returns the number of items cached.
+    """
+    data = {}
+    for menu_item in MenuItem.objects.filter(is_available=True).only('id', 'name', 'price', 'image'):
+        image_url = menu_item.image.url if menu_item.image else None
+        data[f"menu_item_{menu_item.id}"] = (menu_item.name, menu_item.price, image_url)
+    if data:
+        cache.set_many(data, MENU_ITEM_CACHE_TIMEOUT)
+    local_cache.invalidate(MENU_ITEM_L1_NAMESPACE)
+    return len(data)
+
+
+def warm_modifier_cache() -> int:
+    """Cache every available modifier (cache warm-up). Returns the number cached."""
+    data = {
+        f"modifier_{modifier_id}": (name, price)
+        for modifier_id, name, price in Modifier.objects.filter(
+            is_available=True
+        ).values_list('id', 'name', 'price')
+    }
+    if data:
+        cache.set_many(data, MODIFIER_CACHE_TIMEOUT)
+    local_cache.invalidate(MODIFIER_L1_NAMESPACE)
+    return len(data)
 
 
 def clear_menu_cache():
@@ -226,9 +272,9 @@ def get_popular_items_cached(organization_id: int, limit: int = 10) -> List[Dict
 @cache_result(timeout=1800, key_prefix='menu_search')  # 30 minutes
 def search_menu_items_cached(organization_id: int, query: str, category_id: Optional[int] = None) -> List[Dict[str, Any]]:
     """
-    Search menu items with caching.
+    Search menu items with caching (ranked by the menu full-text index).
     """
-    from django.db.models import Q
+    from menu.search import search_menu, ranked_queryset
     
     queryset = MenuItem.objects.filter(
         organization_id=organization_id,
@@ -239,13 +285,16 @@ def search_menu_items_cached(organization_id: int, query: str, category_id: Opti
         queryset = queryset.filter(category_id=category_id)
     
     if query:
-        queryset = queryset.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(category__name__icontains=query)
+        result = search_menu(
+            query,
+            organization_id=organization_id,
+            filters={'category_id': category_id},
         )
+        queryset = ranked_queryset(queryset, result.ids)
+    else:
+        queryset = queryset.order_by('name')
     
-    queryset = queryset.select_related('category').order_by('name')
+    queryset = queryset.select_related('category')
     
     result = []
     for item in queryset:
@@ -0,0 +1,402 @@
+# orders/checkout.py
+"""
+Checkout pipeline for the authenticated DB-cart checkout
+(``orders.views.OrderViewSet.create``).
+
+Checkout used to run in one transaction that also rendered the invoice PDF
+and called Stripe, so a slow Stripe response held a database connection and
+the order's row lock. The work is now split in three stages:
+
+1. ``price()``, outside any transaction: load the pending order and its
+   items, resolve the table from the cached registry (``core.tables``), look
+   up the coupon and the loyalty reward, and compute tip, best-of discount
+   and totals. The priced order is validated (``full_clean``) here.
+2. ``commit()``, one short transaction: lock the order row, check the items
+   did not change since stage 1, and write the priced fields with a single
+   UPDATE (plus the ``coupon_discount`` extra the Stripe step reads). The
+   invoice PDF is queued on commit rather than rendered inline; ``mark_paid``
+   renders the final one anyway.
+3. ``open_session()``, after commit: create the Stripe Checkout session
+   with an idempotency key and remember it on the order.
+
+The idempotency key comes from the ``Idempotency-Key`` header (or an
+``idempotency_key`` field). Without one it is derived from the order and its
+priced contents, so a retried or double-clicked checkout returns the session
+already created instead of opening a second one. Once that session has
+expired (``expires_at``, 24 hours by default) the same key opens a new one,
+under a per-attempt Stripe key, so a returning user is never handed a dead
+URL.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core import tables as table_registry
+
+from .models import Cart, Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+SERVICE_TYPES = {"DINE_IN", "UBER_EATS", "DOORDASH"}
+LOCK_KEY = "checkout:lock:{}"
+LOCK_SECONDS = 30
+
+# Order fields written by commit()
+PRICED_FIELDS = (
+    "delivery_option", "table_id", "tip_amount", "coupon_discount", "loyalty_discount",
+    "applied_coupon_code", "notes", "subtotal", "tax_amount", "total_amount", "item_count",
+)
+
+
+class CheckoutError(Exception):
+    """A checkout that cannot proceed; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, detail: str, status: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+@dataclass
+class CheckoutRequest:
+    service_type: str = "DINE_IN"
+    table_id: Optional[int] = None
+    table_number: str = ""
+    tip_percent: Any = None
+    tip_amount: Any = None
+    coupon_code: str = ""
+    idempotency_key: str = ""
+
+    @classmethod
+    def from_request(cls, request) -> "CheckoutRequest":
+        data = request.data
+        service_type = (data.get("service_type") or data.get("source") or "").upper().strip()
+        if service_type == "UBEREATS":
+            service_type = "UBER_EATS"
+        try:
+            table_id = int(data.get("table_id")) if data.get("table_id") not in (None, "") else None
+        except (TypeError, ValueError):
+            table_id = None
+        return cls(
+            service_type=service_type if service_type in SERVICE_TYPES else "DINE_IN",
+            table_id=table_id,
+            table_number=str(data.get("table_number") or data.get("table_num") or "").strip(),
+            tip_percent=data.get("tip_percent"),
+            tip_amount=data.get("tip_amount") or data.get("tip_custom"),
+            coupon_code=(data.get("coupon") or data.get("coupon_code") or "").strip(),
+            idempotency_key=(
+                request.headers.get("Idempotency-Key") or data.get("idempotency_key") or ""
+            ).strip()[:200],
+        )
+
+
+@dataclass
+class PricedOrder:
+    order: Order
+    service_type: str
+    table: Optional[dict]
+    items_signature: str
+    idempotency_key: str
+    loyalty_reward: Any = None
+    table_number: str = ""  # dine-in table number not found in the registry
+    session_attempt: int = 0  # > 0 once an earlier session for the key expired
+
+    @property
+    def stripe_key(self) -> str:
+        if not self.session_attempt:
+            return self.idempotency_key
+        return f"{self.idempotency_key}-{self.session_attempt}"
+
+
+# ----------------------------------------------------------------------
+# Stage 1: pricing (no transaction)
+# ----------------------------------------------------------------------
+def _items_signature(rows) -> str:
+    parts = sorted(f"{pk}:{menu_item_id}:{quantity}:{unit_price}" for pk, menu_item_id, quantity, unit_price in rows)
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def _resolve_table(req: CheckoutRequest) -> Optional[dict]:
+    if req.service_type != "DINE_IN":
+        return None
+    if req.table_id:
+        table = table_registry.get_table(req.table_id)
+        if table and table["is_active"]:
+            return table
+    if req.table_number:
+        number = req.table_number.upper()
+        for table in table_registry.tables():
+            if table["table_number"] == number:
+                return table
+    return None
+
+
+def _tip(req: CheckoutRequest, subtotal: Decimal) -> Decimal:
+    try:
+        if req.tip_amount:
+            return Decimal(str(req.tip_amount)).quantize(Decimal("0.01"))
+        if req.tip_percent:
+            return (subtotal * Decimal(str(req.tip_percent)) / Decimal("100")).quantize(Decimal("0.01"))
+    except Exception:
+        pass
+    return Decimal("0.00")
+
+
+def _coupon_discount(code: str, subtotal: Decimal, item_count: int, user) -> tuple[Decimal, str]:
+    if not code:
+        return Decimal("0.00"), ""
+    try:
+        from coupons.services import find_active_coupon, compute_discount_for_order
+    except Exception:  # pragma: no cover
+        return Decimal("0.00"), ""
+    coupon = find_active_coupon(code)
+    if coupon is None:
+        return Decimal("0.00"), ""
+    discount, _breakdown = compute_discount_for_order(coupon, subtotal, item_count=item_count, user=user)
+    return (discount, coupon.code) if discount > 0 else (Decimal("0.00"), "")
+
+
+def _loyalty_reward(user):
+    try:
+        from loyalty.services import get_available_reward_for_user
+    except Exception:  # pragma: no cover
+        return None
+    return get_available_reward_for_user(user)
+
+
+def price(user, req: CheckoutRequest) -> PricedOrder:
+    """Load and price the user's pending order without opening a transaction."""
+    order = (
+        Order.objects.filter(user=user, status=Order.STATUS_PENDING)
+        .prefetch_related("items__menu_item")
+        .order_by("-created_at")
+        .first()
+    )
+    items = list(order.items.all()) if order else []
+    if not items:
+        raise CheckoutError("Your cart is empty. Please add items before checkout.")
+
+    table = _resolve_table(req)
+    subtotal = order.items_subtotal()
+    item_count = sum(item.quantity for item in items)
+
+    # Best-of discount: coupon or loyalty reward, never both
+    coupon_discount, coupon_code = _coupon_discount(req.coupon_code, subtotal, item_count, user)
+    reward = _loyalty_reward(user)
+    loyalty_discount = reward.as_discount_amount(subtotal) if reward else Decimal("0.00")
+    use_loyalty = loyalty_discount > 0 and loyalty_discount >= coupon_discount
+
+    # A table number not in the registry cannot be linked (dine-in requires
+    # a table), but it is still where the guest sits: note it for staff
+    unmatched_table = req.service_type == "DINE_IN" and not table and bool(req.table_number)
+    order.delivery_option = Cart.DELIVERY_DINE_IN if table else Cart.DELIVERY_PICKUP
+    order.table_id = table["id"] if table else None
+    order.tip_amount = _tip(req, subtotal)
+    order.loyalty_discount = loyalty_discount if use_loyalty else Decimal("0.00")
+    order.coupon_discount = Decimal("0.00") if use_loyalty else coupon_discount
+    order.applied_coupon_code = "" if use_loyalty else coupon_code
+    if table and not order.notes:
+        order.notes = f"{table['location']['name']} — Table {table['table_number']}"
+    elif unmatched_table and not order.notes:
+        order.notes = f"Table {req.table_number}"
+    order.calculate_totals(save=False)
+    order.full_clean()
+
+    signature = _items_signature(
+        (item.pk, item.menu_item_id, item.quantity, item.unit_price) for item in items
+    )
+    key = req.idempotency_key or "checkout-{}-{}".format(
+        order.pk,
+        hashlib.sha256(
+            f"{signature}:{order.total_amount}:{order.tip_amount}:{order.table_id}:"
+            f"{order.applied_coupon_code}:{req.service_type}:{order.notes}".encode()
+        ).hexdigest()[:32],
+    )
+    return PricedOrder(
+        order=order,
+        service_type=req.service_type,
+        table=table,
+        items_signature=signature,
+        idempotency_key=key,
+        loyalty_reward=reward if use_loyalty else None,
+        table_number=req.table_number if unmatched_table else "",
+    )
+
+
+# ----------------------------------------------------------------------
+# Stage 2: short commit
+# ----------------------------------------------------------------------
+def _defer_invoice(order_id: int) -> None:
+    # Runs after the order committed: a failure here must not fail checkout
+    try:
+        from payments.tasks import save_invoice_pdf_task
+        save_invoice_pdf_task.delay(order_id)
+        return
+    except Exception as e:
+        # No Celery, or the broker is unreachable: render it inline as before
+        logger.warning(f"Could not queue invoice for order {order_id}, rendering inline: {e}")
+    try:
+        from payments.services import save_invoice_pdf_file
+        save_invoice_pdf_file(Order.objects.get(pk=order_id))
+    except Exception as e:
+        logger.warning(f"Invoice for order {order_id} failed: {e}")
+
+
+def commit(priced: PricedOrder) -> None:
+    """Write the priced order in one short transaction."""
+    order = priced.order
+    fields = {name: getattr(order, name) for name in PRICED_FIELDS}
+    began = time.perf_counter()
+    with transaction.atomic():
+        metadata = (
+            Order.objects.select_for_update()
+            .filter(pk=order.pk, status=Order.STATUS_PENDING)
+            .values_list("metadata", flat=True)
+            .first()
+        )
+        if metadata is None:
+            raise CheckoutError("This order is no longer awaiting payment.", status=409)
+        current = OrderItem.objects.filter(order_id=order.pk).values_list(
+            "pk", "menu_item_id", "quantity", "unit_price"
+        )
+        if _items_signature(current) != priced.items_signature:
+            raise CheckoutError("Your cart changed during checkout. Please review it and try again.", status=409)
+
+        metadata = dict(metadata or {})
+        previous = metadata.get("checkout") or {}
+        metadata["service_type"] = priced.service_type
+        if previous.get("idempotency_key") != priced.idempotency_key:
+            metadata["checkout"] = {"idempotency_key": priced.idempotency_key}
+        Order.objects.filter(pk=order.pk).update(metadata=metadata, updated_at=timezone.now(), **fields)
+        order.metadata = metadata
+
+        # create_checkout_session() reads the coupon from the order extras
+        from engagement.models import OrderExtras
+        if order.coupon_discount > 0:
+            OrderExtras.objects.update_or_create(
+                order=order, name="coupon_discount", defaults={"amount": order.coupon_discount},
+            )
+        else:
+            OrderExtras.objects.filter(order=order, name="coupon_discount").delete()
+
+        if priced.loyalty_reward is not None:
+            from loyalty.services import reserve_reward_for_order
+            reserve_reward_for_order(priced.loyalty_reward, order)
+
+        transaction.on_commit(lambda: _defer_invoice(order.pk))
+
+    elapsed_ms = (time.perf_counter() - began) * 1000
+    budget_ms = getattr(settings, "CHECKOUT_TRANSACTION_WARN_MS", 10)
+    if elapsed_ms > budget_ms:
+        logger.warning(f"Checkout transaction for order {order.pk} took {elapsed_ms:.1f}ms (budget {budget_ms}ms)")
+    else:
+        logger.debug(f"Checkout transaction for order {order.pk} took {elapsed_ms:.1f}ms")
+
+
+# ----------------------------------------------------------------------
+# Stage 3: Stripe, after commit
+# ----------------------------------------------------------------------
+def _remember_session(order_id: int, key: str, session_id: str, url: str,
+                      expires_at: Optional[int], attempt: int) -> None:
+    with transaction.atomic():
+        metadata = (
+            Order.objects.select_for_update().filter(pk=order_id)
+            .values_list("metadata", flat=True).first()
+        )
+        if metadata is None:
+            return
+        metadata = dict(metadata or {})
+        metadata["checkout"] = {
+            "idempotency_key": key, "session_id": session_id, "url": url,
+            "expires_at": expires_at, "attempt": attempt,
+        }
+        Order.objects.filter(pk=order_id).update(metadata=metadata)
+
+
+def _session_open(checkout: Dict[str, Any]) -> bool:
+    """Whether the remembered session can still take a payment (a minute of slack)."""
+    try:
+        expires_at = int(checkout.get("expires_at") or 0)
+    except (TypeError, ValueError):
+        return False
+    return time.time() < expires_at - 60
+
+
+def open_session(priced: PricedOrder, success_url: Optional[str] = None, cancel_url: Optional[str] = None) -> Optional[str]:
+    """Create (or, for a repeated key, fetch) the Stripe Checkout session; returns its URL."""
+    from payments.services import create_checkout_session
+
+    order = priced.order
+    try:
+        session = create_checkout_session(
+            order, success_url=success_url, cancel_url=cancel_url,
+            idempotency_key=priced.stripe_key,
+        )
+    except Exception:
+        logger.exception(f"Stripe Checkout session failed for order {order.pk}")
+        raise CheckoutError("Could not start the payment session. Please try again.", status=502)
+
+    if isinstance(session, dict):
+        session_id, url, expires_at = session.get("id"), session.get("url"), session.get("expires_at")
+    else:
+        session_id, url = getattr(session, "id", None), getattr(session, "url", None)
+        expires_at = getattr(session, "expires_at", None)
+    if url:
+        _remember_session(order.pk, priced.idempotency_key, session_id or "", url,
+                          expires_at, priced.session_attempt)
+    return url
+
+
+# ----------------------------------------------------------------------
+# Pipeline
+# ----------------------------------------------------------------------
+def _result(priced: PricedOrder, checkout_url: Optional[str]) -> Dict[str, Any]:
+    order = priced.order
+    return {
+        "id": order.id,
+        "checkout_url": checkout_url,
+        "total": str(order.grand_total()),
+        "currency": getattr(settings, "STRIPE_CURRENCY", "usd").lower(),
+        "source": priced.service_type,
+        "table_number": (
+            priced.table["table_number"] if priced.table
+            else (priced.table_number or None)
+        ),
+        "idempotency_key": priced.idempotency_key,
+    }
+
+
+def run_checkout(user, req: CheckoutRequest, success_url: Optional[str] = None, cancel_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Price, commit and open the Stripe session for ``user``'s pending order.
+    A key whose session is still open returns it without writing anything.
+    Raises ``CheckoutError``.
+    """
+    priced = price(user, req)
+    previous = (priced.order.metadata or {}).get("checkout") or {}
+    if previous.get("idempotency_key") == priced.idempotency_key and previous.get("url"):
+        if _session_open(previous):
+            return _result(priced, previous["url"])
+        # Expired: Stripe would replay the dead session for the same key
+        priced.session_attempt = int(previous.get("attempt") or 0) + 1
+
+    lock = LOCK_KEY.format(priced.idempotency_key)
+    if not cache.add(lock, 1, LOCK_SECONDS):
+        raise CheckoutError("This checkout is already in progress.", status=409)
+    try:
+        commit(priced)
+        checkout_url = open_session(priced, success_url=success_url, cancel_url=cancel_url)
+    finally:
+        cache.delete(lock)
+    return _result(priced, checkout_url)
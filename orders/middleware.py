@@ -2,11 +2,14 @@
 from __future__ import annotations
 
 import logging
+import time
 from datetime import timedelta
 from typing import Optional
 
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.conf import settings
 from django.core import signing
+from django.core.cache import cache
 from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 
@@ -19,6 +22,8 @@ logger = logging.getLogger(__name__)
 CART_COOKIE_NAME = getattr(settings, "CART_COOKIE_NAME", "rms_cart_uuid")
 CART_COOKIE_MAX_AGE = getattr(settings, "CART_COOKIE_MAX_AGE", 60 * 60 * 24 * 30)  # 30 days
 CART_COOKIE_SALT = getattr(settings, "CART_COOKIE_SALT", "rms.cart.cookie.v1")
+# Expired-cart sweep runs at most this often instead of on every request
+CART_EXPIRY_SWEEP_SECONDS = getattr(settings, "CART_EXPIRY_SWEEP_SECONDS", 60)
 
 
 def _get_signed_cart_uuid(request) -> Optional[str]:
@@ -59,21 +64,42 @@ class EnsureCartInitializedMiddleware(MiddlewareMixin):
     """
 
     CART_EXPIRY_MINUTES = 25  # kept from your code to work with SessionCartManager
+    _last_sweep = float("-inf")
 
     def __init__(self, get_response):
         self.get_response = get_response
         super().__init__(get_response)
 
     def __call__(self, request):
-        # Skip cart ops for admin & docs
-        if request.path.startswith("/admin/") or request.path.startswith("/api/docs/"):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        if self._skip(request):
             return self.get_response(request)
+        is_authed = self._before(request)
+        response = self.get_response(request)
+        self._after(request, response, is_authed)
+        return response
 
-        # Ensure session exists
+    async def _acall(self, request):
+        # ASGI: the cart bookkeeping runs in a worker thread, the view on the event loop
+        if self._skip(request):
+            return await self.get_response(request)
+        is_authed = await sync_to_async(self._before)(request)
+        response = await self.get_response(request)
+        await sync_to_async(self._after)(request, response, is_authed)
+        return response
+
+    @staticmethod
+    def _skip(request) -> bool:
+        # Skip cart ops for admin & docs
+        return request.path.startswith("/admin/") or request.path.startswith("/api/docs/")
+
+    def _before(self, request) -> bool:
+        # Ensure session exists. New sessions are marked modified so the cookie is
+        # sent; existing ones are not, so unchanged sessions are never rewritten.
         if not hasattr(request, 'session') or not request.session.session_key:
             request.session.create()
-        # Force browser to keep the session cookie on next response
-        request.session.modified = True
+            request.session.modified = True
 
         # ---------- Sticky reattach for guests ----------
         user = getattr(request, "user", None)
@@ -100,20 +126,15 @@ class EnsureCartInitializedMiddleware(MiddlewareMixin):
                         )
 
         # ---------- Expiration / Initialization ----------
-        # Clean up expired carts (older than 25 minutes)
-        expiry_time = timezone.now() - timedelta(minutes=self.CART_EXPIRY_MINUTES)
-        Cart.objects.filter(
-            updated_at__lt=expiry_time,
-            status=Cart.STATUS_ACTIVE
-        ).update(status=Cart.STATUS_EXPIRED)
-        
+        # Clean up expired carts (older than 25 minutes), at most once per sweep interval
+        self._sweep_expired_carts()
+
         # Ensure user has an active cart
         cart_result = get_or_create_cart(request)
         logger.debug("Ensured cart %s for session: %s", cart_result.cart.cart_uuid, request.session.session_key)
+        return is_authed
 
-        # Process the request
-        response = self.get_response(request)
-
+    def _after(self, request, response, is_authed: bool) -> None:
         # ---------- Mirror guest cart UUID into signed cookie ----------
         if not is_authed:
             active_cart = Cart.objects.filter(
@@ -122,8 +143,23 @@ class EnsureCartInitializedMiddleware(MiddlewareMixin):
             if active_cart:
                 _set_signed_cart_cookie(response, str(active_cart.cart_uuid))
 
-        return response
+    def _sweep_expired_carts(self):
+        """Expire stale carts; throttled per process and across workers via the cache."""
+        now = time.monotonic()
+        if now - EnsureCartInitializedMiddleware._last_sweep < CART_EXPIRY_SWEEP_SECONDS:
+            return
+        EnsureCartInitializedMiddleware._last_sweep = now
+        try:
+            if not cache.add("orders:cart_expiry_sweep", 1, CART_EXPIRY_SWEEP_SECONDS):
+                return
+        except Exception:
+            pass
+        expiry_time = timezone.now() - timedelta(minutes=self.CART_EXPIRY_MINUTES)
+        Cart.objects.filter(
+            updated_at__lt=expiry_time,
+            status=Cart.STATUS_ACTIVE
+        ).update(status=Cart.STATUS_EXPIRED)
 
     def process_request(self, request):
-        # kept for compatibility; logic lives in __call__
+        # kept for compatibility; logic lives in _before/_after
         pass
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2025-09-24 09:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0004_menuitem_reserved_quantity_modifier_reserved_quantity'),
+        ('orders', '0004_alter_cart_source_alter_order_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('item', 'Menu Item'), ('modifier', 'Modifier')], help_text='Whether object_id refers to a menu item or a modifier', max_length=10)),
+                ('object_id', models.PositiveIntegerField(help_text='Menu item or modifier id')),
+                ('quantity', models.PositiveIntegerField(help_text='Units held')),
+                ('expires_at', models.DateTimeField(help_text='When the hold lapses and the units are released')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cart', models.ForeignKey(db_constraint=False, help_text='Cart holding the units', on_delete=django.db.models.deletion.DO_NOTHING, related_name='stock_reservations', to='orders.cart')),
+            ],
+            options={
+                'verbose_name': 'Stock Reservation',
+                'verbose_name_plural': 'Stock Reservations',
+                'indexes': [models.Index(fields=['expires_at'], name='stock_resv_expires_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cart', 'kind', 'object_id'), name='unique_cart_stock_reservation')],
+            },
+        ),
+    ]
@@ -451,25 +451,29 @@ class Cart(models.Model):
     @transaction.atomic
     def calculate_totals(self, save=True):
         """Comprehensive cart total calculation with all fees and discounts."""
-        items = self.items.select_related('menu_item').all()
+        items = list(self.items.select_related('menu_item').all())
         
         # Calculate base subtotal and modifier total
         subtotal = Decimal('0.00')
         modifier_total = Decimal('0.00')
         
+        # All selected modifiers in one query
+        from .read_models import modifier_lookup
+        modifiers_by_id = modifier_lookup(items)
+        
         for item in items:
             item_subtotal = item.menu_item.price * item.quantity
             subtotal += item_subtotal
             
             # Calculate modifier costs
             for modifier_data in item.selected_modifiers:
-                modifier_id = modifier_data.get('modifier_id')
                 modifier_qty = modifier_data.get('quantity', 1)
                 try:
-                    modifier = Modifier.objects.get(id=modifier_id, is_available=True)
-                    modifier_total += modifier.price * modifier_qty * item.quantity
-                except Modifier.DoesNotExist:
+                    modifier = modifiers_by_id.get(int(modifier_data.get('modifier_id')))
+                except (TypeError, ValueError):
                     continue
+                if modifier is not None:
+                    modifier_total += modifier.price * modifier_qty * item.quantity
         
         self.subtotal = q2(subtotal)
         self.modifier_total = q2(modifier_total)
@@ -593,10 +597,14 @@ class Cart(models.Model):
         self.calculate_totals()
     
     def mark_abandoned(self):
-        """Mark cart as abandoned for analytics."""
+        """Mark cart as abandoned for analytics and release its stock holds."""
         self.status = self.STATUS_ABANDONED
         self.abandoned_at = timezone.now()
         self.save(update_fields=['status', 'abandoned_at', 'updated_at'])
+        
+        from .stock import release_cart
+        cart_id = self.pk
+        transaction.on_commit(lambda: release_cart(cart_id))
     
     def mark_converted(self):
         """Mark cart as converted to order."""
@@ -652,15 +660,19 @@ class Cart(models.Model):
     
     @classmethod
     def cleanup_expired_carts(cls, days_old=7):
-        """Clean up old expired carts."""
+        """
+        Delete old expired/abandoned carts (and their items) in raw batches,
+        without loading them or firing signals. Their stock holds expired long
+        ago and are released by ``release_expired_stock_holds_task``.
+        """
+        from core.retention import purge
+
         cutoff_date = timezone.now() - timedelta(days=days_old)
         expired_carts = cls.objects.filter(
             status__in=[cls.STATUS_EXPIRED, cls.STATUS_ABANDONED],
             updated_at__lt=cutoff_date
         )
-        count = expired_carts.count()
-        expired_carts.delete()
-        return count
+        return purge(expired_carts)
     
     def __str__(self):
         owner = self.user.username if self.user else f"Guest ({self.session_key[:8]}...)"
@@ -866,23 +878,37 @@ class CartItem(models.Model):
         self.calculate_totals()
         
         self.full_clean()
+        
+        # Hold limited stock for the cart; raises InsufficientStock before saving
+        from .stock import reserve_cart_item
+        reserve_cart_item(self)
+        
         super().save(*args, **kwargs)
         
         # Update cart totals after saving
         self.cart.calculate_totals()
         self.cart.save()
     
-    def calculate_totals(self):
-        """Calculate modifier total and line total for this item."""
+    def calculate_totals(self, modifiers_by_id=None):
+        """
+        Calculate modifier total and line total for this item.
+        ``modifiers_by_id`` (available modifiers keyed by id) avoids a query
+        per modifier when pricing many items.
+        """
         modifier_total = Decimal('0.00')
         
         for modifier_data in self.selected_modifiers:
             modifier_id = modifier_data.get('modifier_id')
             modifier_qty = modifier_data.get('quantity', 1)
             try:
-                modifier = Modifier.objects.get(id=modifier_id, is_available=True)
+                if modifiers_by_id is not None:
+                    modifier = modifiers_by_id.get(int(modifier_id))
+                    if modifier is None:
+                        raise Modifier.DoesNotExist
+                else:
+                    modifier = Modifier.objects.get(id=modifier_id, is_available=True)
                 modifier_total += modifier.price * modifier_qty
-            except Modifier.DoesNotExist:
+            except (Modifier.DoesNotExist, TypeError, ValueError):
                 continue
         
         self.modifier_total = q2(modifier_total)
@@ -891,15 +917,24 @@ class CartItem(models.Model):
         item_price = self.unit_price - self.discount_applied
         self.line_total = q2((item_price + self.modifier_total) * self.quantity)
     
-    def get_modifier_details(self):
-        """Get detailed modifier information with names and prices."""
+    def get_modifier_details(self, modifiers_by_id=None):
+        """
+        Get detailed modifier information with names and prices.
+        ``modifiers_by_id`` (available modifiers keyed by id) avoids a query
+        per modifier when serializing many items.
+        """
         modifier_details = []
         
         for modifier_data in self.selected_modifiers:
             modifier_id = modifier_data.get('modifier_id')
             modifier_qty = modifier_data.get('quantity', 1)
             try:
-                modifier = Modifier.objects.get(id=modifier_id, is_available=True)
+                if modifiers_by_id is not None:
+                    modifier = modifiers_by_id.get(int(modifier_id))
+                    if modifier is None:
+                        raise Modifier.DoesNotExist
+                else:
+                    modifier = Modifier.objects.get(id=modifier_id, is_available=True)
                 modifier_details.append({
                     'id': modifier.id,
                     'name': modifier.name,
@@ -907,7 +942,7 @@ class CartItem(models.Model):
                     'quantity': modifier_qty,
                     'total': float(modifier.price * modifier_qty)
                 })
-            except Modifier.DoesNotExist:
+            except (Modifier.DoesNotExist, TypeError, ValueError):
                 continue
         
         return modifier_details
@@ -1914,6 +1949,11 @@ class Order(models.Model):
             # Mark cart as converted
             cart.mark_converted()
 
+            # Keep the cart's stock holds until payment commits them
+            from .stock import extend_cart
+            cart_id = cart.pk
+            transaction.on_commit(lambda: extend_cart(cart_id))
+
             return order
     
     def __str__(self):
@@ -2315,3 +2355,59 @@ class OrderStatusHistory(models.Model):
         change_desc = f"{self.previous_status or 'None'} → {self.new_status}"
         user_desc = f" by {self.changed_by.username}" if self.changed_by else " (System)"
         return f"Order #{self.order.order_number or self.order.id}: {change_desc}{user_desc}"
+
+
+class StockReservation(models.Model):
+    """
+    Units of a limited menu item or modifier held by a cart (database
+    fallback of ``orders.stock``; mirrors ``reserved_quantity`` on the menu
+    row). Rows outlive their cart on purpose: the expiry sweep gives the
+    units back even if the cart itself was deleted.
+    """
+
+    KIND_ITEM = "item"
+    KIND_MODIFIER = "modifier"
+    KIND_CHOICES = [
+        (KIND_ITEM, "Menu Item"),
+        (KIND_MODIFIER, "Modifier"),
+    ]
+
+    cart = models.ForeignKey(
+        Cart,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="stock_reservations",
+        help_text="Cart holding the units"
+    )
+    kind = models.CharField(
+        max_length=10,
+        choices=KIND_CHOICES,
+        help_text="Whether object_id refers to a menu item or a modifier"
+    )
+    object_id = models.PositiveIntegerField(
+        help_text="Menu item or modifier id"
+    )
+    quantity = models.PositiveIntegerField(
+        help_text="Units held"
+    )
+    expires_at = models.DateTimeField(
+        help_text="When the hold lapses and the units are released"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Stock Reservation"
+        verbose_name_plural = "Stock Reservations"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "kind", "object_id"],
+                name="unique_cart_stock_reservation",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="stock_resv_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"Cart {self.cart_id}: {self.quantity} x {self.kind} {self.object_id}"
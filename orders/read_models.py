@@ -0,0 +1,113 @@
+# orders/read_models.py
+"""
+Read-model querysets for cart and order endpoints.
+
+``orders.serializers`` reads the annotations (``item_quantity``,
+``item_line_count``) and prefetches declared here, so list endpoints run a
+fixed number of queries regardless of page size. Nested menu items reuse
+``menu.read_models.menu_item_prefetches``.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List
+
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.query import prefetch_related_objects
+
+from menu.models import Modifier
+from menu.read_models import menu_item_prefetches
+
+from .models import Cart, CartItem, Order, OrderItem, OrderStatusHistory
+
+
+def _line_aggregate(model, parent_field: str, aggregate):
+    lines = model.objects.filter(**{parent_field: OuterRef('pk')}).order_by().values(parent_field)
+    return Coalesce(
+        Subquery(lines.annotate(value=aggregate).values('value')[:1], output_field=IntegerField()),
+        0,
+    )
+
+
+# ----------------------------------------------------------------------
+# Orders
+# ----------------------------------------------------------------------
+def order_prefetches() -> List[Prefetch]:
+    return [
+        Prefetch('items', queryset=OrderItem.objects.select_related('menu_item')),
+        *menu_item_prefetches('items__menu_item__'),
+        Prefetch(
+            'status_history',
+            queryset=OrderStatusHistory.objects.select_related('changed_by').order_by('created_at'),
+        ),
+    ]
+
+
+def order_read_queryset(queryset=None):
+    """Queryset for OrderSerializer / OrderListSerializer."""
+    if queryset is None:
+        queryset = Order.objects.all()
+    return queryset.select_related('user', 'table').annotate(
+        item_quantity=_line_aggregate(OrderItem, 'order', Sum('quantity')),
+        item_line_count=_line_aggregate(OrderItem, 'order', Count('pk')),
+    ).prefetch_related(*order_prefetches())
+
+
+def order_item_read_queryset(queryset=None):
+    """Queryset for OrderItemSerializer."""
+    if queryset is None:
+        queryset = OrderItem.objects.all()
+    return queryset.select_related(
+        'order', 'order__user', 'order__table', 'menu_item'
+    ).prefetch_related(*menu_item_prefetches('menu_item__'))
+
+
+# ----------------------------------------------------------------------
+# Carts
+# ----------------------------------------------------------------------
+def cart_prefetches() -> List[Prefetch]:
+    return [
+        Prefetch('items', queryset=CartItem.objects.select_related('menu_item')),
+        *menu_item_prefetches('items__menu_item__'),
+    ]
+
+
+def cart_read_queryset(queryset=None):
+    """Queryset for CartSerializer."""
+    if queryset is None:
+        queryset = Cart.objects.all()
+    return queryset.select_related('user', 'table').annotate(
+        item_quantity=_line_aggregate(CartItem, 'cart', Sum('quantity')),
+    ).prefetch_related(*cart_prefetches())
+
+
+def prefetch_cart(cart: Cart) -> Cart:
+    """Load the read model onto an already-fetched cart instance."""
+    prefetch_related_objects([cart], 'user', 'table', *cart_prefetches())
+    return cart
+
+
+def modifier_lookup(cart_items: Iterable[CartItem]) -> Dict[int, Modifier]:
+    """
+    Available modifiers referenced by ``selected_modifiers`` of the given cart
+    items, loaded in one query (passed to CartItemSerializer via the
+    ``modifiers_by_id`` context key).
+    """
+    ids = set()
+    for item in cart_items:
+        for entry in item.selected_modifiers or []:
+            if isinstance(entry, dict) and entry.get('modifier_id'):
+                try:
+                    ids.add(int(entry['modifier_id']))
+                except (TypeError, ValueError):
+                    continue
+    if not ids:
+        return {}
+    return Modifier.objects.filter(pk__in=ids, is_available=True).in_bulk()
+
+
+def cart_serializer_context(carts: Iterable[Cart], context: Dict) -> Dict:
+    """Extend a serializer context with the modifier lookup for ``carts``."""
+    items = [item for cart in carts for item in cart.items.all()]
+    return {**context, 'modifiers_by_id': modifier_lookup(items)}
@@ -64,9 +64,9 @@ class CartItemSerializer(serializers.ModelSerializer):
         ]
     
     def get_modifier_details(self, obj):
-        """Get detailed modifier information."""
+        """Get detailed modifier information (from the context lookup when provided)."""
         try:
-            return obj.get_modifier_details()
+            return obj.get_modifier_details(self.context.get('modifiers_by_id'))
         except AttributeError:
             return []
     
@@ -191,6 +191,9 @@ class CartSerializer(_ForbidWriteFieldsMixin, serializers.ModelSerializer):
     
     def get_item_count(self, obj):
         """Get total number of items in cart."""
+        quantity = getattr(obj, 'item_quantity', None)
+        if quantity is not None:
+            return quantity
         return sum(item.quantity for item in obj.items.all())
     
     def get_total_discount(self, obj):
@@ -342,11 +345,11 @@ class OrderItemSerializer(serializers.ModelSerializer):
             'id', 'item_uuid', 'menu_item', 'quantity', 'unit_price', 'modifiers',
             'modifier_total', 'line_total', 'discount_applied', 'notes', 'is_gift',
             'gift_message', 'status', 'preparation_notes', 'modifier_details',
-            'is_discounted', 'preparation_time_remaining', 'created_at', 'updated_at'
+            'is_discounted', 'preparation_time_remaining', 'created_at'
         ]
         read_only_fields = [
             'id', 'item_uuid', 'modifier_total', 'line_total', 'modifier_details',
-            'is_discounted', 'preparation_time_remaining', 'created_at', 'updated_at'
+            'is_discounted', 'preparation_time_remaining', 'created_at'
         ]
     
     def get_modifier_details(self, obj):
@@ -390,7 +393,7 @@ class OrderSerializer(_ForbidWriteFieldsMixin, serializers.ModelSerializer):
             'order_uuid', 'order_number', 'user', 'status', 'delivery_option',
             'table_name', 'subtotal', 'modifier_total', 'discount_amount',
             'coupon_discount', 'loyalty_discount', 'total_discount', 'tip_amount',
-            'tip_percentage', 'delivery_fee', 'service_fee', 'tax_amount', 'tax_rate',
+            'delivery_fee', 'service_fee', 'tax_amount', 'tax_rate',
             'total_amount', 'refund_amount', 'notes', 'items', 'item_count',
             'delivery_address', 'delivery_instructions', 'estimated_delivery_time',
             'actual_delivery_time', 'customer_name', 'customer_phone', 'customer_email',
@@ -416,6 +419,9 @@ class OrderSerializer(_ForbidWriteFieldsMixin, serializers.ModelSerializer):
     
     def get_item_count(self, obj):
         """Get total number of items in order."""
+        quantity = getattr(obj, 'item_quantity', None)
+        if quantity is not None:
+            return quantity
         return sum(item.quantity for item in obj.items.all())
     
     def get_total_discount(self, obj):
@@ -446,7 +452,11 @@ class OrderSerializer(_ForbidWriteFieldsMixin, serializers.ModelSerializer):
 
     def get_status_timeline(self, obj):
         try:
-            events = obj.status_history.order_by('created_at')
+            # Prefetched in created_at order by orders.read_models
+            if 'status_history' in getattr(obj, '_prefetched_objects_cache', {}):
+                events = obj.status_history.all()
+            else:
+                events = obj.status_history.select_related('changed_by').order_by('created_at')
             out = []
             for e in events:
                 out.append({
@@ -509,5 +519,8 @@ class OrderListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'order_uuid', 'order_number', 'user', 'total_amount', 'created_at']
     
     def get_item_count(self, obj):
-        """Get total number of items in order."""
+        """Get number of lines in order."""
+        count = getattr(obj, 'item_line_count', None)
+        if count is not None:
+            return count
         return obj.items.count()
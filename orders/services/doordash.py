@@ -39,12 +39,13 @@ class DoorDashService:
             'Accept': 'application/json'
         }
     
-    def create_delivery_quote(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+    def create_delivery_quote(self, order_data: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Create a delivery quote for an order.
         
         Args:
             order_data: Order information including pickup/delivery addresses
+            timeout: Request timeout in seconds (None waits indefinitely)
             
         Returns:
             Quote response with pricing and estimated times
@@ -71,7 +72,7 @@ class DoorDashService:
         }
         
         try:
-            response = requests.post(endpoint, json=payload, headers=self.headers)
+            response = requests.post(endpoint, json=payload, headers=self.headers, timeout=timeout)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -5,6 +5,7 @@ This module provides integration with Uber Eats API for order management.
 Replace placeholder API keys with actual keys from Uber Developer Portal.
 """
 
+import json
 import requests
 import logging
 from typing import Dict, Any, Optional
@@ -27,6 +28,9 @@ class UberEatsService:
         self.client_secret = getattr(settings, 'UBEREATS_CLIENT_SECRET', 'UE_SECRET_PLACEHOLDER')
         self.access_token = getattr(settings, 'UBEREATS_ACCESS_TOKEN', 'UE_TOKEN_PLACEHOLDER')
         self.environment = getattr(settings, 'UBEREATS_ENVIRONMENT', 'sandbox')
+        self.customer_id = (
+            getattr(settings, 'UBEREATS_CUSTOMER_ID', '') or getattr(settings, 'UBEREATS_MERCHANT_ID', '')
+        )
         
         # API endpoints
         if self.environment == 'production':
@@ -69,6 +73,48 @@ class UberEatsService:
                 }
             }
     
+    def create_delivery_quote(self, quote_data: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get an Uber Direct delivery quote.
+        
+        Args:
+            quote_data: pickup_address/dropoff_address dicts (street, city,
+                state, zip_code) and optional dropoff lat/lng and order value
+            timeout: Request timeout in seconds (None waits indefinitely)
+            
+        Returns:
+            Quote with fee (cents), duration (minutes) and dropoff ETA
+        """
+        endpoint = f"{self.base_url}/v1/customers/{self.customer_id}/delivery_quotes"
+        
+        def _address(address: Dict[str, Any]) -> str:
+            return json.dumps({
+                "street_address": [address.get('street', '')],
+                "city": address.get('city', ''),
+                "state": address.get('state', ''),
+                "zip_code": address.get('zip_code', ''),
+                "country": address.get('country', 'US'),
+            })
+        
+        payload = {
+            "pickup_address": _address(quote_data['pickup_address']),
+            "dropoff_address": _address(quote_data['dropoff_address']),
+            "dropoff_latitude": quote_data.get('dropoff_latitude'),
+            "dropoff_longitude": quote_data.get('dropoff_longitude'),
+            "manifest_total_value": quote_data.get('order_value', 0),
+        }
+        
+        try:
+            response = requests.post(endpoint, json=payload, headers=self.headers, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            logger.error(f"Uber Eats delivery quote request failed: {e}")
+            return {
+                'error': 'Failed to get delivery quote from Uber Eats',
+                'details': str(e),
+            }
+    
     def update_menu(self, restaurant_id: str, menu_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Update restaurant menu on Uber Eats.
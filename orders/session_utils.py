@@ -308,6 +308,34 @@ class SessionCartManager:
             logger.error(f"Failed to set cart data: {e}")
             return False
     
+    def set_cart_meta(self, meta: Dict[str, Any]) -> bool:
+        """
+        Set cart metadata only, leaving the cart items untouched.
+        With the Redis session engine this rewrites just the cart_meta field.
+        
+        Args:
+            meta: Cart metadata
+            
+        Returns:
+            True if setting successful, False otherwise
+        """
+        try:
+            if not self.ensure_session_exists():
+                return False
+            
+            if not isinstance(meta, dict):
+                meta = {}
+            
+            self.session["cart_meta"] = meta
+            self.session["cart_last_modified"] = timezone.now().isoformat()
+            self.session.modified = True
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to set cart meta: {e}")
+            return False
+    
     def _get_default_cart_data(self) -> Dict[str, Any]:
         """Get default cart data structure."""
         return {
@@ -363,6 +391,7 @@ class SessionCartManager:
                             # Save the updated session
                             session.session_data = session.encode(session_data)
                             session.save()
+                            _evict_cached_session(session.session_key)
                             cleared_count += 1
                             
                 except Exception as e:
@@ -377,6 +406,22 @@ class SessionCartManager:
             return 0
 
 
+def _evict_cached_session(session_key: str) -> None:
+    """
+    Drop any cached copy of a session after its database row was edited directly,
+    so engines that keep sessions outside the database (core.session_store)
+    re-read the row on next access.
+    """
+    try:
+        from importlib import import_module
+        store_class = import_module(settings.SESSION_ENGINE).SessionStore
+        evict = getattr(store_class, "evict", None)
+        if evict:
+            evict(session_key)
+    except Exception as e:
+        logger.warning(f"Failed to evict cached session {session_key}: {e}")
+
+
 def get_session_cart_manager(request: HttpRequest) -> SessionCartManager:
     """
     Factory function to get a SessionCartManager instance.
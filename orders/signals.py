@@ -1,8 +1,13 @@
+import logging
+
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver, Signal
 from menu.models import MenuItem, Modifier
 from .cache_utils import invalidate_menu_item_cache, invalidate_modifier_cache
 
+logger = logging.getLogger(__name__)
+
 
 @receiver(post_save, sender=MenuItem)
 def invalidate_menu_item_on_save(sender, instance, **kwargs):
@@ -39,3 +44,46 @@ def invalidate_modifier_on_delete(sender, instance, **kwargs):
     Invalidate modifier cache when a modifier is deleted.
     """
     invalidate_modifier_cache(instance.id)
+
+
+# --- Cart-time stock reservations (orders.stock) ---
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_save, sender=Modifier)
+def invalidate_stock_capacity(sender, instance, raw=False, **kwargs):
+    """
+    Stock or limits may have been edited; drop the Redis capacity mirror so
+    the next reservation reloads it.
+    """
+    if raw:
+        return
+    from .stock import ITEM, MODIFIER, invalidate_capacity
+
+    key = (ITEM if sender is MenuItem else MODIFIER, instance.pk)
+    transaction.on_commit(lambda: invalidate_capacity([key]))
+
+
+@receiver(post_delete, sender="orders.CartItem")
+def release_stock_for_cart_item(sender, instance, **kwargs):
+    """Give back the units a removed cart line was holding."""
+    from .stock import reserve_cart_item
+
+    try:
+        reserve_cart_item(instance, deleting=True)
+    except Exception as e:
+        logger.warning(
+            f"Failed releasing stock holds for cart item {instance.pk}: {e}"
+        )
+
+
+@receiver(post_save, sender="orders.Order")
+def release_stock_for_cancelled_order(sender, instance, raw=False, update_fields=None, **kwargs):
+    """An order cancelled before payment no longer needs its cart's holds."""
+    if raw or not instance.source_cart_id or instance.status != instance.STATUS_CANCELLED:
+        return
+    if update_fields is not None and "status" not in update_fields:
+        return
+    from .stock import release_cart
+
+    cart_id = instance.source_cart_id
+    transaction.on_commit(lambda: release_cart(cart_id))
@@ -0,0 +1,557 @@
+# orders/stock.py
+"""
+Cart-time stock reservations for limited menu items and modifiers.
+
+Adding a limited item to a cart holds the units until the cart expires, so
+two customers can never both check out the last portion. "Limited" means:
+
+- a ``MenuItem`` with ``track_inventory`` (capacity ``stock_quantity``);
+- a ``Modifier`` with ``track_inventory`` and/or a ``daily_limit``
+  (capacity ``min(stock_quantity, daily_limit - today's count)``).
+
+Holds are expressed as "this cart wants N units of X" for every limited key
+the cart touches, and are applied all-or-nothing:
+
+Redis (primary)
+    ``<prefix>:stock:<kind>:<id>:cap``   capacity mirror, loaded from the row
+                                         on first use, short TTL
+    ``<prefix>:stock:<kind>:<id>:held``  units held by all carts
+    ``<prefix>:stock:hold:<cart_id>``    hash ``<kind>:<id> -> units``
+    ``<prefix>:stock:holds``             zset of cart ids by hold expiry
+
+    A single Lua script checks and moves every key of a cart line, so a
+    reservation is one round trip with no locks; reading availability is a
+    single ``MGET``.
+
+Database (fallback when Redis is unavailable)
+    Conditional single-row ``UPDATE ... SET reserved_quantity =
+    reserved_quantity + n WHERE capacity >= reserved_quantity + n`` plus a
+    ``StockReservation`` row per cart and key.
+
+Holds are committed when the order is paid (the depletion engine then takes
+the stock for real), released when the cart is abandoned or a line removed,
+and expired by ``release_expired_stock_holds_task``.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from menu.counters import bucket_date, pending_daily
+from menu.models import MenuItem, Modifier
+
+logger = logging.getLogger(__name__)
+
+ITEM = "item"
+MODIFIER = "modifier"
+
+Key = Tuple[str, int]
+
+_line_sync_paused: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "rms_stock_line_sync_paused", default=False
+)
+
+
+class InsufficientStock(ValidationError):
+    """Raised when a cart asks for more limited units than are free."""
+
+    def __init__(self, kind: str, obj, available: int):
+        self.kind = kind
+        self.object_id = obj.pk
+        self.available = max(0, int(available))
+        super().__init__(
+            f"Only {self.available} of '{obj.name}' available.",
+            code="insufficient_stock",
+        )
+
+
+# ----------------------------------------------------------------------
+# Capacity
+# ----------------------------------------------------------------------
+def capacity(kind: str, obj, pending: Optional[int] = None) -> Optional[int]:
+    """
+    Units ``obj`` can sell in total, or None when it is not limited.
+    ``pending``: the modifier's buffered daily increments, when already
+    fetched for a whole set with ``menu.counters.pending_daily``.
+    """
+    limits = []
+    if obj.track_inventory:
+        limits.append(obj.stock_quantity)
+    if kind == MODIFIER and obj.daily_limit:
+        limits.append(obj.daily_limit - obj.daily_count_today(pending))
+    if not limits:
+        return None
+    return max(0, min(limits))
+
+
+def _is_limited(kind: str, obj) -> bool:
+    # Same test as capacity() is not None, without reading the daily count
+    return bool(obj.track_inventory or (kind == MODIFIER and obj.daily_limit))
+
+
+def _pending_daily(keys) -> Dict[int, int]:
+    """Buffered daily increments for the limited modifiers among ``keys``, in one lookup."""
+    return pending_daily([object_id for kind, object_id in keys if kind == MODIFIER])
+
+
+def _model(kind: str):
+    return MenuItem if kind == ITEM else Modifier
+
+
+def _modifier_selections(selected_modifiers) -> List[Tuple[int, int]]:
+    selections = []
+    for entry in selected_modifiers or []:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            selections.append((int(entry.get("modifier_id")), int(entry.get("quantity") or 1)))
+        except (TypeError, ValueError):
+            continue
+    return selections
+
+
+def hold_expiry(cart):
+    """Holds last as long as the cart, but at least ``STOCK_HOLD_SECONDS``."""
+    minimum = timezone.now() + timedelta(seconds=int(getattr(settings, "STOCK_HOLD_SECONDS", 1500)))
+    if cart is not None and cart.expires_at and cart.expires_at > minimum:
+        return cart.expires_at
+    return minimum
+
+
+# ----------------------------------------------------------------------
+# Redis backend
+# ----------------------------------------------------------------------
+# KEYS: hold hash, expiry zset, then (cap, held) per limited key
+# ARGV: cart id, hold expiry (epoch), cap ttl, then (field, wanted, capacity) per key
+_RESERVE_SCRIPT = """
+local n = (#KEYS - 2) / 2
+local diffs = {}
+for i = 1, n do
+  local cap_key, held_key = KEYS[2 * i + 1], KEYS[2 * i + 2]
+  local field, want, fallback = ARGV[3 * i + 1], tonumber(ARGV[3 * i + 2]), ARGV[3 * i + 3]
+  local cap = redis.call('GET', cap_key)
+  if not cap then
+    redis.call('SET', cap_key, fallback, 'EX', ARGV[3])
+    cap = fallback
+  end
+  local current = tonumber(redis.call('HGET', KEYS[1], field) or '0')
+  local diff = want - current
+  if diff > 0 then
+    local free = tonumber(cap) - tonumber(redis.call('GET', held_key) or '0')
+    if free < diff then
+      return {0, i, free + current}
+    end
+  end
+  diffs[i] = diff
+end
+for i = 1, n do
+  if diffs[i] ~= 0 then
+    redis.call('INCRBY', KEYS[2 * i + 2], diffs[i])
+    if tonumber(ARGV[3 * i + 2]) > 0 then
+      redis.call('HSET', KEYS[1], ARGV[3 * i + 1], ARGV[3 * i + 2])
+    else
+      redis.call('HDEL', KEYS[1], ARGV[3 * i + 1])
+    end
+  end
+end
+if redis.call('HLEN', KEYS[1]) > 0 then
+  redis.call('EXPIREAT', KEYS[1], tonumber(ARGV[2]) + 86400)
+  redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+else
+  redis.call('DEL', KEYS[1])
+  redis.call('ZREM', KEYS[2], ARGV[1])
+end
+return {1, 0, 0}
+"""
+
+# KEYS: hold hash, expiry zset; ARGV: cart id, key prefix, 'commit' or 'release'
+_RELEASE_SCRIPT = """
+local fields = redis.call('HGETALL', KEYS[1])
+for i = 1, #fields, 2 do
+  local base = ARGV[2] .. fields[i]
+  local q = tonumber(fields[i + 1])
+  if redis.call('DECRBY', base .. ':held', q) < 0 then
+    redis.call('SET', base .. ':held', 0)
+  end
+  if ARGV[3] == 'commit' and redis.call('EXISTS', base .. ':cap') == 1 then
+    redis.call('DECRBY', base .. ':cap', q)
+  end
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+return fields
+"""
+
+
+def _prefix() -> str:
+    return f"{getattr(settings, 'CACHE_KEY_PREFIX', 'rms')}:stock:"
+
+
+def _field(key: Key) -> str:
+    return f"{key[0]}:{key[1]}"
+
+
+def _hold_key(cart_id: int) -> str:
+    return f"{_prefix()}hold:{cart_id}"
+
+
+def _holds_key() -> str:
+    return f"{_prefix()}holds"
+
+
+def _redis():
+    if getattr(settings, "STOCK_RESERVATION_BACKEND", "auto") == "db":
+        return None
+    from core.cache_service import CacheService
+    return CacheService.get_redis_client(write=True)
+
+
+def _redis_reserve(client, cart_id: int, wanted: Dict[Key, Tuple[object, int]], expires_at) -> None:
+    prefix = _prefix()
+    keys = [_hold_key(cart_id), _holds_key()]
+    argv = [cart_id, int(expires_at.timestamp()), int(getattr(settings, "STOCK_CAPACITY_TTL", 60))]
+    ordered = list(wanted.items())
+    pending = _pending_daily(wanted)
+    for key, (obj, units) in ordered:
+        base = prefix + _field(key)
+        keys += [f"{base}:cap", f"{base}:held"]
+        # Units held through the database fallback are not free either
+        total = capacity(key[0], obj, pending.get(key[1], 0) if key[0] == MODIFIER else None)
+        argv += [_field(key), units, max(0, total - obj.reserved_quantity)]
+    ok, index, available = client.eval(_RESERVE_SCRIPT, len(keys), *keys, *argv)
+    if not int(ok):
+        (kind, _), (obj, _) = ordered[int(index) - 1]
+        raise InsufficientStock(kind, obj, int(available))
+
+
+def _parse_field(value) -> Key:
+    if isinstance(value, bytes):
+        value = value.decode()
+    kind, _, object_id = value.partition(":")
+    return kind, int(object_id)
+
+
+def _redis_finish(client, cart_id: int, mode: str) -> List[Key]:
+    fields = client.eval(_RELEASE_SCRIPT, 2, _hold_key(cart_id), _holds_key(), cart_id, _prefix(), mode)
+    return [_parse_field(value) for value in fields[::2]]
+
+
+# ----------------------------------------------------------------------
+# Database backend
+# ----------------------------------------------------------------------
+def _db_condition(kind: str, diff: int) -> Q:
+    stock_ok = Q(track_inventory=False) | Q(stock_quantity__gte=F("reserved_quantity") + diff)
+    if kind == ITEM:
+        return stock_ok
+    # A count stored for an earlier day no longer uses up the limit
+    today = bucket_date()
+    return stock_ok & (
+        Q(daily_limit__isnull=True)
+        | Q(daily_count_date=today, daily_limit__gte=F("daily_count") + F("reserved_quantity") + diff)
+        | (~Q(daily_count_date=today) & Q(daily_limit__gte=F("reserved_quantity") + diff))
+    )
+
+
+def _db_adjust(kind: str, object_id: int, diff: int) -> bool:
+    qs = _model(kind).objects.filter(pk=object_id)
+    if diff > 0:
+        return bool(qs.filter(_db_condition(kind, diff)).update(reserved_quantity=F("reserved_quantity") + diff))
+    if diff < 0:
+        qs.filter(reserved_quantity__gte=-diff).update(reserved_quantity=F("reserved_quantity") + diff)
+        qs.filter(reserved_quantity__lt=-diff).update(reserved_quantity=0)
+    return True
+
+
+def _db_reserve(cart_id: int, wanted: Dict[Key, Tuple[object, int]], expires_at) -> None:
+    from .models import StockReservation
+
+    with transaction.atomic():
+        held = {
+            (row.kind, row.object_id): row
+            for row in StockReservation.objects.select_for_update().filter(
+                cart_id=cart_id, object_id__in=[key[1] for key in wanted]
+            )
+        }
+        for key, (obj, units) in wanted.items():
+            row = held.get(key)
+            diff = units - (row.quantity if row else 0)
+            if not _db_adjust(key[0], key[1], diff):
+                fresh = _model(key[0]).objects.get(pk=key[1])
+                available = (capacity(key[0], fresh) or 0) - fresh.reserved_quantity + (row.quantity if row else 0)
+                raise InsufficientStock(key[0], obj, available)
+            if units <= 0:
+                if row:
+                    row.delete()
+            elif row:
+                row.quantity = units
+                row.expires_at = expires_at
+                row.save(update_fields=["quantity", "expires_at", "updated_at"])
+            else:
+                StockReservation.objects.create(
+                    cart_id=cart_id, kind=key[0], object_id=key[1],
+                    quantity=units, expires_at=expires_at,
+                )
+        if wanted:
+            StockReservation.objects.filter(cart_id=cart_id).update(expires_at=expires_at)
+
+
+def _db_release_rows(rows) -> List[Key]:
+    totals: Dict[Key, int] = defaultdict(int)
+    ids = []
+    for row in rows:
+        totals[(row.kind, row.object_id)] += row.quantity
+        ids.append(row.pk)
+    for (kind, object_id), units in totals.items():
+        _db_adjust(kind, object_id, -units)
+    if ids:
+        from .models import StockReservation
+        StockReservation.objects.filter(pk__in=ids).delete()
+    return list(totals)
+
+
+def _db_finish(cart_id: int) -> List[Key]:
+    from .models import StockReservation
+
+    with transaction.atomic():
+        rows = list(StockReservation.objects.select_for_update().filter(cart_id=cart_id))
+        return _db_release_rows(rows)
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+def _limited_modifiers(modifier_ids) -> Dict[Key, object]:
+    keys: Dict[Key, object] = {}
+    if modifier_ids:
+        limited = Modifier.objects.filter(pk__in=list(modifier_ids)).filter(
+            Q(track_inventory=True) | Q(daily_limit__isnull=False)
+        )
+        for modifier in limited:
+            if _is_limited(MODIFIER, modifier):
+                keys[(MODIFIER, modifier.pk)] = modifier
+    return keys
+
+
+def cart_line_keys(menu_item, selected_modifiers) -> Dict[Key, object]:
+    """Limited keys touched by one cart line, mapped to their rows."""
+    keys: Dict[Key, object] = {}
+    if _is_limited(ITEM, menu_item):
+        keys[(ITEM, menu_item.pk)] = menu_item
+    keys.update(_limited_modifiers(
+        {modifier_id for modifier_id, _ in _modifier_selections(selected_modifiers)}
+    ))
+    return keys
+
+
+def _wanted(rows, keys: Dict[Key, object]) -> Dict[Key, Tuple[object, int]]:
+    """Units the cart wants per key: holds are per cart, so every line counts."""
+    totals: Dict[Key, int] = defaultdict(int)
+    for menu_item_id, quantity, selected in rows:
+        if (ITEM, menu_item_id) in keys:
+            totals[(ITEM, menu_item_id)] += quantity
+        for modifier_id, per_item in _modifier_selections(selected):
+            if (MODIFIER, modifier_id) in keys:
+                totals[(MODIFIER, modifier_id)] += per_item * quantity
+    return {key: (obj, totals.get(key, 0)) for key, obj in keys.items()}
+
+
+def _reserve(cart_id: int, wanted: Dict[Key, Tuple[object, int]], expires_at) -> None:
+    client = _redis()
+    if client is not None:
+        try:
+            _redis_reserve(client, cart_id, wanted, expires_at)
+            return
+        except InsufficientStock:
+            raise
+        except Exception as e:
+            logger.warning(f"Redis stock reservation failed for cart {cart_id}, using database: {e}")
+    _db_reserve(cart_id, wanted, expires_at)
+
+
+@contextmanager
+def paused_line_sync():
+    """
+    Skip per-line syncing inside the block; bulk writers (e.g. the cart
+    merge engine) call ``reserve_cart``/``release_cart`` once instead.
+    """
+    token = _line_sync_paused.set(True)
+    try:
+        yield
+    finally:
+        _line_sync_paused.reset(token)
+
+
+def reserve_cart_item(cart_item, deleting: bool = False) -> None:
+    """
+    Bring the cart's holds in line with ``cart_item`` about to be saved (or
+    just deleted). Raises ``InsufficientStock`` before anything is written
+    if the cart would hold more than is free.
+    """
+    if _line_sync_paused.get():
+        return
+    keys = cart_line_keys(cart_item.menu_item, cart_item.selected_modifiers)
+    if not keys:
+        return
+
+    from .models import CartItem
+
+    lines = CartItem.objects.filter(cart_id=cart_item.cart_id)
+    if cart_item.pk:
+        lines = lines.exclude(pk=cart_item.pk)
+    rows = list(lines.values_list("menu_item_id", "quantity", "selected_modifiers"))
+    if not deleting:
+        rows.append((cart_item.menu_item_id, cart_item.quantity, cart_item.selected_modifiers))
+
+    # The cart may already be gone when its lines are deleted in cascade
+    expires_at = hold_expiry(None if deleting else cart_item.cart)
+    _reserve(cart_item.cart_id, _wanted(rows, keys), expires_at)
+
+
+def reserve_cart(cart, rows=None) -> None:
+    """
+    Hold what every line of ``cart`` asks for (bulk counterpart of
+    ``reserve_cart_item``, a fixed number of queries). ``rows`` are
+    (menu_item_id, quantity, selected_modifiers) tuples, read from the
+    cart when omitted.
+    """
+    from .models import CartItem
+
+    if rows is None:
+        rows = list(CartItem.objects.filter(cart_id=cart.pk).values_list(
+            "menu_item_id", "quantity", "selected_modifiers"
+        ))
+    if not rows:
+        return
+    keys: Dict[Key, object] = {
+        (ITEM, item.pk): item
+        for item in MenuItem.objects.filter(pk__in={row[0] for row in rows}, track_inventory=True)
+    }
+    keys.update(_limited_modifiers(
+        {modifier_id for row in rows for modifier_id, _ in _modifier_selections(row[2])}
+    ))
+    if keys:
+        _reserve(cart.pk, _wanted(rows, keys), hold_expiry(cart))
+
+
+def release_cart(cart_id: int) -> int:
+    """Give back every unit held by the cart (abandonment / expiry)."""
+    return len(_finish(cart_id, "release"))
+
+
+def commit_cart(cart_id: int) -> int:
+    """
+    Turn the cart's holds into a sale: the units stop being held and the
+    capacity mirror shrinks by the same amount, since the depletion engine
+    takes them from stock in the same transaction. The touched mirrors are
+    dropped once that transaction commits, so none can be reloaded stale.
+    """
+    keys = _finish(cart_id, "commit")
+    if keys:
+        transaction.on_commit(lambda: invalidate_capacity(keys))
+    return len(keys)
+
+
+def _finish(cart_id: int, mode: str) -> List[Key]:
+    keys = set()
+    client = _redis()
+    if client is not None:
+        try:
+            keys.update(_redis_finish(client, cart_id, mode))
+        except Exception as e:
+            logger.warning(f"Redis stock {mode} failed for cart {cart_id}: {e}")
+    # Holds may have been taken by the database path while Redis was down
+    keys.update(_db_finish(cart_id))
+    if keys:
+        logger.info(f"Stock holds {mode}d for cart {cart_id}: {len(keys)} keys")
+    return list(keys)
+
+
+def extend_cart(cart_id: int, seconds: Optional[int] = None) -> None:
+    """Keep the holds alive while checkout/payment is in progress."""
+    seconds = int(seconds or getattr(settings, "STOCK_CHECKOUT_HOLD_SECONDS", 1800))
+    expires_at = timezone.now() + timedelta(seconds=seconds)
+    client = _redis()
+    if client is not None:
+        try:
+            pipe = client.pipeline()
+            pipe.zadd(_holds_key(), {cart_id: int(expires_at.timestamp())}, xx=True)
+            pipe.expireat(_hold_key(cart_id), int(expires_at.timestamp()) + 86400)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed extending Redis stock holds for cart {cart_id}: {e}")
+    from .models import StockReservation
+    StockReservation.objects.filter(cart_id=cart_id).update(expires_at=expires_at)
+
+
+def release_expired(batch_size: int = 500) -> int:
+    """Release holds whose cart expired without paying. Returns carts released."""
+    released = 0
+    client = _redis()
+    if client is not None:
+        try:
+            now = int(timezone.now().timestamp())
+            for cart_id in client.zrangebyscore(_holds_key(), "-inf", now, start=0, num=batch_size):
+                _redis_finish(client, int(cart_id), "release")
+                released += 1
+        except Exception as e:
+            logger.warning(f"Failed releasing expired Redis stock holds: {e}")
+
+    from .models import StockReservation
+    with transaction.atomic():
+        rows = list(
+            StockReservation.objects.select_for_update(skip_locked=True)
+            .filter(expires_at__lte=timezone.now())
+            .order_by("expires_at")[:batch_size]
+        )
+        released += len({row.cart_id for row in rows})
+        _db_release_rows(rows)
+    return released
+
+
+def available_units(kind: str, obj) -> Optional[int]:
+    """Units still free to add to a cart, or None when ``obj`` is not limited."""
+    total = capacity(kind, obj)
+    if total is None:
+        return None
+    client = _redis()
+    if client is not None:
+        try:
+            base = _prefix() + _field((kind, obj.pk))
+            cap, held = client.mget(f"{base}:cap", f"{base}:held")
+            cap = total - obj.reserved_quantity if cap is None else int(cap)
+            return max(0, cap - int(held or 0))
+        except Exception as e:
+            logger.debug(f"Stock availability read from Redis failed: {e}")
+    return max(0, total - obj.reserved_quantity)
+
+
+def invalidate_capacity(keys: Optional[Iterable[Key]] = None) -> None:
+    """
+    Drop capacity mirrors so the next reservation reloads them from the row
+    (after stock edits, depletion or the daily modifier reset). Without
+    ``keys`` every mirror is dropped.
+    """
+    client = _redis()
+    if client is None:
+        return
+    prefix = _prefix()
+    try:
+        if keys is None:
+            names = list(client.scan_iter(match=f"{prefix}*:cap", count=500))
+        else:
+            names = [f"{prefix}{_field(key)}:cap" for key in keys]
+        if names:
+            client.delete(*names)
+    except Exception as e:
+        logger.debug(f"Failed invalidating stock capacity mirrors: {e}")
@@ -0,0 +1,30 @@
+# orders/tasks.py
+from __future__ import annotations
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from celery import shared_task
+except Exception:  # Celery not installed; provide a no-op decorator
+    def shared_task(*d, **kw):
+        def _wrap(fn):
+            return fn
+        return _wrap
+
+
+@shared_task
+def release_expired_stock_holds_task(batch_size: int = 500):
+    """
+    Give back stock held by carts that expired without checking out
+    (see orders.stock).
+    """
+    try:
+        from orders.stock import release_expired
+        released = release_expired(batch_size=batch_size)
+        if released:
+            logger.info(f"Released expired stock holds for {released} carts")
+        return released
+    except Exception:
+        logger.exception("release_expired_stock_holds_task failed")
+        return 0
@@ -1,11 +1,14 @@
 # orders/utils/cart.py
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import timedelta
 from decimal import Decimal
 from typing import Any, Dict, Iterable, List, Tuple
 
+from django.conf import settings
 from django.db import transaction
 from django.http import HttpRequest
+from django.utils import timezone
 
 from orders.models import Cart, CartItem
 from menu.models import Modifier
@@ -31,7 +34,7 @@ def _normalize_modifiers(mods: Iterable[Dict[str, Any]] | None) -> Tuple[Tuple[i
     return tuple(norm)
 
 
-def _item_signature(menu_item_id: int, modifiers: Iterable[Dict[str, Any]] | None) -> Tuple[int, Tuple[Tuple[int, int], ...]]:
+def line_signature(menu_item_id: int, modifiers: Iterable[Dict[str, Any]] | None) -> Tuple[int, Tuple[Tuple[int, int], ...]]:
     return (int(menu_item_id), _normalize_modifiers(modifiers))
 
 
@@ -51,13 +54,14 @@ def get_or_create_cart(request: HttpRequest) -> CartResult:
     if user and user.is_authenticated:
         cart, created = Cart.objects.get_or_create(user=user, status=Cart.STATUS_ACTIVE)
         # touch updated_at for activity tracking
-        cart.save(update_fields=["updated_at"])
+        if not created:
+            _touch_cart(cart)
         return CartResult(cart, created)
 
     # Guest flow: ensure a sticky session key (and force Set-Cookie by marking modified)
     if not request.session.session_key:
         request.session.create()
-    request.session.modified = True  # <- important so browser gets Set-Cookie
+        request.session.modified = True  # <- important so browser gets Set-Cookie
 
     try:
         # Try to get the most recent active cart for this session
@@ -82,52 +86,77 @@ def get_or_create_cart(request: HttpRequest) -> CartResult:
         )
         created = True
     
-    cart.save(update_fields=["updated_at"])
+    if not created:
+        _touch_cart(cart)
     return CartResult(cart, created)
 
 
-@transaction.atomic
-def merge_carts(source: Cart, destination: Cart, *, strategy: str = "increment") -> dict:
+def _touch_cart(cart: Cart) -> None:
     """
-    Merge *source* cart into *destination* cart atomically.
+    Refresh updated_at for activity tracking, coalesced to one write per
+    CART_TOUCH_INTERVAL_SECONDS so plain page views do not rewrite the cart row.
+    """
+    interval = getattr(settings, "CART_TOUCH_INTERVAL_SECONDS", 60)
+    if cart.updated_at and timezone.now() - cart.updated_at < timedelta(seconds=interval):
+        return
+    cart.save(update_fields=["updated_at"])
+
+
+# ---------------------------------------------------------------------------
+# Merge engine
+# ---------------------------------------------------------------------------
+Signature = Tuple[int, Tuple[Tuple[int, int], ...]]
+
+MAX_LINE_QUANTITY = 999  # CartItem.quantity validator / check constraint
+
+
+@dataclass
+class MergePlan:
+    """Merged line set computed in memory; callers apply it in bulk."""
+    quantities: Dict[Signature, int] = field(default_factory=dict)
+    updated: List[Signature] = field(default_factory=list)
+    created: List[Signature] = field(default_factory=list)
+    matched: int = 0
+    moved: int = 0
+
+    def summary(self) -> dict:
+        return {"moved": self.moved, "merged": self.matched, "created": len(self.created)}
+
+
+def plan_merge(
+    existing: Dict[Signature, int],
+    incoming: Iterable[Tuple[Signature, int]],
+    strategy: str = "increment",
+) -> MergePlan:
+    """
+    Merge ``incoming`` (signature, quantity) lines into ``existing``
+    quantities by signature (menu item + normalized modifiers).
 
     - strategy="increment": same line → increase quantity
-    - strategy="replace"  : same line → take source quantity
+    - strategy="replace"  : same line → take incoming quantity
     """
-    if source.pk == destination.pk:
-        return {"moved": 0, "merged": 0, "created": 0}
+    plan = MergePlan()
+    grouped: Dict[Signature, int] = {}
+    for sig, qty in incoming:
+        plan.moved += 1
+        grouped[sig] = grouped.get(sig, 0) + max(0, int(qty))
 
-    # Index destination by signature (menu_item + normalized modifiers)
-    dest_index: dict[Tuple[int, Tuple[Tuple[int, int], ...]], CartItem] = {}
-    for it in destination.items.select_related("menu_item"):
-        sig = _item_signature(it.menu_item_id, getattr(it, "selected_modifiers", []))
-        dest_index[sig] = it
-
-    moved = merged = created = 0
-
-    for src in source.items.select_related("menu_item"):
-        sig = _item_signature(src.menu_item_id, getattr(src, "selected_modifiers", []))
-        if sig in dest_index:
-            dst = dest_index[sig]
-            if strategy == "replace":
-                dst.quantity = src.quantity
-            else:
-                dst.quantity = dst.quantity + src.quantity
-            dst.save(update_fields=["quantity", "updated_at"])
-            merged += 1
-        else:
-            CartItem.objects.create(
-                cart=destination,
-                menu_item_id=src.menu_item_id,
-                quantity=src.quantity,
-                unit_price=src.unit_price,
-                selected_modifiers=getattr(src, "selected_modifiers", []),
-                notes=src.notes,
-            )
-            created += 1
-        moved += 1
+    for sig, qty in grouped.items():
+        if sig in existing:
+            plan.matched += 1
+            final = qty if strategy == "replace" else existing[sig] + qty
+            final = min(max(final, 1), MAX_LINE_QUANTITY)
+            if final != existing[sig]:
+                plan.updated.append(sig)
+                plan.quantities[sig] = final
+        elif qty > 0:
+            plan.created.append(sig)
+            plan.quantities[sig] = min(qty, MAX_LINE_QUANTITY)
+    return plan
 
-    # Merge cart-level options (delivery, table, metadata)
+
+def _merge_cart_options(source: Cart, destination: Cart) -> None:
+    """Merge cart-level options (delivery, table, metadata)."""
     try:
         if not destination.table_id and source.table_id:
             destination.table_id = source.table_id
@@ -157,13 +186,94 @@ def merge_carts(source: Cart, destination: Cart, *, strategy: str = "increment")
     except Exception:
         pass
 
+
+@transaction.atomic
+def merge_carts(source: Cart, destination: Cart, *, strategy: str = "increment") -> dict:
+    """
+    Merge *source* cart into *destination* cart atomically.
+
+    The merged line set is planned in memory (``plan_merge``) and applied
+    with one bulk_update, one bulk_create and one totals computation, so the
+    cost does not grow with the size of the source cart.
+    """
+    from orders import stock
+    from orders.read_models import modifier_lookup
+
+    if source.pk == destination.pk:
+        return {"moved": 0, "merged": 0, "created": 0}
+
+    dest_index: Dict[Signature, CartItem] = {}
+    for it in destination.items.all():
+        dest_index.setdefault(line_signature(it.menu_item_id, it.selected_modifiers), it)
+    src_lines = list(source.items.all())
+    templates: Dict[Signature, CartItem] = {}
+    incoming = []
+    for src in src_lines:
+        sig = line_signature(src.menu_item_id, src.selected_modifiers)
+        templates.setdefault(sig, src)
+        incoming.append((sig, src.quantity))
+
+    plan = plan_merge({sig: it.quantity for sig, it in dest_index.items()}, incoming, strategy)
+    modifiers_by_id = modifier_lookup(list(dest_index.values()) + src_lines)
+    now = timezone.now()
+
+    updates: List[CartItem] = []
+    for sig in plan.updated:
+        dst = dest_index[sig]
+        dst.quantity = plan.quantities[sig]
+        dst.calculate_totals(modifiers_by_id)
+        dst.updated_at = now
+        updates.append(dst)
+
+    creates: List[CartItem] = []
+    for sig in plan.created:
+        src = templates[sig]
+        line = CartItem(
+            cart=destination,
+            menu_item_id=src.menu_item_id,
+            quantity=plan.quantities[sig],
+            unit_price=src.unit_price,
+            original_price=src.original_price or src.unit_price,
+            selected_modifiers=list(src.selected_modifiers or []),
+            notes=src.notes,
+            is_gift=src.is_gift,
+            gift_message=src.gift_message,
+            scheduled_for=src.scheduled_for,
+            discount_applied=src.discount_applied,
+            added_via=src.added_via,
+        )
+        line.calculate_totals(modifiers_by_id)
+        creates.append(line)
+
+    with stock.paused_line_sync():
+        if updates:
+            CartItem.objects.bulk_update(updates, ["quantity", "modifier_total", "line_total", "updated_at"])
+        if creates:
+            CartItem.objects.bulk_create(creates)
+        # Clear/deactivate source (keep row for audit)
+        source.items.all().delete()
+
+    # Move the guest's stock holds to the destination in one step each
+    stock.release_cart(source.pk)
+    try:
+        stock.reserve_cart(destination)
+    except Exception:
+        # The merge rolls back; give the guest cart its holds again
+        try:
+            stock.reserve_cart(source, rows=[
+                (src.menu_item_id, src.quantity, src.selected_modifiers) for src in src_lines
+            ])
+        except Exception:
+            pass
+        raise
+
+    _merge_cart_options(source, destination)
+
     # Server-side authoritative totals
-    destination.calculate_totals()
+    destination.calculate_totals(save=False)
     destination.save()
 
-    # Clear/deactivate source (keep row for audit)
-    source.items.all().delete()
     source.status = Cart.STATUS_ABANDONED  # mark as no longer current
     source.save(update_fields=["status", "updated_at"])
 
-    return {"moved": moved, "merged": merged, "created": created}
+    return plan.summary()
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from decimal import Decimal
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple
 
 from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
@@ -21,42 +22,11 @@ import hmac as _hmac
 import hashlib as _hashlib
 import logging as _logging
 
+from .checkout import CheckoutError, CheckoutRequest, run_checkout
 from .models import Order, OrderItem
+from .utils.cart import line_signature, plan_merge
 from menu.models import MenuItem
 
-# Optional imports (safe stubs if absent)
-try:
-    from payments.services import create_checkout_session, save_invoice_pdf_file
-except Exception:  # pragma: no cover
-    def create_checkout_session(order: Order):
-        class _Dummy: url = None
-        return _Dummy()
-    def save_invoice_pdf_file(order: Order):  # noqa
-        return None
-
-try:
-    from coupons.services import find_active_coupon, compute_discount_for_order  # type: ignore
-except Exception:  # pragma: no cover
-    def find_active_coupon(code: str): return None
-    def compute_discount_for_order(order: Order, coupon, user):
-        return False, Decimal("0.00"), "coupon service missing"
-
-# NOTE:
-# Use the canonical loyalty services. The loyalty app encapsulates the
-# tip-based loyalty logic. If unavailable, fall back to safe stubs.
-try:
-    from loyalty.services import get_available_reward_for_user, reserve_reward_for_order  # type: ignore
-except Exception:  # pragma: no cover
-    def get_available_reward_for_user(user): return None
-    def reserve_reward_for_order(reward, order: Order): return None
-
-# Reservations.Table for dine-in mapping (optional)
-try:
-    from reservations.models import Table as RMSTable
-except Exception:  # pragma: no cover
-    RMSTable = None
-
-
 # ---------- Helpers ----------
 def _currency() -> str:
     return getattr(settings, "STRIPE_CURRENCY", "usd").lower()
@@ -181,46 +151,6 @@ def _enrich(items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Decimal]
         enriched.append(enriched_item)
     return enriched, subtotal
 
-# Align by explicit RMS Table id (preferred), else by number
-def _align_table_by_id(order: Order, table_id: int) -> bool:
-    if not RMSTable or not table_id:
-        return False
-    try:
-        tbl = RMSTable.objects.select_related("location").get(id=table_id, is_active=True)
-    except Exception:
-        return False
-    # Set number if numeric
-    try:
-        order.table_number = int(getattr(tbl, "table_number", "") or 0) or None
-    except Exception:
-        pass
-    order.external_order_id = f"TBL:{tbl.id}"
-    label_loc = getattr(tbl.location, "name", getattr(tbl.location, "title", ""))
-    label = f"{label_loc} — Table {getattr(tbl, 'table_number', '')}".strip(" —")
-    if not getattr(order, "notes", ""):
-        order.notes = label
-    return True
-
-def _align_table_by_number(order: Order, table_number_input: Optional[int]) -> None:
-    if not table_number_input:
-        return
-    try:
-        tn = str(int(table_number_input))
-    except Exception:
-        return
-    if RMSTable is None:
-        order.table_number = int(tn)
-        return
-    tbl = RMSTable.objects.filter(table_number=tn, is_active=True).select_related("location").first()
-    order.table_number = int(tn)
-    if not tbl:
-        return
-    order.external_order_id = f"TBL:{tbl.id}"
-    label_loc = getattr(tbl.location, "name", getattr(tbl.location, "title", ""))
-    label = f"{label_loc} — Table {tbl.table_number}".strip(" —")
-    if not getattr(order, "notes", ""):
-        order.notes = label
-
 
 # ---------- Session cart endpoints (guest) and DB cart (auth) ----------
 @method_decorator(csrf_exempt, name='dispatch')
@@ -574,56 +504,53 @@ class SessionCartViewSet(viewsets.ViewSet):
             if not order:
                 order = Order.objects.create(user=request.user, status="PENDING", currency=_currency())
 
-            # Get all existing order items
-            existing_items = list(order.items.select_related("menu_item"))
-            
+            # Plan the merged line set in memory (same engine as cart merges),
+            # then write it with one bulk_update and one bulk_create
+            existing = {}
+            for oi in order.items.all():
+                existing.setdefault(line_signature(oi.menu_item_id, oi.modifiers), oi)
+            templates = {}
+            incoming = []
             for it in session_items:
-                pid, qty = int(it["id"]), int(it["quantity"])
-                modifiers = it.get("modifiers", [])
-                _, unit = _fetch_menu_item(pid)
-                
-                # Look for exact match (same menu item + same modifiers)
-                matching_item = None
-                for oi in existing_items:
-                    if (oi.menu_item_id == pid and 
-                        self._modifiers_match(oi.modifiers or [], modifiers)):
-                        matching_item = oi
-                        break
-                
-                if matching_item:
-                    # Sum quantities for exact matches
-                    matching_item.quantity = int(matching_item.quantity) + qty
-                    matching_item.unit_price = unit
-                    matching_item.save(update_fields=["quantity", "unit_price"])
-                else:
-                    # Create new item for different modifier combinations
-                    new_item = OrderItem.objects.create(
-                        order=order, 
-                        menu_item_id=pid, 
-                        quantity=qty, 
-                        unit_price=unit, 
-                        modifiers=modifiers
-                    )
-                    existing_items.append(new_item)
+                sig = line_signature(it["id"], it.get("modifiers", []))
+                templates.setdefault(sig, it)
+                incoming.append((sig, it["quantity"]))
+            plan = plan_merge({sig: oi.quantity for sig, oi in existing.items()}, incoming)
+
+            # Authoritative prices, one query
+            ids = {sig[0] for sig in plan.updated + plan.created}
+            prices = dict(MenuItem.objects.filter(pk__in=ids).values_list("pk", "price"))
+            missing = ids - set(prices)
+            if missing:
+                raise ValueError(f"Menu item with ID {min(missing)} does not exist")
+
+            updates = []
+            for sig in plan.updated:
+                oi = existing[sig]
+                oi.quantity = plan.quantities[sig]
+                oi.unit_price = Decimal(str(prices[sig[0]]))
+                oi.calculate_totals()
+                updates.append(oi)
+            creates = []
+            for sig in plan.created:
+                oi = OrderItem(
+                    order=order,
+                    menu_item_id=sig[0],
+                    quantity=plan.quantities[sig],
+                    unit_price=Decimal(str(prices[sig[0]])),
+                    modifiers=templates[sig].get("modifiers", []),
+                )
+                oi.calculate_totals()
+                creates.append(oi)
+            if updates:
+                OrderItem.objects.bulk_update(updates, ["quantity", "unit_price", "modifier_total", "line_total"])
+            if creates:
+                OrderItem.objects.bulk_create(creates)
 
             _cart_set(request, [])
 
         return Response({"status": "ok", "order_id": order.id})
     
-    def _modifiers_match(self, modifiers1, modifiers2):
-        """Check if two modifier lists are equivalent."""
-        # Normalize both lists - sort by modifier ID for comparison
-        def normalize_modifiers(mods):
-            if not mods:
-                return []
-            # Sort by modifier ID to ensure consistent comparison
-            return sorted(mods, key=lambda x: x.get('id', 0) if isinstance(x, dict) else str(x))
-        
-        norm1 = normalize_modifiers(modifiers1)
-        norm2 = normalize_modifiers(modifiers2)
-        
-        return norm1 == norm2
-
     @action(methods=["get"], detail=False, url_path="modifiers", permission_classes=[AllowAny])
     def get_modifiers(self, request):
         """Get available modifiers/extras for cart items."""
@@ -790,121 +717,21 @@ class OrderViewSet(viewsets.ModelViewSet):
         Build an Order for checkout (DB cart only):
           - Auth required
           - Optional: service_type, table_id (preferred), table_number (fallback), coupon_code
+          - Optional Idempotency-Key header; repeats return the same Stripe session
           - Returns Stripe checkout_url
+        Pricing runs before the order transaction and Stripe after it (see orders.checkout).
         """
         user = getattr(request, "user", None)
         if not user or not user.is_authenticated:
             return Response({"detail": "Authentication required for checkout."}, status=401)
 
-        body_source_raw = (request.data.get("service_type") or request.data.get("source") or "").upper().strip()
-        if body_source_raw == "UBEREATS":
-            body_source_raw = "UBER_EATS"
-        source = body_source_raw if body_source_raw in {"DINE_IN", "UBER_EATS", "DOORDASH"} else "DINE_IN"
-
-        # accept table_id from cart select; fallback to table_number
-        table_id = request.data.get("table_id")
         try:
-            table_id = int(table_id) if table_id not in (None, "",) else None
-        except Exception:
-            table_id = None
-
-        table_number = request.data.get("table_number") or request.data.get("table_num")
-
-        tip_percent = request.data.get("tip_percent")
-        tip_amount_custom = request.data.get("tip_amount") or request.data.get("tip_custom")
-        coupon_code = (request.data.get("coupon") or request.data.get("coupon_code") or "").strip()
-
-        with transaction.atomic():
-            order = (
-                Order.objects.filter(user=user, status="PENDING")
-                .prefetch_related("items__menu_item").first()
-            )
-            if not order:
-                order = Order(user=user, status="PENDING", currency=_currency())
-                order.save()
-
-            if not order.items.exists():
-                return Response({"detail": "Your cart is empty. Please add items before checkout."}, status=400)
-
-            # Source + Table alignment (id first, else number)
-            order.source = source
-            aligned = False
-            if source == "DINE_IN" and table_id:
-                aligned = _align_table_by_id(order, table_id)
-            if source == "DINE_IN" and not aligned and table_number:
-                try:
-                    tn = int(table_number)
-                except Exception:
-                    tn = None
-                _align_table_by_number(order, tn)
-
-            # Tip
-            tip_dec = Decimal("0.00")
-            if tip_amount_custom:
-                try:
-                    tip_dec = Decimal(str(tip_amount_custom))
-                except Exception:
-                    tip_dec = Decimal("0.00")
-            elif tip_percent:
-                try:
-                    pct = Decimal(str(tip_percent)) / Decimal("100")
-                    tip_dec = (order.subtotal * pct).quantize(Decimal("0.01"))
-                except Exception:
-                    tip_dec = Decimal("0.00")
-            order.tip_amount = tip_dec
-
-            # Coupon (compute but do not yet apply; we will pick best-of)
-            coupon_discount = Decimal("0.00")
-            coupon_code_used = ""
-            if coupon_code:
-                c = find_active_coupon(coupon_code)
-                ok, disc, _reason = compute_discount_for_order(order, c, user)
-                if ok:
-                    coupon_discount = disc
-                    coupon_code_used = c.code
-
-            # Loyalty (TIP-based; FIXED amount) — proxied via loyalty.services
-            reward = get_available_reward_for_user(user)
-            loyalty_discount = reward.as_discount_amount(order.subtotal) if reward else Decimal("0.00")
-
-            # BEST-OF: choose the greater absolute discount (no stacking; tips excluded from min spend upstream)
-            if loyalty_discount >= coupon_discount and loyalty_discount > 0:
-                order.discount_amount = loyalty_discount
-                order.discount_code = "LOYALTY"
-                # keep compatibility no-op
-                if reward:
-                    reserve_reward_for_order(reward, order)
-            elif coupon_discount > 0:
-                order.discount_amount = coupon_discount
-                order.discount_code = coupon_code_used
-            else:
-                order.discount_amount = Decimal("0.00")
-                order.discount_code = ""
-
-            order.full_clean()
-            order.save()
-
-            # Optional invoice placeholder
-            try:
-                save_invoice_pdf_file(order)
-            except Exception:
-                pass
-
-            # Stripe Checkout
-            session = create_checkout_session(order)
-            checkout_url = getattr(session, "url", None) if session else None
-
-            return Response(
-                {
-                    "id": order.id,
-                    "checkout_url": checkout_url,
-                    "total": str(order.grand_total()),
-                    "currency": _currency(),
-                    "source": order.source,
-                    "table_number": getattr(order, "table_number", None),
-                },
-                status=201,
-            )
+            result = run_checkout(user, CheckoutRequest.from_request(request))
+        except CheckoutError as e:
+            return Response({"detail": e.detail}, status=e.status)
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=400)
+        return Response(result, status=201)
 
 
 # Simple function-based view for cart to bypass DRF issues
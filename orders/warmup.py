@@ -0,0 +1,16 @@
+# orders/warmup.py
+"""Price lookup datasets (``orders.cache_utils``) for ``core.warmup``."""
+
+from core import warmup
+
+
+@warmup.register("menu.items", "Name/price/image of every available menu item")
+def warm_menu_items():
+    from .cache_utils import warm_menu_item_cache
+    return warm_menu_item_cache()
+
+
+@warmup.register("menu.modifiers", "Name/price of every available modifier")
+def warm_modifiers():
+    from .cache_utils import warm_modifier_cache
+    return warm_modifier_cache()
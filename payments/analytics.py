@@ -0,0 +1,264 @@
+# payments/analytics.py
+"""
+Payment analytics computed in SQL.
+
+Every metric comes from one grouped aggregate per table (payment intents and
+refunds), bucketed by local day (``settings.TIME_ZONE``) and payment method.
+Closed days never change once over, so their buckets are cached without
+expiry (``payments:analytics:day:<date>``); a request only aggregates the
+current day, partial edge days and closed days not yet cached. Late writes
+to a closed day (e.g. an intent created before midnight that succeeds after
+it) drop that day's bucket via ``signals_analytics``.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PaymentRefund, StripePaymentIntent
+
+logger = logging.getLogger(__name__)
+
+DAY_KEY = "payments:analytics:day:{}"
+
+SUCCEEDED = "succeeded"
+# Declined intents go back to requires_payment_method for a retry; the ones
+# that end for good are canceled ('failed' is kept for older rows).
+FAILED = ("failed", "canceled")
+# Refunds that moved, or are about to move, money back
+COUNTED_REFUNDS = ("pending", "succeeded")
+
+UNKNOWN_METHOD = "unknown"
+
+
+# ----------------------------------------------------------------------
+# Day buckets
+# ----------------------------------------------------------------------
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def _empty_bucket(day: date) -> Dict:
+    return {
+        "date": day.isoformat(),
+        "transactions": 0,
+        "successful": 0,
+        "failed": 0,
+        "revenue_cents": 0,
+        "refunds": 0,
+        "refunded_cents": 0,
+        "methods": {},
+    }
+
+
+def _empty_method() -> Dict:
+    return {"transactions": 0, "successful": 0, "revenue_cents": 0, "refunds": 0, "refunded_cents": 0}
+
+
+def _aggregate(intervals: List[Tuple[datetime, datetime]]) -> Dict[date, Dict]:
+    """Buckets for the given [start, end] intervals: one query per table."""
+    if not intervals:
+        return {}
+    window = Q()
+    for start, end in intervals:
+        window |= Q(created_at__gte=start, created_at__lte=end)
+    tz = timezone.get_current_timezone()
+    buckets: Dict[date, Dict] = {}
+
+    def bucket(day, method) -> Tuple[Dict, Dict]:
+        entry = buckets.setdefault(day, _empty_bucket(day))
+        return entry, entry["methods"].setdefault(method or UNKNOWN_METHOD, _empty_method())
+
+    intents = (
+        StripePaymentIntent.objects.filter(window)
+        .annotate(day=TruncDate("created_at", tzinfo=tz))
+        .values("day", "payment_method_type")
+        .annotate(
+            transactions=Count("pk"),
+            successful=Count("pk", filter=Q(status=SUCCEEDED)),
+            failed=Count("pk", filter=Q(status__in=FAILED)),
+            revenue_cents=Sum("amount_cents", filter=Q(status=SUCCEEDED)),
+        )
+        .order_by()
+    )
+    for row in intents:
+        entry, method = bucket(row["day"], row["payment_method_type"])
+        for name in ("transactions", "successful", "revenue_cents"):
+            value = row[name] or 0
+            entry[name] += value
+            method[name] += value
+        entry["failed"] += row["failed"] or 0
+
+    refunds = (
+        PaymentRefund.objects.filter(window, status__in=COUNTED_REFUNDS)
+        .annotate(day=TruncDate("created_at", tzinfo=tz))
+        .values("day", "payment_intent__payment_method_type")
+        .annotate(refunds=Count("pk"), refunded_cents=Sum("amount_cents"))
+        .order_by()
+    )
+    for row in refunds:
+        entry, method = bucket(row["day"], row["payment_intent__payment_method_type"])
+        for name in ("refunds", "refunded_cents"):
+            value = row[name] or 0
+            entry[name] += value
+            method[name] += value
+    return buckets
+
+
+def _runs(days: List[date]) -> List[Tuple[date, date]]:
+    """Group sorted days into contiguous (first, last) runs."""
+    runs: List[Tuple[date, date]] = []
+    for day in days:
+        if runs and runs[-1][1] + timedelta(days=1) == day:
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def daily_buckets(start: datetime, end: datetime) -> List[Dict]:
+    """Per-day buckets covering ``start``..``end`` (inclusive), oldest first."""
+    start_local = timezone.localtime(start)
+    end_local = timezone.localtime(end)
+    today = timezone.localdate()
+    first, last = start_local.date(), end_local.date()
+    if last < first:
+        return []
+    days = [first + timedelta(days=n) for n in range((last - first).days + 1)]
+
+    def is_whole(day: date) -> bool:
+        # Fully covered by the range and already over
+        return (
+            day < today
+            and (day != first or start_local == _day_start(day))
+            and (day != last or end_local >= _day_start(day + timedelta(days=1)) - timedelta(microseconds=1))
+        )
+
+    cacheable = [day for day in days if is_whole(day)]
+    cached = cache.get_many([DAY_KEY.format(day.isoformat()) for day in cacheable]) if cacheable else {}
+    found: Dict[date, Dict] = {}
+    for day in cacheable:
+        bucket = cached.get(DAY_KEY.format(day.isoformat()))
+        if bucket is not None:
+            found[day] = bucket
+
+    missing_whole = [day for day in cacheable if day not in found]
+    intervals = [
+        (_day_start(a), _day_start(b + timedelta(days=1)) - timedelta(microseconds=1))
+        for a, b in _runs(missing_whole)
+    ]
+    partial = [day for day in days if day not in cacheable]
+    for day in partial:
+        lower = max(start, _day_start(day))
+        upper = min(end, _day_start(day + timedelta(days=1)) - timedelta(microseconds=1))
+        intervals.append((lower, upper))
+
+    computed = _aggregate(intervals)
+    fresh = {}
+    for day in missing_whole:
+        bucket = computed.get(day) or _empty_bucket(day)
+        found[day] = bucket
+        fresh[DAY_KEY.format(day.isoformat())] = bucket
+    if fresh:
+        cache.set_many(fresh, None)
+    for day in partial:
+        found[day] = computed.get(day) or _empty_bucket(day)
+    return [found[day] for day in days]
+
+
+def invalidate_day(moment: Optional[datetime]) -> None:
+    """Drop the cached bucket of the day ``moment`` falls on."""
+    if moment is None:
+        return
+    cache.delete(DAY_KEY.format(timezone.localtime(moment).date().isoformat()))
+
+
+# ----------------------------------------------------------------------
+# Report
+# ----------------------------------------------------------------------
+def _dollars(cents: int) -> float:
+    return float(Decimal(cents) / 100)
+
+
+def _rate(part: int, whole: int) -> float:
+    return (part / whole * 100) if whole > 0 else 0
+
+
+def payment_analytics(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict:
+    """
+    Revenue, transaction and refund totals for the range, with day and
+    payment method breakdowns.
+    """
+    if not end_date:
+        end_date = timezone.now()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+    if timezone.is_naive(start_date):
+        start_date = timezone.make_aware(start_date)
+    if timezone.is_naive(end_date):
+        end_date = timezone.make_aware(end_date)
+
+    days = daily_buckets(start_date, end_date)
+    totals = defaultdict(int)
+    methods: Dict[str, Dict] = defaultdict(_empty_method)
+    for bucket in days:
+        for name in ("transactions", "successful", "failed", "revenue_cents", "refunds", "refunded_cents"):
+            totals[name] += bucket[name]
+        for method, values in bucket["methods"].items():
+            for name, value in values.items():
+                methods[method][name] += value
+
+    return {
+        'period': {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+        },
+        'revenue': {
+            'total_revenue': _dollars(totals["revenue_cents"]),
+            'net_revenue': _dollars(totals["revenue_cents"] - totals["refunded_cents"]),
+            'total_refunded': _dollars(totals["refunded_cents"]),
+        },
+        'transactions': {
+            'total_transactions': totals["transactions"],
+            'successful_transactions': totals["successful"],
+            'failed_transactions': totals["failed"],
+            'success_rate': _rate(totals["successful"], totals["transactions"]),
+        },
+        'refunds': {
+            'total_refunds': totals["refunds"],
+            'refund_rate': _rate(totals["refunds"], totals["successful"]),
+        },
+        'daily': [
+            {
+                'date': bucket["date"],
+                'transactions': bucket["transactions"],
+                'successful_transactions': bucket["successful"],
+                'failed_transactions': bucket["failed"],
+                'revenue': _dollars(bucket["revenue_cents"]),
+                'refunded': _dollars(bucket["refunded_cents"]),
+                'net_revenue': _dollars(bucket["revenue_cents"] - bucket["refunded_cents"]),
+                'refunds': bucket["refunds"],
+            }
+            for bucket in days
+        ],
+        'payment_methods': {
+            method: {
+                'transactions': values["transactions"],
+                'successful_transactions': values["successful"],
+                'revenue': _dollars(values["revenue_cents"]),
+                'refunded': _dollars(values["refunded_cents"]),
+                'refunds': values["refunds"],
+                'share': _rate(values["revenue_cents"], totals["revenue_cents"]),
+            }
+            for method, values in sorted(methods.items())
+        },
+    }
@@ -10,3 +10,7 @@ class PaymentsConfig(AppConfig):
             from . import signals  # noqa: F401
         except Exception:
             pass
+        try:
+            from . import signals_analytics  # noqa: F401
+        except Exception:
+            pass
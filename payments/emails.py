@@ -0,0 +1,126 @@
+# payments/emails.py
+"""
+Order emails, rendered into the transactional outbox (``core.outbox``).
+
+``queue_order_emails`` renders the customer confirmation and the staff
+notification for a paid order and stores both with a single INSERT; the
+outbox worker sends them. Dedupe keys make re-running it for the same order
+harmless.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import List, Optional
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from core.outbox import Email, enqueue
+
+logger = logging.getLogger(__name__)
+
+
+def _order_number(order) -> str:
+    return str(getattr(order, "order_number", None) or order.id)
+
+
+def _from_email() -> str:
+    return getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@restaurant.com")
+
+
+def _order_items(order) -> list:
+    if not hasattr(order, "items"):
+        return []
+    return list(order.items.select_related("menu_item"))
+
+
+def customer_email(order) -> Optional[str]:
+    if getattr(order, "email", None):
+        return order.email
+    user = getattr(order, "user", None)
+    if user is not None and getattr(user, "email", None):
+        return user.email
+    return None
+
+
+def order_confirmation(order, items: Optional[list] = None) -> Optional[Email]:
+    """Customer confirmation for ``order``, or None without an address."""
+    recipient = customer_email(order)
+    if not recipient:
+        logger.warning(f"No email available for order {order.id}")
+        return None
+
+    context = {
+        'order': order,
+        'order_items': _order_items(order) if items is None else items,
+        'restaurant_name': getattr(settings, 'RESTAURANT_NAME', 'Restaurant'),
+        'support_email': getattr(settings, 'SUPPORT_EMAIL', 'support@restaurant.com'),
+    }
+    try:
+        html_body = render_to_string('emails/order_confirmation.html', context)
+        body = render_to_string('emails/order_confirmation.txt', context)
+    except Exception:
+        html_body = ""
+        body = (
+            f"Thank you for your order #{_order_number(order)}!\n\n"
+            f"Your order has been confirmed and is being prepared.\n\n"
+            f"Total: ${order.total}\n\n"
+            f"Thank you for choosing {context['restaurant_name']}!"
+        )
+    return Email(
+        to=[recipient],
+        subject=f"Order Confirmation #{_order_number(order)}",
+        body=body,
+        html_body=html_body,
+        from_email=_from_email(),
+        kind="order_confirmation",
+        dedupe_key=f"order_confirmation:{order.id}",
+    )
+
+
+def staff_notification(order, items: Optional[list] = None) -> Optional[Email]:
+    """One new-order notification addressed to every STAFF_NOTIFICATION_EMAILS recipient."""
+    staff_emails = list(getattr(settings, 'STAFF_NOTIFICATION_EMAILS', []) or [])
+    if not staff_emails:
+        return None
+
+    service_type = getattr(order, 'service_type', 'Dine-in')
+    context = {
+        'order': order,
+        'order_items': _order_items(order) if items is None else items,
+        'customer_name': getattr(order, 'customer_name', 'Guest'),
+        'order_time': order.created_at,
+    }
+    try:
+        html_body = render_to_string('emails/staff_notification.html', context)
+        body = render_to_string('emails/staff_notification.txt', context)
+    except Exception:
+        html_body = ""
+        items_text = "\n".join(f"- {item.menu_item.name} x {item.quantity}" for item in context['order_items'])
+        body = (
+            f"New Order #{_order_number(order)}\n\n"
+            f"Customer: {context['customer_name']}\n"
+            f"Service: {service_type}\n"
+            f"Total: ${order.total}\n\n"
+            f"Items:\n{items_text}"
+        )
+    return Email(
+        to=staff_emails,
+        subject=f"New Order #{_order_number(order)} - {service_type}",
+        body=body,
+        html_body=html_body,
+        from_email=_from_email(),
+        kind="staff_notification",
+        dedupe_key=f"staff_notification:{order.id}",
+    )
+
+
+def queue_order_emails(order) -> int:
+    """Render and enqueue the emails of a paid order (one INSERT)."""
+    items = _order_items(order)
+    messages: List[Email] = [
+        message for message in (order_confirmation(order, items), staff_notification(order, items))
+        if message is not None
+    ]
+    return enqueue(messages)
@@ -6,7 +6,6 @@ from decimal import Decimal
 from typing import Optional, Iterable
 
 from django.conf import settings
-from django.core.mail import send_mail
 from django.dispatch import Signal
 
 logger = logging.getLogger(__name__)
@@ -60,48 +59,32 @@ def _customer_email(order) -> Optional[str]:
 
 def decrement_stock_for_order(order) -> None:
     """
-    Best-effort stock decrement.
-    Looks for one of: menu_item.decrement_stock(qty), menu_item.stock, menu_item.quantity_in_stock, menu_item.available_quantity.
-    Never lets stock go < 0. Completely silent if model doesn't support stock.
+    Take the order's recipe ingredients and tracked menu item/modifier stock
+    (see inventory.depletion): one aggregated F() update per table, recorded
+    per order so repeated calls are no-ops. Then commits the stock the
+    source cart was holding (see orders.stock). Never raises.
     """
-    changed_any = False
-    for it in _iter_items(order):
-        qty = int(getattr(it, "quantity", 0) or 0)
-        if qty <= 0:
-            continue
-        mi = getattr(it, "menu_item", None)
-        if mi is None:
-            continue
+    try:
+        from inventory.depletion import deplete_for_order
+        deplete_for_order(order)
+    except Exception:
+        logger.exception("Failed to deplete inventory for order #%s", getattr(order, "id", None))
+        return
 
+    # The cart's holds become the sale that was just taken from stock
+    if getattr(order, "source_cart_id", None):
         try:
-            # Method first (best)
-            dec = getattr(mi, "decrement_stock", None)
-            if callable(dec):
-                dec(qty)
-                changed_any = True
-                continue
-
-            # Common numeric fields
-            for field in ("stock", "quantity_in_stock", "available_quantity"):
-                if hasattr(mi, field):
-                    cur = int(getattr(mi, field) or 0)
-                    new_val = max(0, cur - qty)
-                    if new_val != cur:
-                        setattr(mi, field, new_val)
-                        mi.save(update_fields=[field])
-                        changed_any = True
-                    break  # only one field is used
+            from orders.stock import commit_cart
+            commit_cart(order.source_cart_id)
         except Exception:
-            logger.exception("Failed to decrement stock for menu_item=%s", getattr(mi, "id", None))
-
-    if changed_any:
-        logger.info("Stock decremented for order #%s", getattr(order, "id", None))
+            logger.exception("Failed to commit stock holds for order #%s", getattr(order, "id", None))
 
 # ---------- Email receipt ----------
 
 def email_receipt(order, payment=None) -> None:
     """
-    Sends a simple text receipt to the customer, if email is available and email is configured.
+    Queues a simple text receipt for the customer in the email outbox, if
+    email is available and email is configured.
     """
     try:
         to_email = _customer_email(order)
@@ -159,9 +142,13 @@ def email_receipt(order, payment=None) -> None:
         subject = f"Receipt for Order #{order.id}"
         body = "\n".join(lines)
 
-        send_mail(subject, body, from_email, [to_email], fail_silently=True)
+        from core.outbox import Email, enqueue
+        enqueue([Email(
+            to=[to_email], subject=subject, body=body, from_email=from_email,
+            kind="receipt", dedupe_key=f"receipt:{order.id}",
+        )])
     except Exception:
-        logger.exception("Failed sending receipt email for order #%s", getattr(order, "id", None))
+        logger.exception("Failed queueing receipt email for order #%s", getattr(order, "id", None))
 
 # ---------- Kitchen / RMS signal ----------
 
@@ -185,12 +172,18 @@ def run_post_payment_hooks(order, payment=None, request=None) -> None:
     # Immediate synchronous tasks (critical for order flow)
     decrement_stock_for_order(order)
     emit_kitchen_signal(order, payment=payment, request=request)
+
+    # Confirmation and staff emails are rendered into the outbox in one
+    # INSERT; the outbox worker sends them, never this request.
+    try:
+        from .emails import queue_order_emails
+        queue_order_emails(order)
+    except Exception:
+        logger.exception("Failed queueing emails for order #%s", getattr(order, "id", None))
     
     # Async tasks for non-critical post-payment processing
     try:
         from .tasks import (
-            send_order_confirmation_email_task,
-            send_staff_notification_task,
             sync_order_to_pos_task,
             record_payment_analytics_task,
             process_loyalty_rewards_task,
@@ -203,10 +196,6 @@ def run_post_payment_hooks(order, payment=None, request=None) -> None:
             'payment_method_type': getattr(payment, 'payment_method_type', 'unknown') if payment else 'unknown'
         }
         
-        # Send confirmation emails
-        send_order_confirmation_email_task.delay(order_id)
-        send_staff_notification_task.delay(order_id)
-        
         # POS integration
         sync_order_to_pos_task.delay(order_id)
         
@@ -219,7 +208,7 @@ def run_post_payment_hooks(order, payment=None, request=None) -> None:
         
         logger.info(f"Queued async post-payment tasks for order {order_id}")
         
-    except ImportError:
-        # Fallback to synchronous processing if Celery is not available
-        logger.info("Celery not available, falling back to synchronous email processing")
-        email_receipt(order, payment=payment)
+    except (ImportError, AttributeError):
+        # Celery is not available (no-op task decorator). The queued emails
+        # are still sent by the outbox's background drain, not inline here.
+        logger.info("Celery not available, skipping async post-payment tasks")
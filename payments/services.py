@@ -165,7 +165,9 @@ def _reservation_deposit_credit(order: Order) -> Tuple[Decimal, int | None]:
         return Decimal('0.00'), None
 
 
-def _apply_best_discount(order: Order, loyalty_amount: Decimal, coupon_amount: Decimal) -> Tuple[Dict[str, Any], Decimal, str]:
+def _apply_best_discount(
+    order: Order, loyalty_amount: Decimal, coupon_amount: Decimal, idempotency_key: str | None = None
+) -> Tuple[Dict[str, Any], Decimal, str]:
     """
     Create a one-off Stripe Coupon for amount_off = chosen discount (if any)
     and return (discounts_param, chosen_amount, source_label) for Checkout Session.
@@ -185,6 +187,7 @@ def _apply_best_discount(order: Order, loyalty_amount: Decimal, coupon_amount: D
             currency=_currency(),
             duration="once",
             name=name or "Discount",
+            **({"idempotency_key": f"{idempotency_key}:coupon"} if idempotency_key else {}),
         )
         # Attach reservation id to metadata for webhook to mark applied
         discounts_param = {"discounts": [{"coupon": coupon["id"]}]}
@@ -210,10 +213,18 @@ def checkout_session_from_order(order: Order):
     return create_checkout_session(order)
 
 
-def create_checkout_session(order: Order, *, success_url: str | None = None, cancel_url: str | None = None):
+def create_checkout_session(
+    order: Order,
+    *,
+    success_url: str | None = None,
+    cancel_url: str | None = None,
+    idempotency_key: str | None = None,
+):
     """
     Builds a Stripe Checkout Session with items + tip + best discount (loyalty vs coupon).
     Stores resolved numbers as OrderExtras rows so invoices/receipts show correct lines.
+    With ``idempotency_key`` Stripe returns the session (and coupon) created by an
+    earlier call with the same key instead of creating new ones.
     """
     success_url = success_url or _success_url(order)
     cancel_url = cancel_url or _cancel_url(order)
@@ -233,7 +244,9 @@ def create_checkout_session(order: Order, *, success_url: str | None = None, can
     loyalty_amount, loyalty_msg = best_loyalty_discount_for_user(user, subtotal=subtotal + tax)
     coupon_amount = _get_extra_amount(order, "coupon_discount")  # if your flow saves coupon elsewhere, adapt here
 
-    discounts_param, chosen_amount, chosen_source = _apply_best_discount(order, loyalty_amount, coupon_amount)
+    discounts_param, chosen_amount, chosen_source = _apply_best_discount(
+        order, loyalty_amount, coupon_amount, idempotency_key=idempotency_key
+    )
     if chosen_source == "loyalty" and loyalty_msg:
         _set_extra_amount(order, "loyalty_discount", chosen_amount)
     elif chosen_source == "coupon":
@@ -257,6 +270,7 @@ def create_checkout_session(order: Order, *, success_url: str | None = None, can
         success_url=success_url,
         cancel_url=cancel_url,
         **(discounts_param or {}),
+        **({"idempotency_key": idempotency_key} if idempotency_key else {}),
     )
 
     # Update Payment record if present (tolerate schema differences)
@@ -752,51 +766,11 @@ class StripePaymentService:
     @staticmethod
     def get_payment_analytics(start_date=None, end_date=None) -> dict:
         """
-        Get comprehensive payment analytics for the specified date range.
+        Get comprehensive payment analytics for the specified date range
+        (SQL-aggregated, closed days cached; see payments.analytics).
         """
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        if not start_date:
-            start_date = timezone.now() - timedelta(days=30)
-        if not end_date:
-            end_date = timezone.now()
-        
-        payment_intents = StripePaymentIntent.objects.filter(
-            created_at__range=[start_date, end_date]
-        )
-        
-        total_revenue = sum(pi.amount_dollars for pi in payment_intents.filter(status='succeeded'))
-        total_transactions = payment_intents.count()
-        successful_transactions = payment_intents.filter(status='succeeded').count()
-        failed_transactions = payment_intents.filter(status='failed').count()
-        
-        refunds = PaymentRefund.objects.filter(
-            created_at__range=[start_date, end_date]
-        )
-        total_refunded = sum(r.amount_dollars for r in refunds)
-        
-        return {
-            'period': {
-                'start_date': start_date.isoformat(),
-                'end_date': end_date.isoformat(),
-            },
-            'revenue': {
-                'total_revenue': float(total_revenue),
-                'net_revenue': float(total_revenue - total_refunded),
-                'total_refunded': float(total_refunded),
-            },
-            'transactions': {
-                'total_transactions': total_transactions,
-                'successful_transactions': successful_transactions,
-                'failed_transactions': failed_transactions,
-                'success_rate': (successful_transactions / total_transactions * 100) if total_transactions > 0 else 0,
-            },
-            'refunds': {
-                'total_refunds': refunds.count(),
-                'refund_rate': (refunds.count() / successful_transactions * 100) if successful_transactions > 0 else 0,
-            }
-        }
+        from .analytics import payment_analytics
+        return payment_analytics(start_date, end_date)
     
     @staticmethod
     def process_payment_method_update(customer_id: str, payment_method_id: str) -> bool:
@@ -0,0 +1,34 @@
+# FILE: payments/signals_analytics.py
+from __future__ import annotations
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from payments.analytics import invalidate_day
+from payments.models import PaymentRefund, StripePaymentIntent
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=StripePaymentIntent)
+@receiver(post_delete, sender=StripePaymentIntent)
+@receiver(post_save, sender=PaymentRefund)
+@receiver(post_delete, sender=PaymentRefund)
+def drop_cached_analytics_day(sender, instance, raw=False, **kwargs):
+    """
+    Analytics buckets are keyed by creation day; a write to a row created on
+    an already cached (closed) day must drop that day's bucket.
+    """
+    if raw:
+        return
+    created_at = getattr(instance, "created_at", None)
+
+    def _drop():
+        try:
+            invalidate_day(created_at)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate payment analytics day: {e}")
+
+    transaction.on_commit(_drop)
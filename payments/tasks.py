@@ -6,8 +6,6 @@ from decimal import Decimal
 
 from django.apps import apps
 from django.conf import settings
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
@@ -39,102 +37,54 @@ def run_post_payment_hooks_task(order_id: int):
 @shared_task
 def send_order_confirmation_email_task(order_id: int):
     """
-    Send order confirmation email to customer.
+    Queue the order confirmation email in the outbox (sent by the outbox
+    worker over a pooled connection).
     """
     try:
         Order = apps.get_model("orders", "Order")
         order = Order.objects.filter(pk=order_id).first()
         if not order:
             return
-        
-        recipient_email = None
-        if hasattr(order, 'email') and order.email:
-            recipient_email = order.email
-        elif hasattr(order, 'user') and order.user and order.user.email:
-            recipient_email = order.user.email
-        
-        if not recipient_email:
-            logger.warning(f"No email available for order {order_id}")
-            return
-        
-        context = {
-            'order': order,
-            'order_items': order.items.all() if hasattr(order, 'items') else [],
-            'restaurant_name': getattr(settings, 'RESTAURANT_NAME', 'Restaurant'),
-            'support_email': getattr(settings, 'SUPPORT_EMAIL', 'support@restaurant.com'),
-        }
-        
-        subject = f"Order Confirmation #{getattr(order, 'order_number', order.id)}"
-        
-        # Try to use templates if they exist, otherwise use simple text
-        try:
-            html_message = render_to_string('emails/order_confirmation.html', context)
-            plain_message = render_to_string('emails/order_confirmation.txt', context)
-        except Exception:
-            # Fallback to simple text message
-            plain_message = f"Thank you for your order #{getattr(order, 'order_number', order.id)}!\n\nYour order has been confirmed and is being prepared.\n\nTotal: ${order.total}\n\nThank you for choosing {context['restaurant_name']}!"
-            html_message = None
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            html_message=html_message,
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@restaurant.com'),
-            recipient_list=[recipient_email],
-            fail_silently=False,
-        )
-        
-        logger.info(f"Order confirmation email sent for order {order_id}")
-        
+        from core.outbox import enqueue
+        from payments.emails import order_confirmation
+        message = order_confirmation(order)
+        if message is not None and enqueue([message]):
+            logger.info(f"Order confirmation email queued for order {order_id}")
     except Exception:
-        logger.exception(f"Failed to send confirmation email for order {order_id}")
+        logger.exception(f"Failed to queue confirmation email for order {order_id}")
 
 @shared_task
 def send_staff_notification_task(order_id: int):
     """
-    Send new order notification to restaurant staff.
+    Queue the new order notification for restaurant staff in the outbox.
     """
     try:
-        staff_emails = getattr(settings, 'STAFF_NOTIFICATION_EMAILS', [])
-        if not staff_emails:
+        Order = apps.get_model("orders", "Order")
+        order = Order.objects.filter(pk=order_id).first()
+        if not order:
             return
-        
+        from core.outbox import enqueue
+        from payments.emails import staff_notification
+        message = staff_notification(order)
+        if message is not None and enqueue([message]):
+            logger.info(f"Staff notification email queued for order {order_id}")
+    except Exception:
+        logger.exception(f"Failed to queue staff notification for order {order_id}")
+
+@shared_task
+def save_invoice_pdf_task(order_id: int):
+    """
+    Render and attach the invoice PDF of an order, off the checkout request.
+    """
+    try:
         Order = apps.get_model("orders", "Order")
         order = Order.objects.filter(pk=order_id).first()
         if not order:
             return
-        
-        context = {
-            'order': order,
-            'order_items': order.items.all() if hasattr(order, 'items') else [],
-            'customer_name': getattr(order, 'customer_name', 'Guest'),
-            'order_time': order.created_at,
-        }
-        
-        subject = f"New Order #{getattr(order, 'order_number', order.id)} - {getattr(order, 'service_type', 'Dine-in')}"
-        
-        try:
-            html_message = render_to_string('emails/staff_notification.html', context)
-            plain_message = render_to_string('emails/staff_notification.txt', context)
-        except Exception:
-            # Fallback to simple text message
-            items_text = "\n".join([f"- {item.menu_item.name} x {item.quantity}" for item in context['order_items']])
-            plain_message = f"New Order #{getattr(order, 'order_number', order.id)}\n\nCustomer: {context['customer_name']}\nService: {getattr(order, 'service_type', 'Dine-in')}\nTotal: ${order.total}\n\nItems:\n{items_text}"
-            html_message = None
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            html_message=html_message,
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@restaurant.com'),
-            recipient_list=staff_emails,
-            fail_silently=False,
-        )
-        
-        logger.info(f"Staff notification email sent for order {order_id}")
-        
+        from payments.services import save_invoice_pdf_file
+        save_invoice_pdf_file(order)
     except Exception:
-        logger.exception(f"Failed to send staff notification for order {order_id}")
+        logger.exception(f"Failed to save invoice PDF for order {order_id}")
 
 @shared_task
 def sync_order_to_pos_task(order_id: int):
@@ -274,41 +224,23 @@ def process_loyalty_rewards_task(order_id: int):
 @shared_task
 def update_inventory_levels_task(order_id: int):
     """
-    Update inventory levels based on order items.
+    Apply the order's inventory depletion. run_post_payment_hooks already does
+    this synchronously; the depletion ledger makes this a no-op then, so the
+    task only matters as the retry path when the synchronous step failed.
     """
     try:
         Order = apps.get_model("orders", "Order")
         order = Order.objects.filter(pk=order_id).first()
-        if not order or not hasattr(order, 'items'):
-            return
-        
-        try:
-            InventoryItem = apps.get_model('inventory', 'InventoryItem')
-        except (LookupError, ImportError):
-            logger.info(f"Inventory system not available for order {order_id}")
+        if not order:
             return
-        
-        # Update inventory for each order item
-        from django.db import transaction
-        for order_item in order.items.all():
-            menu_item = order_item.menu_item
-            quantity = order_item.quantity
-            
-            # Try to find corresponding inventory item
-            try:
-                inventory_item = InventoryItem.objects.get(menu_item=menu_item)
-                
-                with transaction.atomic():
-                    if inventory_item.quantity >= quantity:
-                        inventory_item.quantity -= quantity
-                        inventory_item.save()
-                        logger.info(f"Updated inventory for {menu_item.name}: -{quantity}")
-                    else:
-                        logger.warning(f"Insufficient inventory for {menu_item.name}")
-                        
-            except InventoryItem.DoesNotExist:
-                logger.info(f"No inventory tracking for menu item: {menu_item.name}")
-        
+
+        from inventory.depletion import deplete_for_order
+        deplete_for_order(order)
+
+        if order.source_cart_id:
+            from orders.stock import commit_cart
+            commit_cart(order.source_cart_id)
+
     except Exception:
         logger.exception(f"Failed to update inventory for order {order_id}")
 
@@ -204,6 +204,7 @@ class AuditLog(models.Model):
             models.Index(fields=['severity', '-created_at']),
             models.Index(fields=['category', '-created_at']),
             models.Index(fields=['ip_address', '-created_at']),
+            models.Index(fields=['created_at'], name='auditlog_created_idx'),
         ]
     
     def __str__(self) -> str:
@@ -204,7 +204,7 @@ class OrderAnalyticsViewSet(viewsets.GenericViewSet):
         
         # Revenue metrics
         revenue_data = orders_qs.filter(
-            status__in=[Order.STATUS_COMPLETED, Order.STATUS_PAID]
+            status__in=[Order.STATUS_COMPLETED]
         ).aggregate(
             total_revenue=Sum('total_amount'),
             avg_order_value=Avg('total_amount'),
@@ -217,9 +217,9 @@ class OrderAnalyticsViewSet(viewsets.GenericViewSet):
             count=Count('id')
         ).order_by('-count')
         
-        # Service type breakdown
+        # Service type breakdown (orders record it as their delivery option)
         service_breakdown = orders_qs.values(
-            'service_type__name'
+            'delivery_option'
         ).annotate(
             count=Count('id'),
             revenue=Sum('total_amount')
@@ -259,7 +259,7 @@ class OrderAnalyticsViewSet(viewsets.GenericViewSet):
         daily_revenue = Order.objects.filter(
             created_at__date__gte=start_date,
             created_at__date__lte=end_date,
-            status__in=[Order.STATUS_COMPLETED, Order.STATUS_PAID]
+            status__in=[Order.STATUS_COMPLETED]
         ).extra(
             select={'day': 'date(created_at)'}
         ).values('day').annotate(
@@ -346,7 +346,7 @@ class MenuAnalyticsViewSet(viewsets.GenericViewSet):
         top_items = OrderItem.objects.filter(
             order__created_at__date__gte=start_date,
             order__created_at__date__lte=end_date,
-            order__status__in=[Order.STATUS_COMPLETED, Order.STATUS_PAID]
+            order__status__in=[Order.STATUS_COMPLETED]
         ).values(
             'menu_item__name',
             'menu_item__id'
@@ -360,7 +360,7 @@ class MenuAnalyticsViewSet(viewsets.GenericViewSet):
         category_performance = OrderItem.objects.filter(
             order__created_at__date__gte=start_date,
             order__created_at__date__lte=end_date,
-            order__status__in=[Order.STATUS_COMPLETED, Order.STATUS_PAID]
+            order__status__in=[Order.STATUS_COMPLETED]
         ).values(
             'menu_item__category__name'
         ).annotate(
@@ -415,7 +415,7 @@ class MenuAnalyticsViewSet(viewsets.GenericViewSet):
             items_in_range = OrderItem.objects.filter(
                 order__created_at__date__gte=start_date,
                 order__created_at__date__lte=end_date,
-                order__status__in=[Order.STATUS_COMPLETED, Order.STATUS_PAID],
+                order__status__in=[Order.STATUS_COMPLETED],
                 unit_price__gte=price_range['min'],
                 unit_price__lt=price_range['max']
             ).aggregate(
@@ -0,0 +1,181 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from core.perf import percentile
+from core.retention import purge
+from reservations.models import Reservation, ReservationConflict, Table, overlap_enforced_by_db
+
+SLOT_MINUTES = 30
+GUEST_NAME = 'Booking benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent booking throughput per worker count. Runs against the '
+        'configured database; the reservations it creates are removed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            default='1,2,4,8',
+            help='Comma separated worker (thread) counts to run (default: 1,2,4,8)'
+        )
+        parser.add_argument(
+            '--bookings',
+            type=int,
+            default=50,
+            help='Booking attempts per worker'
+        )
+        parser.add_argument(
+            '--location',
+            type=int,
+            help='Location whose active tables are booked (default: first with tables)'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['optimistic', 'locked'],
+            default='optimistic',
+            help='optimistic: plain insert guarded by the database; locked: lock the '
+                 'table row and check overlaps first (the previous approach)'
+        )
+        parser.add_argument(
+            '--contended',
+            action='store_true',
+            help='All workers race for the same table and slots; verifies exactly one '
+                 'booking wins each slot'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(value) for value in options['workers'].split(',') if value.strip()]
+        except ValueError:
+            raise CommandError('--workers must be a comma separated list of integers')
+        bookings = max(1, options['bookings'])
+
+        tables = Table.objects.filter(is_active=True).order_by('pk')
+        if options['location']:
+            tables = tables.filter(location_id=options['location'])
+        else:
+            first = tables.values_list('location_id', flat=True).first()
+            tables = tables.filter(location_id=first)
+        tables = list(tables.select_related('location'))
+        if not tables:
+            raise CommandError('No active tables to book')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["mode"]} booking on {connection.vendor} '
+            f'(database overlap guard: {"yes" if overlap_enforced_by_db() else "no"}), '
+            f'{bookings} attempts per worker, {len(tables)} tables'
+            + (', contended' if options['contended'] else '')
+        ))
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite serializes writers; expect flat throughput and "database is locked" errors.'
+            ))
+
+        baseline = None
+        for workers in counts:
+            result = self._run(tables, workers, bookings, options['mode'], options['contended'])
+            attempts = result['booked'] + result['conflicts'] + result['errors']
+            rate = attempts / result['seconds'] if result['seconds'] else 0.0
+            baseline = baseline or rate
+            scaling = rate / baseline if baseline else 0.0
+            self.stdout.write(
+                f'workers={workers:<3} attempts/s={rate:8.1f} scaling={scaling:4.2f}x '
+                f'booked={result["booked"]:<5} conflicts={result["conflicts"]:<5} errors={result["errors"]:<4} '
+                f'p50={result["p50"]:.1f}ms p95={result["p95"]:.1f}ms'
+            )
+            if options['contended']:
+                if result['booked'] == bookings:
+                    self.stdout.write(self.style.SUCCESS('    integrity: one booking per slot'))
+                else:
+                    self.stdout.write(self.style.ERROR(
+                        f'    integrity: {result["booked"]} bookings for {bookings} slots'
+                    ))
+
+    def _slots(self, tables, worker, bookings, contended, start):
+        """(table, start, end) for every attempt of one worker."""
+        slots = []
+        for i in range(bookings):
+            if contended:
+                table, index = tables[0], i
+            else:
+                # Own table where possible, and a slot nobody else uses
+                table, index = tables[worker % len(tables)], worker * bookings + i
+            begin = start + timedelta(minutes=SLOT_MINUTES * index)
+            slots.append((table, begin, begin + timedelta(minutes=SLOT_MINUTES)))
+        return slots
+
+    def _run(self, tables, workers, bookings, mode, contended):
+        start = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        barrier = threading.Barrier(workers)
+        lock = threading.Lock()
+        totals = {'booked': 0, 'conflicts': 0, 'errors': 0}
+        latencies = []
+        created = []
+
+        def book(table, begin, end):
+            reservation = Reservation(
+                location=table.location,
+                table=table,
+                guest_name=GUEST_NAME,
+                party_size=1,
+                start_time=begin,
+                end_time=end,
+                status=Reservation.STATUS_CONFIRMED,
+            )
+            if mode == 'locked':
+                with transaction.atomic():
+                    Table.objects.select_for_update().get(pk=table.pk)
+                    if reservation._overlaps_qs().exists():
+                        raise ReservationConflict('overlap')
+                    reservation.save()
+            else:
+                reservation.save()
+            return reservation.pk
+
+        def worker(index):
+            close_old_connections()
+            stats = {'booked': 0, 'conflicts': 0, 'errors': 0}
+            ids, timings = [], []
+            try:
+                barrier.wait()
+                for table, begin, end in self._slots(tables, index, bookings, contended, start):
+                    began = time.perf_counter()
+                    try:
+                        ids.append(book(table, begin, end))
+                        stats['booked'] += 1
+                    except ReservationConflict:
+                        stats['conflicts'] += 1
+                    except Exception:
+                        stats['errors'] += 1
+                    timings.append((time.perf_counter() - began) * 1000)
+            finally:
+                with lock:
+                    for name, value in stats.items():
+                        totals[name] += value
+                    created.extend(ids)
+                    latencies.extend(timings)
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - began
+
+        purge(Reservation.objects.filter(pk__in=created))
+        return {
+            **totals,
+            'seconds': seconds,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+        }
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:05
+
+from django.db import migrations
+
+TABLE = "reservations_reservation"
+NAME = "reservation_no_overlap"
+ACTIVE = "('pending', 'confirmed')"
+
+PG_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    f"ALTER TABLE {TABLE} ADD CONSTRAINT {NAME} "
+    f"EXCLUDE USING gist (table_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&) "
+    f"WHERE (status IN {ACTIVE})",
+]
+PG_DROP = [f"ALTER TABLE {TABLE} DROP CONSTRAINT IF EXISTS {NAME}"]
+
+# SQLite has no exclusion constraints; it serializes writers, so a trigger
+# that checks for an overlapping active row is just as race-free.
+SQLITE_CONDITION = (
+    f"NEW.status IN {ACTIVE} AND EXISTS ("
+    f"SELECT 1 FROM {TABLE} r WHERE r.table_id = NEW.table_id AND r.status IN {ACTIVE} "
+    f"AND r.start_time < NEW.end_time AND r.end_time > NEW.start_time{{extra}})"
+)
+SQLITE_CREATE = [
+    f"CREATE TRIGGER {NAME}_insert BEFORE INSERT ON {TABLE} "
+    f"WHEN {SQLITE_CONDITION.format(extra='')} "
+    f"BEGIN SELECT RAISE(ABORT, '{NAME}'); END",
+    f"CREATE TRIGGER {NAME}_update BEFORE UPDATE OF table_id, start_time, end_time, status ON {TABLE} "
+    f"WHEN {SQLITE_CONDITION.format(extra=' AND r.id <> NEW.id')} "
+    f"BEGIN SELECT RAISE(ABORT, '{NAME}'); END",
+]
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {NAME}_insert",
+    f"DROP TRIGGER IF EXISTS {NAME}_update",
+]
+
+
+def _check_existing_overlaps(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT a.id, b.id FROM {TABLE} a JOIN {TABLE} b "
+            f"ON a.table_id = b.table_id AND a.id < b.id "
+            f"AND a.start_time < b.end_time AND a.end_time > b.start_time "
+            f"WHERE a.status IN {ACTIVE} AND b.status IN {ACTIVE} LIMIT 10"
+        )
+        pairs = cursor.fetchall()
+    if pairs:
+        listed = ", ".join(f"{a}/{b}" for a, b in pairs)
+        raise RuntimeError(
+            f"Active reservations overlap on the same table ({listed}); "
+            f"cancel or move them before applying {NAME}."
+        )
+
+
+def add_overlap_guard(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        statements = PG_CREATE
+    elif vendor == "sqlite":
+        statements = SQLITE_CREATE
+    else:
+        return  # Reservation.save() keeps its locked overlap check
+    _check_existing_overlaps(schema_editor)
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def remove_overlap_guard(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": PG_DROP, "sqlite": SQLITE_DROP}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0006_alter_reservation_guest_phone'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_overlap_guard, remove_overlap_guard),
+    ]
@@ -7,7 +7,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
-from django.db import models, transaction
+from django.db import IntegrityError, connections, models, router, transaction
 from django.utils import timezone
 from django.utils.html import strip_tags
 import re
@@ -20,10 +20,30 @@ User = get_user_model()
 from core.models import Table
 
 
+# Name of the database-level overlap guard (see migration 0007)
+OVERLAP_CONSTRAINT = "reservation_no_overlap"
+OVERLAP_MESSAGE = "This table is already booked in the selected time range."
+
+
+class ReservationConflict(ValidationError):
+    """The table is already booked (pending/confirmed) in the requested window."""
+
+
+def overlap_enforced_by_db(using: str = "default") -> bool:
+    """
+    True when the database itself rejects overlapping active bookings:
+    a GiST exclusion constraint on PostgreSQL, BEFORE INSERT/UPDATE
+    triggers on SQLite (whose single writer makes them race-free).
+    """
+    return connections[using].vendor in ("postgresql", "sqlite")
+
+
 class Reservation(models.Model):
     """
     Reservation for a specific Table and time window.
-    - Prevents double-booking via atomic overlap check in save().
+    - Double-booking is rejected by the database (``reservation_no_overlap``);
+      save() is an optimistic write that turns a violation into
+      ReservationConflict. Other backends fall back to a locked overlap check.
     - Keeps a 'reservation_date' (date-only) to support original filterset usage.
     """
     STATUS_PENDING = "pending"
@@ -40,6 +60,9 @@ class Reservation(models.Model):
         (STATUS_COMPLETED, "Completed"),
     ]
 
+    # Statuses that hold the table (must match the constraint's predicate)
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_CONFIRMED)
+
     # Align phone regex with orders app to reduce false rejections
     phone_regex = RegexValidator(
         regex=r'^[\+]?[1-9]?[0-9]{7,15}$',
@@ -162,30 +185,42 @@ class Reservation(models.Model):
         Overlaps on same table in active statuses:
             existing.start < self.end AND existing.end > self.start
         """
-        active = [self.STATUS_PENDING, self.STATUS_CONFIRMED]
         return (
-            Reservation.objects.select_for_update()
+            Reservation.objects
             .filter(
-                location=self.location,
                 table=self.table,
-                status__in=active,
+                status__in=self.ACTIVE_STATUSES,
                 start_time__lt=self.end_time,
                 end_time__gt=self.start_time,
             )
             .exclude(pk=self.pk)
         )
 
-    @transaction.atomic
     def save(self, *args, **kwargs):
         # Keep reservation_date synced with start_time's date
         if self.start_time and timezone.is_aware(self.start_time):
             self.reservation_date = timezone.localtime(self.start_time).date()
         elif self.start_time:
             self.reservation_date = self.start_time.date()
+        if not self.confirmation_number:
+            from core.confirmation_codes import allocate
+            self.confirmation_number = allocate(type(self))
 
         self.full_clean()
 
-        if self._overlaps_qs().exists():
-            raise ValidationError("This table is already booked in the selected time range.")
-
-        super().save(*args, **kwargs)
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        if not overlap_enforced_by_db(using):
+            with transaction.atomic(using=using):
+                if self.status in self.ACTIVE_STATUSES and self._overlaps_qs().select_for_update().exists():
+                    raise ReservationConflict(OVERLAP_MESSAGE)
+                super().save(*args, **kwargs)
+            return
+
+        try:
+            # Savepoint, so a rejected booking leaves the caller's transaction usable
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            if OVERLAP_CONSTRAINT in str(e):
+                raise ReservationConflict(OVERLAP_MESSAGE)
+            raise
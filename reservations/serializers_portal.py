@@ -1,6 +1,6 @@
 from __future__ import annotations
 from rest_framework import serializers
-from .models import Table, Reservation
+from .models import Table, Reservation, ReservationConflict
 
 class TableStatusSerializer(serializers.Serializer):
     id = serializers.IntegerField()
@@ -66,6 +66,8 @@ class CreateReservationSerializer(serializers.Serializer):
                 note=validated.get("notes", ""),
                 created_by=user,
             )
+        except ReservationConflict:
+            raise  # the view answers 409
         except DjangoValidationError as e:
             from rest_framework.exceptions import ValidationError as DRFValidationError
             # Normalize to DRF validation error for consistent 400 handling
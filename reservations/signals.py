@@ -2,12 +2,18 @@ from __future__ import annotations
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from core.signals import table_availability_changed
+
 from .models import Reservation
 
 
+post_save.connect(table_availability_changed, sender=Reservation, dispatch_uid="reservations_availability_save")
+post_delete.connect(table_availability_changed, sender=Reservation, dispatch_uid="reservations_availability_delete")
+
+
 @receiver(post_save, sender=Reservation)
 def reservation_broadcast(sender, instance: Reservation, created: bool, **kwargs):
     try:
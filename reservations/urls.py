@@ -4,7 +4,7 @@ from __future__ import annotations
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import TableViewSet, ReservationViewSet
+from .views import TableViewSet, ReservationViewSet, TableAvailabilityView
 
 app_name = "reservations"
 
@@ -13,5 +13,11 @@ router.register(r"reservations/tables", TableViewSet, basename="reservations-tab
 router.register(r"reservations", ReservationViewSet, basename="reservations")
 
 urlpatterns = [
+    # Native async read path; must precede the router's tables/<pk>/ route
+    path(
+        "reservations/tables/availability/",
+        TableAvailabilityView.as_view(),
+        name="reservations-tables-availability",
+    ),
     path("", include(router.urls)),
 ]
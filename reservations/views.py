@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from django.db import transaction
-from django.db.models import Q
+from django.http import JsonResponse
 from django.utils import timezone
+from django.views import View
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -13,7 +13,10 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from .models import Table, Reservation
+from core import aio
+from core import tables as table_registry
+
+from .models import Table, Reservation, ReservationConflict
 from .serializers import TableSerializer, ReservationSerializer, WalkInReservationSerializer
 
 
@@ -66,7 +69,7 @@ class TableViewSet(viewsets.ModelViewSet):
     Matches the original ZIP:
       - ModelViewSet
       - filterset on ['location', 'is_active', 'capacity']
-    Extended to provide 'availability' for a time window via a custom action.
+    Availability for a time window is ``TableAvailabilityView``.
     """
     queryset = Table.objects.select_related("location").all()
     serializer_class = TableSerializer
@@ -74,65 +77,77 @@ class TableViewSet(viewsets.ModelViewSet):
     filterset_fields = ["location", "is_active", "capacity"]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
-    @action(detail=False, methods=["get"], url_path="availability")
-    def availability(self, request: Request) -> Response:
-        """
-        GET /api/reservations/tables/availability/
-          ?date=YYYY-MM-DD&from=HH:MM&to=HH:MM&location=<id>
 
-        Also supports legacy params: start=<ISO>, end=<ISO>.
+def _availability_window(params) -> Tuple[int, datetime, datetime]:
+    """
+    Location and time window of an availability request. Prefers
+    (date, from, to), falls back to (start, end), then to the upcoming
+    quarter-hour plus 90 minutes. Raises ValueError for a bad location.
+    """
+    location_id = int(params.get("location") or params.get("location_id") or 1)
+
+    date_str = params.get("date")
+    from_str = params.get("from")
+    to_str = params.get("to")
 
-        Returns per-table blocks:
-          {
-            table_id, table_number, capacity, is_active,
-            busy: [{start, end, reservation_id}],
-            free: [{start, end}]  # derived within requested window
-          }
-        """
-        # Location
+    def _combine(d: str, h: str) -> Optional[datetime]:
         try:
-            location_id = int(request.query_params.get("location") or request.query_params.get("location_id") or 1)
+            dt = datetime.strptime(f"{d}T{h}", "%Y-%m-%dT%H:%M")
+            if timezone.is_naive(dt):
+                dt = timezone.make_aware(dt, timezone.get_current_timezone())
+            return dt
         except Exception:
-            return Response({"detail": "Invalid location id."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Time window: prefer (date, from, to); fallback to (start, end)
-        date_str = request.query_params.get("date")
-        from_str = request.query_params.get("from")
-        to_str = request.query_params.get("to")
-
-        def _combine(d: str, h: str) -> Optional[datetime]:
-            try:
-                dt = datetime.strptime(f"{d}T{h}", "%Y-%m-%dT%H:%M")
-                if timezone.is_naive(dt):
-                    dt = timezone.make_aware(dt, timezone.get_current_timezone())
-                return dt
-            except Exception:
-                return None
-
-        start = end = None
-        if date_str and from_str and to_str:
-            start = _combine(date_str, from_str)
-            end = _combine(date_str, to_str)
-        else:
-            start = _parse_dt(request.query_params.get("start"))
-            end = _parse_dt(request.query_params.get("end"))
+            return None
 
-        # Defaults
-        if not start:
-            # round upcoming quarter-hour
-            now = timezone.now() + timedelta(minutes=15)
-            minute = (now.minute // 15) * 15
-            start = now.replace(minute=minute, second=0, microsecond=0)
-        if not end:
-            end = start + timedelta(minutes=90)
+    start = end = None
+    if date_str and from_str and to_str:
+        start = _combine(date_str, from_str)
+        end = _combine(date_str, to_str)
+    else:
+        start = _parse_dt(params.get("start"))
+        end = _parse_dt(params.get("end"))
+
+    # Defaults
+    if not start:
+        # round upcoming quarter-hour
+        now = timezone.now() + timedelta(minutes=15)
+        minute = (now.minute // 15) * 15
+        start = now.replace(minute=minute, second=0, microsecond=0)
+    if not end:
+        end = start + timedelta(minutes=90)
+    return location_id, start, end
+
+
+class TableAvailabilityView(View):
+    """
+    GET /api/reservations/tables/availability/
+      ?date=YYYY-MM-DD&from=HH:MM&to=HH:MM&location=<id>
+
+    Also supports legacy params: start=<ISO>, end=<ISO>.
+
+    Returns per-table blocks:
+      {
+        table_id, table_number, capacity, is_active,
+        busy: [{start, end, reservation_id}],
+        free: [{start, end}]  # derived within requested window
+      }
+
+    Served natively async: the floor plan comes from the table registry
+    through the async cache client and reservations from one async query.
+    """
+
+    async def get(self, request):
+        try:
+            location_id, start, end = _availability_window(request.GET)
+        except (TypeError, ValueError):
+            return aio.error("Invalid location id.", status.HTTP_400_BAD_REQUEST)
 
         # Gather active reservations overlapping window
-        active_statuses = _active_reservation_statuses()
         res_qs = (
-            Reservation.objects.select_related("table")
+            Reservation.objects
             .filter(
                 location_id=location_id,
-                status__in=active_statuses,
+                status__in=_active_reservation_statuses(),
                 start_time__lt=end,
                 end_time__gt=start,
             )
@@ -140,7 +155,7 @@ class TableViewSet(viewsets.ModelViewSet):
         )
 
         busy_by_table: Dict[int, List[Dict]] = {}
-        for r in res_qs:
+        async for r in res_qs:
             busy_by_table.setdefault(r.table_id, []).append({
                 "start": timezone.localtime(r.start_time).isoformat(),
                 "end": timezone.localtime(r.end_time).isoformat(),
@@ -152,9 +167,8 @@ class TableViewSet(viewsets.ModelViewSet):
 
         # Compose table blocks
         blocks: List[Dict] = []
-        tables = Table.objects.select_related("location").filter(location_id=location_id).order_by("table_number")
-        for t in tables:
-            busy = busy_by_table.get(t.id, [])
+        for t in await table_registry.atables(location_id, active_only=False):
+            busy = busy_by_table.get(t["id"], [])
             # derive free windows
             free: List[Dict] = []
             cur_start = start
@@ -169,15 +183,15 @@ class TableViewSet(viewsets.ModelViewSet):
                 free.append({"start": cur_start.isoformat(), "end": end.isoformat()})
 
             blocks.append({
-                "table_id": t.id,
-                "table_number": getattr(t, "table_number", ""),
-                "capacity": getattr(t, "capacity", None),
-                "is_active": getattr(t, "is_active", True),
+                "table_id": t["id"],
+                "table_number": t["table_number"],
+                "capacity": t["capacity"],
+                "is_active": t["is_active"],
                 "busy": busy,
                 "free": free,
             })
 
-        return Response({
+        return JsonResponse({
             "start": start.isoformat(),
             "end": end.isoformat(),
             "tables": blocks,
@@ -189,7 +203,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
     Matches the original ZIP:
       - ModelViewSet
       - filterset on ['location', 'status', 'reservation_date', 'table']
-    Create is guarded by atomic overlap checks (transaction-safe).
+    Create relies on the database overlap guard (optimistic insert, 409 on conflict).
     """
     queryset = Reservation.objects.select_related("location", "table", "created_by").all()
     serializer_class = ReservationSerializer
@@ -197,14 +211,14 @@ class ReservationViewSet(viewsets.ModelViewSet):
     filterset_fields = ["location", "status", "reservation_date", "table"]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
-    @transaction.atomic
     def create(self, request: Request, *args, **kwargs) -> Response:
         """
         Accepts either:
           - explicit start_time & end_time, or
           - start_time only (end_time defaults to +90 minutes)
         Also sets created_by = request.user if authenticated.
-        Prevents double-booking with SELECT ... FOR UPDATE on conflicting rows.
+        Double-booking is rejected by the database; the insert is optimistic
+        and a conflict comes back as 409.
         """
         data = dict(request.data)
         # Normalize incoming strings
@@ -230,7 +244,6 @@ class ReservationViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=payload)
         serializer.is_valid(raise_exception=True)
 
-        # Double-booking protection in DB transaction:
         table = serializer.validated_data["table"]
         location = serializer.validated_data["location"]
         s = serializer.validated_data["start_time"]
@@ -245,21 +258,14 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if party_size > getattr(table, "capacity", party_size):
             return Response({"detail": "Party size exceeds table capacity."}, status=status.HTTP_400_BAD_REQUEST)
 
-        active_statuses = _active_reservation_statuses()
-        conflicts = (
-            Reservation.objects.select_for_update()
-            .filter(location=location, table=table, status__in=active_statuses)
-            .filter(Q(start_time__lt=e) & Q(end_time__gt=s))
-        )
-        if conflicts.exists():
+        try:
+            instance = serializer.save()
+        except ReservationConflict:
             return Response({"detail": "Selected table is already booked in this time range."}, status=status.HTTP_409_CONFLICT)
-
-        instance = serializer.save()
         headers = self.get_success_headers(serializer.data)
         return Response(ReservationSerializer(instance).data, status=status.HTTP_201_CREATED, headers=headers)
 
     @action(detail=False, methods=["post"], url_path="walkin")
-    @transaction.atomic
     def walkin(self, request: Request) -> Response:
         """
         Create a walk-in reservation starting in 5 minutes for a fixed duration (default 90m).
@@ -281,16 +287,6 @@ class ReservationViewSet(viewsets.ModelViewSet):
         start = timezone.now() + timedelta(minutes=5)
         end = start + timedelta(minutes=minutes)
 
-        # Conflict check (atomic)
-        active_statuses = _active_reservation_statuses()
-        conflicts = (
-            Reservation.objects.select_for_update()
-            .filter(location=location, table=table, status__in=active_statuses)
-            .filter(Q(start_time__lt=end) & Q(end_time__gt=start))
-        )
-        if conflicts.exists():
-            return Response({"detail": "Selected table is already booked in this time range."}, status=status.HTTP_409_CONFLICT)
-
         # Create reservation
         res = Reservation(
             location=location,
@@ -303,8 +299,11 @@ class ReservationViewSet(viewsets.ModelViewSet):
             end_time=end,
             status=getattr(Reservation, "STATUS_CONFIRMED", "confirmed"),
         )
-        # Model.save() will validate reservation_date & overlap again
-        res.save()
+        # Model.save() validates and the database rejects overlaps
+        try:
+            res.save()
+        except ReservationConflict:
+            return Response({"detail": "Selected table is already booked in this time range."}, status=status.HTTP_409_CONFLICT)
         return Response(ReservationSerializer(res).data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAdminUser])
@@ -314,7 +313,10 @@ class ReservationViewSet(viewsets.ModelViewSet):
         """
         res = self.get_object()
         res.status = getattr(Reservation, "STATUS_CONFIRMED", "confirmed")
-        res.save(update_fields=["status"])
+        try:
+            res.save(update_fields=["status"])
+        except ReservationConflict:
+            return Response({"detail": "Selected table is already booked in this time range."}, status=status.HTTP_409_CONFLICT)
         return Response({"ok": True, "status": res.status})
 
     @action(detail=True, methods=["post"], permission_classes=[IsAdminUser])
@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.shortcuts import render
 from django.utils import timezone
+from django.views import View
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -13,7 +14,10 @@ import stripe
 stripe.api_key = getattr(settings, "STRIPE_SECRET_KEY", "")
 from django.http import JsonResponse
 
-from .models import Table, Reservation
+from core import aio
+from core import tables as table_registry
+
+from .models import Table, Reservation, ReservationConflict
 from .serializers_portal import (
     TableStatusSerializer,
     CreateReservationSerializer,
@@ -21,36 +25,27 @@ from .serializers_portal import (
 )
 
 # derive “20-minute hold after checkout” from existing Orders/Payments
-def _current_dinein_busy_map(slot_start=None, slot_end=None, now=None):
-    """
-    Treat active holds as temporary busy states, but only when the requested
-    time window overlaps the hold window. This ensures holds only affect
-    "this day / this time" and do not block other days/times.
-    """
+def _aware(dt):
+    if dt is not None and timezone.is_naive(dt):
+        return timezone.make_aware(dt, timezone.get_current_timezone())
+    return dt
+
+def _pending_holds(slot_start, slot_end, now):
     from engagement.models import ReservationHold
-    now = now or timezone.now()
-    # Normalize inputs to timezone-aware datetimes to avoid naive/aware comparisons
-    if slot_start is not None and timezone.is_naive(slot_start):
-        slot_start = timezone.make_aware(slot_start, timezone.get_current_timezone())
-    if slot_end is not None and timezone.is_naive(slot_end):
-        slot_end = timezone.make_aware(slot_end, timezone.get_current_timezone())
     qs = ReservationHold.objects.filter(status="PENDING")
     if slot_start is not None and slot_end is not None:
         qs = qs.filter(created_at__lt=slot_end, expires_at__gt=slot_start)
     else:
         qs = qs.filter(expires_at__gt=now)
-    qs = qs.select_related("table")
+    return qs.select_related("table")
 
+def _busy_from_holds(holds, slot_start, slot_end, now):
     busy = {}
-    for h in qs:
+    for h in holds:
         tnum = str(getattr(h.table, "table_number", ""))
         # Compute overlap seconds between [created_at, expires_at] and [slot_start, slot_end] or [now, expires_at]
-        s0 = h.created_at
-        e0 = h.expires_at
-        if timezone.is_naive(s0):
-            s0 = timezone.make_aware(s0, timezone.get_current_timezone())
-        if timezone.is_naive(e0):
-            e0 = timezone.make_aware(e0, timezone.get_current_timezone())
+        s0 = _aware(h.created_at)
+        e0 = _aware(h.expires_at)
         s1 = slot_start or now
         e1 = slot_end or e0
         try:
@@ -61,6 +56,25 @@ def _current_dinein_busy_map(slot_start=None, slot_end=None, now=None):
             busy[tnum] = max(busy.get(tnum, 0), overlap)
     return busy
 
+def _current_dinein_busy_map(slot_start=None, slot_end=None, now=None):
+    """
+    Treat active holds as temporary busy states, but only when the requested
+    time window overlaps the hold window. This ensures holds only affect
+    "this day / this time" and do not block other days/times.
+    """
+    now = now or timezone.now()
+    # Normalize inputs to timezone-aware datetimes to avoid naive/aware comparisons
+    slot_start, slot_end = _aware(slot_start), _aware(slot_end)
+    holds = _pending_holds(slot_start, slot_end, now)
+    return _busy_from_holds(holds, slot_start, slot_end, now)
+
+async def _acurrent_dinein_busy_map(slot_start=None, slot_end=None, now=None):
+    """``_current_dinein_busy_map`` for async views."""
+    now = now or timezone.now()
+    slot_start, slot_end = _aware(slot_start), _aware(slot_end)
+    holds = [h async for h in _pending_holds(slot_start, slot_end, now)]
+    return _busy_from_holds(holds, slot_start, slot_end, now)
+
 def _parse_dt(date_str: str, time_str: str) -> datetime:
     # Build timezone-aware datetime to match DB datetimes
     dt = datetime.fromisoformat(f"{date_str}T{time_str}")
@@ -91,60 +105,67 @@ def _active_reservations(slot_dt: datetime, end_dt: datetime | None = None):
 def reserve_page(request):
     return render(request, "reservations/reserve.html", {})
 
-class AvailabilityView(APIView):
-    permission_classes = [IsAuthenticated]
+class AvailabilityView(View):
+    """
+    Table status grid for the reservation page. Served natively async:
+    holds and reservations are read with async queries and the floor plan
+    comes from the table registry through the async cache client.
+    """
 
-    def get(self, request):
-        date = request.query_params.get("date")
-        time = request.query_params.get("time")
-        end_time = request.query_params.get("end")
+    async def get(self, request):
+        if await aio.authenticate(request) is None:
+            return aio.error("Authentication credentials were not provided.", 403)
+
+        date = request.GET.get("date")
+        time = request.GET.get("time")
+        end_time = request.GET.get("end")
         if not date or not time:
-            return Response({"detail": "date and time are required"}, status=400)
+            return aio.error("date and time are required", 400)
 
         try:
             slot_dt = _parse_dt(date, time)
             end_dt = _parse_dt(date, end_time) if end_time else None
         except ValueError:
-            return Response({"detail": "Invalid date/time format."}, status=400)
+            return aio.error("Invalid date/time format.", 400)
         # Robustness: if provided end is earlier than start (e.g., 05:00 vs 19:00),
         # treat it as next-day end instead of erroring.
         if end_dt is not None and end_dt <= slot_dt:
             end_dt = end_dt + timedelta(days=1)
 
         # Map: table_id -> Reservation overlapping requested window
-        res_map = {r.table_id: r for r in _active_reservations(slot_dt, end_dt)}
+        res_map = {r.table_id: r async for r in _active_reservations(slot_dt, end_dt)}
 
-        busy_map = _current_dinein_busy_map(slot_dt, end_dt)  # table_number -> seconds overlap
+        busy_map = await _acurrent_dinein_busy_map(slot_dt, end_dt)  # table_number -> seconds overlap
 
         payload = []
-        for t in Table.objects.filter(is_active=True):
+        for t in await table_registry.atables():
             status = "available"
             hold_seconds = None
             res_id = None
             res_status = ""
 
             # Busy due to 20m dine-in turnover
-            if str(t.table_number) in busy_map and busy_map[str(t.table_number)] > 0:
+            if str(t["table_number"]) in busy_map and busy_map[str(t["table_number"])] > 0:
                 status = "busy"
-                hold_seconds = busy_map[str(t.table_number)]
+                hold_seconds = busy_map[str(t["table_number"])]
 
             # Reserved in the requested slot
-            if t.id in res_map:
+            if t["id"] in res_map:
                 status = "reserved"
-                res_id = res_map[t.id].id
-                res_status = res_map[t.id].status
+                res_id = res_map[t["id"]].id
+                res_status = res_map[t["id"]].status
 
             payload.append({
-                "id": t.id,
-                "table_number": t.table_number,
-                "capacity": t.capacity,
+                "id": t["id"],
+                "table_number": t["table_number"],
+                "capacity": t["capacity"],
                 "status": status,
                 "hold_seconds": hold_seconds,
                 "reservation_id": res_id,
                 "reservation_status": res_status,
             })
 
-        return Response(TableStatusSerializer(payload, many=True).data, status=200)
+        return JsonResponse(TableStatusSerializer(payload, many=True).data, status=200, safe=False)
 
 class CreateReservationView(APIView):
     permission_classes = [IsAuthenticated]
@@ -153,7 +174,7 @@ class CreateReservationView(APIView):
     def post(self, request):
         ser = CreateReservationSerializer(data=request.data, context={"request": request})
         ser.is_valid(raise_exception=True)
-        table = Table.objects.select_for_update().get(pk=ser.validated_data["table_id"])
+        table = Table.objects.get(pk=ser.validated_data["table_id"])
         start_dt = _parse_dt(
             ser.validated_data["date"].isoformat(),
             ser.validated_data["time"].isoformat(timespec="minutes"),
@@ -171,7 +192,8 @@ class CreateReservationView(APIView):
         if str(table.table_number) in busy_map and busy_map[str(table.table_number)] > 0:
             return Response({"detail": "Table busy (turnover). Try later or another table."}, status=409)
 
-        # deny if another reservation blocks the requested window
+        # deny if another reservation blocks the requested window (fast path;
+        # the database overlap guard decides races at insert time)
         if _active_reservations(start_dt, end_dt).filter(table=table).exists():
             return Response({"detail": "Table reserved at that time."}, status=409)
 
@@ -185,7 +207,7 @@ class CreateReservationView(APIView):
                     status__in=["pending", "confirmed"],
                     start_time__lt=end_dt,
                     end_time__gt=start_dt,
-                ).select_for_update().count()
+                ).count()
                 if overlapping_count >= max_tables:
                     return Response({"detail": f"You already have {overlapping_count} active reservation(s) for that time window (limit {max_tables})."}, status=409)
 
@@ -215,7 +237,10 @@ class CreateReservationView(APIView):
             total_deposit = round(per * max(1, party_size), 2)
 
         # Create reservation; attach deposit fields
-        reservation = ser.save()
+        try:
+            reservation = ser.save()
+        except ReservationConflict:
+            return Response({"detail": "Table reserved at that time."}, status=409)
         if total_deposit > 0:
             reservation.deposit_amount = total_deposit
             reservation.deposit_paid = False
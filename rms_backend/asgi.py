@@ -1,9 +1,21 @@
+"""
+ASGI entry point: HTTP (including the native async read views) and the
+Channels websockets. Production runs it under gunicorn with uvicorn
+workers; see DEPLOYMENT.md ("ASGI workers").
+"""
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rms_backend.settings')
+# No WhiteNoise here: it is sync-only and would put every request, the async
+# views included, on a thread. Static files come from the web server or CDN.
+os.environ.setdefault('SERVE_STATIC', '0')
+
+# Set up Django before importing anything that touches models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.auth import AuthMiddlewareStack
 
 from core.routing import websocket_urlpatterns as core_ws
 try:
@@ -11,8 +23,11 @@ try:
 except Exception:
     reports_ws = []
 
+from core.warmup import on_startup
+on_startup()
+
 application = ProtocolTypeRouter({
-    'http': get_asgi_application(),
+    'http': django_asgi_app,
     'websocket': AuthMiddlewareStack(
         URLRouter(list(core_ws) + list(reports_ws))
     ),
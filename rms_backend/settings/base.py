@@ -97,6 +97,7 @@ MIDDLEWARE = [
     "core.rate_limiting.SecurityHeadersMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "core.middleware.cache_middleware.CachePerformanceMiddleware",
+    "core.middleware.query_budget.QueryBudgetMiddleware",
 
     "core.rate_limiting.RateLimitMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -105,12 +106,22 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "reports.middleware.AuditLogMiddleware",
+    "accounts.middleware.ActivityMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "core.middleware.cache_middleware.CacheInvalidationMiddleware",
     "core.middleware.cache_middleware.CacheCompressionMiddleware",
+    "core.middleware.cache_middleware.ResponseCacheMiddleware",
 ]
 
+# WhiteNoise is sync-only: under ASGI workers it makes Django run the whole
+# chain through async_to_sync, so every request holds a thread. The ASGI entry
+# point (rms_backend.asgi) defaults SERVE_STATIC to 0 and /static/ is served by
+# the web server or CDN instead (DEPLOYMENT.md, "ASGI workers").
+SERVE_STATIC = os.getenv("SERVE_STATIC", "1") == "1"
+if not SERVE_STATIC:
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
 ROOT_URLCONF = "rms_backend.urls"
 
 # -----------------------------------------------------------------------------
@@ -290,6 +301,8 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {
         "anon": os.getenv("DRF_ANON_THROTTLE_RATE", "100/hour"),
         "user": os.getenv("DRF_USER_THROTTLE_RATE", "1000/hour"),
+        # integrations.views.delivery_options: misses call the paid quote APIs
+        "delivery_quotes": os.getenv("DRF_DELIVERY_QUOTE_THROTTLE_RATE", "30/min"),
     },
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
@@ -325,6 +338,9 @@ except Exception:
 RESERVATION_MAX_NO_SHOWS = int(os.getenv("RESERVATION_MAX_NO_SHOWS", "3") or 3)
 # Action when limit reached: 'block' or 'require_prepayment'
 RESERVATION_NO_SHOW_ACTION = (os.getenv("RESERVATION_NO_SHOW_ACTION", "require_prepayment") or "require_prepayment").lower()
+# Key of the confirmation code permutation (core.confirmation_codes); defaults to SECRET_KEY.
+# Set it once: codes issued under another key may collide (the unique constraint rejects them).
+CONFIRMATION_CODE_KEY = os.getenv("CONFIRMATION_CODE_KEY", "")
 
 # API Documentation
 SPECTACULAR_SETTINGS = {
@@ -400,9 +416,14 @@ SIMPLE_JWT = {
 # -----------------------------------------------------------------------------
 # Session Configuration
 # -----------------------------------------------------------------------------
-SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+# Redis hashes with coalesced DB write-through (falls back to DB when cache isn't Redis)
+SESSION_ENGINE = "core.session_store"
 SESSION_COOKIE_AGE = int(os.getenv("SESSION_COOKIE_AGE", str(60 * 60 * 24 * 7)))  # 7 days
 SESSION_SAVE_EVERY_REQUEST = True
+# Max seconds between DB writes for sessions whose content did not change
+SESSION_DB_SYNC_INTERVAL = int(os.getenv("SESSION_DB_SYNC_INTERVAL", "3600"))
+# Keys whose changes are buffered in Redis and persisted on the sync interval
+SESSION_COALESCED_KEYS = ["cart_last_activity", "cart_last_modified"]
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_COOKIE_NAME = "rms_sessionid"
 SESSION_COOKIE_HTTPONLY = True
@@ -524,6 +545,30 @@ DELIVERY_FEE_DOORDASH = float(os.getenv("DELIVERY_FEE_DOORDASH", "0") or 0)
 DELIVERY_FEE_UBEREATS = float(os.getenv("DELIVERY_FEE_UBEREATS", "0") or 0)
 MIN_ORDER_FOR_DELIVERY = float(os.getenv("MIN_ORDER_FOR_DELIVERY", "0") or 0)
 
+# Delivery quotes (integrations.options): providers asked concurrently, overall
+# deadline, cache cell/band granularity and fallback estimates
+UBEREATS_CUSTOMER_ID = os.getenv("UBEREATS_CUSTOMER_ID", "")
+DELIVERY_PICKUP_ADDRESS = {
+    "street": os.getenv("DELIVERY_PICKUP_STREET", ""),
+    "city": os.getenv("DELIVERY_PICKUP_CITY", ""),
+    "state": os.getenv("DELIVERY_PICKUP_STATE", ""),
+    "zip_code": os.getenv("DELIVERY_PICKUP_ZIP", ""),
+}
+DELIVERY_QUOTE_PROVIDERS = [
+    name.strip() for name in os.getenv("DELIVERY_QUOTE_PROVIDERS", "DOORDASH,UBEREATS").split(",") if name.strip()
+]
+DELIVERY_QUOTE_FAKE_PROVIDERS = os.getenv("DELIVERY_QUOTE_FAKE_PROVIDERS", "")  # e.g. "DOORDASH=120,UBEREATS=900"
+DELIVERY_QUOTE_DEADLINE_MS = int(os.getenv("DELIVERY_QUOTE_DEADLINE_MS", "1200"))
+DELIVERY_QUOTE_HTTP_TIMEOUT = float(os.getenv("DELIVERY_QUOTE_HTTP_TIMEOUT", "5"))
+# Worker threads per provider; a provider with all of them busy is skipped
+DELIVERY_QUOTE_MAX_WORKERS = int(os.getenv("DELIVERY_QUOTE_MAX_WORKERS", "8"))
+DELIVERY_QUOTE_CACHE_TTL = int(os.getenv("DELIVERY_QUOTE_CACHE_TTL", "60"))
+DELIVERY_QUOTE_FALLBACK_TTL = int(os.getenv("DELIVERY_QUOTE_FALLBACK_TTL", "1800"))
+DELIVERY_QUOTE_CELL_PRECISION = int(os.getenv("DELIVERY_QUOTE_CELL_PRECISION", "2"))  # ~1 km
+DELIVERY_QUOTE_VALUE_BANDS = [int(v) for v in os.getenv("DELIVERY_QUOTE_VALUE_BANDS", "15,30,50,100").split(",")]
+DELIVERY_QUOTE_FALLBACK_FEE = os.getenv("DELIVERY_QUOTE_FALLBACK_FEE", "4.99")
+DELIVERY_QUOTE_FALLBACK_ETA = int(os.getenv("DELIVERY_QUOTE_FALLBACK_ETA", "40"))
+
 # Optional platform fees (absolute amounts added to service fees)
 UBEREATS_FEE = float(os.getenv("UBEREATS_FEE", "0"))
 DOORDASH_FEE = float(os.getenv("DOORDASH_FEE", "0"))
@@ -559,10 +604,14 @@ CELERY_TASK_ROUTES = {
     'payments.tasks.run_post_payment_hooks_task': {'queue': 'post_payment'},
     'payments.tasks.send_order_confirmation_email_task': {'queue': 'emails'},
     'payments.tasks.send_staff_notification_task': {'queue': 'emails'},
+    'payments.tasks.save_invoice_pdf_task': {'queue': 'documents'},
+    'menu.tasks.generate_image_variants_task': {'queue': 'documents'},
     'payments.tasks.sync_order_to_pos_task': {'queue': 'pos_sync'},
     'payments.tasks.record_payment_analytics_task': {'queue': 'analytics'},
     'payments.tasks.process_loyalty_rewards_task': {'queue': 'loyalty'},
     'payments.tasks.update_inventory_levels_task': {'queue': 'inventory'},
+    'orders.tasks.release_expired_stock_holds_task': {'queue': 'inventory'},
+    'core.tasks.drain_email_outbox_task': {'queue': 'emails'},
     # Default queue for other tasks
     '*': {'queue': 'default'},
 }
@@ -646,6 +695,30 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'reservations.tasks_portal.auto_cancel_no_show_reservations',
         'schedule': int(os.getenv('RESERVATION_AUTOCANCEL_CHECK_SECONDS', '60') or 60),
     },
+    'flush_dirty_sessions': {
+        'task': 'core.tasks.flush_dirty_sessions_task',
+        'schedule': int(os.getenv('SESSION_FLUSH_SECONDS', '300') or 300),
+    },
+    'release_expired_stock_holds': {
+        'task': 'orders.tasks.release_expired_stock_holds_task',
+        'schedule': int(os.getenv('STOCK_HOLD_SWEEP_SECONDS', '60') or 60),
+    },
+    'flush_counters': {
+        'task': 'menu.tasks.flush_counters_task',
+        'schedule': int(os.getenv('COUNTER_FLUSH_SECONDS', '5') or 5),
+    },
+    'flush_user_activity': {
+        'task': 'accounts.tasks.flush_activity_task',
+        'schedule': int(os.getenv('ACTIVITY_FLUSH_SECONDS', '60') or 60),
+    },
+    'drain_email_outbox': {
+        'task': 'core.tasks.drain_email_outbox_task',
+        'schedule': int(os.getenv('EMAIL_OUTBOX_DRAIN_SECONDS', '10') or 10),
+    },
+    'apply_retention': {
+        'task': 'core.tasks.apply_retention_task',
+        'schedule': int(os.getenv('DATA_RETENTION_RUN_SECONDS', '86400') or 86400),
+    },
 }
 
 # -----------------------------------------------------------------------------
@@ -699,10 +772,72 @@ CACHE_MIDDLEWARE_KEY_PREFIX = "rms"
 # Cache configuration settings
 CACHE_WARMUP_ENABLED = os.getenv("CACHE_WARMUP_ENABLED", "1") == "1"
 CACHE_WARMUP_ON_STARTUP = os.getenv("CACHE_WARMUP_ON_STARTUP", "0") == "1"
+# core.warmup: single-flight rebuild lock, stale copy lifetime, how long a
+# reader waits for a cold rebuild, and invalidation debounce (seconds / ms)
+CACHE_WARMUP_LOCK_TTL = int(os.getenv("CACHE_WARMUP_LOCK_TTL", "30"))
+CACHE_WARMUP_STALE_TTL = int(os.getenv("CACHE_WARMUP_STALE_TTL", str(60 * 60 * 24)))
+CACHE_WARMUP_WAIT_MS = int(os.getenv("CACHE_WARMUP_WAIT_MS", "2000"))
+CACHE_WARMUP_DEBOUNCE = int(os.getenv("CACHE_WARMUP_DEBOUNCE", "5"))
+# core.local_cache: per-process LRU in front of Redis for menu item, modifier
+# and menu lookups, invalidated over the L1_CACHE_CHANNEL pub/sub channel
+L1_CACHE_ENABLED = os.getenv("L1_CACHE_ENABLED", "1") == "1"
+L1_CACHE_MAX_ENTRIES = int(os.getenv("L1_CACHE_MAX_ENTRIES", "5000"))
+L1_CACHE_TTL = float(os.getenv("L1_CACHE_TTL", "5"))
+L1_CACHE_SYNC_INTERVAL = float(os.getenv("L1_CACHE_SYNC_INTERVAL", "1"))
+L1_CACHE_CHANNEL = os.getenv("L1_CACHE_CHANNEL", "rms:l1:invalidate")
+# core.http_cache: rendered responses of the endpoints in HTTP_CACHE_POLICIES
+# (URL name -> CachePolicy options), with ETag/Last-Modified revalidation.
+# Bodies of at least HTTP_CACHE_GZIP_MIN_BYTES are also stored gzipped.
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") == "1"
+HTTP_CACHE_GZIP_MIN_BYTES = int(os.getenv("HTTP_CACHE_GZIP_MIN_BYTES", "1024"))
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(1024 * 1024)))
+HTTP_CACHE_POLICIES = {
+    # Staff see unavailable items and inactive categories, so they bypass
+    "menu_api:menudisplay-list": {"max_age": 60, "stale_while_revalidate": 300, "scope": "non_staff", "namespaces": ["menu"]},
+    "menu_api:menucategory-list": {"max_age": 60, "stale_while_revalidate": 300, "scope": "non_staff", "namespaces": ["menu"]},
+    "menu_api:menucategory-tree": {"max_age": 60, "stale_while_revalidate": 300, "scope": "non_staff", "namespaces": ["menu"]},
+    "menu_api:menuitem-list": {"max_age": 60, "stale_while_revalidate": 300, "scope": "non_staff", "namespaces": ["menu"]},
+    "menu_api:menuitem-search": {"max_age": 30, "stale_while_revalidate": 120, "scope": "non_staff", "namespaces": ["menu"]},
+    "reservations:reservations-tables-availability": {"max_age": 5, "stale_while_revalidate": 10, "namespaces": ["tables"]},
+    "core_api:servicetype-availability": {"max_age": 5, "stale_while_revalidate": 10, "namespaces": ["tables"]},
+}
 CACHE_MONITORING_ENABLED = os.getenv("CACHE_MONITORING_ENABLED", str(DEBUG).lower()) == "true"
 CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "rms")
 CACHE_VERSION = int(os.getenv("CACHE_VERSION", "1"))
 
+# -----------------------------------------------------------------------------
+# Performance Budgets (core.perf, QueryBudgetMiddleware, bench_endpoints)
+# -----------------------------------------------------------------------------
+PERF_INSTRUMENTATION_ENABLED = os.getenv("PERF_INSTRUMENTATION_ENABLED", "1") == "1"
+# None -> follow DEBUG
+PERF_HEADERS = {"1": True, "0": False}.get(os.getenv("PERF_HEADERS", ""))
+PERF_LOG_SAMPLE_RATE = float(os.getenv("PERF_LOG_SAMPLE_RATE", "0") or 0)
+PERF_AGGREGATE_METRICS = os.getenv("PERF_AGGREGATE_METRICS", "0") == "1"
+PERF_REPEAT_THRESHOLD = int(os.getenv("PERF_REPEAT_THRESHOLD", "5"))
+
+PERF_DEFAULT_BUDGET = {"queries": 25, "duplicates": 3, "ms": 500}
+# Keyed by URL name; query counts are measured with a cold cache. Ceilings
+# are the worst request of a `bench_endpoints` run at its defaults plus
+# ~10%; the cart, checkout and webhook paths still have N+1s to bring down.
+PERF_BUDGETS = {
+    "menu_api:menudisplay-list": {"queries": 16, "duplicates": 0, "ms": 300},
+    "menu_api:menucategory-list": {"queries": 8, "duplicates": 0, "ms": 200},
+    "menu_api:menuitem-list": {"queries": 8, "duplicates": 0, "ms": 200},
+    "menu_api:menuitem-search": {"queries": 10, "duplicates": 0, "ms": 250},
+    "orders_api:cart-list": {"queries": 14, "duplicates": 1, "ms": 250},
+    "orders_api:cart-add-item": {"queries": 92, "duplicates": 36, "ms": 300},
+    "orders_api:cart-update-item": {"queries": 86, "duplicates": 29, "ms": 300},
+    "orders_api:order-list": {"queries": 14, "duplicates": 1, "ms": 300},
+    "orders_api:order-create": {"queries": 190, "duplicates": 82, "ms": 800},
+    "orders_api:orderitem-preparation-queue": {"queries": 12, "duplicates": 1, "ms": 300},
+    "reservations:reservations-tables-availability": {"queries": 10, "duplicates": 1, "ms": 300},
+    "reservations_portal:availability": {"queries": 10, "duplicates": 1, "ms": 300},
+    "core_api:servicetype-availability": {"queries": 10, "duplicates": 1, "ms": 300},
+    "reports:order-analytics-overview": {"queries": 20, "duplicates": 2, "ms": 800},
+    "orders_api:ubereats_webhook": {"queries": 30, "duplicates": 3, "ms": 500},
+    "payments_api:stripe_webhook": {"queries": 52, "duplicates": 19, "ms": 500},
+}
+
 # -----------------------------------------------------------------------------
 # Logging Configuration
 # -----------------------------------------------------------------------------
@@ -809,6 +944,11 @@ LOGGING = {
             "level": "DEBUG" if DEBUG else "INFO",
             "propagate": False,
         },
+        "core.perf": {
+            "handlers": ["console", "file"],
+            "level": "INFO",
+            "propagate": False,
+        },
         "core.middleware.cache_middleware": {
             "handlers": ["console", "file"],
             "level": "INFO",
@@ -827,6 +967,98 @@ LOGOUT_REDIRECT_URL = "/"
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Inventory depletion (inventory.depletion): seconds between repeated
+# low-stock alerts for the same item
+INVENTORY_LOW_STOCK_ALERT_TTL = int(os.getenv("INVENTORY_LOW_STOCK_ALERT_TTL", "3600"))
+
+# Cart-time stock reservations (orders.stock). Backend "auto" uses Redis
+# counters when available and the database otherwise; "db" forces the latter.
+STOCK_RESERVATION_BACKEND = os.getenv("STOCK_RESERVATION_BACKEND", "auto")
+STOCK_HOLD_SECONDS = int(os.getenv("STOCK_HOLD_SECONDS", "1500"))
+STOCK_CHECKOUT_HOLD_SECONDS = int(os.getenv("STOCK_CHECKOUT_HOLD_SECONDS", "1800"))
+STOCK_CAPACITY_TTL = int(os.getenv("STOCK_CAPACITY_TTL", "60"))
+
+# Buffered popularity/usage counters (menu.counters). Backend "auto" buffers
+# in Redis when available, "local" always buffers in process memory.
+COUNTER_BACKEND = os.getenv("COUNTER_BACKEND", "auto")
+COUNTER_FLUSH_SECONDS = int(os.getenv("COUNTER_FLUSH_SECONDS", "5"))
+
+# User activity tracking (accounts.activity). Last-seen times are recorded at
+# most once per ACTIVITY_RESOLUTION_SECONDS per user and process, written to
+# User.last_activity every ACTIVITY_FLUSH_SECONDS; "online" means active in
+# the last ACTIVITY_ONLINE_SECONDS. Backend "local" skips Redis.
+ACTIVITY_BACKEND = os.getenv("ACTIVITY_BACKEND", "auto")
+ACTIVITY_RESOLUTION_SECONDS = int(os.getenv("ACTIVITY_RESOLUTION_SECONDS", "60"))
+ACTIVITY_FLUSH_SECONDS = int(os.getenv("ACTIVITY_FLUSH_SECONDS", "60"))
+ACTIVITY_ONLINE_SECONDS = int(os.getenv("ACTIVITY_ONLINE_SECONDS", "300"))
+
+# Responsive menu images (menu.images): derivative widths rendered as WebP
+# and JPEG under MEDIA_ROOT/MENU_IMAGE_DERIVATIVE_DIR. File names are content
+# hashes, so that directory can be served with a one-year immutable cache.
+MENU_IMAGE_WIDTHS = tuple(
+    int(w) for w in os.getenv("MENU_IMAGE_WIDTHS", "160,320,640,960,1280").split(",") if w.strip()
+)
+MENU_IMAGE_QUALITY = int(os.getenv("MENU_IMAGE_QUALITY", "80"))
+MENU_IMAGE_DERIVATIVE_DIR = os.getenv("MENU_IMAGE_DERIVATIVE_DIR", "derivatives")
+MENU_IMAGE_SIZES = os.getenv("MENU_IMAGE_SIZES", "(max-width: 600px) 100vw, 33vw")
+
+# Checkout pipeline (orders.checkout): the order commit is logged as a
+# warning when its transaction takes longer than this
+CHECKOUT_TRANSACTION_WARN_MS = float(os.getenv("CHECKOUT_TRANSACTION_WARN_MS", "10"))
+
+# Data retention (core.retention). Expired rows are deleted in raw batches;
+# "archive" policies append them to gzip NDJSON files under
+# DATA_RETENTION_ARCHIVE_DIR first. "partition": "month" policies can be
+# converted to monthly partitioned tables on PostgreSQL when
+# DATA_RETENTION_PARTITIONING is on (manage.py apply_retention --partition).
+DATA_RETENTION_ARCHIVE_DIR = os.getenv("DATA_RETENTION_ARCHIVE_DIR", str(BASE_DIR / "archive"))
+DATA_RETENTION_BATCH_SIZE = int(os.getenv("DATA_RETENTION_BATCH_SIZE", "2000"))
+DATA_RETENTION_PARTITIONING = os.getenv("DATA_RETENTION_PARTITIONING", "0") == "1"
+DATA_RETENTION_PARTITIONS_AHEAD = int(os.getenv("DATA_RETENTION_PARTITIONS_AHEAD", "3"))
+DATA_RETENTION_POLICIES = {
+    "audit_log": {
+        "model": "reports.AuditLog",
+        "field": "created_at",
+        "days": int(os.getenv("AUDIT_LOG_RETENTION_DAYS", "365")),
+        "action": "archive",
+        "partition": "month",
+    },
+    "sync_log": {
+        "model": "integrations.SyncLog",
+        "field": "created_at",
+        "days": int(os.getenv("SYNC_LOG_RETENTION_DAYS", "30")),
+        "action": "archive",
+        "partition": "month",
+    },
+    "stripe_webhook_events": {
+        "model": "payments.StripeWebhookEvent",
+        "field": "created_at",
+        "days": int(os.getenv("WEBHOOK_EVENT_RETENTION_DAYS", "90")),
+        "action": "archive",
+        "filters": {"processed": True},
+    },
+    "order_status_history": {
+        "model": "orders.OrderStatusHistory",
+        "field": "created_at",
+        "days": int(os.getenv("ORDER_STATUS_HISTORY_RETENTION_DAYS", "730")),
+        "action": "archive",
+    },
+    "sent_emails": {
+        "model": "core.OutboundEmail",
+        "field": "created_at",
+        "days": int(os.getenv("SENT_EMAIL_RETENTION_DAYS", "30")),
+        "action": "delete",
+        "filters": {"status": "sent"},
+    },
+    "stale_carts": {
+        "model": "orders.Cart",
+        "field": "updated_at",
+        "days": int(os.getenv("STALE_CART_RETENTION_DAYS", "7")),
+        "action": "delete",
+        "filters": {"status__in": ["expired", "abandoned"]},
+    },
+}
+
 # Email configuration
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = os.getenv("EMAIL_HOST", "")
@@ -837,6 +1069,20 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "noreply@example.com")
 SERVER_EMAIL = os.getenv("SERVER_EMAIL", DEFAULT_FROM_EMAIL)
 
+# Transactional email outbox (core.outbox). EMAIL_OUTBOX_BACKEND overrides
+# EMAIL_BACKEND for the drainer; for local runs use the file backend
+# (django.core.mail.backends.filebased.EmailBackend, EMAIL_FILE_PATH) or an
+# SMTP sink on EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=0.
+EMAIL_OUTBOX_BACKEND = os.getenv("EMAIL_OUTBOX_BACKEND", "")
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", str(BASE_DIR / "logs" / "emails"))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "100"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_RETRY_BASE_SECONDS", "60"))
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+# Messages per minute per recipient domain (0 = unlimited)
+EMAIL_OUTBOX_DEFAULT_DOMAIN_RATE = int(os.getenv("EMAIL_OUTBOX_DEFAULT_DOMAIN_RATE", "0"))
+EMAIL_OUTBOX_DOMAIN_RATES = {}
+
 # Admin configuration
 ADMINS = [("Admin", os.getenv("ADMIN_EMAIL", "admin@example.com"))]
 MANAGERS = ADMINS
@@ -166,6 +166,7 @@ REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {
     "login": "100/min",
     "register": "50/min",
     "password_reset": "20/min",
+    "delivery_quotes": "300/min",
 }
 
 # -----------------------------------------------------------------------------
@@ -179,7 +180,7 @@ SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"] = timedelta(days=30)
 # Session Configuration (Development)
 # -----------------------------------------------------------------------------
 # Use the same session engine as base settings for consistency
-# SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"  # Inherited from base
+# SESSION_ENGINE = "core.session_store"  # Inherited from base (DB mode while cache is disabled)
 
 # -----------------------------------------------------------------------------
 # File Upload Settings (Development)
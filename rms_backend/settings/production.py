@@ -50,8 +50,8 @@ CSP_FRAME_SRC = ("https://js.stripe.com", "https://hooks.stripe.com")
 if not os.getenv("DATABASE_URL") and not os.getenv("PG_NAME"):
     raise ValueError("Database configuration is required in production")
 
-# Enable connection pooling
-DATABASES["default"]["CONN_MAX_AGE"] = 600  # 10 minutes
+# Enable connection pooling (DB_CONN_MAX_AGE=0 under ASGI workers, see DEPLOYMENT.md)
+DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "600"))  # 10 minutes
 DATABASES["default"]["OPTIONS"] = {
     "sslmode": "require",
     "options": "-c default_transaction_isolation=read_committed"
@@ -64,15 +64,13 @@ DATABASES["default"]["OPTIONS"] = {
 if not os.getenv("REDIS_URL"):
     raise ValueError("REDIS_URL must be set in production")
 
-# Add cache middleware only if cache is enabled
-if not CACHE_DISABLED:
-    MIDDLEWARE.insert(1, "django.middleware.cache.UpdateCacheMiddleware")
-    MIDDLEWARE.append("django.middleware.cache.FetchFromCacheMiddleware")
+# Responses are cached per endpoint by core.middleware.cache_middleware.ResponseCacheMiddleware
+# (HTTP_CACHE_POLICIES); the per-site cache middleware pickled every public response
 
 # -----------------------------------------------------------------------------
 # Session Configuration (Production)
 # -----------------------------------------------------------------------------
-SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_ENGINE = "core.session_store"
 SESSION_CACHE_ALIAS = "default"
 
 # -----------------------------------------------------------------------------
@@ -196,6 +194,7 @@ REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {
     "user": os.getenv("DRF_USER_THROTTLE_RATE", "1000/hour"),
     "login": "5/min",
     "register": "3/min",
+    "delivery_quotes": os.getenv("DRF_DELIVERY_QUOTE_THROTTLE_RATE", "30/min"),
 }
 
 # Remove browsable API in production
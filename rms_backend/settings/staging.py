@@ -85,6 +85,7 @@ REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {
     "user": "5000/hour",
     "login": "20/min",
     "register": "10/min",
+    "delivery_quotes": "120/min",
 }
 
 # -----------------------------------------------------------------------------
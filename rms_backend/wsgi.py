@@ -3,3 +3,6 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rms_backend.settings')
 application = get_wsgi_application()
+
+from core.warmup import on_startup  # noqa: E402
+on_startup()
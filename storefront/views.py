@@ -15,21 +15,33 @@ from django.views.decorators.http import require_GET, require_POST
 from django.views.decorators.csrf import csrf_exempt
 
 from menu.models import MenuItem, MenuCategory, Modifier, ModifierGroup
-from core.models import Table, Organization, Location
+from core.models import Table
 from orders.models import Cart, CartItem, Order
 from orders.utils.cart import get_or_create_cart
 from orders.utils.cart import merge_carts
 from coupons.services import find_active_coupon, compute_discount_for_order
 from payments.services import create_checkout_session
 from core.seed import seed_default_tables
+from core import tables as table_registry
 from engagement.models import ReservationHold
 
 def _to_cents(amount):
     d = Decimal(str(amount or 0)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
     return int((d * 100).to_integral_value(rounding=ROUND_HALF_UP))
 
+CART_TTL_MINUTES = 25
+
+
 def _touch_expiration(cart: Cart) -> None:
-    cart.set_expiration(minutes=25)
+    """Slide the cart expiry, coalesced like orders.utils.cart._touch_cart:
+    skip the write while expires_at is within CART_TOUCH_INTERVAL_SECONDS of
+    a fresh CART_TTL_MINUTES window, so browsing does not rewrite the row."""
+    interval = getattr(settings, "CART_TOUCH_INTERVAL_SECONDS", 60)
+    if cart.expires_at:
+        remaining = cart.expires_at - timezone.now()
+        if remaining > timedelta(minutes=CART_TTL_MINUTES, seconds=-interval):
+            return
+    cart.set_expiration(minutes=CART_TTL_MINUTES)
     cart.save(update_fields=["expires_at", "updated_at", "last_activity"])
 
 def _cart_or_404(request: HttpRequest) -> Cart:
@@ -49,28 +61,13 @@ def _is_htmx(request: HttpRequest) -> bool:
 def _ensure_min_tables(min_tables: int = 6) -> None:
     """If there are no tables in RMS admin, seed a sensible default set.
     This is a development convenience to avoid empty dine-in flows.
-    Idempotent: only seeds when Table count is zero.
+    The check reads the cached table registry, so it costs no query once
+    tables exist.
     """
     try:
-        if Table.objects.exists():
+        if table_registry.has_tables():
             return
-        # Create a default organization and location
-        org, _ = Organization.objects.get_or_create(name="Default Organization")
-        loc, _ = Location.objects.get_or_create(organization=org, name="Main")
-        # Seed tables: A1..A6 (or min_tables)
-        import string
-        letters = ["A", "B"]
-        created = 0
-        for letter in letters:
-            for num in range(1, min_tables + 1):
-                if created >= min_tables:
-                    break
-                Table.objects.get_or_create(
-                    location=loc,
-                    table_number=f"{letter}{num}",
-                    defaults={"capacity": 4, "is_active": True, "table_type": "dining"},
-                )
-                created += 1
+        seed_default_tables(min_tables=min_tables)
     except Exception:
         # If seeding fails, silently ignore; UI will just show no tables
         pass
@@ -109,7 +106,7 @@ def cart_full(request: HttpRequest) -> HttpResponse:
     now = timezone.now()
     in_two = now + timedelta(hours=2)
     # Show all active tables; mark reserved separately so UI can disable/select accordingly
-    tables = Table.objects.filter(is_active=True).order_by("location_id", "table_number")
+    tables = table_registry.tables()
     sel_ids = []
     if cart.table_id:
         sel_ids.append(cart.table_id)
@@ -252,7 +249,7 @@ def cart_option(request: HttpRequest) -> HttpResponse:
             now = timezone.now()
             in_two = now + timedelta(hours=2)
             _ensure_min_tables()
-            tables = Table.objects.filter(is_active=True).order_by("location_id", "table_number")
+            tables = table_registry.tables()
             sel_ids = []
             if cart.table_id:
                 sel_ids.append(cart.table_id)
@@ -536,7 +533,7 @@ def cart_table_modal(request: HttpRequest) -> HttpResponse:
     now = timezone.now()
     in_two = now + timedelta(hours=2)
     _ensure_min_tables()
-    tables = Table.objects.filter(is_active=True).order_by("location_id", "table_number")
+    tables = table_registry.tables()
     sel_ids: list[int] = []
     if cart.table_id:
         sel_ids.append(cart.table_id)
@@ -614,7 +611,7 @@ def cart_coupon(request: HttpRequest) -> HttpResponse:
         # Also refresh order options panel so the coupon section reflects applied code
         # Recompute selected table ids similarly to cart_full/cart_option
         _ensure_min_tables()
-        tables = Table.objects.filter(is_active=True).order_by("location_id", "table_number")
+        tables = table_registry.tables()
         sel_ids = []
         if cart.table_id:
             sel_ids.append(cart.table_id)